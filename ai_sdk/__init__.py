@@ -34,7 +34,32 @@ AI SDK - 兼容OpenAI SDK的AI API客户端
 __version__ = "0.2.0"
 
 from .client import AIClient
-from .async_client import AsyncAIClient, LLMResponse
+from .async_client import AsyncAIClient, LLMResponse, MapResult
+from ._poller import TaskHandle
+from ._registry import close_shared_clients, get_async_client, get_client
+from .cache import BaseCache, CacheStats, MemoryCache, SQLiteCache
+from ._singleflight import CoalescingStats
+from ._limiter import AIMDLimiter, AsyncAIMDLimiter
+from ._token_pool import TokenPool, TokenStatus
+from ._shared_limiter import SharedLimiterState, SharedRateLimiter
+from ._queue import PriorityWaitStats, QueueStats, SubmissionQueue
+from ._tenants import TenantScheduler, TenantStats
+from ._journal import RecoveredTask, TaskJournal
+from .resources.batches import BatchSummary
+from .resources.chat import CompletionResult
+from ._spool import AnswerBuffer, SpooledCompletion
+from ._codec import JSONCodec
+from .transports import (
+    AsyncBaseTransport,
+    AsyncHTTP2Transport,
+    AsyncioTransport,
+    BaseTransport,
+    HTTP2Transport,
+    InProcessTransport,
+    PoolStats,
+    RequestsTransport,
+    Urllib3Transport,
+)
 from .exceptions import (
     AIAPIError,
     AuthenticationError,
@@ -42,6 +67,7 @@ from .exceptions import (
     APIConnectionError,
     RateLimitError,
     TimeoutError,
+    TenantQueueFullError,
 )
 from .types import (
     ChatMessage,
@@ -49,6 +75,7 @@ from .types import (
     ChatCompletionRequest,
     Choice,
     Usage,
+    TaskState,
 )
 from .helpers import (
     extract_markdown,
@@ -65,6 +92,46 @@ __all__ = [
     "AIClient",
     "AsyncAIClient",
     "LLMResponse",
+    "MapResult",
+    "CompletionResult",
+    "SpooledCompletion",
+    "AnswerBuffer",
+    "TaskHandle",
+    "get_client",
+    "get_async_client",
+    "close_shared_clients",
+    # 缓存
+    "BaseCache",
+    "MemoryCache",
+    "SQLiteCache",
+    "CacheStats",
+    "CoalescingStats",
+    # 并发控制
+    "AIMDLimiter",
+    "AsyncAIMDLimiter",
+    "TokenPool",
+    "TokenStatus",
+    "SharedRateLimiter",
+    "SharedLimiterState",
+    "SubmissionQueue",
+    "QueueStats",
+    "PriorityWaitStats",
+    "TenantScheduler",
+    "TenantStats",
+    "BatchSummary",
+    "TaskJournal",
+    "RecoveredTask",
+    # 传输层
+    "BaseTransport",
+    "AsyncBaseTransport",
+    "RequestsTransport",
+    "Urllib3Transport",
+    "AsyncioTransport",
+    "InProcessTransport",
+    "HTTP2Transport",
+    "AsyncHTTP2Transport",
+    "PoolStats",
+    "JSONCodec",
     # 异常
     "AIAPIError",
     "AuthenticationError",
@@ -72,12 +139,14 @@ __all__ = [
     "APIConnectionError",
     "RateLimitError",
     "TimeoutError",
+    "TenantQueueFullError",
     # 类型
     "ChatMessage",
     "ChatCompletion",
     "ChatCompletionRequest",
     "Choice",
     "Usage",
+    "TaskState",
     # 辅助函数
     "extract_markdown",
     "extract_json",
@@ -0,0 +1,340 @@
+"""
+基于 asyncio 的轻量 HTTP/1.1 连接池
+
+供 AsyncAIClient 使用：所有请求都在事件循环内完成，不占用额外线程。
+连接按 (scheme, host, port) 复用（keep-alive），并限制总连接数。
+"""
+import asyncio
+import logging
+import ssl
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .transports.base import STREAM_CHUNK_SIZE, PoolStats, Response, Sink
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[str, str, int]
+
+
+# 响应体已完整读取的异步HTTP响应
+AsyncHTTPResponse = Response
+
+
+class _StaleConnectionError(ConnectionResetError):
+    """读取状态行时连接已关闭，服务端没有返回任何数据"""
+
+
+def _chunk_size(size_line: bytes) -> int:
+    """解析 chunked 编码的长度行，格式错误时按连接错误处理（与响应体不完整相同）"""
+    try:
+        return int(size_line.split(b";", 1)[0].strip(), 16)
+    except ValueError:
+        raise ConnectionError(f"无效的chunk长度: {size_line!r}") from None
+
+
+class _Connection:
+    """单个 keep-alive 连接"""
+
+    __slots__ = ("reader", "writer", "idle_since")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class AsyncConnectionPool:
+    """
+    asyncio HTTP/1.1 连接池
+
+    Args:
+        max_connections: 最大并发连接数
+        keepalive_expiry: 空闲连接保留时间（秒）
+    """
+
+    def __init__(self, max_connections: int = 100, keepalive_expiry: float = 30.0):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._idle: Dict[_Key, Deque[_Connection]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._closed = False
+        self.stats = PoolStats(max_connections, keepalive_expiry)
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        sink: Optional[Sink] = None,
+    ) -> AsyncHTTPResponse:
+        """
+        发送已编码的请求体并读取完整响应
+
+        传入 sink 时，状态码为200的响应体分块交给 sink，返回的响应 content 为空
+
+        Raises:
+            asyncio.TimeoutError: 请求超时
+            OSError: 网络连接错误
+        """
+        self._bind()
+
+        parts = urlsplit(url)
+        key = self._key(parts)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        body = content or b""
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {parts.netloc}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive")
+        payload = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+        semaphore = self._semaphore
+        stats = self.stats
+        stats.requests += 1
+        if semaphore.locked():
+            # 连接数已达上限，等待其他请求释放连接
+            started = time.monotonic()
+            await semaphore.acquire()
+            waited = time.monotonic() - started
+            stats.waits += 1
+            stats.wait_time += waited
+            stats.max_wait = max(stats.max_wait, waited)
+        else:
+            await semaphore.acquire()
+        stats.in_use += 1
+        try:
+            return await asyncio.wait_for(self._send(key, payload, sink), timeout)
+        finally:
+            stats.in_use -= 1
+            semaphore.release()
+
+    async def warmup(self, url: str, connections: int, timeout: Optional[float] = None) -> int:
+        """
+        预先建立到 url 所在主机的连接并放入空闲连接池，已有的空闲连接计入 connections
+
+        Returns:
+            新建立的连接数（建立失败的连接只记录警告）
+        """
+        self._bind()
+        key = self._key(urlsplit(url))
+        idle = self._idle.setdefault(key, deque())
+        missing = min(connections, self.max_connections) - len(idle)
+        if missing <= 0:
+            return 0
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._connect(key), timeout) for _ in range(missing)),
+            return_exceptions=True,
+        )
+        opened = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"Warmup connection to {key[1]}:{key[2]} failed: {result!r}")
+            else:
+                idle.append(result)
+                opened += 1
+        return opened
+
+    def _bind(self) -> None:
+        if self._closed:
+            raise RuntimeError("连接池已关闭")
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 连接与信号量都绑定在事件循环上，换循环（如多次 asyncio.run）时重建
+            self._drop_idle()
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+            self._loop = loop
+
+    @staticmethod
+    def _key(parts) -> _Key:
+        scheme = parts.scheme or "http"
+        return (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+
+    async def _send(
+        self, key: _Key, payload: bytes, sink: Optional[Sink] = None
+    ) -> AsyncHTTPResponse:
+        conn = self._take_idle(key)
+        if conn is not None:
+            try:
+                return await self._exchange(key, conn, payload, sink)
+            except _StaleConnectionError:
+                # 复用的连接已被服务端关闭且没有返回任何数据，换新连接重试一次。
+                # 收到部分响应后出错不重试：POST /chatCompletion 重发会重复提交任务
+                logger.debug(f"Stale keep-alive connection to {key[1]}:{key[2]}, reconnecting")
+        conn = await self._connect(key)
+        return await self._exchange(key, conn, payload, sink)
+
+    async def _exchange(
+        self, key: _Key, conn: _Connection, payload: bytes, sink: Optional[Sink] = None
+    ) -> AsyncHTTPResponse:
+        try:
+            conn.writer.write(payload)
+            await conn.writer.drain()
+            response, reusable = await self._read_response(conn.reader, sink)
+        except BaseException:
+            conn.close()
+            raise
+
+        if reusable and not self._closed:
+            conn.idle_since = time.monotonic()
+            self._idle.setdefault(key, deque()).append(conn)
+        else:
+            conn.close()
+        return response
+
+    async def _connect(self, key: _Key) -> _Connection:
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl_context)
+        self.stats.connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _take_idle(self, key: _Key) -> Optional[_Connection]:
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            conn = idle.pop()
+            if conn.reader.at_eof():
+                conn.close()
+            elif now - conn.idle_since >= self.keepalive_expiry:
+                self.stats.evictions += 1
+                conn.close()
+            else:
+                return conn
+        return None
+
+    @staticmethod
+    async def _read_response(
+        reader: asyncio.StreamReader, sink: Optional[Sink] = None
+    ) -> Tuple[AsyncHTTPResponse, bool]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise _StaleConnectionError("服务端关闭了连接")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2:
+            raise ConnectionError(f"无效的HTTP状态行: {status_line!r}")
+        version, status_code = parts[0], int(parts[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        reusable = connection != "close" and (
+            version != "HTTP/1.0" or connection == "keep-alive"
+        )
+
+        if sink is not None and status_code == 200:
+            reusable = await AsyncConnectionPool._stream_body(reader, headers, sink) and reusable
+            return AsyncHTTPResponse(status_code, headers, b""), reusable
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size_line = await reader.readline()
+                size = _chunk_size(size_line)
+                if size == 0:
+                    # 跳过 trailer
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b"".join(chunks)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        elif status_code in (204, 304) or 100 <= status_code < 200:
+            content = b""
+        else:
+            content = await reader.read()
+            reusable = False
+
+        return AsyncHTTPResponse(status_code, headers, content), reusable
+
+    @staticmethod
+    async def _stream_body(
+        reader: asyncio.StreamReader, headers: Dict[str, str], sink: Sink
+    ) -> bool:
+        """
+        按不超过 STREAM_CHUNK_SIZE 的块读取响应体并交给 sink
+
+        Returns:
+            连接是否可以复用（响应体以连接关闭结束时不可复用）
+        """
+
+        async def read_exactly(size: int) -> None:
+            while size > 0:
+                chunk = await reader.readexactly(min(size, STREAM_CHUNK_SIZE))
+                size -= len(chunk)
+                sink(chunk)
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                size = _chunk_size(size_line)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return True
+                await read_exactly(size)
+                await reader.readexactly(2)
+        if "content-length" in headers:
+            await read_exactly(int(headers["content-length"]))
+            return True
+        while True:
+            chunk = await reader.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return False
+            sink(chunk)
+
+    def _after_fork(self) -> None:
+        """fork 后在子进程中调用：丢弃继承的连接（不关闭，它们属于父进程的事件循环）"""
+        self._idle = {}
+        self._semaphore = None
+        self._loop = None
+        self.stats = PoolStats(self.max_connections, self.keepalive_expiry)
+
+    def _drop_idle(self) -> None:
+        for idle in self._idle.values():
+            while idle:
+                idle.pop().close()
+        self._idle.clear()
+
+    def close(self) -> None:
+        """关闭所有空闲连接（同步）"""
+        self._closed = True
+        self._drop_idle()
+
+    async def aclose(self) -> None:
+        """关闭所有空闲连接并等待关闭完成"""
+        writers = [conn.writer for idle in self._idle.values() for conn in idle]
+        self.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
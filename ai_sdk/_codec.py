@@ -0,0 +1,147 @@
+"""
+JSON 编解码
+
+请求体与响应体都经过这里编解码。标准库 json.dumps 默认 ensure_ascii=True，每个中文字符被转义成
+6 字节的 \\uXXXX（UTF-8 只需 3 字节），并在分隔符后加空格；这里统一编码为紧凑的 UTF-8 字节串。
+响应体直接从字节串解码一次，不再先解码成文本。
+
+安装了 orjson 或 msgspec 时自动使用（优先 orjson），否则使用标准库 json。
+也可通过客户端的 json_codec 参数或环境变量 AI_JSON_CODEC 指定 "orjson" / "msgspec" / "json"，
+或传入自定义的 JSONCodec 实例。
+"""
+import json as _json
+import logging
+import os
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class JSONCodec:
+    """
+    JSON 编解码器基类
+
+    encode 返回 UTF-8 字节串；decode 解析失败时抛出 ValueError（客户端据此报告无法解析的响应）
+    """
+
+    name = "custom"
+
+    def encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class StdlibJSONCodec(JSONCodec):
+    """标准库 json：不转义非 ASCII 字符，使用紧凑分隔符"""
+
+    name = "json"
+
+    def __init__(self):
+        self._encoder = _json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def encode(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return _json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson：直接输出 UTF-8 字节串"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def encode(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+    def decode(self, data: bytes) -> Any:
+        # orjson.JSONDecodeError 是 ValueError 的子类
+        return self._loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """msgspec.json：直接输出 UTF-8 字节串"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decode_error = msgspec.DecodeError
+
+    def encode(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as e:
+            raise ValueError(str(e)) from e
+
+
+_CODECS = {
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+    StdlibJSONCodec.name: StdlibJSONCodec,
+}
+
+_default: Optional[JSONCodec] = None
+
+
+def get_codec(codec: Union[str, JSONCodec, None] = None) -> JSONCodec:
+    """
+    解析编解码器
+
+    Args:
+        codec: JSONCodec 实例、名称（"orjson" / "msgspec" / "json" / "auto"），
+            None 时读取环境变量 AI_JSON_CODEC，未设置时为 "auto"（已安装的最快实现）
+
+    Returns:
+        JSONCodec
+
+    Raises:
+        ValueError: 未知的名称
+        ImportError: 指定的库未安装
+    """
+    global _default
+    if isinstance(codec, JSONCodec):
+        return codec
+    name = codec or os.getenv("AI_JSON_CODEC") or "auto"
+    if name != "auto":
+        if name not in _CODECS:
+            raise ValueError(f"未知的 JSON 编解码器: {name}，可选: auto, {', '.join(_CODECS)}")
+        return _CODECS[name]()
+    if _default is None:
+        for codec_cls in _CODECS.values():
+            try:
+                _default = codec_cls()
+                break
+            except ImportError:
+                continue
+        logger.debug(f"Using JSON codec: {_default.name}")
+    return _default
+
+
+# /chatResult 的请求体只有任务ID一个字段，按固定模板拼接，不经过编码器
+_POLL_BODY_PREFIX = b'{"id":'
+_POLL_BODY_SUFFIX = b"}"
+
+
+def poll_body(task_id: int) -> bytes:
+    """/chatResult 的请求体 {"id": task_id}（紧凑 UTF-8）"""
+    if type(task_id) is int:
+        return b"%s%d%s" % (_POLL_BODY_PREFIX, task_id, _POLL_BODY_SUFFIX)
+    return StdlibJSONCodec().encode({"id": task_id})
@@ -0,0 +1,38 @@
+"""
+fork 安全
+
+预派生服务器（gunicorn --preload、celery 的 prefork 池）常在主进程中创建客户端，再 fork 出工作进程。
+子进程会继承:
+
+    - 连接池中的套接字：父子进程在同一个连接上收发，响应错乱，或连接被一方关闭后大量重连
+    - 轮询器的任务与状态：父进程的后台线程不会复制到子进程，继承的任务永远不会完成
+    - 锁：fork 时被其他线程持有的锁在子进程中永远不会释放
+
+客户端创建时登记到这里；fork 后在子进程中（os.register_at_fork 的 after_in_child 回调）
+调用每个客户端的 _after_fork()，丢弃继承的连接、轮询任务与在途计数，并重建锁。
+连接与轮询线程在子进程第一次使用时重新建立。旧连接只是丢弃而不关闭，不会影响父进程的连接。
+"""
+import logging
+import os
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_objects: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def register(obj) -> None:
+    """登记需要在 fork 后重置的对象（需实现 _after_fork 方法）"""
+    _objects.add(obj)
+
+
+def _after_fork_in_child() -> None:
+    for obj in list(_objects):
+        try:
+            obj._after_fork()
+        except Exception:
+            logger.exception(f"Failed to reset {obj!r} after fork")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
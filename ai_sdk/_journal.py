@@ -0,0 +1,277 @@
+"""
+任务日志（task journal）
+
+深度研究、图片生成等任务可能运行几十分钟，进程在轮询期间退出时任务ID随之丢失，
+只能重新提交（消耗配额并重新等待）。启用日志后，每个任务提交成功、开始轮询之前
+先追加一条 submit 记录，任务在服务端结束（成功或失败）后追加一条 done 记录。
+客户端启动时读取日志，对没有 done 记录的任务通过 /chatResult 继续轮询。
+
+写入由后台线程分组完成：调用方只把记录放进缓冲区，后台线程把积累的记录一次写入并 fsync，
+不增加提交路径的延迟；进程崩溃时最多丢失最近一组尚未落盘的记录。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from ._poller import TaskHandle
+
+logger = logging.getLogger(__name__)
+
+SUBMIT = "submit"
+DONE = "done"
+
+
+def token_id(token: Optional[str]) -> Optional[str]:
+    """日志中只记录 Token 的摘要，恢复时与客户端的 Token 比对"""
+    if not token:
+        return None
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class JournalEntry:
+    """日志中一个尚未结束的任务"""
+
+    task_id: int
+    key: Optional[str]  # 请求哈希，见 cache.request_hash
+    model: str
+    deep_research: bool
+    generate_image: bool
+    submitted_at: float  # 提交时间（Unix时间戳）
+    token: Optional[str] = None  # 提交所用 Token 的摘要
+
+
+@dataclass
+class RecoveredTask:
+    """启动时从日志恢复、重新开始轮询的任务"""
+
+    task_id: int
+    key: Optional[str]
+    model: str
+    deep_research: bool
+    generate_image: bool
+    submitted_at: float
+    handle: "TaskHandle"
+
+
+class TaskJournal:
+    """
+    追加写入的任务日志
+
+    用法示例:
+        ```python
+        journal = TaskJournal("/var/lib/myapp/tasks.journal")
+        client = AIClient(journal=journal)
+
+        # 上次进程退出时仍在轮询的任务，已自动重新开始轮询
+        for task in client.tasks.recover():
+            print(task.task_id, task.key, task.handle.result().choices[0].message.content)
+        ```
+
+    一个日志文件只能由一个进程使用：fork 出的子进程中日志自动停用（见 _after_fork），
+    预派生服务器的工作进程应各自使用不同路径的日志。
+
+    Args:
+        path: 日志文件路径
+        fsync: 每组写入后是否 fsync，默认True
+        compact_every: 每写入多少条记录后压缩一次日志（只保留未结束的任务），默认10000
+    """
+
+    def __init__(self, path: str, fsync: bool = True, compact_every: int = 10000):
+        self.path = path
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self._cond = threading.Condition()
+        self._buffer: List[str] = []
+        self._queued = 0  # 已放入缓冲区的记录数
+        self._written = 0  # 已写入文件的记录数
+        self._since_compact = 0
+        self._closed = False
+        self._detached = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._unfinished: Dict[int, JournalEntry] = self._load()
+        self._compact()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="ai-sdk-journal-writer", daemon=True
+        )
+        self._thread.start()
+        if self._unfinished:
+            logger.info(f"Task journal {path} has {len(self._unfinished)} unfinished tasks")
+
+    # ---------------------------------------------------------------- 读取与压缩
+
+    def _load(self) -> Dict[int, JournalEntry]:
+        """读取日志，返回没有 done 记录的任务；忽略崩溃时写了一半的最后一行"""
+        unfinished: Dict[int, JournalEntry] = {}
+        if not os.path.exists(self.path):
+            return unfinished
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    task_id = int(record["id"])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable task journal record: {line[:80]!r}")
+                    continue
+                if record.get("op") == DONE:
+                    unfinished.pop(task_id, None)
+                elif record.get("op") == SUBMIT:
+                    unfinished[task_id] = JournalEntry(
+                        task_id=task_id,
+                        key=record.get("key"),
+                        model=record.get("model", "yuanbao"),
+                        deep_research=bool(record.get("dr")),
+                        generate_image=bool(record.get("img")),
+                        submitted_at=float(record.get("ts", 0.0)),
+                        token=record.get("token"),
+                    )
+        return unfinished
+
+    @staticmethod
+    def _encode_submit(entry: JournalEntry) -> str:
+        record = {
+            "op": SUBMIT,
+            "id": entry.task_id,
+            "key": entry.key,
+            "model": entry.model,
+            "dr": int(entry.deep_research),
+            "img": int(entry.generate_image),
+            "ts": entry.submitted_at,
+            "token": entry.token,
+        }
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def _compact(self) -> None:
+        """用只含未结束任务的新文件原子替换日志"""
+        with self._cond:
+            entries = list(self._unfinished.values())
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(self._encode_submit(entry) for entry in entries))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._since_compact = 0
+
+    # ---------------------------------------------------------------- 写入
+
+    def _append(self, line: str) -> None:
+        with self._cond:
+            if self._closed:
+                if not self._detached:
+                    logger.warning("Task journal is closed, record dropped")
+                return
+            self._buffer.append(line)
+            self._queued += 1
+            self._cond.notify_all()
+
+    def record_submit(
+        self,
+        task_id: int,
+        key: Optional[str],
+        model: str,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        token: Optional[str] = None,
+    ) -> None:
+        """记录一个已提交、即将开始轮询的任务（不等待落盘）"""
+        entry = JournalEntry(
+            task_id, key, model, deep_research, generate_image, time.time(), token_id(token)
+        )
+        with self._cond:
+            self._unfinished[task_id] = entry
+        self._append(self._encode_submit(entry))
+
+    def record_done(self, task_id: int) -> None:
+        """记录任务已在服务端结束（成功或失败），之后不再恢复"""
+        with self._cond:
+            self._unfinished.pop(task_id, None)
+        self._append(json.dumps({"op": DONE, "id": task_id}) + "\n")
+
+    def unfinished(self) -> List[JournalEntry]:
+        """尚未结束的任务，按提交时间排序"""
+        with self._cond:
+            return sorted(self._unfinished.values(), key=lambda e: e.submitted_at)
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                batch, self._buffer = self._buffer, []
+                target = self._queued
+            try:
+                # 等待期间积累的记录一次写入（分组提交）
+                self._file.write("".join(batch))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                self._since_compact += len(batch)
+                if self._since_compact >= self.compact_every:
+                    self._file.close()
+                    self._compact()
+                    self._file = open(self.path, "a", encoding="utf-8")
+            except OSError as e:
+                logger.error(f"Failed to write task journal {self.path}: {e}")
+            with self._cond:
+                self._written = target
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已记录的内容全部落盘
+
+        Returns:
+            是否在 timeout 秒内完成
+        """
+        with self._cond:
+            target = self._queued
+            return self._cond.wait_for(
+                lambda: self._written >= target or not self._thread.is_alive(), timeout
+            )
+
+    def _after_fork(self) -> None:
+        """
+        fork 后在子进程中调用（由所属客户端调用）：日志在子进程中停用，之后的记录直接丢弃
+
+        后台写线程不会复制到子进程，继续写入会与父进程交错追加同一个文件。
+        子进程中的文件描述符改指向 /dev/null，继承的缓冲区即使被刷新也不会重复写入父进程的日志。
+        """
+        if self._detached:
+            return
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._queued = self._written = 0
+        self._closed = True
+        self._detached = True
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, self._file.fileno())
+            os.close(devnull)
+        except (OSError, ValueError):
+            pass
+        logger.warning(
+            f"Task journal {self.path} detached in forked process {os.getpid()}; "
+            "create a separate journal in each worker to keep recording tasks"
+        )
+
+    def close(self) -> None:
+        """写完缓冲区中的记录并关闭日志"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
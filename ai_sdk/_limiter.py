@@ -0,0 +1,187 @@
+"""
+AIMD 自适应并发控制
+
+限制同时在途（已提交、尚未结束）的任务数：任务成功时加性增长上限，
+遇到限流（HTTP 429 或"账号达到使用限制"）时乘性减小上限。
+同一轮限流中多个任务相继失败只减小一次——只有在上一次减小之后才获得许可的任务，
+其限流失败才会再次触发减小。
+
+同步版本供 AIClient 跨线程使用，异步版本供 AsyncAIClient 在事件循环内使用。
+"""
+import asyncio
+import collections
+import logging
+import threading
+from typing import Deque, Optional
+
+from .exceptions import TimeoutError as AITimeoutError
+
+logger = logging.getLogger(__name__)
+
+# 任务结束的结果
+SUCCESS = "success"
+RATE_LIMITED = "rate_limited"
+DROPPED = "dropped"  # 其他错误或取消，不调整上限
+
+
+class _AIMD:
+    """上限计算（不含等待逻辑）"""
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("需要满足 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease 必须在 (0, 1) 之间")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._next_token = 0
+        # 在此之前获得许可的任务，限流失败不再重复减小上限
+        self._cut_token = 0
+        self.successes = 0
+        self.rate_limits = 0
+
+    @property
+    def limit(self) -> int:
+        """当前的并发上限"""
+        return int(self._limit)
+
+    def _after_fork(self) -> None:
+        """fork 后在子进程中调用：父进程的在途任务不会在子进程中结束，清零在途计数"""
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """当前在途的任务数"""
+        return self._in_flight
+
+    def _grant(self) -> int:
+        self._in_flight += 1
+        token = self._next_token
+        self._next_token += 1
+        return token
+
+    def _adjust(self, token: int, outcome: str) -> None:
+        self._in_flight -= 1
+        if outcome == SUCCESS:
+            self.successes += 1
+            # 每成功约 limit 个任务，上限加 increase
+            self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+        elif outcome == RATE_LIMITED:
+            self.rate_limits += 1
+            if token >= self._cut_token:
+                self._limit = max(self.min_limit, self._limit * self.decrease)
+                self._cut_token = self._next_token
+                logger.warning(f"Rate limited, concurrency limit reduced to {self.limit}")
+
+
+class AIMDLimiter(_AIMD):
+    """
+    线程安全的AIMD并发限制器
+
+    Args:
+        initial_limit: 初始并发上限，默认8
+        min_limit: 最小并发上限，默认1
+        max_limit: 最大并发上限，默认64
+        increase: 每轮（约 limit 个任务成功）增加的上限，默认1
+        decrease: 遇到限流时上限乘以的系数，默认0.5
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+        self._waiting = 0
+
+    def _after_fork(self) -> None:
+        super()._after_fork()
+        self._cond = threading.Condition()
+        self._waiting = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """等待许可的调用方数量"""
+        return self._waiting
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """
+        获取一个在途许可，达到上限时阻塞
+
+        Returns:
+            许可令牌，结束时传给 release()
+
+        Raises:
+            AITimeoutError: 在 timeout 秒内未获得许可
+        """
+        with self._cond:
+            self._waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self._in_flight < self.limit, timeout):
+                    raise AITimeoutError("等待并发许可超时")
+            finally:
+                self._waiting -= 1
+            return self._grant()
+
+    def release(self, token: int, outcome: str = DROPPED) -> None:
+        """归还许可，并按任务结果（SUCCESS / RATE_LIMITED / DROPPED）调整上限"""
+        with self._cond:
+            self._adjust(token, outcome)
+            self._cond.notify_all()
+
+
+class AsyncAIMDLimiter(_AIMD):
+    """asyncio版本的AIMD并发限制器，参数与 AIMDLimiter 相同"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters: Deque["asyncio.Future[int]"] = collections.deque()
+
+    def _after_fork(self) -> None:
+        super()._after_fork()
+        self._waiters = collections.deque()
+
+    @property
+    def queue_depth(self) -> int:
+        """等待许可的协程数量"""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> int:
+        """获取一个在途许可，达到上限时等待"""
+        if self._in_flight < self.limit and not self._waiters:
+            return self._grant()
+
+        waiter: "asyncio.Future[int]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 许可已分配但调用方被取消，立即归还
+                self.release(waiter.result())
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, token: int, outcome: str = DROPPED) -> None:
+        """归还许可，并按任务结果调整上限"""
+        self._adjust(token, outcome)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            waiter.set_result(self._grant())
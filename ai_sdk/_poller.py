@@ -0,0 +1,643 @@
+"""
+集中式任务轮询器
+
+AIClient 持有一个 Poller，所有等待中的任务 ID 都放在按下次轮询时间排序的最小堆里，
+由一个调度线程取出到期任务，交给少量工作线程查询 /chatResult，
+任务完成后唤醒等待方。同一个任务 ID 只会被轮询一次，多个等待方共享同一份任务状态。
+"""
+import heapq
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import (
+    CancelledError,
+    Future,
+    InvalidStateError,
+    TimeoutError as FuturesTimeoutError,
+)
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from ._spool import AnswerBuffer
+
+from .exceptions import (
+    AIAPIError,
+    APIConnectionError,
+    InvalidRequestError,
+    TimeoutError as AITimeoutError,
+)
+from ._codec import poll_body
+from ._schedule import LatencyStats, PollSchedule, ScheduleKey, schedule_key
+from ._utils import (
+    MAX_UNKNOWN_POLLS,
+    check_task_result,
+    parse_task_state,
+    unknown_state_error,
+)
+from .types.task import TaskState
+
+if TYPE_CHECKING:
+    from .client import AIClient
+
+logger = logging.getLogger(__name__)
+
+_PENDING, _FINISHED, _CANCELLED = 0, 1, 2
+
+# 回调注册与结果设置共用一把全局锁，避免每个任务各自分配锁
+_callbacks_lock = threading.Lock()
+
+
+def _reset_callbacks_lock() -> None:
+    # fork 时可能被其他线程持有
+    global _callbacks_lock
+    _callbacks_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_callbacks_lock)
+
+# 按轮询观察到的状态计数时使用的下标
+_STATES = tuple(TaskState)
+_STATE_INDEX = {state: i for i, state in enumerate(_STATES)}
+
+
+class _PollTask:
+    """
+    单个待轮询任务的紧凑状态
+
+    同时充当该任务的轻量 Future：等待方调用 result() 时才按需创建 Event（所有等待方共用一个），
+    未被等待的任务不分配任何同步原语。
+    """
+
+    __slots__ = (
+        "task_id", "model", "key", "token", "started", "due", "deadline", "polls",
+        "max_polls", "interval", "last_poll", "run_started", "state",
+        "unknown_streak", "state_polls", "spool", "_state", "_result", "_exception",
+        "_callbacks", "_event",
+    )
+
+    def __init__(
+        self,
+        task_id: int,
+        model: str,
+        key: ScheduleKey,
+        started: float,
+        due: float,
+        deadline: Optional[float],
+        max_polls: Optional[int],
+        interval: Optional[float],
+        token: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ):
+        self.task_id = task_id
+        self.model = model
+        self.key = key
+        # 提交该任务所用的API Token，轮询时使用同一个
+        self.token = token
+        self.started = started
+        self.due = due
+        self.deadline = deadline
+        self.polls = 0
+        self.max_polls = max_polls
+        self.interval = interval
+        self.last_poll = started
+        self.run_started: Optional[float] = None
+        self.state: Optional[TaskState] = None
+        self.unknown_streak = 0
+        # 每种状态被观察到的次数，首次轮询时才分配
+        self.state_polls: Optional[List[int]] = None
+        # 创建答案缓冲区的函数；设置时流式接收答案，结果为 SpooledCompletion
+        self.spool = spool
+        self._state = _PENDING
+        self._result = None
+        self._exception: Optional[BaseException] = None
+        self._callbacks: Optional[List[Callable[["_PollTask"], None]]] = None
+        self._event: Optional[threading.Event] = None
+
+    def observe(self, state: TaskState) -> None:
+        """记录一次轮询观察到的状态"""
+        if self.state_polls is None:
+            self.state_polls = [0] * len(_STATES)
+        self.state_polls[_STATE_INDEX[state]] += 1
+        self.unknown_streak = self.unknown_streak + 1 if state == TaskState.UNKNOWN else 0
+        if state != TaskState.UNKNOWN:
+            self.state = state
+
+    def poll_counts(self) -> Dict[TaskState, int]:
+        """各状态被观察到的次数（只包含出现过的状态）"""
+        counts = self.state_polls
+        if counts is None:
+            return {}
+        return {state: n for state, n in zip(_STATES, counts) if n}
+
+    def done(self) -> bool:
+        """任务是否已结束（完成、失败或取消）"""
+        return self._state != _PENDING
+
+    def cancelled(self) -> bool:
+        return self._state == _CANCELLED
+
+    def cancel(self) -> bool:
+        """取消等待，轮询器会在下次调度时丢弃该任务"""
+        return self._set(_CANCELLED, None, None)
+
+    def add_done_callback(self, fn: Callable[["_PollTask"], None]) -> None:
+        """任务结束时调用 fn(task)；已结束则立即调用"""
+        with _callbacks_lock:
+            if self._state == _PENDING:
+                if self._callbacks is None:
+                    self._callbacks = []
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _wait(self, timeout: Optional[float]) -> None:
+        """阻塞等待任务结束；超时抛出 TimeoutError，已取消抛出 CancelledError"""
+        if self._state == _PENDING:
+            with _callbacks_lock:
+                event = self._event
+                if event is None:
+                    event = self._event = threading.Event()
+                    if self._state != _PENDING:
+                        event.set()
+            if not event.wait(timeout):
+                raise FuturesTimeoutError()
+        if self._state == _CANCELLED:
+            raise CancelledError()
+
+    def result(self, timeout: Optional[float] = None):
+        """
+        阻塞等待任务结果
+
+        Raises:
+            concurrent.futures.TimeoutError: 等待超时
+            concurrent.futures.CancelledError: 任务已取消
+            其他异常: 任务执行失败
+        """
+        self._wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        """
+        阻塞等待任务结束并返回其异常（成功时为None），与 Future.exception() 相同；
+        任务已结束时立即返回，可在结束回调中使用
+
+        Raises:
+            concurrent.futures.TimeoutError: 等待超时
+            concurrent.futures.CancelledError: 任务已取消
+        """
+        self._wait(timeout)
+        return self._exception
+
+    def _set(self, state: int, result, exception) -> bool:
+        with _callbacks_lock:
+            if self._state != _PENDING:
+                return False
+            self._state = state
+            self._result = result
+            self._exception = exception
+            callbacks, self._callbacks = self._callbacks, None
+            event = self._event
+        for fn in callbacks or ():
+            try:
+                fn(self)
+            except Exception:
+                logger.exception(f"Exception in done callback of task {self.task_id}")
+        # 回调（归还许可、写日志等）完成后再唤醒等待方
+        if event is not None:
+            event.set()
+        return True
+
+
+class TaskHandle:
+    """
+    已提交任务的句柄
+
+    由 chat.completions.submit() 返回，提交后立即可用；任务结果由客户端的后台轮询器获取。
+
+    用法示例:
+        ```python
+        handle = client.chat.completions.submit(model="gemini", messages=messages)
+        print(handle.task_id, handle.status)
+
+        handle.add_done_callback(lambda h: print(h.result().choices[0].message.content))
+
+        # 阻塞等待结果
+        response = handle.result(timeout=120)
+
+        # 与 concurrent.futures / asyncio 互操作
+        concurrent.futures.wait([h.future for h in handles])
+        response = await asyncio.wrap_future(handle.future)
+        ```
+    """
+
+    __slots__ = ("_task", "_future")
+
+    def __init__(self, task: _PollTask):
+        self._task = task
+        self._future: Optional[Future] = None
+
+    @property
+    def task_id(self) -> int:
+        """任务ID"""
+        return self._task.task_id
+
+    @property
+    def model(self) -> str:
+        """模型名称"""
+        return self._task.model
+
+    @property
+    def status(self) -> TaskState:
+        """
+        任务状态
+
+        尚未轮询时为 PENDING；结束后为 SUCCEEDED / FAILED / CANCELLED，
+        否则为最近一次轮询观察到的状态。
+        """
+        task = self._task
+        if task.done():
+            # 结束后状态不再变化，先判断 done() 再取异常不会遇到并发取消
+            if task.cancelled():
+                return TaskState.CANCELLED
+            return TaskState.FAILED if task.exception() is not None else TaskState.SUCCEEDED
+        return task.state or TaskState.PENDING
+
+    @property
+    def polls(self) -> int:
+        """已经发出的 /chatResult 轮询次数"""
+        return self._task.polls
+
+    @property
+    def poll_counts(self) -> Dict[TaskState, int]:
+        """
+        每种状态被轮询观察到的次数
+
+        例如 {PENDING: 2, RUNNING: 3, SUCCEEDED: 1}；请求本身失败（网络错误等）的轮询不计入。
+        """
+        return self._task.poll_counts()
+
+    def done(self) -> bool:
+        """任务是否已结束"""
+        return self._task.done()
+
+    def cancelled(self) -> bool:
+        return self._task.cancelled()
+
+    def cancel(self) -> bool:
+        """停止在本地轮询该任务（不会取消服务端任务）"""
+        return self._task.cancel()
+
+    def result(self, timeout: Optional[float] = None):
+        """
+        等待并返回ChatCompletion
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+
+        Raises:
+            concurrent.futures.TimeoutError: 等待超时（任务仍在继续轮询）
+            concurrent.futures.CancelledError: 任务已取消
+            AIAPIError: 任务执行失败
+        """
+        return self._task.result(timeout)
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        """等待任务结束并返回其异常（成功时为None）"""
+        return self._task.exception(timeout)
+
+    def add_done_callback(self, fn: Callable[["TaskHandle"], None]) -> None:
+        """任务结束时调用 fn(handle)；已结束则立即调用"""
+        self._task.add_done_callback(lambda _: fn(self))
+
+    @property
+    def future(self) -> Future:
+        """与该任务绑定的 concurrent.futures.Future（按需创建）"""
+        if self._future is None:
+            future: Future = Future()
+            self._future = future
+            task = self._task
+            # 取消Future等同于取消本地轮询
+            future.add_done_callback(lambda f: task.cancel() if f.cancelled() else None)
+            task.add_done_callback(lambda _: _copy_to_future(task, future))
+        return self._future
+
+    def __repr__(self) -> str:
+        return f"<TaskHandle task_id={self.task_id} status={self.status.value}>"
+
+
+def _copy_to_future(task: _PollTask, future: Future) -> None:
+    try:
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task._result)
+    except InvalidStateError:
+        pass
+
+
+class Poller:
+    """
+    堆调度的后台轮询器
+
+    Args:
+        client: 所属的AIClient，用于发送 /chatResult 请求
+        max_workers: 并发轮询的工作线程数，默认4
+        schedule: 轮询调度策略，默认使用不持久化的自适应调度
+    """
+
+    def __init__(
+        self,
+        client: "AIClient",
+        max_workers: int = 4,
+        schedule: Optional[PollSchedule] = None,
+    ):
+        self._client = client
+        self.max_workers = max_workers
+        self.schedule = schedule or PollSchedule(LatencyStats())
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int]] = []
+        self._tasks: Dict[int, _PollTask] = {}
+        self._in_flight = 0
+        self._work: "queue.SimpleQueue[Optional[_PollTask]]" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self.total_polls = 0
+        self._state_polls = [0] * len(_STATES)
+
+    @property
+    def pending_count(self) -> int:
+        """尚未完成的任务数"""
+        return len(self._tasks)
+
+    def poll_stats(self) -> Dict[TaskState, int]:
+        """所有任务的轮询按观察到的状态汇总的次数"""
+        with self._cond:
+            return {state: n for state, n in zip(_STATES, self._state_polls) if n}
+
+    def watch(
+        self,
+        task_id: int,
+        model: str,
+        key: Optional[ScheduleKey] = None,
+        timeout: Optional[float] = 120.0,
+        interval: Optional[float] = None,
+        first_delay: Optional[float] = None,
+        max_polls: Optional[int] = None,
+        token: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> _PollTask:
+        """
+        登记一个需要轮询的任务
+
+        Args:
+            task_id: 任务ID
+            model: 模型名称（用于构造ChatCompletion）
+            key: 调度统计键，默认 (model, False, False)
+            timeout: 等待总时长上限（秒），超过后以TimeoutError结束；None表示不限
+            interval: 固定轮询间隔（秒）；默认由自适应调度决定
+            first_delay: 首次轮询前的等待时间（秒）；默认由自适应调度决定
+            max_polls: 最大轮询次数（可选）
+            token: 轮询使用的API Token（可选），应与提交任务时相同；默认使用客户端的Token
+            spool: 创建答案缓冲区的函数（可选）；设置时每次轮询把答案流式写入新的缓冲区，
+                result() 得到 SpooledCompletion
+
+        Returns:
+            任务状态对象（接口与Future相同，result()得到ChatCompletion）；
+            同一任务ID返回同一个对象
+        """
+        if key is None:
+            key = schedule_key(model, False, False)
+        if first_delay is None:
+            first_delay = 0.0 if interval is not None else self.schedule.first_delay(key)
+
+        with self._cond:
+            if self._closed:
+                raise AIAPIError("客户端已关闭，无法继续轮询任务")
+
+            task = self._tasks.get(task_id)
+            if task is not None:
+                return task
+
+            now = time.monotonic()
+            task = _PollTask(
+                task_id,
+                model,
+                key,
+                now,
+                now + first_delay,
+                now + timeout if timeout is not None else None,
+                max_polls,
+                interval,
+                token,
+                spool,
+            )
+            self._tasks[task_id] = task
+            self._push(task)
+            self._ensure_threads()
+        return task
+
+    def eta(self, task_id: int) -> Optional[float]:
+        """
+        估计任务的剩余等待时间（秒）
+
+        Returns:
+            估计值；任务不在轮询中或样本不足时返回None
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        now = time.monotonic()
+        run_elapsed = now - task.run_started if task.run_started is not None else None
+        eta = self.schedule.eta(task.key, now - task.started, run_elapsed)
+        return max(0.0, eta) if eta is not None else None
+
+    def _push(self, task: _PollTask) -> None:
+        """将任务放入堆；只有成为堆顶时才需要唤醒调度线程"""
+        heap = self._heap
+        if not heap or task.due < heap[0][0]:
+            self._cond.notify_all()
+        heapq.heappush(heap, (task.due, task.task_id))
+
+    def _ensure_threads(self) -> None:
+        if self._threads:
+            return
+        dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="ai-sdk-poller", daemon=True
+        )
+        self._threads.append(dispatcher)
+        for i in range(self.max_workers):
+            self._threads.append(
+                threading.Thread(
+                    target=self._worker_loop, name=f"ai-sdk-poller-{i}", daemon=True
+                )
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def _dispatch_loop(self) -> None:
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                heap = self._heap
+                if heap and self._in_flight < self.max_workers and heap[0][0] <= now:
+                    due, task_id = heapq.heappop(heap)
+                    task = self._tasks.get(task_id)
+                    # 过期的堆条目（任务已完成或已重新排期）直接丢弃
+                    if task is None or task.due != due:
+                        continue
+                    if task.cancelled():
+                        del self._tasks[task_id]
+                        continue
+                    self._in_flight += 1
+                    self._work.put(task)
+                    continue
+
+                timeout = None
+                if heap and self._in_flight < self.max_workers:
+                    timeout = heap[0][0] - now
+                self._cond.wait(timeout)
+
+    def _worker_loop(self) -> None:
+        while True:
+            task = self._work.get()
+            if task is None:
+                return
+            state = None
+            try:
+                state = self._poll(task)
+            except Exception as e:
+                self._finish(task, exception=e)
+            finally:
+                with self._cond:
+                    self.total_polls += 1
+                    if state is not None:
+                        self._state_polls[_STATE_INDEX[state]] += 1
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _poll(self, task: _PollTask) -> Optional[TaskState]:
+        """轮询一次任务，返回观察到的状态（请求失败时返回None）"""
+        if task.spool is None:
+            return self._poll_once(task, None)
+        answer = task.spool()
+        try:
+            return self._poll_once(task, answer)
+        finally:
+            # 未作为结果交给等待方的缓冲区（任务未完成、失败或请求出错）立即释放
+            if getattr(task._result, "answer", None) is not answer:
+                answer.close()
+
+    def _poll_once(
+        self, task: _PollTask, answer: Optional[AnswerBuffer]
+    ) -> Optional[TaskState]:
+        task.polls += 1
+        task_id = task.task_id
+
+        try:
+            response = self._client._post(
+                "/chatResult", content=poll_body(task_id), token=task.token, answer=answer
+            )
+        except InvalidRequestError as e:
+            # 请求参数错误，立即结束，不重试
+            self._finish(task, exception=e)
+            return None
+        except AIAPIError as e:
+            # 网络错误、超时或其他API错误，可以重试
+            if self._expired(task):
+                self._finish(task, exception=e)
+                return None
+            logger.warning(f"Error checking task {task_id} status, will retry: {str(e)}")
+            self._reschedule(task)
+            return None
+
+        # 任务实际状态变化发生在上一次与本次轮询之间，取中点作为估计
+        now = time.monotonic()
+        observed_at = (task.last_poll + now) / 2
+        task.last_poll = now
+
+        state = parse_task_state(response)
+        task.observe(state)
+        if state == TaskState.RUNNING and task.run_started is None:
+            task.run_started = observed_at
+
+        try:
+            completion = check_task_result(task_id, task.model, response, state)
+        except AIAPIError as e:
+            # 任务失败（包括限流）是终态，直接结束
+            self._finish(task, exception=e)
+            return state
+
+        if completion is not None:
+            run_started = task.run_started
+            self.schedule.stats.record(
+                task.key,
+                total=observed_at - task.started,
+                queue=run_started - task.started if run_started is not None else None,
+                run=observed_at - run_started if run_started is not None else None,
+            )
+            self.schedule.stats.maybe_save()
+            logger.debug(f"Task {task_id} finished after {task.polls} polls: {task.poll_counts()}")
+            self._finish(task, result=completion)
+        elif task.unknown_streak >= MAX_UNKNOWN_POLLS:
+            self._finish(task, exception=unknown_state_error(task_id, response))
+        elif self._expired(task):
+            self._finish(
+                task,
+                exception=AITimeoutError(
+                    f"任务{task_id}等待超时，已重试{task.polls}次"
+                ),
+            )
+        else:
+            self._reschedule(task)
+        return state
+
+    @staticmethod
+    def _expired(task: _PollTask) -> bool:
+        if task.max_polls is not None and task.polls >= task.max_polls:
+            return True
+        return task.deadline is not None and time.monotonic() >= task.deadline
+
+    def _reschedule(self, task: _PollTask) -> None:
+        now = time.monotonic()
+        if task.interval is not None:
+            delay = task.interval
+        else:
+            run_elapsed = now - task.run_started if task.run_started is not None else None
+            delay = self.schedule.next_delay(
+                task.key, task.state, now - task.started, run_elapsed
+            )
+        if task.deadline is not None:
+            # 不要越过截止时间太多，保证最后一次轮询落在截止时间附近
+            delay = min(delay, max(0.0, task.deadline - now))
+
+        with self._cond:
+            if self._tasks.get(task.task_id) is not task:
+                return
+            task.due = now + delay
+            self._push(task)
+
+    def _finish(self, task: _PollTask, result=None, exception=None) -> None:
+        with self._cond:
+            if self._tasks.get(task.task_id) is task:
+                del self._tasks[task.task_id]
+        task._set(_FINISHED, result, exception)
+
+    def close(self) -> None:
+        """停止轮询，未完成的任务以错误结束"""
+        with self._cond:
+            self._closed = True
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        for _ in range(self.max_workers):
+            self._work.put(None)
+        # 任务在服务端仍在运行，只是本地停止了轮询（任务日志据此保留这些任务）
+        for task in tasks:
+            task._set(_FINISHED, None, APIConnectionError("客户端已关闭，任务轮询已停止"))
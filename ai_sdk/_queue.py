@@ -0,0 +1,363 @@
+"""
+本地优先级提交队列
+
+并发受限时，交互式请求不应排在大批量的低优先级任务之后。提交前先进入本队列：
+
+- 按优先级出队（数值越大越优先），同优先级先到先得；
+- 老化：每等待 aging 秒，有效优先级加1，低优先级任务不会被无限期饿死；
+- 在途任务达到 max_in_flight 时排队，排队数达到 max_pending 时阻塞生产者（背压）；
+- 出队时的有效优先级作为请求体的 priority 字段发给上游；
+- 按原始优先级统计排队等待时间。
+
+同一个队列可同时被多个线程与协程使用：同步调用方阻塞在各自的 Event 上，
+异步调用方等待各自的 Future，出队时只唤醒被选中的调用方。
+"""
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .exceptions import TimeoutError as AITimeoutError
+
+logger = logging.getLogger(__name__)
+
+# 每个优先级保留的最近等待时间样本数（用于计算P95）
+WAIT_SAMPLES = 1024
+
+
+@dataclass
+class PriorityWaitStats:
+    """单个优先级的排队统计"""
+
+    priority: int
+    dispatched: int  # 已出队的任务数
+    pending: int  # 正在排队的任务数
+    mean_wait: float  # 平均等待秒数
+    p95_wait: float  # 最近样本的P95等待秒数
+    max_wait: float  # 最长等待秒数
+
+
+@dataclass
+class QueueStats:
+    """提交队列的统计快照"""
+
+    pending: int
+    in_flight: int
+    max_pending: int
+    max_in_flight: int
+    priorities: Dict[int, PriorityWaitStats] = field(default_factory=dict)
+
+
+def _set_done(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    """阻塞中的调用方：线程使用 Event，协程使用所在事件循环的 Future"""
+
+    __slots__ = ("event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        if loop is None:
+            self.event: Optional[threading.Event] = threading.Event()
+            self.future: Optional["asyncio.Future[None]"] = None
+        else:
+            self.event = None
+            self.future = loop.create_future()
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(_set_done, self.future)
+
+
+class QueueTicket:
+    """一次出队许可，任务结束后交给 SubmissionQueue.release()"""
+
+    __slots__ = (
+        "priority", "effective_priority", "enqueued_at", "wait", "granted", "released", "_waiter",
+    )
+
+    def __init__(self, priority: int, enqueued_at: float, waiter: _Waiter):
+        self.priority = priority
+        self.effective_priority = priority  # 出队时的有效优先级，发给上游
+        self.enqueued_at = enqueued_at
+        self.wait = 0.0
+        self.granted = False
+        self.released = False
+        self._waiter = waiter
+
+
+class _WaitRecord:
+    __slots__ = ("dispatched", "total", "max", "samples")
+
+    def __init__(self):
+        self.dispatched = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = collections.deque(maxlen=WAIT_SAMPLES)
+
+    def add(self, wait: float) -> None:
+        self.dispatched += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+        self.samples.append(wait)
+
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)]
+
+
+class SubmissionQueue:
+    """
+    带老化的本地优先级提交队列
+
+    用法示例:
+        ```python
+        queue = SubmissionQueue(max_in_flight=8, max_pending=1000)
+        client = AIClient(submission_queue=queue)
+
+        client.chat.completions.submit(messages=[...], priority=10)  # 交互式请求
+        client.chat.completions.submit(messages=[...], priority=0)   # 批量任务
+
+        print(queue.stats().priorities[0].p95_wait)
+        ```
+
+    Args:
+        max_in_flight: 同时在途（已出队、尚未结束）的任务上限，默认8
+        max_pending: 排队任务数上限，达到后 acquire() 阻塞生产者，默认1000
+        aging: 每等待多少秒有效优先级加1，默认30；None 表示不老化
+        max_priority: 发给上游的有效优先级上限（可选），老化不会超过该值
+
+    Raises:
+        ValueError: 参数无效
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_pending: int = 1000,
+        aging: Optional[float] = 30.0,
+        max_priority: Optional[int] = None,
+    ):
+        if max_in_flight < 1 or max_pending < 1:
+            raise ValueError("max_in_flight 与 max_pending 至少为1")
+        if aging is not None and aging <= 0:
+            raise ValueError("aging 必须大于0")
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.aging = aging
+        self.max_priority = max_priority
+
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._space_futures: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = (
+            collections.deque()
+        )
+        self._heap: List[Tuple[float, int, QueueTicket]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._records: Dict[int, _WaitRecord] = {}
+
+    @property
+    def pending(self) -> int:
+        """正在排队的任务数"""
+        return len(self._heap)
+
+    @property
+    def in_flight(self) -> int:
+        """已出队、尚未结束的任务数"""
+        return self._in_flight
+
+    # ---------------------------------------------------------------- 排队与出队
+
+    def _sort_key(self, priority: int, now: float) -> float:
+        # 有效优先级 = priority + (当前时间 - 入队时间) / aging，
+        # 各任务的"当前时间"相同，因此按 入队时间 / aging - priority 从小到大出队即可
+        if self.aging is None:
+            return -float(priority)
+        return now / self.aging - priority
+
+    def _enqueue(self, priority: int, waiter: _Waiter) -> QueueTicket:
+        now = time.monotonic()
+        ticket = QueueTicket(priority, now, waiter)
+        heapq.heappush(self._heap, (self._sort_key(priority, now), next(self._seq), ticket))
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self) -> None:
+        """在途任务未满时按有效优先级出队，只唤醒被选中的调用方（需持有锁）"""
+        freed = 0
+        while self._heap and self._in_flight < self.max_in_flight:
+            _, _, ticket = heapq.heappop(self._heap)
+            now = time.monotonic()
+            ticket.wait = now - ticket.enqueued_at
+            effective = ticket.priority
+            if self.aging is not None:
+                effective += int(ticket.wait // self.aging)
+            if self.max_priority is not None:
+                effective = min(effective, max(self.max_priority, ticket.priority))
+            ticket.effective_priority = effective
+            if effective != ticket.priority:
+                logger.debug(
+                    f"Priority {ticket.priority} task aged to {effective} after {ticket.wait:.1f}s"
+                )
+            ticket.granted = True
+            self._in_flight += 1
+            record = self._records.get(ticket.priority)
+            if record is None:
+                record = self._records[ticket.priority] = _WaitRecord()
+            record.add(ticket.wait)
+            ticket._waiter.wake()
+            freed += 1
+        if freed:
+            self._notify_space(freed)
+
+    def _notify_space(self, n: int) -> None:
+        """排队数减少后唤醒被背压阻塞的生产者（需持有锁）"""
+        self._not_full.notify(n)
+        for _ in range(min(n, len(self._space_futures))):
+            loop, future = self._space_futures.popleft()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_set_done, future)
+
+    def _abandon(self, ticket: QueueTicket) -> bool:
+        """
+        调用方放弃等待（超时或取消）
+
+        Returns:
+            True 表示放弃前已经出队，调用方持有许可
+        """
+        with self._lock:
+            if ticket.granted:
+                return True
+            self._heap = [entry for entry in self._heap if entry[2] is not ticket]
+            heapq.heapify(self._heap)
+            self._notify_space(1)
+            return False
+
+    def acquire(self, priority: int = 0, timeout: Optional[float] = None) -> QueueTicket:
+        """
+        按优先级排队获取提交许可，必要时阻塞
+
+        Args:
+            priority: 任务优先级，数值越大越优先
+            timeout: 等待的总时长上限（秒），None表示一直等待
+
+        Returns:
+            QueueTicket，effective_priority 为出队时的有效优先级
+
+        Raises:
+            AITimeoutError: 在 timeout 秒内未出队
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        waiter = _Waiter()
+        with self._lock:
+            # 背压：排队已满时等待
+            if not self._not_full.wait_for(
+                lambda: len(self._heap) < self.max_pending, timeout
+            ):
+                raise AITimeoutError("提交队列已满，等待超时")
+            ticket = self._enqueue(priority, waiter)
+
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not waiter.event.wait(remaining) and not self._abandon(ticket):
+            raise AITimeoutError("提交队列排队超时")
+        return ticket
+
+    async def acquire_async(
+        self, priority: int = 0, timeout: Optional[float] = None
+    ) -> QueueTicket:
+        """acquire() 的异步版本，等待期间不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - loop.time())
+
+        while True:
+            with self._lock:
+                if len(self._heap) < self.max_pending:
+                    ticket = self._enqueue(priority, _Waiter(loop))
+                    break
+                space = loop.create_future()
+                self._space_futures.append((loop, space))
+            try:
+                await asyncio.wait_for(space, remaining())
+            except asyncio.TimeoutError:
+                raise AITimeoutError("提交队列已满，等待超时") from None
+            finally:
+                with self._lock:
+                    try:
+                        self._space_futures.remove((loop, space))
+                    except ValueError:
+                        pass
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket._waiter.future), remaining())
+        except asyncio.TimeoutError:
+            if not self._abandon(ticket):
+                raise AITimeoutError("提交队列排队超时") from None
+        except asyncio.CancelledError:
+            if self._abandon(ticket):
+                # 许可已分配但调用方被取消，立即归还
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: QueueTicket) -> None:
+        """任务结束时归还许可，并让下一个任务出队"""
+        with self._lock:
+            if ticket.released or not ticket.granted:
+                return
+            ticket.released = True
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _after_fork(self) -> None:
+        """
+        fork 后在子进程中调用（由所属客户端调用）：重建锁，清空排队与在途计数
+
+        父进程的排队者与在途任务不在子进程中，它们的许可永远不会在子进程中归还
+        """
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._space_futures = collections.deque()
+        self._heap = []
+        self._in_flight = 0
+
+    # ---------------------------------------------------------------- 统计
+
+    def stats(self) -> QueueStats:
+        """返回排队数、在途数与按原始优先级的等待时间统计"""
+        with self._lock:
+            pending = collections.Counter(entry[2].priority for entry in self._heap)
+            priorities = {}
+            for priority in sorted(set(self._records) | set(pending), reverse=True):
+                record = self._records.get(priority) or _WaitRecord()
+                priorities[priority] = PriorityWaitStats(
+                    priority=priority,
+                    dispatched=record.dispatched,
+                    pending=pending.get(priority, 0),
+                    mean_wait=record.total / record.dispatched if record.dispatched else 0.0,
+                    p95_wait=record.p95(),
+                    max_wait=record.max,
+                )
+            return QueueStats(
+                pending=len(self._heap),
+                in_flight=self._in_flight,
+                max_pending=self.max_pending,
+                max_in_flight=self.max_in_flight,
+                priorities=priorities,
+            )
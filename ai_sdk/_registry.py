@@ -0,0 +1,127 @@
+"""
+进程内共享客户端
+
+每个 AIClient 都有自己的连接池与后台轮询线程，每个 AsyncAIClient 还另外创建一个内部的
+AIClient。在请求处理函数、任务函数里临时创建客户端时，每次都要重新建立连接（TCP/TLS握手），
+轮询线程也会越积越多。get_client() / get_async_client() 按 (base_url, Token, 其他参数)
+返回进程内共享的客户端，相同配置只创建一次。
+
+共享客户端的 close() 与退出 with 语句不会关闭连接；进程退出时（或调用
+close_shared_clients() 时）统一关闭。
+"""
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .async_client import AsyncAIClient
+from .client import DEFAULT_BASE_URL, AIClient
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_clients: Dict[Tuple, Any] = {}
+
+
+def _reset_lock() -> None:
+    # fork 时可能被其他线程持有；共享客户端本身由 _fork 重置，子进程继续使用
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _key(
+    kind: str, api_token: Optional[str], base_url: Optional[str], kwargs: Dict[str, Any]
+) -> Tuple:
+    """与客户端相同的方式解析 Token 与 base_url，使显式传参与环境变量得到同一个客户端"""
+    token = api_token or os.getenv("AI_API_TOKEN")
+    url = (base_url or os.getenv("AI_API_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+    return (kind, url, token, _freeze(kwargs))
+
+
+def _shared(kind: str, factory, api_token, base_url, kwargs) -> Tuple[Any, bool]:
+    key = _key(kind, api_token, base_url, kwargs)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client, False
+        client = factory(api_token=api_token, base_url=base_url, **kwargs)
+        client._shared = True
+        _clients[key] = client
+    logger.debug(f"Created shared {kind} for {key[1]}")
+    return client, True
+
+
+def get_client(
+    api_token: Optional[str] = None,
+    base_url: Optional[str] = None,
+    warmup: bool = False,
+    **kwargs,
+) -> AIClient:
+    """
+    获取进程内共享的同步客户端，相同的 (base_url, Token, 其他参数) 返回同一个实例
+
+    Args:
+        api_token: API Token，不提供则从 AI_API_TOKEN 环境变量读取
+        base_url: API基础URL（可选）
+        warmup: 首次创建时是否预热连接（见 AIClient.warmup），默认False
+        **kwargs: 传给 AIClient 的其他参数，参与区分客户端
+
+    Returns:
+        共享的 AIClient
+
+    Raises:
+        AuthenticationError: Token未提供
+    """
+    client, created = _shared("AIClient", AIClient, api_token, base_url, kwargs)
+    if created and warmup:
+        client.warmup()
+    return client
+
+
+def get_async_client(
+    api_token: Optional[str] = None,
+    base_url: Optional[str] = None,
+    **kwargs,
+) -> AsyncAIClient:
+    """
+    获取进程内共享的异步客户端，参数同 get_client；需要预热时 await client.warmup()
+
+    连接绑定在事件循环上，在另一个事件循环中使用时会重新建立连接
+
+    Returns:
+        共享的 AsyncAIClient
+
+    Raises:
+        AuthenticationError: Token未提供
+    """
+    client, _ = _shared("AsyncAIClient", AsyncAIClient, api_token, base_url, kwargs)
+    return client
+
+
+def close_shared_clients() -> None:
+    """关闭所有共享客户端（进程退出时自动调用），之后 get_client() 会创建新的客户端"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client._shared = False
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close shared client: {e}")
+
+
+atexit.register(close_shared_clients)
@@ -0,0 +1,290 @@
+"""
+自适应轮询调度
+
+按 (model, deep_research, generate_image) 记录任务的完成耗时（滚动窗口），
+并据此决定首次轮询延迟与后续轮询间隔：
+
+- 排队阶段（"AI任务待处理"）按历史排队时长的中位数安排下一次轮询；
+- 处理阶段（"AI任务处理中"）按处理耗时的经验分布，在下一个分位点附近轮询；
+- 超出历史分布后按已等待时长的比例退避；
+- 所有间隔都带随机抖动，避免大量任务同时轮询。
+
+没有足够样本时使用内置的先验间隔。统计数据可选持久化到 JSON 文件，跨进程重启保留。
+"""
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .types.task import TaskState
+
+logger = logging.getLogger(__name__)
+
+# (model, deep_research, generate_image)
+ScheduleKey = Tuple[str, bool, bool]
+
+def schedule_key(model: str, deep_research: bool, generate_image: bool) -> ScheduleKey:
+    """构造调度统计的键"""
+    return (model.lower(), bool(deep_research), bool(generate_image))
+
+
+class _Series:
+    """单个键下的滚动样本：总耗时、排队耗时、处理耗时"""
+
+    __slots__ = ("total", "queue", "run", "_sorted")
+
+    def __init__(self, window: int):
+        self.total: Deque[float] = deque(maxlen=window)
+        self.queue: Deque[float] = deque(maxlen=window)
+        self.run: Deque[float] = deque(maxlen=window)
+        self._sorted: Dict[str, List[float]] = {}
+
+    def add(self, name: str, value: float) -> None:
+        getattr(self, name).append(value)
+        self._sorted.pop(name, None)
+
+    def sorted(self, name: str) -> List[float]:
+        values = self._sorted.get(name)
+        if values is None:
+            values = self._sorted[name] = sorted(getattr(self, name))
+        return values
+
+
+class LatencyStats:
+    """
+    任务耗时的滚动统计
+
+    Args:
+        window: 每个键保留的最近样本数，默认256
+        path: 持久化文件路径（可选），提供时初始化会加载已有数据
+    """
+
+    def __init__(self, window: int = 256, path: Optional[str] = None):
+        self.window = window
+        self.path = path
+        self._series: Dict[ScheduleKey, _Series] = {}
+        self._lock = threading.Lock()
+        self._dirty = 0
+        if path:
+            self.load()
+
+    def _after_fork(self) -> None:
+        """fork 后在子进程中调用：重建锁（fork 时可能被其他线程持有）"""
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        key: ScheduleKey,
+        total: float,
+        queue: Optional[float] = None,
+        run: Optional[float] = None,
+    ) -> None:
+        """记录一次任务完成的耗时（秒）"""
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.window)
+            series.add("total", total)
+            if queue is not None:
+                series.add("queue", queue)
+            if run is not None:
+                series.add("run", run)
+            self._dirty += 1
+
+    def samples(self, key: ScheduleKey, name: str = "total") -> List[float]:
+        """返回某个键的有序样本（只读）"""
+        with self._lock:
+            series = self._series.get(key)
+            return series.sorted(name) if series is not None else []
+
+    def quantile(self, key: ScheduleKey, q: float, name: str = "total") -> Optional[float]:
+        """返回分位数，无样本时返回None"""
+        values = self.samples(key, name)
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, int(q * len(values))))
+        return values[index]
+
+    def load(self) -> None:
+        """从 path 加载统计数据，文件不存在或损坏时忽略"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load latency stats from {self.path}: {e}")
+            return
+
+        with self._lock:
+            for raw_key, values in data.items():
+                model, deep_research, generate_image = raw_key.split("|")
+                key = (model, deep_research == "1", generate_image == "1")
+                series = self._series.setdefault(key, _Series(self.window))
+                for name in ("total", "queue", "run"):
+                    for value in values.get(name, []):
+                        series.add(name, float(value))
+
+    def save(self) -> None:
+        """原子地写入 path（先写临时文件再替换）"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                f"{model}|{int(deep_research)}|{int(generate_image)}": {
+                    "total": list(series.total),
+                    "queue": list(series.queue),
+                    "run": list(series.run),
+                }
+                for (model, deep_research, generate_image), series in self._series.items()
+            }
+            self._dirty = 0
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save latency stats to {self.path}: {e}")
+
+    def maybe_save(self, every: int = 50) -> None:
+        """累计 every 条新样本后保存一次"""
+        if self.path and self._dirty >= every:
+            self.save()
+
+
+class PollSchedule:
+    """
+    基于耗时分布的轮询调度
+
+    Args:
+        stats: 耗时统计
+        min_interval: 最小轮询间隔（秒）
+        max_interval: 最大轮询间隔（秒）
+        jitter: 抖动比例，0.1 表示 ±10%
+        min_samples: 使用统计数据前至少需要的样本数
+    """
+
+    # 没有样本时的先验：(首次轮询延迟, 轮询间隔)
+    PRIORS = {
+        "text": (1.0, 2.0),
+        "deep_research": (5.0, 5.0),
+        "image": (10.0, 10.0),
+    }
+
+    # 处理阶段每次前进的分位步长
+    QUANTILE_STEP = 0.1
+
+    # 超出历史分布后，下一次间隔为已等待时长的比例
+    BACKOFF_RATIO = 0.25
+
+    def __init__(
+        self,
+        stats: LatencyStats,
+        min_interval: float = 0.5,
+        max_interval: float = 60.0,
+        jitter: float = 0.1,
+        min_samples: int = 5,
+    ):
+        self.stats = stats
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.min_samples = min_samples
+
+    def _prior(self, key: ScheduleKey) -> Tuple[float, float]:
+        _, deep_research, generate_image = key
+        if generate_image:
+            return self.PRIORS["image"]
+        if deep_research:
+            return self.PRIORS["deep_research"]
+        return self.PRIORS["text"]
+
+    def _finish(self, delay: float) -> float:
+        delay = min(self.max_interval, max(self.min_interval, delay))
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return delay
+
+    def first_delay(self, key: ScheduleKey) -> float:
+        """首次轮询前的等待时间：总耗时的10%分位"""
+        values = self.stats.samples(key, "total")
+        if len(values) < self.min_samples:
+            return self._finish(self._prior(key)[0])
+        return self._finish(values[int(0.1 * len(values))])
+
+    def next_delay(
+        self,
+        key: ScheduleKey,
+        state: Optional[TaskState],
+        elapsed: float,
+        run_elapsed: Optional[float] = None,
+    ) -> float:
+        """
+        计算下一次轮询前的等待时间
+
+        Args:
+            key: 调度键
+            state: 最近一次轮询观察到的任务状态（未轮询过时为None）
+            elapsed: 自提交以来的秒数
+            run_elapsed: 自首次观察到处理中以来的秒数（未观察到时为None）
+        """
+        if state == TaskState.PENDING:
+            values = self.stats.samples(key, "queue")
+            if len(values) >= self.min_samples:
+                target = values[len(values) // 2]
+                if target > elapsed:
+                    return self._finish(target - elapsed)
+                return self._finish(elapsed * self.BACKOFF_RATIO)
+            return self._finish(self._prior(key)[1])
+
+        if state == TaskState.RUNNING and run_elapsed is not None:
+            values = self.stats.samples(key, "run")
+            position = run_elapsed
+        else:
+            values = []
+        if len(values) < self.min_samples:
+            values = self.stats.samples(key, "total")
+            position = elapsed
+        if len(values) < self.min_samples:
+            return self._finish(self._prior(key)[1])
+
+        # 在经验分布中前进一个分位步长
+        p = bisect.bisect_right(values, position) / len(values)
+        target_p = p + self.QUANTILE_STEP
+        if target_p >= 1.0:
+            return self._finish(position * self.BACKOFF_RATIO)
+        target = values[int(target_p * len(values))]
+        return self._finish(max(target - position, self.min_interval))
+
+    def eta(
+        self, key: ScheduleKey, elapsed: float, run_elapsed: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        估计剩余等待时间（秒）
+
+        取"已等待 elapsed 仍未完成"条件下耗时的中位数减去已等待时长；
+        已进入处理阶段时优先使用处理耗时分布。
+
+        Returns:
+            估计值；没有足够样本时返回None
+        """
+        values: List[float] = []
+        if run_elapsed is not None:
+            values = self.stats.samples(key, "run")
+            position = run_elapsed
+        if len(values) < self.min_samples:
+            values = self.stats.samples(key, "total")
+            position = elapsed
+        if len(values) < self.min_samples:
+            return None
+        remaining = values[bisect.bisect_right(values, position):]
+        if not remaining:
+            # 已超出历史分布，按退避比例粗略估计
+            return position * self.BACKOFF_RATIO
+        return remaining[len(remaining) // 2] - position
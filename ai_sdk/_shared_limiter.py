@@ -0,0 +1,372 @@
+"""
+跨进程共享的限流与并发预算
+
+同一台机器上的多个工作进程（gunicorn、multiprocessing）各自创建 AIClient 时，
+通过同一个 SQLite 文件共享：
+
+- 令牌桶：每秒补充 rate 个令牌，最多 burst 个，每次提交任务消耗一个；
+- 并发预算：同时在途的任务数上限（租约超时后自动回收，进程崩溃不会永久占用）；
+- 共享退避：任一进程遇到限流后，所有进程在退避结束前都不再提交，连续限流时退避时长翻倍。
+
+所有状态更新都在 BEGIN IMMEDIATE 事务中完成，多个进程之间是原子的。
+异步版本在线程池中执行 SQLite 操作，其他进程持有写锁时不阻塞事件循环。
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .exceptions import TimeoutError as AITimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SharedLimiterState:
+    """共享限流器的状态快照"""
+
+    tokens: float  # 当前可用令牌数
+    rate: float
+    burst: int
+    in_flight: int  # 所有进程在途的任务数
+    max_concurrency: Optional[int]
+    waiters: int  # 所有进程中正在等待的调用方数量
+    blocked_for: float  # 共享退避剩余秒数
+    backoff: float  # 当前退避时长（连续限流时翻倍）
+
+
+class SharedRateLimiter:
+    """
+    基于SQLite的跨进程令牌桶与并发预算
+
+    用法示例:
+        ```python
+        limiter = SharedRateLimiter("/tmp/ai_sdk_limiter.db", rate=5, burst=10, max_concurrency=50)
+        client = AIClient(shared_limiter=limiter)
+        print(limiter.snapshot())
+        ```
+
+    Args:
+        path: 共享状态文件路径，同一台机器上的进程使用同一个路径
+        rate: 每秒允许提交的任务数
+        burst: 令牌桶容量（允许的突发提交数）
+        max_concurrency: 所有进程合计的在途任务上限，None表示不限
+        name: 预算名称，同一个文件中可以有多个相互独立的预算
+        backoff: 首次限流后的共享退避时长（秒），默认5
+        max_backoff: 共享退避时长上限（秒），默认300
+        lease_ttl: 在途租约的最长有效期（秒），超过后视为持有进程已崩溃，默认3600
+    """
+
+    # 等待时两次检查之间的最长间隔（秒）
+    MAX_WAIT_STEP = 0.5
+
+    # 等待方心跳超过该秒数未更新即视为已退出
+    WAITER_TTL = 5.0
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            blocked_until REAL NOT NULL DEFAULT 0,
+            backoff REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            pid INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS leases_name ON leases (name, expires_at)",
+        """
+        CREATE TABLE IF NOT EXISTS waiters (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            heartbeat REAL NOT NULL
+        )
+        """,
+    )
+
+    def __init__(
+        self,
+        path: str,
+        rate: float = 5.0,
+        burst: int = 10,
+        max_concurrency: Optional[int] = None,
+        name: str = "default",
+        backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        lease_ttl: float = 3600.0,
+    ):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate 必须大于0，burst 至少为1")
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.name = name
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease_ttl = lease_ttl
+        self._local = threading.local()
+        # 本进程是否遇到过共享退避；没有时 report_success() 无需写入
+        self._backoff_seen = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        for statement in self._SCHEMA:
+            conn.execute(statement)
+        conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+            (name, float(burst), time.time()),
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用各自的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------------------------------------------------------------- 获取与归还
+
+    def try_acquire(self, waiter_id: Optional[str] = None) -> Tuple[Optional[str], float]:
+        """
+        尝试获取一个提交许可（不阻塞）
+
+        Args:
+            waiter_id: 等待方标识；获取失败时以此登记为等待方，成功时注销
+
+        Returns:
+            (租约ID, 0) 表示成功；(None, 建议等待秒数) 表示需要等待
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated_at, blocked_until, backoff = conn.execute(
+                "SELECT tokens, updated_at, blocked_until, backoff FROM buckets WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            if backoff > 0:
+                self._backoff_seen = True
+            tokens = min(float(self.burst), tokens + max(0.0, now - updated_at) * self.rate)
+
+            wait = 0.0
+            if blocked_until > now:
+                wait = blocked_until - now
+            elif tokens < 1.0:
+                wait = (1.0 - tokens) / self.rate
+            elif self.max_concurrency is not None:
+                conn.execute(
+                    "DELETE FROM leases WHERE name = ? AND expires_at <= ?", (self.name, now)
+                )
+                (in_flight,) = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE name = ?", (self.name,)
+                ).fetchone()
+                if in_flight >= self.max_concurrency:
+                    wait = self.MAX_WAIT_STEP
+
+            if wait > 0:
+                if waiter_id is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO waiters (id, name, heartbeat) VALUES (?, ?, ?)",
+                        (waiter_id, self.name, now),
+                    )
+                conn.execute("COMMIT")
+                return None, wait
+
+            lease = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                (tokens - 1.0, now, self.name),
+            )
+            conn.execute(
+                "INSERT INTO leases (id, name, pid, expires_at) VALUES (?, ?, ?, ?)",
+                (lease, self.name, os.getpid(), now + self.lease_ttl),
+            )
+            if waiter_id is not None:
+                conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+            conn.execute("COMMIT")
+            return lease, 0.0
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, timeout: Optional[float] = None) -> str:
+        """
+        获取一个提交许可，必要时阻塞等待（令牌不足、共享退避中或在途任务达到上限）
+
+        Returns:
+            租约ID，任务结束后传给 release()
+
+        Raises:
+            AITimeoutError: 在 timeout 秒内未获得许可
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        waiter_id = uuid.uuid4().hex
+        waited = False
+        try:
+            while True:
+                lease, wait = self.try_acquire(waiter_id)
+                if lease is not None:
+                    return lease
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AITimeoutError("等待共享限流许可超时")
+                    wait = min(wait, remaining)
+                waited = True
+                time.sleep(min(wait, self.MAX_WAIT_STEP))
+        finally:
+            if waited:
+                self._forget_waiter(waiter_id)
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> str:
+        """acquire() 的异步版本，SQLite 事务在线程池中执行，等待期间不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        waiter_id = uuid.uuid4().hex
+        waited = False
+        try:
+            while True:
+                future = loop.run_in_executor(None, self.try_acquire, waiter_id)
+                try:
+                    lease, wait = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # 调用方被取消时事务可能已经提交，拿到的租约立即归还
+                    future.add_done_callback(self._release_abandoned)
+                    raise
+                if lease is not None:
+                    return lease
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise AITimeoutError("等待共享限流许可超时")
+                    wait = min(wait, remaining)
+                waited = True
+                await asyncio.sleep(min(wait, self.MAX_WAIT_STEP))
+        finally:
+            if waited:
+                loop.run_in_executor(None, self._forget_waiter, waiter_id)
+
+    def _release_abandoned(self, future: "asyncio.Future[Tuple[Optional[str], float]]") -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        lease, _ = future.result()
+        if lease is not None:
+            future.get_loop().run_in_executor(None, self.release, lease)
+
+    def _forget_waiter(self, waiter_id: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+        except sqlite3.Error as e:
+            logger.debug(f"Failed to remove limiter waiter: {e}")
+
+    def release(self, lease: str) -> None:
+        """归还在途租约"""
+        self._conn().execute("DELETE FROM leases WHERE id = ?", (lease,))
+
+    # ---------------------------------------------------------------- 共享退避
+
+    def report_rate_limit(self) -> float:
+        """
+        报告一次限流：所有进程进入共享退避
+
+        退避期间再次报告不会延长；退避结束后再次限流时退避时长翻倍。
+
+        Returns:
+            退避剩余秒数
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            blocked_until, backoff = conn.execute(
+                "SELECT blocked_until, backoff FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            if blocked_until <= now:
+                backoff = min(self.max_backoff, backoff * 2 if backoff else self.backoff)
+                blocked_until = now + backoff
+                # 清空令牌，退避结束后按速率重新积累
+                conn.execute(
+                    "UPDATE buckets SET blocked_until = ?, backoff = ?, tokens = 0, "
+                    "updated_at = ? WHERE name = ?",
+                    (blocked_until, backoff, blocked_until, self.name),
+                )
+                logger.warning(
+                    f"Rate limited, all processes sharing {self.path} back off for {backoff:.1f}s"
+                )
+            conn.execute("COMMIT")
+            self._backoff_seen = True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return blocked_until - now
+
+    def report_success(self) -> None:
+        """报告一次成功，重置退避时长；本进程未遇到过退避时不写入"""
+        if not self._backoff_seen:
+            return
+        self._backoff_seen = False
+        self._conn().execute(
+            "UPDATE buckets SET backoff = 0 WHERE name = ? AND backoff > 0", (self.name,)
+        )
+
+    # ---------------------------------------------------------------- 查询
+
+    def snapshot(self) -> SharedLimiterState:
+        """返回当前令牌数、在途任务数、等待方数量与退避状态"""
+        conn = self._conn()
+        now = time.time()
+        tokens, updated_at, blocked_until, backoff = conn.execute(
+            "SELECT tokens, updated_at, blocked_until, backoff FROM buckets WHERE name = ?",
+            (self.name,),
+        ).fetchone()
+        (in_flight,) = conn.execute(
+            "SELECT COUNT(*) FROM leases WHERE name = ? AND expires_at > ?", (self.name, now)
+        ).fetchone()
+        (waiters,) = conn.execute(
+            "SELECT COUNT(*) FROM waiters WHERE name = ? AND heartbeat > ?",
+            (self.name, now - self.WAITER_TTL),
+        ).fetchone()
+        return SharedLimiterState(
+            tokens=min(float(self.burst), tokens + max(0.0, now - updated_at) * self.rate),
+            rate=self.rate,
+            burst=self.burst,
+            in_flight=in_flight,
+            max_concurrency=self.max_concurrency,
+            waiters=waiters,
+            blocked_for=max(0.0, blocked_until - now),
+            backoff=backoff,
+        )
+
+    def _after_fork(self) -> None:
+        """
+        fork 后在子进程中调用（由所属客户端调用）：丢弃继承的 SQLite 连接（不关闭），
+        子进程首次使用时重新连接；父进程持有的租约仍由父进程归还
+        """
+        self._local = threading.local()
+
+    def close(self) -> None:
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
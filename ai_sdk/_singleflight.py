@@ -0,0 +1,129 @@
+"""
+相同请求合并（singleflight）
+
+同一时刻对同一个键的多次调用只执行一次：第一个调用方（leader）执行函数，
+其余调用方（follower）等待并共享 leader 的结果或异常。
+同步版本用于跨线程合并，异步版本用于同一事件循环内跨协程合并。
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+@dataclass
+class CoalescingStats:
+    """请求合并统计"""
+
+    leaders: int = 0  # 实际执行（提交任务）的次数
+    followers: int = 0  # 共享了其他调用结果、省下一次提交的次数
+    in_flight: int = 0  # 当前正在执行的键数
+
+    @property
+    def saved(self) -> int:
+        """省下的提交次数"""
+        return self.followers
+
+
+class _Call:
+    __slots__ = ("event", "result", "exception")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """跨线程合并相同键的调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行 fn，或等待同一个键上正在执行的调用
+
+        Returns:
+            (结果, 是否为共享结果)；leader 得到 False，follower 得到 True
+
+        Raises:
+            fn 抛出的异常（leader 与所有 follower 都会收到）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+                leader = True
+            else:
+                self._followers += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    def stats(self) -> CoalescingStats:
+        with self._lock:
+            return CoalescingStats(self._leaders, self._followers, len(self._calls))
+
+
+class AsyncSingleFlight:
+    """
+    跨协程合并相同键的调用
+
+    leader 的工作以独立的 Task 运行，所有调用方通过 asyncio.shield 等待，
+    任何一个调用方被取消都不会取消共享的工作。不同事件循环之间不合并。
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        执行 fn()，或等待同一个键上正在执行的调用
+
+        Returns:
+            (结果, 是否为共享结果)
+        """
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self._followers += 1
+            return await asyncio.shield(task), True
+
+        self._leaders += 1
+        task = loop.create_task(fn())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # 所有调用方都已取消时，避免"Task exception was never retrieved"警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> CoalescingStats:
+        in_flight = sum(1 for task in self._tasks.values() if not task.done())
+        return CoalescingStats(self._leaders, self._followers, in_flight)
@@ -0,0 +1,414 @@
+"""
+大答案的低内存接收
+
+深度研究的答案可达数十MB。普通路径中 /chatResult 的响应体先完整读入内存，解析成 dict，
+答案再放进 ChatMessage / ChatCompletion，同一份答案的多个副本同时存在。
+
+create_spooled() 走另一条路径：传输层边接收边把响应体交给 _AnswerDecoder 增量解析，
+answer 字段的字符串直接反转义写入 AnswerBuffer（UTF-8，超过阈值后转存到临时文件），
+其他字段很小，收集后再解析。答案只保留这一份，通过 AnswerBuffer 交给调用方。
+"""
+import codecs
+import io
+import mmap
+import re
+import tempfile
+from dataclasses import dataclass
+from json.decoder import scanstring
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Union
+
+from ._codec import JSONCodec
+from .types.chat import ChatCompletion, ChatMessage, Choice, Usage
+
+# 答案超过该字节数时转存到临时文件
+DEFAULT_SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+_READ_CHUNK_SIZE = 1024 * 1024
+
+_NON_SPACE = re.compile(rb"\S")
+
+
+class AnswerBuffer:
+    """
+    答案缓冲区
+
+    保存 UTF-8 编码的答案：不超过 spool_threshold 字节时在内存中，超过后转存到临时文件
+    （关闭后自动删除）。读取方式都不会复制整个答案，除非显式调用 read() / text()。
+
+    用法示例:
+        ```python
+        with client.chat.completions.create_spooled(messages=[...], deep_research=True) as result:
+            answer = result.answer
+            print(answer.size, answer.spooled)
+            answer.save("report.md")              # 分块写入文件
+            for text in answer.iter_text():       # 分块解码为文本
+                ...
+            view = answer.getbuffer()             # 零拷贝的只读视图（内存缓冲区或内存映射）
+        ```
+
+    Args:
+        spool_threshold: 转存到临时文件的字节数阈值，默认8MB；None 表示始终保存在内存中
+        spool_dir: 临时文件所在目录（可选），默认为系统临时目录
+    """
+
+    def __init__(
+        self,
+        spool_threshold: Optional[int] = DEFAULT_SPOOL_THRESHOLD,
+        spool_dir: Optional[str] = None,
+    ):
+        self.spool_threshold = spool_threshold
+        self.spool_dir = spool_dir
+        self._file: BinaryIO = io.BytesIO()
+        self._spooled = False
+        self._size = 0
+        self._blank = True
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def size(self) -> int:
+        """答案的字节数（UTF-8）"""
+        return self._size
+
+    @property
+    def spooled(self) -> bool:
+        """是否已转存到临时文件"""
+        return self._spooled
+
+    @property
+    def blank(self) -> bool:
+        """答案是否为空或只包含空白字符（写入时记录，不读取内容）"""
+        return self._blank
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data: Union[bytes, memoryview]) -> None:
+        """追加 UTF-8 数据（由解码器调用；开始读取后不应再写入）"""
+        if self._blank and _NON_SPACE.search(data):
+            self._blank = False
+        size = self._size + len(data)
+        threshold = self.spool_threshold
+        if not self._spooled and threshold is not None and size > threshold:
+            self._rollover()
+        self._file.write(data)
+        self._size = size
+
+    def _rollover(self) -> None:
+        spool = tempfile.TemporaryFile(dir=self.spool_dir)
+        spool.write(self._file.getbuffer())
+        self._file = spool
+        self._spooled = True
+
+    def getbuffer(self) -> memoryview:
+        """
+        整个答案的只读视图，不复制数据
+
+        Returns:
+            内存中时为缓冲区本身的视图；转存到临时文件时为文件的内存映射
+        """
+        if not self._spooled:
+            return self._file.getbuffer().toreadonly()
+        if self._size == 0:
+            return memoryview(b"")
+        if self._mmap is None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def iter_bytes(self, chunk_size: int = _READ_CHUNK_SIZE) -> Iterator[bytes]:
+        """按 chunk_size 字节分块读取答案"""
+        view = self.getbuffer()
+        for start in range(0, len(view), chunk_size):
+            yield view[start : start + chunk_size].tobytes()
+
+    def iter_text(self, chunk_size: int = _READ_CHUNK_SIZE, errors: str = "replace") -> Iterator[str]:
+        """分块解码为文本，多字节字符不会被截断"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors)
+        for chunk in self.iter_bytes(chunk_size):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def read(self) -> bytes:
+        """复制出完整的答案字节串"""
+        return self.getbuffer().tobytes()
+
+    def text(self, errors: str = "replace") -> str:
+        """解码为完整的字符串（会在内存中创建整个答案的字符串）"""
+        return str(self.getbuffer(), "utf-8", errors)
+
+    def copy_to(self, fileobj: BinaryIO, chunk_size: int = _READ_CHUNK_SIZE) -> int:
+        """
+        分块写入文件对象
+
+        Returns:
+            写入的字节数
+        """
+        view = self.getbuffer()
+        for start in range(0, len(view), chunk_size):
+            fileobj.write(view[start : start + chunk_size])
+        return len(view)
+
+    def save(self, path: str) -> int:
+        """写入文件 path，返回写入的字节数"""
+        with open(path, "wb") as f:
+            return self.copy_to(f)
+
+    def close(self) -> None:
+        """释放内存或删除临时文件；仍有未释放的 getbuffer() 视图时留给垃圾回收"""
+        try:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._file.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "AnswerBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        where = "file" if self._spooled else "memory"
+        return f"<AnswerBuffer {self._size} bytes in {where}>"
+
+
+@dataclass
+class SpooledCompletion:
+    """
+    create_spooled() 的结果：答案在 AnswerBuffer 中，不构造 ChatCompletion
+
+    用完后调用 close()（或使用 with 语句）删除临时文件
+    """
+
+    id: str  # 任务ID
+    model: str
+    created: int
+    answer: AnswerBuffer
+
+    def to_completion(self) -> ChatCompletion:
+        """转换为 ChatCompletion（会把整个答案解码为字符串）"""
+        return ChatCompletion(
+            id=self.id,
+            object="chat.completion",
+            created=self.created,
+            model=self.model,
+            choices=[
+                Choice(
+                    index=0,
+                    message=ChatMessage(role="assistant", content=self.answer.text()),
+                    finish_reason="stop",
+                )
+            ],
+            usage=Usage(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+        )
+
+    def close(self) -> None:
+        self.answer.close()
+
+    def __enter__(self) -> "SpooledCompletion":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+# ---------------------------------------------------------------- 增量解析
+
+# 解析状态
+_START, _KEY_OR_END, _KEY, _COLON, _VALUE, _RAW, _ANSWER, _AFTER_VALUE, _NEXT_KEY, _END = range(10)
+
+# 字符串内容中由完整单元组成的最长前缀：普通字符、两字符转义、\uXXXX
+_STRING_UNITS = re.compile(rb'[^"\\]*(?:(?:\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})[^"\\]*)*')
+_HIGH_SURROGATE = re.compile(rb"\\u[dD][89abAB][0-9a-fA-F]{2}")
+_WHITESPACE = b" \t\r\n"
+
+
+def _incomplete_utf8(data: bytes, start: int, end: int) -> int:
+    """data[start:end] 末尾被截断的 UTF-8 多字节字符的字节数"""
+    for k in range(1, min(4, end - start + 1)):
+        c = data[end - k]
+        if c < 0x80:
+            return 0
+        if c >= 0xC0:
+            length = 2 if c < 0xE0 else 3 if c < 0xF0 else 4
+            return k if k < length else 0
+    return 0
+
+
+def _is_escape(data: bytes, pos: int, start: int) -> bool:
+    """data[pos] 处的反斜杠是否是一个转义序列的开始（前面连续的反斜杠数为偶数）"""
+    run = 0
+    while pos - run >= start and data[pos - run] == 0x5C:
+        run += 1
+    return run % 2 == 1
+
+
+class _AnswerDecoder:
+    """
+    增量解析 /chatResult 响应（JSON 对象）
+
+    顶层 field 字段的字符串值直接反转义写入 AnswerBuffer：不含转义的片段原样写入，
+    含转义的片段（最多一个数据块）用标准库 scanstring 解码。其他字段收集原始字节后用编解码器解析。
+    """
+
+    def __init__(self, answer: AnswerBuffer, codec: JSONCodec, field: str = "answer"):
+        self._answer = answer
+        self._codec = codec
+        self._field = field
+        self._state = _START
+        self._carry = b""
+        self._raw = bytearray()
+        self._key: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._fields: Dict[str, Any] = {}
+
+    def feed(self, data: bytes) -> None:
+        """
+        解析下一块响应体
+
+        Raises:
+            ValueError: 响应不是合法的 JSON 对象
+        """
+        if self._carry:
+            data = self._carry + bytes(data)
+            self._carry = b""
+        i, n = 0, len(data)
+        while i < n:
+            state = self._state
+            if state == _ANSWER:
+                i = self._feed_answer(data, i)
+            elif state == _RAW or state == _KEY:
+                i = self._feed_raw(data, i)
+            else:
+                c = data[i]
+                i += 1
+                if c in _WHITESPACE:
+                    continue
+                if state == _START and c == 0x7B:  # {
+                    self._state = _KEY_OR_END
+                elif (state == _KEY_OR_END or state == _NEXT_KEY) and c == 0x22:  # "
+                    self._start_raw(in_string=True, prefix=b'"')
+                    self._state = _KEY
+                elif state == _KEY_OR_END and c == 0x7D:  # }
+                    self._state = _END
+                elif state == _COLON and c == 0x3A:  # :
+                    self._state = _VALUE
+                elif state == _VALUE:
+                    if c == 0x22 and self._key == self._field:
+                        self._fields[self._field] = self._answer
+                        self._state = _ANSWER
+                    else:
+                        self._start_raw(in_string=False)
+                        self._state = _RAW
+                        i -= 1
+                elif state == _AFTER_VALUE and c == 0x2C:  # ,
+                    self._state = _NEXT_KEY
+                elif state == _AFTER_VALUE and c == 0x7D:
+                    self._state = _END
+                else:
+                    raise ValueError(f"无效的JSON响应: 意外的字符 {chr(c)!r}")
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        响应体接收完毕，返回解析出的字段（field 字段为 AnswerBuffer）
+
+        Raises:
+            ValueError: 响应不完整
+        """
+        if self._state != _END or self._carry:
+            raise ValueError("无效的JSON响应: 响应不完整")
+        return self._fields
+
+    def _start_raw(self, in_string: bool, prefix: bytes = b"") -> None:
+        self._raw = bytearray(prefix)
+        self._depth = 0
+        self._in_string = in_string
+        self._escaped = False
+
+    def _feed_raw(self, data: bytes, i: int) -> int:
+        """收集键或普通字段值的原始字节，直到值结束"""
+        start, n = i, len(data)
+        done = False
+        while i < n:
+            c = data[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == 0x5C:
+                    self._escaped = True
+                elif c == 0x22:
+                    self._in_string = False
+                    if self._depth == 0 and self._state == _KEY:
+                        i += 1
+                        done = True
+                        break
+            elif c == 0x22:
+                self._in_string = True
+            elif c == 0x5B or c == 0x7B:  # [ {
+                self._depth += 1
+            elif c == 0x5D or c == 0x7D:  # ] }
+                if self._depth == 0:
+                    done = True
+                    break
+                self._depth -= 1
+            elif c == 0x2C and self._depth == 0:
+                done = True
+                break
+            i += 1
+        self._raw += data[start:i]
+        if done:
+            value = self._codec.decode(bytes(self._raw))
+            if self._state == _KEY:
+                self._key = value
+                self._state = _COLON
+            else:
+                self._fields[self._key] = value
+                self._state = _AFTER_VALUE
+        return i
+
+    def _feed_answer(self, data: bytes, i: int) -> int:
+        """把 field 字符串的内容写入 AnswerBuffer，不完整的转义与多字节字符留到下一块"""
+        n = len(data)
+        j = _STRING_UNITS.match(data, i).end()
+        final = j < n and data[j] == 0x22
+        if not final:
+            if j < n:
+                # 反斜杠之后不是完整的转义：可能被分块截断，否则为无效转义
+                if n - j >= 6:
+                    raise ValueError("无效的JSON响应: 无效的转义序列")
+            else:
+                j -= _incomplete_utf8(data, i, n)
+            # 代理对的前半部分留到下一块，与后半部分一起解码
+            if (
+                j - i >= 6
+                and _HIGH_SURROGATE.fullmatch(data, j - 6, j)
+                and _is_escape(data, j - 6, i)
+            ):
+                j -= 6
+        self._write(data, i, j)
+        if final:
+            self._state = _AFTER_VALUE
+            return j + 1
+        self._carry = data[j:]
+        return n
+
+    def _write(self, data: bytes, start: int, end: int) -> None:
+        if end <= start:
+            return
+        if data.find(b"\\", start, end) == -1:
+            self._answer.write(memoryview(data)[start:end])
+            return
+        text = data[start:end].decode("utf-8", errors="replace")
+        value, _ = scanstring(text + '"', 0, False)
+        self._answer.write(value.encode("utf-8", errors="replace"))
@@ -0,0 +1,341 @@
+"""
+多租户公平调度
+
+多个团队共用一个客户端（一个账号配额）时，一个团队的大批量任务不应占满全部并发。
+提交时带上租户标签，由 TenantScheduler 决定出队顺序：
+
+- 加权公平排队（WFQ）：每个请求入队时按租户权重计算虚拟完成时间，出队时选择最小者，
+  各租户按权重比例分享在途名额，空闲后回来的租户不能"攒"额度；
+- 每个租户的在途任务上限：达到上限的租户只能排队，不影响其他租户；
+- 每个租户的排队上限：超过时直接拒绝（TenantQueueFullError）并计数；
+- 每个租户的等待时间、端到端延迟、吞吐与拒绝次数统计。
+
+与 SubmissionQueue 相同，同一个调度器可同时被线程与协程使用。
+"""
+import asyncio
+import collections
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from ._queue import _Waiter, _WaitRecord
+from .exceptions import TenantQueueFullError, TimeoutError as AITimeoutError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+# 吞吐统计的时间窗口（秒）
+THROUGHPUT_WINDOW = 60.0
+
+
+@dataclass
+class TenantStats:
+    """单个租户的调度统计"""
+
+    tenant: str
+    weight: float
+    max_in_flight: Optional[int]
+    pending: int  # 正在排队的任务数
+    in_flight: int  # 已出队、尚未结束的任务数
+    dispatched: int  # 已出队的任务数
+    completed: int  # 已结束的任务数
+    rejected: int  # 因排队已满或排队超时被拒绝的次数
+    mean_wait: float  # 平均排队秒数
+    mean_latency: float  # 平均端到端秒数（排队 + 执行）
+    p95_latency: float  # 最近样本的P95端到端秒数
+    throughput: float  # 最近一分钟每秒结束的任务数
+
+
+def _trim(finished: Deque[float], now: float) -> None:
+    """丢弃吞吐统计窗口之外的结束时间"""
+    while finished and finished[0] < now - THROUGHPUT_WINDOW:
+        finished.popleft()
+
+
+class TenantTicket:
+    """一次出队许可，任务结束后交给 TenantScheduler.release()"""
+
+    __slots__ = ("tenant", "start", "tag", "enqueued_at", "wait", "granted", "released", "_waiter")
+
+    def __init__(
+        self, tenant: str, start: float, tag: float, enqueued_at: float, waiter: _Waiter
+    ):
+        self.tenant = tenant
+        self.start = start  # 虚拟开始时间
+        self.tag = tag  # 虚拟完成时间，出队时选择最小者
+        self.enqueued_at = enqueued_at
+        self.wait = 0.0
+        self.granted = False
+        self.released = False
+        self._waiter = waiter
+
+
+class _Tenant:
+    __slots__ = (
+        "name", "weight", "max_in_flight", "queue", "in_flight", "last_finish",
+        "rejected", "completed", "waits", "latencies", "finished_at",
+    )
+
+    def __init__(self, name: str, weight: float, max_in_flight: Optional[int]):
+        self.name = name
+        self.weight = weight
+        self.max_in_flight = max_in_flight
+        self.queue: Deque[TenantTicket] = collections.deque()
+        self.in_flight = 0
+        self.last_finish = 0.0
+        self.rejected = 0
+        self.completed = 0
+        self.waits = _WaitRecord()
+        self.latencies = _WaitRecord()
+        self.finished_at: Deque[float] = collections.deque()
+
+    def eligible(self) -> bool:
+        return bool(self.queue) and (
+            self.max_in_flight is None or self.in_flight < self.max_in_flight
+        )
+
+
+class TenantScheduler:
+    """
+    加权公平的多租户调度器
+
+    用法示例:
+        ```python
+        scheduler = TenantScheduler(
+            max_in_flight=32,
+            tenant_max_in_flight=16,
+            weights={"search": 3, "batch": 1},
+        )
+        client = AIClient(tenant_scheduler=scheduler)
+        client.chat.completions.create(messages=[...], tenant="search")
+
+        for stats in scheduler.stats():
+            print(stats.tenant, stats.in_flight, stats.p95_latency, stats.rejected)
+        ```
+
+    Args:
+        max_in_flight: 所有租户合计的在途任务上限，默认32
+        tenant_max_in_flight: 每个租户默认的在途任务上限（可选），None表示只受总上限约束
+        max_pending: 每个租户的排队任务上限，超过时拒绝，默认1000
+        weights: 租户权重（可选），未列出的租户权重为1
+        limits: 单独设置部分租户的在途任务上限（可选），覆盖 tenant_max_in_flight
+
+    Raises:
+        ValueError: 参数无效
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        tenant_max_in_flight: Optional[int] = None,
+        max_pending: int = 1000,
+        weights: Optional[Dict[str, float]] = None,
+        limits: Optional[Dict[str, int]] = None,
+    ):
+        if max_in_flight < 1 or max_pending < 1:
+            raise ValueError("max_in_flight 与 max_pending 至少为1")
+        if any(w <= 0 for w in (weights or {}).values()):
+            raise ValueError("租户权重必须大于0")
+        self.max_in_flight = max_in_flight
+        self.tenant_max_in_flight = tenant_max_in_flight
+        self.max_pending = max_pending
+        self._weights = dict(weights or {})
+        self._limits = dict(limits or {})
+
+        self._lock = threading.Lock()
+        self._tenants: Dict[str, _Tenant] = {}
+        self._in_flight = 0
+        self._virtual_time = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """所有租户合计的在途任务数"""
+        return self._in_flight
+
+    def _tenant(self, name: str) -> _Tenant:
+        tenant = self._tenants.get(name)
+        if tenant is None:
+            tenant = self._tenants[name] = _Tenant(
+                name,
+                self._weights.get(name, 1.0),
+                self._limits.get(name, self.tenant_max_in_flight),
+            )
+        return tenant
+
+    def set_weight(self, tenant: str, weight: float) -> None:
+        """调整租户权重，对之后入队的请求生效"""
+        if weight <= 0:
+            raise ValueError("租户权重必须大于0")
+        with self._lock:
+            self._weights[tenant] = weight
+            self._tenant(tenant).weight = weight
+
+    # ---------------------------------------------------------------- 排队与出队
+
+    def _enqueue(self, name: Optional[str], waiter: _Waiter) -> TenantTicket:
+        """入队并计算虚拟完成时间；排队已满时拒绝（需持有锁）"""
+        tenant = self._tenant(name or DEFAULT_TENANT)
+        if len(tenant.queue) >= self.max_pending:
+            tenant.rejected += 1
+            logger.warning(f"Tenant {tenant.name} queue full, rejecting submission")
+            # 本地拒绝不是服务端限流：不触发限流重试，也不让 AIMD 限制器降低上限
+            raise TenantQueueFullError(f"租户 {tenant.name} 的排队任务数已达上限 {self.max_pending}")
+        # 空闲后回来的租户从当前虚拟时间开始，不能用之前空闲的时间"攒"额度
+        start = max(self._virtual_time, tenant.last_finish)
+        tenant.last_finish = start + 1.0 / tenant.weight
+        ticket = TenantTicket(tenant.name, start, tenant.last_finish, time.monotonic(), waiter)
+        tenant.queue.append(ticket)
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self) -> None:
+        """总在途未满时，在未达上限的租户中选择虚拟完成时间最小的请求出队（需持有锁）"""
+        while self._in_flight < self.max_in_flight:
+            chosen: Optional[_Tenant] = None
+            for tenant in self._tenants.values():
+                if tenant.eligible() and (
+                    chosen is None or tenant.queue[0].tag < chosen.queue[0].tag
+                ):
+                    chosen = tenant
+            if chosen is None:
+                return
+            ticket = chosen.queue.popleft()
+            self._virtual_time = max(self._virtual_time, ticket.start)
+            ticket.wait = time.monotonic() - ticket.enqueued_at
+            ticket.granted = True
+            chosen.in_flight += 1
+            chosen.waits.add(ticket.wait)
+            self._in_flight += 1
+            ticket._waiter.wake()
+
+    def _abandon(self, ticket: TenantTicket) -> bool:
+        """
+        调用方放弃等待（超时或取消）
+
+        Returns:
+            True 表示放弃前已经出队，调用方持有许可
+        """
+        with self._lock:
+            if ticket.granted:
+                return True
+            tenant = self._tenants[ticket.tenant]
+            if tenant.queue and tenant.queue[-1] is ticket:
+                # 放弃的是最后入队的请求：虚拟完成时间退回，租户不会因放弃的请求被推后
+                tenant.queue.pop()
+                tenant.last_finish = ticket.start
+            else:
+                try:
+                    tenant.queue.remove(ticket)
+                except ValueError:
+                    pass
+            return False
+
+    def _timed_out(self, ticket: TenantTicket) -> AITimeoutError:
+        with self._lock:
+            self._tenants[ticket.tenant].rejected += 1
+        return AITimeoutError(f"租户 {ticket.tenant} 排队超时")
+
+    def acquire(
+        self, tenant: Optional[str] = None, timeout: Optional[float] = None
+    ) -> TenantTicket:
+        """
+        以租户身份排队获取提交许可，必要时阻塞
+
+        Args:
+            tenant: 租户标签，None 表示默认租户
+            timeout: 排队时长上限（秒），None表示一直等待
+
+        Returns:
+            TenantTicket
+
+        Raises:
+            TenantQueueFullError: 该租户排队任务数已达上限
+            AITimeoutError: 在 timeout 秒内未出队
+        """
+        waiter = _Waiter()
+        with self._lock:
+            ticket = self._enqueue(tenant, waiter)
+        if not waiter.event.wait(timeout) and not self._abandon(ticket):
+            raise self._timed_out(ticket)
+        return ticket
+
+    async def acquire_async(
+        self, tenant: Optional[str] = None, timeout: Optional[float] = None
+    ) -> TenantTicket:
+        """acquire() 的异步版本，等待期间不阻塞事件循环"""
+        waiter = _Waiter(asyncio.get_running_loop())
+        with self._lock:
+            ticket = self._enqueue(tenant, waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(ticket):
+                raise self._timed_out(ticket) from None
+        except asyncio.CancelledError:
+            if self._abandon(ticket):
+                # 许可已分配但调用方被取消，立即归还
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: TenantTicket) -> None:
+        """任务结束时归还许可，记录端到端延迟，并让下一个请求出队"""
+        now = time.monotonic()
+        with self._lock:
+            if ticket.released or not ticket.granted:
+                return
+            ticket.released = True
+            tenant = self._tenants[ticket.tenant]
+            tenant.in_flight -= 1
+            tenant.completed += 1
+            tenant.latencies.add(now - ticket.enqueued_at)
+            tenant.finished_at.append(now)
+            _trim(tenant.finished_at, now)
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _after_fork(self) -> None:
+        """
+        fork 后在子进程中调用（由所属客户端调用）：重建锁，清空各租户的排队与在途计数
+
+        权重、虚拟时间与统计保留
+        """
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        for tenant in self._tenants.values():
+            tenant.queue.clear()
+            tenant.in_flight = 0
+
+    # ---------------------------------------------------------------- 统计
+
+    def stats(self) -> List[TenantStats]:
+        """返回每个租户的排队、在途、延迟、吞吐与拒绝统计"""
+        now = time.monotonic()
+        with self._lock:
+            result = []
+            for tenant in self._tenants.values():
+                finished = tenant.finished_at
+                _trim(finished, now)
+                waits, latencies = tenant.waits, tenant.latencies
+                result.append(
+                    TenantStats(
+                        tenant=tenant.name,
+                        weight=tenant.weight,
+                        max_in_flight=tenant.max_in_flight,
+                        pending=len(tenant.queue),
+                        in_flight=tenant.in_flight,
+                        dispatched=waits.dispatched,
+                        completed=tenant.completed,
+                        rejected=tenant.rejected,
+                        mean_wait=waits.total / waits.dispatched if waits.dispatched else 0.0,
+                        mean_latency=(
+                            latencies.total / latencies.dispatched if latencies.dispatched else 0.0
+                        ),
+                        p95_latency=latencies.p95(),
+                        throughput=len(finished) / THROUGHPUT_WINDOW,
+                    )
+                )
+            return result
@@ -0,0 +1,235 @@
+"""
+多 API Token 轮换
+
+持有多个账号的 Token 时，每次提交任务从池中选择一个 Token（负载最低或轮询），
+任务的轮询使用提交它的同一个 Token。某个 Token 遇到"账号达到使用限制"或 HTTP 429 时
+被隔离一段时间（连续失败时隔离时长翻倍），到期后先只放行一个探测请求，成功后恢复正常。
+"""
+import collections
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .exceptions import InvalidRequestError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+LEAST_LOADED = "least_loaded"
+ROUND_ROBIN = "round_robin"
+
+# Token 状态
+ACTIVE = "active"
+QUARANTINED = "quarantined"
+PROBING = "probing"
+
+# 记住最近多少个任务的提交 Token，查询任务时使用同一个 Token
+OWNER_HISTORY = 100000
+
+
+def mask_token(token: str) -> str:
+    """日志与统计中只显示 Token 的前几位"""
+    return f"{token[:8]}..." if len(token) > 8 else "***"
+
+
+@dataclass
+class TokenStatus:
+    """单个 Token 的状态快照"""
+
+    token: str  # 已脱敏
+    state: str  # active / quarantined / probing
+    in_flight: int
+    submitted: int
+    rate_limits: int
+    quarantined_for: float  # 剩余隔离秒数，未隔离时为0
+
+
+class _TokenState:
+    __slots__ = (
+        "token", "in_flight", "submitted", "rate_limits", "failures",
+        "quarantined_until", "probing",
+    )
+
+    def __init__(self, token: str):
+        self.token = token
+        self.in_flight = 0
+        self.submitted = 0
+        self.rate_limits = 0
+        self.failures = 0  # 连续限流次数，决定隔离时长
+        self.quarantined_until = 0.0
+        self.probing = False
+
+
+class TokenPool:
+    """
+    API Token 池
+
+    Args:
+        tokens: Token 列表（去重后保持顺序）
+        strategy: 选择策略，"least_loaded"（在途任务最少，默认）或 "round_robin"
+        quarantine: 首次限流后的隔离时长（秒），默认60
+        max_quarantine: 隔离时长上限（秒），默认3600
+
+    Raises:
+        InvalidRequestError: Token 列表为空或策略无效
+    """
+
+    def __init__(
+        self,
+        tokens: List[str],
+        strategy: str = LEAST_LOADED,
+        quarantine: float = 60.0,
+        max_quarantine: float = 3600.0,
+    ):
+        tokens = list(dict.fromkeys(t.strip() for t in tokens if t and t.strip()))
+        if not tokens:
+            raise InvalidRequestError("Token 池不能为空")
+        if strategy not in (LEAST_LOADED, ROUND_ROBIN):
+            raise InvalidRequestError(f"无效的Token选择策略: {strategy}")
+        self.strategy = strategy
+        self.quarantine_seconds = quarantine
+        self.max_quarantine = max_quarantine
+        self._states = [_TokenState(t) for t in tokens]
+        self._by_token = {s.token: s for s in self._states}
+        self._next = 0
+        self._lock = threading.Lock()
+        self._owners: "collections.OrderedDict[int, str]" = collections.OrderedDict()
+
+    def _after_fork(self) -> None:
+        """fork 后在子进程中调用：清零父进程的在途任务数并重建锁，保留隔离状态"""
+        self._lock = threading.Lock()
+        for state in self._states:
+            state.in_flight = 0
+
+    @property
+    def tokens(self) -> List[str]:
+        return [s.token for s in self._states]
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _eligible(self, state: _TokenState, now: float) -> bool:
+        if state.quarantined_until > now:
+            return False
+        # 隔离到期后只放行一个探测请求
+        return not (state.probing and state.in_flight > 0)
+
+    def available(self) -> int:
+        """当前可以接收新任务的 Token 数"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for s in self._states if self._eligible(s, now))
+
+    def acquire(self) -> str:
+        """
+        为一次提交选择 Token
+
+        Returns:
+            选中的 Token；任务结束后需调用 release()
+
+        Raises:
+            RateLimitError: 所有 Token 都处于隔离中
+        """
+        now = time.monotonic()
+        with self._lock:
+            states = self._states
+            n = len(states)
+            chosen: Optional[_TokenState] = None
+            if self.strategy == ROUND_ROBIN:
+                for i in range(n):
+                    state = states[(self._next + i) % n]
+                    if self._eligible(state, now):
+                        chosen = state
+                        self._next = (self._next + i + 1) % n
+                        break
+            else:
+                for i in range(n):
+                    # 从轮转位置开始扫描，负载相同时依次分配
+                    state = states[(self._next + i) % n]
+                    if self._eligible(state, now) and (
+                        chosen is None or state.in_flight < chosen.in_flight
+                    ):
+                        chosen = state
+                self._next = (self._next + 1) % n
+
+            if chosen is None:
+                wait = min(s.quarantined_until for s in states) - now
+                raise RateLimitError(
+                    f"所有Token均已达到使用限制，最早约{max(0.0, wait):.0f}秒后恢复"
+                )
+            if chosen.quarantined_until and not chosen.probing:
+                chosen.probing = True
+                logger.info(f"Probing token {mask_token(chosen.token)} after quarantine")
+            chosen.in_flight += 1
+            chosen.submitted += 1
+            return chosen.token
+
+    def release(self, token: str, success: bool = False) -> None:
+        """任务结束时归还 Token；success 为True时结束探测并清零连续失败次数"""
+        with self._lock:
+            state = self._by_token.get(token)
+            if state is None:
+                return
+            state.in_flight -= 1
+            if success:
+                state.failures = 0
+                state.probing = False
+                state.quarantined_until = 0.0
+
+    def remember(self, task_id: int, token: str) -> None:
+        """记录提交任务所用的 Token，只保留最近 OWNER_HISTORY 个任务"""
+        with self._lock:
+            self._owners[task_id] = token
+            self._owners.move_to_end(task_id)
+            if len(self._owners) > OWNER_HISTORY:
+                self._owners.popitem(last=False)
+
+    def owner(self, task_id: int) -> Optional[str]:
+        """提交任务所用的 Token；不是本进程提交或已超出记录范围时返回None"""
+        with self._lock:
+            return self._owners.get(task_id)
+
+    def report_rate_limit(self, token: str) -> None:
+        """Token 遇到限流：归还并隔离，连续限流时隔离时长翻倍"""
+        with self._lock:
+            state = self._by_token.get(token)
+            if state is None:
+                return
+            state.in_flight -= 1
+            state.rate_limits += 1
+            now = time.monotonic()
+            # 同一轮限流中已在隔离的 Token 不再延长
+            if state.quarantined_until > now and not state.probing:
+                return
+            duration = min(
+                self.max_quarantine, self.quarantine_seconds * (2 ** state.failures)
+            )
+            state.failures += 1
+            state.probing = False
+            state.quarantined_until = now + duration
+        logger.warning(f"Token {mask_token(token)} rate limited, quarantined for {duration:.0f}s")
+
+    def snapshot(self) -> List[TokenStatus]:
+        """返回所有 Token 的状态快照"""
+        now = time.monotonic()
+        with self._lock:
+            result = []
+            for s in self._states:
+                if s.quarantined_until > now:
+                    state = QUARANTINED
+                elif s.probing or s.quarantined_until:
+                    state = PROBING
+                else:
+                    state = ACTIVE
+                result.append(
+                    TokenStatus(
+                        token=mask_token(s.token),
+                        state=state,
+                        in_flight=s.in_flight,
+                        submitted=s.submitted,
+                        rate_limits=s.rate_limits,
+                        quarantined_for=max(0.0, s.quarantined_until - now),
+                    )
+                )
+            return result
@@ -1,9 +1,19 @@
 """
 内部工具函数
 """
+import logging
 import time
-from typing import List
-from .types.chat import ChatMessage
+from typing import Any, Dict, List, Optional, Union
+
+from ._spool import AnswerBuffer, SpooledCompletion
+from .exceptions import AIAPIError, InvalidRequestError, RateLimitError
+from .types.chat import ChatCompletion, ChatMessage, Choice, Usage
+from .types.task import TaskState
+
+logger = logging.getLogger(__name__)
+
+# 连续多少次无法识别任务状态后放弃轮询
+MAX_UNKNOWN_POLLS = 5
 
 
 def get_timestamp() -> int:
@@ -46,3 +56,137 @@ def model_name_to_type(model: str) -> int:
     """
     model_mapping = {"yuanbao": 1, "gemini": 2}
     return model_mapping.get(model.lower(), 1)
+
+
+def build_completion(task_id: int, model: str, answer: str) -> ChatCompletion:
+    """构造ChatCompletion响应"""
+    return ChatCompletion(
+        id=str(task_id),
+        object="chat.completion",
+        created=get_timestamp(),
+        model=model,
+        choices=[
+            Choice(
+                index=0,
+                message=ChatMessage(role="assistant", content=answer),
+                finish_reason="stop",
+            )
+        ],
+        usage=Usage(
+            prompt_tokens=0, completion_tokens=0, total_tokens=0
+        ),
+    )
+
+
+def _is_blank(answer: Union[str, AnswerBuffer]) -> bool:
+    """答案是否为空；流式接收的答案（AnswerBuffer）不读取内容"""
+    if isinstance(answer, str):
+        return not answer.strip()
+    return answer.blank
+
+
+def parse_task_state(result_response: Dict[str, Any]) -> TaskState:
+    """
+    将 /chatResult 响应解析为任务状态
+
+    判断只依据 code 与 message，与答案长度无关；
+    "处理完成"但答案为空视为异常响应（UNKNOWN），由调用方决定是否继续轮询。
+
+    Args:
+        result_response: /chatResult 响应
+
+    Returns:
+        TaskState
+    """
+    # code != 0 表示API调用失败（不是任务失败）
+    if result_response.get("code") != 0:
+        return TaskState.UNKNOWN
+
+    message = result_response.get("message") or ""
+    answer = result_response.get("answer") or ""
+
+    if message == "AI任务处理失败":
+        return TaskState.FAILED
+    if message == "AI任务处理完成":
+        return TaskState.UNKNOWN if _is_blank(answer) else TaskState.SUCCEEDED
+    if "待处理" in message:
+        return TaskState.PENDING
+    if "处理中" in message:
+        return TaskState.RUNNING
+
+    # 兜底：未知 message 但带有答案（文档中提到的情况）
+    if not _is_blank(answer):
+        return TaskState.SUCCEEDED
+    return TaskState.UNKNOWN
+
+
+def check_task_result(
+    task_id: int,
+    model: str,
+    result_response: Dict[str, Any],
+    state: Optional[TaskState] = None,
+) -> Union[ChatCompletion, SpooledCompletion, None]:
+    """
+    根据一次 /chatResult 轮询响应判断任务是否结束
+
+    Args:
+        task_id: 任务ID
+        model: 模型名称
+        result_response: /chatResult 响应
+        state: 已解析的任务状态（可选，未提供时自动解析）
+
+    Returns:
+        任务成功时返回ChatCompletion（答案为流式接收的 AnswerBuffer 时返回 SpooledCompletion），
+        仍需等待（PENDING / RUNNING / UNKNOWN）时返回None
+
+    Raises:
+        RateLimitError: 任务因限流失败
+        InvalidRequestError: 任务执行失败
+    """
+    if state is None:
+        state = parse_task_state(result_response)
+    message = result_response.get("message", "")
+    answer = result_response.get("answer", "")
+
+    if state == TaskState.SUCCEEDED:
+        logger.info(f"Task {task_id} completed successfully")
+        if isinstance(answer, AnswerBuffer):
+            return SpooledCompletion(str(task_id), model, get_timestamp(), answer)
+        return build_completion(task_id, model, answer)
+
+    if state == TaskState.FAILED:
+        if isinstance(answer, AnswerBuffer):
+            answer = answer.text()
+        error_msg = answer if answer else "任务执行失败"
+        logger.error(f"Task {task_id} failed: {error_msg}")
+
+        # 识别限流错误
+        if (
+            "账号达到使用限制" in error_msg
+            or "限制" in error_msg
+            or "quota" in error_msg.lower()
+            or "rate limit" in error_msg.lower()
+        ):
+            raise RateLimitError(
+                message=error_msg,
+                response={"task_id": task_id, "original_error": error_msg},
+            )
+
+        raise InvalidRequestError(f"任务执行失败: {error_msg}")
+
+    if state == TaskState.UNKNOWN:
+        logger.warning(
+            f"Task {task_id} unknown response (code={result_response.get('code')}): {message}"
+        )
+    else:
+        logger.debug(f"Task {task_id}: {message}")
+    return None
+
+
+def unknown_state_error(task_id: int, result_response: Dict[str, Any]) -> AIAPIError:
+    """连续多次无法识别任务状态时返回的错误"""
+    return AIAPIError(
+        f"任务{task_id}连续{MAX_UNKNOWN_POLLS}次返回无法识别的状态: "
+        f"{result_response.get('message', '')}",
+        response=result_response,
+    )
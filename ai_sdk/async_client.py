@@ -20,13 +20,42 @@ AI SDK 异步客户端
 """
 
 import asyncio
-import concurrent.futures
 import logging
 import re
-from typing import Optional, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 from dataclasses import dataclass
 
-from .client import AIClient
+from .cache import BaseCache
+from . import _fork
+from ._codec import JSONCodec
+from ._spool import AnswerBuffer, _AnswerDecoder
+from ._limiter import AsyncAIMDLimiter
+from ._queue import SubmissionQueue
+from ._tenants import TenantScheduler
+from ._journal import TaskJournal
+from ._shared_limiter import SharedRateLimiter
+from ._singleflight import AsyncSingleFlight
+from .client import AIClient, _handle_answer_response, _handle_response
+from .exceptions import AIAPIError, InvalidRequestError
+from .resources.chat import AsyncChat
+from .resources.tasks import AsyncTasks
+from .transports import (
+    AsyncBaseTransport,
+    AsyncioTransport,
+    BaseTransport,
+    PoolStats,
+    build_request,
+)
 from .types.chat import ChatMessage
 
 logger = logging.getLogger(__name__)
@@ -42,12 +71,34 @@ class LLMResponse:
     cost: float = 0.0
 
 
+@dataclass
+class MapResult:
+    """map() / as_completed() 中单个输入的结果，失败时 error 不为空"""
+    index: int  # 输入中的位置
+    prompt: Any
+    response: Optional[LLMResponse] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def text(self) -> Optional[str]:
+        return self.response.text if self.response is not None else None
+
+
+# 批量输入：用户消息字符串，或 generate_with_metadata 的参数字典
+Prompt = Union[str, Dict[str, Any]]
+ProgressCallback = Callable[[int, Optional[int], MapResult], None]
+
+
 class AsyncAIClient:
     """
     AI SDK 异步客户端
 
-    在 asyncio 环境中使用 AI SDK 的包装器，提供以下增强功能：
-    - 异步 API
+    在 asyncio 环境中使用 AI SDK 的客户端，提供以下增强功能：
+    - 原生异步 API（共享连接池，提交与轮询均不占用线程）
     - 自动重试间歇性失败（"任务执行失败"错误）
     - Gemini 模型 System Prompt 自动补全
     - 成本估算
@@ -71,6 +122,9 @@ class AsyncAIClient:
     # Gemini 是推荐的文本生成模型
     DEFAULT_MODEL = "gemini"
 
+    # get_async_client() 返回的共享客户端，close() 与退出 async with 语句时不关闭
+    _shared = False
+
     def __init__(
         self,
         api_token: Optional[str] = None,
@@ -80,6 +134,21 @@ class AsyncAIClient:
         max_retries: int = 3,
         retry_on_rate_limit: bool = True,
         auto_system_prompt: bool = True,
+        retry_delay: float = 5.0,
+        max_connections: int = 100,
+        cache: Optional[BaseCache] = None,
+        coalesce_requests: bool = False,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int = 64,
+        api_tokens: Optional[List[str]] = None,
+        token_strategy: str = "least_loaded",
+        shared_limiter: Optional[SharedRateLimiter] = None,
+        submission_queue: Optional[SubmissionQueue] = None,
+        tenant_scheduler: Optional[TenantScheduler] = None,
+        journal: Optional[TaskJournal] = None,
+        transport: Optional[AsyncBaseTransport] = None,
+        keepalive_expiry: float = 30.0,
+        json_codec: Union[str, JSONCodec, None] = None,
     ):
         """
         初始化异步客户端
@@ -92,23 +161,178 @@ class AsyncAIClient:
             max_retries: 间歇性失败最大重试次数
             retry_on_rate_limit: 遇到限流时是否重试
             auto_system_prompt: 是否自动为 Gemini 添加 System Prompt
+            retry_delay: 限流重试延迟基数（秒），使用指数退避策略
+            max_connections: 异步连接池最大连接数
+            cache: 响应缓存（可选），可与同步客户端共用同一个实例
+            coalesce_requests: 是否合并同时进行的相同请求（跨协程共享同一个上游任务），默认False
+            adaptive_concurrency: 是否启用AIMD自适应并发控制：任务成功时逐步提高在途任务上限，
+                遇到限流时减半，并在限流后重新提交任务，默认False
+            max_concurrency: 自适应并发控制的在途任务上限，默认64
+            api_tokens: 多个API Token（可选），也可通过 AI_API_TOKENS 环境变量设置，见 AIClient
+            token_strategy: Token选择策略，"least_loaded"（默认）或 "round_robin"
+            shared_limiter: 跨进程共享的限流器（可选），同一台机器上的多个进程传入指向同一文件的
+                SharedRateLimiter，即可共享提交速率、在途任务上限与限流退避
+            submission_queue: 本地优先级提交队列（可选），提交前按 priority 排队（带老化），
+                排队已满时阻塞调用方；出队时的有效优先级作为上游 priority 字段
+            tenant_scheduler: 多租户调度器（可选），按请求的 tenant 标签加权公平排队，
+                并限制每个租户的在途任务数，避免一个租户占满共享配额
+            journal: 任务日志（可选），提交的任务在开始轮询前写入日志；进程重启后自动继续轮询
+                未结束的任务，结果通过 tasks.recover() 获取，无需重新提交
+            transport: 异步HTTP传输层（可选），默认使用内置的 asyncio 连接池（AsyncioTransport，
+                连接数上限为 max_connections）；同时实现同步接口的传输层（如 InProcessTransport）
+                也用于内部的同步客户端
+            keepalive_expiry: 默认连接池中空闲连接的保留时间（秒），默认30
+            json_codec: JSON编解码器（可选），见 AIClient
         """
         self._model = model or self.DEFAULT_MODEL
         self.timeout = timeout
         self.max_retries = max_retries
         self.auto_system_prompt = auto_system_prompt
+        self.retry_on_rate_limit = retry_on_rate_limit
+        self.retry_delay = retry_delay
+        self.cache = cache
+        self.shared_limiter = shared_limiter
+        self.submission_queue = submission_queue
+        self.tenant_scheduler = tenant_scheduler
+        self.journal = journal
+        self._singleflight = AsyncSingleFlight() if coalesce_requests else None
+        self.limiter = (
+            AsyncAIMDLimiter(initial_limit=min(8, max_concurrency), max_limit=max_concurrency)
+            if adaptive_concurrency
+            else None
+        )
 
-        # 初始化同步客户端
+        # 初始化同步客户端（负责配置解析，也供需要同步调用的场景使用）
         self.client = AIClient(
             api_token=api_token,
             base_url=base_url,
             timeout=timeout,
             max_retries=max_retries,
             retry_on_rate_limit=retry_on_rate_limit,
+            retry_delay=retry_delay,
+            api_tokens=api_tokens,
+            token_strategy=token_strategy,
+            journal=journal,
+            transport=transport if isinstance(transport, BaseTransport) else None,
+            json_codec=json_codec,
+        )
+        self.api_token = self.client.api_token
+        # 与同步客户端共用Token池（含各Token的在途任务数与隔离状态）
+        self.token_pool = self.client.token_pool
+        self.base_url = self.client.base_url
+        # 与同步客户端共用耗时统计与自适应轮询调度
+        self._schedule = self.client._schedule
+        self._headers = {
+            "Content-Type": "application/json",
+            "x-custom-token": self.api_token,
+        }
+
+        # 共享的异步传输层（连接池），所有请求复用
+        self.transport = transport or AsyncioTransport(
+            max_connections=max_connections, keepalive_expiry=keepalive_expiry
         )
+        self._warmup_connections = min(max_connections, 10)
+
+        # 初始化资源
+        self.chat = AsyncChat(self)
+        self.tasks = AsyncTasks(self)
+
+        _fork.register(self)
 
         logger.info(f"AsyncAIClient initialized with model: {self._model}")
 
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        json: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        content: Optional[bytes] = None,
+        answer: Optional[AnswerBuffer] = None,
+    ) -> Dict[str, Any]:
+        """
+        发送异步HTTP请求，错误映射与 AIClient._request 相同
+
+        token 指定本次请求使用的API Token（可选），默认使用客户端的Token；
+        content 为已编码的JSON请求体（可选），代替 json；
+        answer 为接收 answer 字段的缓冲区（可选），传入时流式读取响应体
+
+        Raises:
+            AuthenticationError: 认证失败
+            InvalidRequestError: 请求参数错误
+            APIConnectionError: 网络连接错误
+            RateLimitError: 请求频率限制
+            AITimeoutError: 请求超时
+            AIAPIError: 其他API错误
+        """
+        request = build_request(
+            method,
+            f"{self.base_url}{endpoint}",
+            {**self._headers, "x-custom-token": token} if token else self._headers,
+            json=json,
+            params=params,
+            timeout=self.client.timeout,
+            content=content,
+            codec=self.client._codec,
+        )
+
+        try:
+            logger.debug(f"Sending {method} request to {request.url}")
+
+            if answer is None:
+                response = await self.transport.handle_async_request(request)
+            else:
+                decoder = _AnswerDecoder(answer, self.client._codec)
+                try:
+                    response = await self.transport.stream_async_request(request, decoder.feed)
+                except ValueError as e:
+                    raise AIAPIError(f"无法解析API响应: {e}")
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Response status: {response.status_code}, body: {response.text[:200]}"
+                )
+
+            if answer is not None:
+                return _handle_answer_response(
+                    response.status_code, response.content, decoder, self.client._codec.decode
+                )
+            return _handle_response(
+                response.status_code, response.content, self.client._codec.decode
+            )
+
+        except (AIAPIError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            raise AIAPIError(f"未知错误: {str(e)}")
+
+    async def _post(
+        self,
+        endpoint: str,
+        json: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        content: Optional[bytes] = None,
+        answer: Optional[AnswerBuffer] = None,
+    ) -> Dict[str, Any]:
+        """发送异步POST请求"""
+        return await self._request(
+            "POST",
+            endpoint,
+            json=json,
+            params=params,
+            token=token,
+            content=content,
+            answer=answer,
+        )
+
+    async def _get(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """发送异步GET请求"""
+        return await self._request("GET", endpoint, params=params)
+
     @property
     def model(self) -> str:
         """获取当前模型名称"""
@@ -121,6 +345,7 @@ class AsyncAIClient:
         max_tokens: int = 4096,
         temperature: float = 0.7,
         priority: int = 50,
+        tenant: Optional[str] = None,
     ) -> str:
         """
         异步生成文本响应
@@ -131,6 +356,7 @@ class AsyncAIClient:
             max_tokens: 最大生成 token 数（AI SDK 不直接支持，仅作记录）
             temperature: 采样温度（AI SDK 不直接支持，仅作记录）
             priority: 任务优先级
+            tenant: 租户标签（可选），配置了 tenant_scheduler 时按租户公平调度
 
         Returns:
             生成的文本内容
@@ -141,6 +367,7 @@ class AsyncAIClient:
             max_tokens=max_tokens,
             temperature=temperature,
             priority=priority,
+            tenant=tenant,
         )
         return response.text
 
@@ -151,6 +378,7 @@ class AsyncAIClient:
         max_tokens: int = 4096,
         temperature: float = 0.7,
         priority: int = 50,
+        tenant: Optional[str] = None,
     ) -> LLMResponse:
         """
         异步生成文本响应，包含元数据
@@ -161,6 +389,7 @@ class AsyncAIClient:
             max_tokens: 最大生成 token 数
             temperature: 采样温度
             priority: 任务优先级
+            tenant: 租户标签（可选），配置了 tenant_scheduler 时按租户公平调度
 
         Returns:
             LLMResponse 包含文本和元数据
@@ -173,20 +402,15 @@ class AsyncAIClient:
 
         for attempt in range(self.max_retries):
             try:
-                # 在线程池中执行同步调用
-                def _sync_call():
-                    return self.client.chat.completions.create(
+                response = await asyncio.wait_for(
+                    self.chat.completions.create(
                         model=self._model,
                         messages=messages,
                         priority=priority,
-                    )
-
-                loop = asyncio.get_running_loop()
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    response = await asyncio.wait_for(
-                        loop.run_in_executor(executor, _sync_call),
-                        timeout=self.timeout,
-                    )
+                        tenant=tenant,
+                    ),
+                    timeout=self.timeout,
+                )
 
                 # 提取响应
                 if not response.choices or len(response.choices) == 0:
@@ -228,6 +452,139 @@ class AsyncAIClient:
 
         raise last_error or RuntimeError("重试后仍然失败")
 
+    async def map(
+        self,
+        prompts: Iterable[Prompt],
+        concurrency: int = 8,
+        system: str = "",
+        priority: int = 50,
+        tenant: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> List[MapResult]:
+        """
+        以有限并发处理一批输入，按输入顺序返回结果
+
+        单个输入失败不影响其他输入，错误记录在对应的 MapResult.error 中。
+        取消 map() 会取消尚未结束的输入。
+
+        用法示例:
+            ```python
+            results = await client.map(["问题1", "问题2", "问题3"], concurrency=4)
+            for r in results:
+                print(r.index, r.text if r.ok else r.error)
+            ```
+
+        Args:
+            prompts: 输入列表；每项为用户消息字符串，或 generate_with_metadata 的参数字典
+                （如 {"system": "...", "user": "...", "priority": 80}）
+            concurrency: 同时进行的请求数，默认8
+            system: 字符串输入使用的 System Prompt
+            priority: 默认任务优先级
+            tenant: 默认租户标签
+            on_progress: 每完成一项调用 on_progress(已完成数, 总数或None, MapResult)
+
+        Returns:
+            MapResult 列表，顺序与输入相同
+        """
+        results = [
+            result
+            async for result in self.as_completed(
+                prompts, concurrency, system, priority, tenant, on_progress
+            )
+        ]
+        results.sort(key=lambda r: r.index)
+        return results
+
+    async def as_completed(
+        self,
+        prompts: Iterable[Prompt],
+        concurrency: int = 8,
+        system: str = "",
+        priority: int = 50,
+        tenant: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> AsyncIterator[MapResult]:
+        """
+        以有限并发处理一批输入，按完成顺序逐个产出结果
+
+        输入按需从 prompts 中读取（可以是生成器），同时进行的请求不超过 concurrency；
+        提交与轮询共用客户端的连接池与自适应轮询调度，不为每项创建线程。
+        提前退出 async for（break）或取消迭代时，尚未结束的输入会被取消。
+
+        用法示例:
+            ```python
+            async for r in client.as_completed(prompts, concurrency=16):
+                if r.ok:
+                    save(r.index, r.text)
+            ```
+
+        参数与 map() 相同。
+
+        Yields:
+            MapResult
+
+        Raises:
+            InvalidRequestError: concurrency 小于1
+        """
+        if concurrency < 1:
+            raise InvalidRequestError("concurrency 至少为1")
+
+        total = len(prompts) if hasattr(prompts, "__len__") else None
+        items = iter(enumerate(prompts))
+        pending: Set["asyncio.Future[MapResult]"] = set()
+        completed = 0
+
+        def start_next() -> bool:
+            try:
+                index, prompt = next(items)
+            except StopIteration:
+                return False
+            pending.add(
+                asyncio.ensure_future(self._map_item(index, prompt, system, priority, tenant))
+            )
+            return True
+
+        try:
+            while len(pending) < concurrency and start_next():
+                pass
+            while pending:
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    pending.discard(future)
+                    result = future.result()
+                    completed += 1
+                    if on_progress is not None:
+                        on_progress(completed, total, result)
+                    # 先补充新的请求再交出结果，保持并发
+                    start_next()
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _map_item(
+        self,
+        index: int,
+        prompt: Prompt,
+        system: str,
+        priority: int,
+        tenant: Optional[str],
+    ) -> MapResult:
+        """处理单个输入，异常记录在结果中"""
+        kwargs: Dict[str, Any] = {"system": system, "priority": priority, "tenant": tenant}
+        if isinstance(prompt, str):
+            kwargs["user"] = prompt
+        else:
+            kwargs.update(prompt)
+        try:
+            response = await self.generate_with_metadata(**kwargs)
+        except Exception as e:
+            logger.debug(f"Item {index} failed: {e}")
+            return MapResult(index=index, prompt=prompt, error=e)
+        return MapResult(index=index, prompt=prompt, response=response)
+
     def _build_messages(self, system: str, user: str) -> List[ChatMessage]:
         """
         构建消息列表
@@ -378,8 +735,57 @@ Please format your response with clear structure:
         except Exception:
             return False
 
+    async def warmup(self, connections: Optional[int] = None) -> int:
+        """
+        预先建立到服务端的连接，避免首批请求承担建连延迟，见 AIClient.warmup
+
+        Args:
+            connections: 预热的连接数，默认10（不超过 max_connections）
+
+        Returns:
+            新建立的连接数；传输层不支持预热时返回0
+        """
+        if connections is None:
+            connections = self._warmup_connections
+        opened = await self.transport.warmup(self.base_url, connections, timeout=self.timeout)
+        logger.info(f"Warmed up {opened} connection(s) to {self.base_url}")
+        return opened
+
+    def pool_stats(self) -> Optional[PoolStats]:
+        """异步传输层的连接池统计，见 AIClient.pool_stats"""
+        return self.transport.pool_stats()
+
+    def _after_fork(self) -> None:
+        """fork 后在子进程中调用，见 AIClient._after_fork（内部的同步客户端自行重置）"""
+        self.transport.after_fork()
+        if self._singleflight is not None:
+            self._singleflight = AsyncSingleFlight()
+        if self.limiter is not None:
+            self.limiter._after_fork()
+        if self.cache is not None:
+            self.cache._after_fork()
+        if self.submission_queue is not None:
+            self.submission_queue._after_fork()
+        if self.tenant_scheduler is not None:
+            self.tenant_scheduler._after_fork()
+        if self.shared_limiter is not None:
+            self.shared_limiter._after_fork()
+        if self.journal is not None:
+            self.journal._after_fork()
+
     def close(self):
         """关闭客户端"""
+        if self._shared:
+            return
+        self.transport.close()
+        if self.client:
+            self.client.close()
+
+    async def aclose(self):
+        """关闭客户端并等待连接关闭完成"""
+        if self._shared:
+            return
+        await self.transport.aclose()
         if self.client:
             self.client.close()
 
@@ -390,4 +796,4 @@ Please format your response with clear structure:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+        await self.aclose()
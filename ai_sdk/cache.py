@@ -0,0 +1,536 @@
+"""
+Chat completion 响应缓存
+
+相同的请求（模型、问题、图片、深度研究、图片生成）在缓存有效期内直接返回上一次的结果，
+不再提交任务和轮询。缓存需要显式启用：
+
+    ```python
+    from ai_sdk import AIClient, MemoryCache
+
+    client = AIClient(cache=MemoryCache(max_bytes=64 * 1024 * 1024, ttl=3600))
+
+    client.chat.completions.create(messages=messages)                   # 提交任务并缓存
+    client.chat.completions.create(messages=messages)                   # 命中缓存
+    client.chat.completions.create(messages=messages, use_cache=False)  # 绕过缓存
+    ```
+
+缓存键为请求体的规范化哈希（见 request_hash），与 Completions.create 构建的
+/chatCompletion 请求体一一对应。
+
+提供两种后端：
+- MemoryCache: 进程内LRU缓存；
+- SQLiteCache: 单文件磁盘缓存（SQLite WAL），多个进程可同时读写，重启后保留。
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .types.chat import ChatCompletion
+
+logger = logging.getLogger(__name__)
+
+# 不影响回答内容的请求字段，不参与缓存键计算
+_IGNORED_FIELDS = ("priority",)
+
+# 每个缓存条目除答案文本外的大致内存开销（字节）：ChatCompletion 及其嵌套对象、键、链表节点
+_ENTRY_OVERHEAD = 1024
+
+
+def request_hash(request_data: Dict[str, Any]) -> str:
+    """
+    计算 /chatCompletion 请求体的规范化哈希
+
+    字段按名称排序、紧凑序列化后取 SHA-256；priority 等不影响结果的字段被忽略。
+
+    Args:
+        request_data: Completions.create 构建的请求体
+
+    Returns:
+        64位十六进制字符串
+    """
+    canonical = {k: v for k, v in request_data.items() if k not in _IGNORED_FIELDS}
+    payload = json.dumps(
+        canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """缓存统计"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（无请求时为0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class BaseCache:
+    """
+    缓存后端基类
+
+    子类实现 get / set / delete / clear / stats；有效期策略在基类中统一处理。
+
+    Args:
+        ttl: 普通文本结果的有效期（秒），None表示永不过期
+        deep_research_ttl: 深度研究结果的有效期（秒），默认与 ttl 相同
+        image_ttl: 图片生成结果的有效期（秒），默认与 ttl 相同
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 3600.0,
+        deep_research_ttl: Optional[float] = None,
+        image_ttl: Optional[float] = None,
+    ):
+        self.ttl = ttl
+        self.deep_research_ttl = deep_research_ttl if deep_research_ttl is not None else ttl
+        self.image_ttl = image_ttl if image_ttl is not None else ttl
+
+    def _after_fork(self) -> None:
+        """fork 后在子进程中调用，重建锁与连接等不能跨进程使用的资源（默认无操作）"""
+
+    def ttl_for(self, deep_research: bool, generate_image: bool) -> Optional[float]:
+        """按任务类型返回有效期"""
+        if generate_image:
+            return self.image_ttl
+        if deep_research:
+            return self.deep_research_ttl
+        return self.ttl
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        """读取缓存，未命中或已过期时返回None"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: ChatCompletion, ttl: Optional[float] = None) -> None:
+        """写入缓存，ttl 为None时永不过期"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """删除一个条目"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """清空缓存"""
+        raise NotImplementedError
+
+    def stats(self) -> CacheStats:
+        """返回统计信息快照"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """释放资源（默认无操作）"""
+
+
+class MemoryCache(BaseCache):
+    """
+    进程内LRU缓存
+
+    按条目的大致字节数限制总内存，超出时淘汰最久未使用的条目；过期条目在读取时清除。
+    线程安全，同步与异步客户端可共用同一个实例。
+
+    Args:
+        max_bytes: 缓存总大小上限（字节），默认64MB
+        ttl / deep_research_ttl / image_ttl: 见 BaseCache
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 3600.0,
+        deep_research_ttl: Optional[float] = None,
+        image_ttl: Optional[float] = None,
+    ):
+        super().__init__(ttl=ttl, deep_research_ttl=deep_research_ttl, image_ttl=image_ttl)
+        self.max_bytes = max_bytes
+        # key -> (过期时间, 字节数, 结果)
+        self._entries: "OrderedDict[str, Tuple[Optional[float], int, ChatCompletion]]" = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(key: str, value: ChatCompletion) -> int:
+        content = sum(len(c.message.content.encode("utf-8")) for c in value.choices)
+        return content + len(key) + _ENTRY_OVERHEAD
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._size -= size
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+        # 返回副本，调用方修改结果不影响缓存
+        return value.model_copy(deep=True)
+
+    def set(self, key: str, value: ChatCompletion, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(key, value)
+        if size > self.max_bytes:
+            logger.debug(f"Cache entry {key[:12]} ({size} bytes) exceeds max_bytes, skipped")
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        value = value.model_copy(deep=True)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (expires_at, size, value)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                entries=len(self._entries),
+                size_bytes=self._size,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """
+    基于SQLite的磁盘缓存，可由多个进程共享
+
+    使用WAL模式，读写互不阻塞；按请求哈希（主键）查询。超过 compress_threshold 的结果
+    以zlib压缩存储。后台线程定期清除过期条目，并在总大小超过 max_bytes 时
+    按最近访问时间淘汰。数据库文件损坏时自动改名备份并重建，缓存读写失败只记录日志、按未命中处理，
+    不影响请求本身。
+
+    用法示例:
+        ```python
+        cache = SQLiteCache("/var/cache/ai_sdk/completions.db", max_bytes=1024 ** 3)
+        client = AIClient(cache=cache)
+        ```
+
+    Args:
+        path: 数据库文件路径
+        max_bytes: 缓存总大小上限（按存储后的字节数计），默认512MB
+        ttl / deep_research_ttl / image_ttl: 见 BaseCache
+        compress_threshold: 超过该字节数的结果压缩存储，默认1024
+        eviction_interval: 后台淘汰的间隔（秒），默认60；None表示不启动后台线程
+    """
+
+    # 读取时最多每隔多少秒更新一次访问时间，避免每次命中都产生写入
+    TOUCH_INTERVAL = 60.0
+
+    # 每批淘汰的最大条目数
+    EVICTION_BATCH = 500
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS completions (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            compressed INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL,
+            accessed_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS completions_expires_at ON completions (expires_at)",
+        "CREATE INDEX IF NOT EXISTS completions_accessed_at ON completions (accessed_at)",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl: Optional[float] = 3600.0,
+        deep_research_ttl: Optional[float] = None,
+        image_ttl: Optional[float] = None,
+        compress_threshold: int = 1024,
+        eviction_interval: Optional[float] = 60.0,
+    ):
+        super().__init__(ttl=ttl, deep_research_ttl=deep_research_ttl, image_ttl=image_ttl)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.eviction_interval = eviction_interval
+
+        self._local = threading.local()
+        self._stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._evictor: Optional[threading.Thread] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    # ---------------------------------------------------------------- 连接管理
+
+    def _after_fork(self) -> None:
+        # SQLite 连接不能跨 fork 使用；后台淘汰线程也不会复制到子进程，需要时重新启动
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        closed, self._closed = self._closed.is_set(), threading.Event()
+        if closed:
+            self._closed.set()
+        self._evictor = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用各自的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _init_db(self) -> None:
+        try:
+            conn = self._connect()
+            conn.execute("PRAGMA quick_check")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            conn.close()
+        except sqlite3.DatabaseError as e:
+            self._recover(e)
+
+    def _recover(self, error: Exception) -> None:
+        """数据库文件损坏：改名备份后重建"""
+        backup = f"{self.path}.corrupt-{int(time.time())}"
+        logger.warning(f"Cache database {self.path} is corrupt ({error}), moved to {backup}")
+        self._local = threading.local()
+        for suffix in ("-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except OSError:
+                pass
+        os.replace(self.path, backup)
+        conn = self._connect()
+        for statement in self._SCHEMA:
+            conn.execute(statement)
+        conn.close()
+
+    # ---------------------------------------------------------------- 编解码
+
+    def _encode(self, value: ChatCompletion) -> Tuple[bytes, bool]:
+        data = value.model_dump_json().encode("utf-8")
+        if len(data) > self.compress_threshold:
+            return zlib.compress(data), True
+        return data, False
+
+    @staticmethod
+    def _decode(data: bytes, compressed: bool) -> ChatCompletion:
+        if compressed:
+            data = zlib.decompress(data)
+        return ChatCompletion.model_validate_json(data)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            setattr(self._stats, name, getattr(self._stats, name) + 1)
+
+    # ---------------------------------------------------------------- 读写
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, compressed, expires_at, accessed_at FROM completions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            data, compressed, expires_at, accessed_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute(
+                    "DELETE FROM completions WHERE key = ? AND expires_at <= ?", (key, now)
+                )
+                self._count("expirations")
+                self._count("misses")
+                return None
+            if now - accessed_at > self.TOUCH_INTERVAL:
+                conn.execute(
+                    "UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            value = self._decode(data, bool(compressed))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"Cache read failed for {key[:12]}: {e}")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return value
+
+    def set(self, key: str, value: ChatCompletion, ttl: Optional[float] = None) -> None:
+        data, compressed = self._encode(value)
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, value, compressed, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    data,
+                    int(compressed),
+                    len(data) + len(key),
+                    now + ttl if ttl is not None else None,
+                    now,
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed for {key[:12]}: {e}")
+            return
+        self._ensure_evictor()
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM completions WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache delete failed for {key[:12]}: {e}")
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM completions")
+
+    def stats(self) -> CacheStats:
+        try:
+            entries, size = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        with self._stats_lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                entries=entries,
+                size_bytes=size,
+            )
+
+    # ---------------------------------------------------------------- 淘汰
+
+    def evict(self) -> int:
+        """
+        清除过期条目，并在总大小超过 max_bytes 时淘汰最久未访问的条目
+
+        由后台线程定期调用，也可以手动调用。
+
+        Returns:
+            删除的条目数
+        """
+        conn = self._conn()
+        now = time.time()
+        expired = conn.execute(
+            "DELETE FROM completions WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        ).rowcount
+
+        evicted = 0
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM completions ORDER BY accessed_at LIMIT ?",
+                (self.EVICTION_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            keys = []
+            for key, size in rows:
+                keys.append((key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("DELETE FROM completions WHERE key = ?", keys)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            evicted += len(keys)
+
+        with self._stats_lock:
+            self._stats.expirations += expired
+            self._stats.evictions += evicted
+        return expired + evicted
+
+    def _ensure_evictor(self) -> None:
+        if self._evictor is not None or self.eviction_interval is None:
+            return
+        with self._stats_lock:
+            if self._evictor is not None:
+                return
+            self._evictor = threading.Thread(
+                target=self._evict_loop, name="ai-sdk-cache-evictor", daemon=True
+            )
+        self._evictor.start()
+
+    def _evict_loop(self) -> None:
+        while not self._closed.wait(self.eviction_interval):
+            try:
+                self.evict()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache eviction failed: {e}")
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+    def close(self) -> None:
+        """停止后台淘汰线程并关闭当前线程的连接"""
+        self._closed.set()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -4,19 +4,32 @@ AI SDK核心客户端
 """
 import os
 import logging
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Union
 import requests
 from dotenv import load_dotenv
 
+from .cache import BaseCache
+from ._codec import JSONCodec, get_codec
+from ._spool import AnswerBuffer, _AnswerDecoder
+from . import _fork
+from ._poller import Poller
+from ._limiter import AIMDLimiter
+from ._queue import SubmissionQueue
+from ._tenants import TenantScheduler
+from ._journal import TaskJournal
+from ._shared_limiter import SharedRateLimiter
+from ._singleflight import SingleFlight
+from ._token_pool import LEAST_LOADED, TokenPool
+from ._schedule import LatencyStats, PollSchedule
+from .resources.batches import Batches
 from .resources.chat import Chat
 from .resources.tasks import Tasks
+from .transports import BaseTransport, PoolStats, RequestsTransport, build_request
 from .exceptions import (
     AIAPIError,
     AuthenticationError,
     InvalidRequestError,
-    APIConnectionError,
     RateLimitError,
-    TimeoutError as AITimeoutError,
 )
 
 # 加载环境变量
@@ -24,11 +37,117 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# 默认的 API base URL
+DEFAULT_BASE_URL = "http://156.254.5.245:8088/api/v1"
+
+
+def _handle_response(
+    status_code: int, content: bytes, decode: Callable[[bytes], Any]
+) -> Dict[str, Any]:
+    """
+    将HTTP响应映射为API数据或SDK异常（同步/异步客户端共用）
+
+    成功的响应直接从字节串解析一次；只有出错时才把响应体解码为文本放进异常信息
+
+    Args:
+        status_code: HTTP状态码
+        content: 响应体
+        decode: 解析JSON字节串的函数，解析失败时抛出ValueError
+
+    Returns:
+        API响应的JSON数据
+
+    Raises:
+        AuthenticationError: 认证失败
+        InvalidRequestError: 请求参数错误
+        RateLimitError: 请求频率限制
+        AIAPIError: 其他API错误
+    """
+
+    # 辅助函数：安全地解析JSON响应
+    def safe_json_parse():
+        try:
+            return decode(content) if content else None
+        except ValueError:
+            return None
+
+    if status_code != 200:
+        text = content.decode("utf-8", errors="replace")
+
+    # 处理HTTP错误
+    if status_code == 401 or status_code == 403:
+        raise AuthenticationError(
+            "认证失败，请检查API Token是否正确", status_code=status_code
+        )
+    elif status_code == 400:
+        raise InvalidRequestError(
+            f"请求参数错误: {text}",
+            status_code=status_code,
+            response=safe_json_parse(),
+        )
+    elif status_code == 429:
+        raise RateLimitError(
+            "请求频率超限，请稍后再试", status_code=status_code
+        )
+    elif status_code >= 500:
+        raise AIAPIError(
+            f"服务器错误: {text}",
+            status_code=status_code,
+            response=safe_json_parse(),
+        )
+    elif status_code != 200:
+        raise AIAPIError(
+            f"请求失败: {text}",
+            status_code=status_code,
+            response=safe_json_parse(),
+        )
+
+    # 解析响应
+    try:
+        data = decode(content)
+    except ValueError:
+        raise AIAPIError(f"无法解析API响应: {content.decode('utf-8', errors='replace')}")
+
+    return _check_success(data)
+
+
+def _check_success(data: Dict[str, Any]) -> Dict[str, Any]:
+    """检查业务错误"""
+    if not data.get("success", True):
+        error_msg = data.get("message", "未知错误")
+        raise AIAPIError(f"API返回错误: {error_msg}", response=data)
+
+    return data
+
+
+def _handle_answer_response(
+    status_code: int,
+    content: bytes,
+    decoder: _AnswerDecoder,
+    decode: Callable[[bytes], Any],
+) -> Dict[str, Any]:
+    """
+    流式接收的响应：状态码为200时响应体已交给 decoder，其他状态码与 _handle_response 相同
+
+    Returns:
+        API响应的JSON数据，answer 字段为 AnswerBuffer
+    """
+    if status_code != 200:
+        return _handle_response(status_code, content, decode)
+    try:
+        data = decoder.finish()
+    except ValueError as e:
+        raise AIAPIError(f"无法解析API响应: {e}")
+    return _check_success(data)
+
 
 class AIClient:
     """
     AI API客户端
 
+    AIClient 是线程安全的：多个线程可以共用同一个实例（共用连接池与后台轮询器），
+    无需每个线程创建客户端。
+
     用法示例:
         ```python
         from ai_sdk import AIClient
@@ -49,6 +168,9 @@ class AIClient:
         ```
     """
 
+    # get_client() 返回的共享客户端，close() 与退出 with 语句时不关闭
+    _shared = False
+
     def __init__(
         self,
         api_token: Optional[str] = None,
@@ -57,6 +179,22 @@ class AIClient:
         max_retries: int = 0,
         retry_on_rate_limit: bool = False,
         retry_delay: float = 5.0,
+        poll_workers: int = 4,
+        latency_stats_path: Optional[str] = None,
+        cache: Optional[BaseCache] = None,
+        coalesce_requests: bool = False,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int = 64,
+        api_tokens: Optional[List[str]] = None,
+        token_strategy: str = LEAST_LOADED,
+        shared_limiter: Optional[SharedRateLimiter] = None,
+        submission_queue: Optional[SubmissionQueue] = None,
+        tenant_scheduler: Optional[TenantScheduler] = None,
+        journal: Optional[TaskJournal] = None,
+        transport: Optional[BaseTransport] = None,
+        max_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        json_codec: Union[str, JSONCodec, None] = None,
     ):
         """
         初始化AI客户端
@@ -68,15 +206,47 @@ class AIClient:
             max_retries: 最大重试次数，默认0（不重试）
             retry_on_rate_limit: 遇到限流错误时是否自动重试，默认False
             retry_delay: 重试延迟基数（秒），使用指数退避策略，默认5.0秒
+            poll_workers: 后台轮询器的工作线程数，默认4
+            latency_stats_path: 任务耗时统计的持久化文件（可选），
+                也可通过环境变量AI_LATENCY_STATS_PATH设置；用于跨进程重启保留自适应轮询数据
+            cache: 响应缓存（可选），例如 MemoryCache()；相同请求在有效期内直接返回缓存结果
+            coalesce_requests: 是否合并同时进行的相同请求（跨线程共享同一个上游任务），默认False
+            adaptive_concurrency: 是否启用AIMD自适应并发控制：任务成功时逐步提高在途任务上限，
+                遇到限流时减半，并在限流后重新提交任务，默认False
+            max_concurrency: 自适应并发控制的在途任务上限，默认64
+            api_tokens: 多个API Token（可选），也可通过环境变量AI_API_TOKENS（逗号分隔）设置；
+                提供时每次提交任务从池中选择一个Token，限流的Token会被暂时隔离
+            token_strategy: Token选择策略，"least_loaded"（默认）或 "round_robin"
+            shared_limiter: 跨进程共享的限流器（可选），同一台机器上的多个进程传入指向同一文件的
+                SharedRateLimiter，即可共享提交速率、在途任务上限与限流退避
+            submission_queue: 本地优先级提交队列（可选），提交前按 priority 排队（带老化），
+                排队已满时阻塞调用方；出队时的有效优先级作为上游 priority 字段
+            tenant_scheduler: 多租户调度器（可选），按请求的 tenant 标签加权公平排队，
+                并限制每个租户的在途任务数，避免一个租户占满共享配额
+            journal: 任务日志（可选），提交的任务在开始轮询前写入日志；进程重启后自动继续轮询
+                未结束的任务，结果通过 tasks.recover() 获取，无需重新提交
+            transport: HTTP传输层（可选），默认使用 requests.Session（RequestsTransport）；
+                可换成 Urllib3Transport 以降低每个请求的开销，或 InProcessTransport 用于测试
+            max_connections: 默认传输层同时进行的请求数上限，也是保留的 keep-alive 连接数，默认32；
+                超过时请求等待空闲连接，等待次数与时长见 pool_stats()
+            keepalive_expiry: 默认传输层的连接池空闲超过该时长（秒）后丢弃空闲连接，默认30
+            json_codec: 请求体与响应体的JSON编解码器（可选），"orjson" / "msgspec" / "json" 或
+                JSONCodec 实例；默认读取环境变量AI_JSON_CODEC，未设置时使用已安装的最快实现
 
         Raises:
             AuthenticationError: Token未提供或无效
         """
-        # 默认的 API base URL
-        DEFAULT_BASE_URL = "http://156.254.5.245:8088/api/v1"
-
         # 获取配置
-        self.api_token = api_token or os.getenv("AI_API_TOKEN")
+        if api_tokens is None and os.getenv("AI_API_TOKENS"):
+            api_tokens = os.getenv("AI_API_TOKENS").split(",")
+        self.token_pool = (
+            TokenPool(api_tokens, strategy=token_strategy) if api_tokens else None
+        )
+        self.api_token = (
+            api_token
+            or os.getenv("AI_API_TOKEN")
+            or (self.token_pool.tokens[0] if self.token_pool else None)
+        )
         self.base_url = (
             base_url or
             os.getenv("AI_API_BASE_URL") or
@@ -86,6 +256,17 @@ class AIClient:
         self.max_retries = max_retries
         self.retry_on_rate_limit = retry_on_rate_limit
         self.retry_delay = retry_delay
+        self.cache = cache
+        self.shared_limiter = shared_limiter
+        self.submission_queue = submission_queue
+        self.tenant_scheduler = tenant_scheduler
+        self.journal = journal
+        self._singleflight = SingleFlight() if coalesce_requests else None
+        self.limiter = (
+            AIMDLimiter(initial_limit=min(8, max_concurrency), max_limit=max_concurrency)
+            if adaptive_concurrency
+            else None
+        )
 
         # 验证配置
         if not self.api_token:
@@ -93,18 +274,42 @@ class AIClient:
                 "API Token未提供。请设置AI_API_TOKEN环境变量或在初始化时传入api_token参数"
             )
 
-        # 创建session
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "Content-Type": "application/json",
-                "x-custom-token": self.api_token,
-            }
+        # 所有请求经过传输层发送
+        self._headers = {
+            "Content-Type": "application/json",
+            "x-custom-token": self.api_token,
+        }
+        if transport is None:
+            transport = RequestsTransport(
+                max_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            )
+        self.session = getattr(transport, "session", None)
+        self.transport = transport
+        self._codec = get_codec(json_codec)
+        # 预热的默认连接数：一个提交 + 每个轮询线程一个
+        self._warmup_connections = min(max_connections, poll_workers + 1)
+
+        # 按历史耗时分布自适应决定轮询间隔
+        self._latency_stats = LatencyStats(
+            path=latency_stats_path or os.getenv("AI_LATENCY_STATS_PATH")
         )
+        self._schedule = PollSchedule(self._latency_stats)
+
+        # 所有未完成任务共用一个后台轮询器
+        self._poller = Poller(self, max_workers=poll_workers, schedule=self._schedule)
 
         # 初始化资源
         self.chat = Chat(self)
         self.tasks = Tasks(self)
+        self.batches = Batches(self)
+
+        # 继续轮询上次进程退出时尚未结束的任务
+        if journal is not None:
+            self.tasks._reattach()
+
+        # fork 出的子进程中丢弃从父进程继承的连接与轮询状态
+        _fork.register(self)
 
         logger.info(f"AIClient initialized with base_url: {self.base_url}")
 
@@ -114,6 +319,9 @@ class AIClient:
         endpoint: str,
         json: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        content: Optional[bytes] = None,
+        answer: Optional[AnswerBuffer] = None,
     ) -> Dict[str, Any]:
         """
         发送HTTP请求
@@ -123,6 +331,10 @@ class AIClient:
             endpoint: API端点 (例如 "/chatCompletion")
             json: JSON请求体
             params: URL查询参数
+            token: 本次请求使用的API Token（可选），默认使用客户端的Token
+            content: 已编码的JSON请求体（可选），代替 json
+            answer: 接收 answer 字段的缓冲区（可选）；传入时流式读取响应体，
+                answer 字段直接写入该缓冲区，返回数据中的 answer 为该缓冲区
 
         Returns:
             API响应的JSON数据
@@ -135,78 +347,43 @@ class AIClient:
             AITimeoutError: 请求超时
             AIAPIError: 其他API错误
         """
-        url = f"{self.base_url}{endpoint}"
+        request = build_request(
+            method,
+            f"{self.base_url}{endpoint}",
+            {**self._headers, "x-custom-token": token} if token else self._headers,
+            json=json,
+            params=params,
+            timeout=self.timeout,
+            content=content,
+            codec=self._codec,
+        )
 
         try:
-            logger.debug(f"Sending {method} request to {url}")
-
-            response = self.session.request(
-                method=method,
-                url=url,
-                json=json,
-                params=params,
-                timeout=self.timeout,
-            )
+            logger.debug(f"Sending {method} request to {request.url}")
 
-            # 记录响应
-            logger.debug(
-                f"Response status: {response.status_code}, body: {response.text[:200]}"
-            )
-
-            # 辅助函数：安全地解析JSON响应
-            def safe_json_parse():
+            if answer is None:
+                response = self.transport.handle_request(request)
+            else:
+                decoder = _AnswerDecoder(answer, self._codec)
                 try:
-                    return response.json() if response.text else None
-                except ValueError:
-                    return None
-
-            # 处理HTTP错误
-            if response.status_code == 401 or response.status_code == 403:
-                raise AuthenticationError(
-                    "认证失败，请检查API Token是否正确", status_code=response.status_code
-                )
-            elif response.status_code == 400:
-                raise InvalidRequestError(
-                    f"请求参数错误: {response.text}",
-                    status_code=response.status_code,
-                    response=safe_json_parse(),
-                )
-            elif response.status_code == 429:
-                raise RateLimitError(
-                    "请求频率超限，请稍后再试", status_code=response.status_code
+                    response = self.transport.stream_request(request, decoder.feed)
+                except ValueError as e:
+                    raise AIAPIError(f"无法解析API响应: {e}")
+
+            # 记录响应（只在开启DEBUG日志时才解码响应体）
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Response status: {response.status_code}, body: {response.text[:200]}"
                 )
-            elif response.status_code >= 500:
-                raise AIAPIError(
-                    f"服务器错误: {response.text}",
-                    status_code=response.status_code,
-                    response=safe_json_parse(),
-                )
-            elif response.status_code != 200:
-                raise AIAPIError(
-                    f"请求失败: {response.text}",
-                    status_code=response.status_code,
-                    response=safe_json_parse(),
+
+            if answer is not None:
+                return _handle_answer_response(
+                    response.status_code, response.content, decoder, self._codec.decode
                 )
+            return _handle_response(response.status_code, response.content, self._codec.decode)
 
-            # 解析响应
-            try:
-                data = response.json()
-            except ValueError:
-                raise AIAPIError(f"无法解析API响应: {response.text}")
-
-            # 检查业务错误
-            if not data.get("success", True):
-                error_msg = data.get("message", "未知错误")
-                raise AIAPIError(f"API返回错误: {error_msg}", response=data)
-
-            return data
-
-        except requests.exceptions.Timeout:
-            raise AITimeoutError(f"请求超时 ({self.timeout}秒)")
-        except requests.exceptions.ConnectionError as e:
-            raise APIConnectionError(f"网络连接错误: {str(e)}")
-        except (AuthenticationError, InvalidRequestError, RateLimitError, AITimeoutError, AIAPIError):
-            # 已经是我们定义的异常，直接抛出
+        except AIAPIError:
+            # 已经是我们定义的异常（传输层已将超时、连接错误转换为SDK异常），直接抛出
             raise
         except Exception as e:
             # 其他未知错误
@@ -217,6 +394,9 @@ class AIClient:
         endpoint: str,
         json: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        content: Optional[bytes] = None,
+        answer: Optional[AnswerBuffer] = None,
     ) -> Dict[str, Any]:
         """
         发送POST请求
@@ -225,11 +405,22 @@ class AIClient:
             endpoint: API端点
             json: JSON请求体
             params: URL查询参数
+            token: 本次请求使用的API Token（可选）
+            content: 已编码的JSON请求体（可选），代替 json
+            answer: 接收 answer 字段的缓冲区（可选），见 _request
 
         Returns:
             API响应
         """
-        return self._request("POST", endpoint, json=json, params=params)
+        return self._request(
+            "POST",
+            endpoint,
+            json=json,
+            params=params,
+            token=token,
+            content=content,
+            answer=answer,
+        )
 
     def _get(
         self, endpoint: str, params: Optional[Dict[str, Any]] = None
@@ -246,9 +437,67 @@ class AIClient:
         """
         return self._request("GET", endpoint, params=params)
 
+    def warmup(self, connections: Optional[int] = None) -> int:
+        """
+        预先建立到服务端的连接（TCP/TLS握手），避免首批请求承担建连延迟
+
+        Args:
+            connections: 预热的连接数，默认为轮询线程数+1（不超过 max_connections）
+
+        Returns:
+            新建立的连接数；传输层不支持预热时返回0
+        """
+        if connections is None:
+            connections = self._warmup_connections
+        opened = self.transport.warmup(self.base_url, connections, timeout=self.timeout)
+        logger.info(f"Warmed up {opened} connection(s) to {self.base_url}")
+        return opened
+
+    def pool_stats(self) -> Optional[PoolStats]:
+        """
+        传输层连接池统计：新建连接数、连接数达到上限时的等待次数与时长等
+
+        Returns:
+            PoolStats；传输层不支持统计时返回None
+        """
+        return self.transport.pool_stats()
+
+    def _after_fork(self) -> None:
+        """
+        fork 后在子进程中调用（见 _fork）：丢弃继承的连接、父进程的轮询任务与在途计数，重建锁
+
+        父进程中提交、尚未完成的任务只由父进程继续轮询；连接与轮询线程在子进程第一次使用时重新建立
+        """
+        self.transport.after_fork()
+        self._latency_stats._after_fork()
+        self._poller = Poller(self, max_workers=self._poller.max_workers, schedule=self._schedule)
+        if self._singleflight is not None:
+            self._singleflight = SingleFlight()
+        if self.limiter is not None:
+            self.limiter._after_fork()
+        if self.token_pool is not None:
+            self.token_pool._after_fork()
+        if self.cache is not None:
+            self.cache._after_fork()
+        if self.submission_queue is not None:
+            self.submission_queue._after_fork()
+        if self.tenant_scheduler is not None:
+            self.tenant_scheduler._after_fork()
+        if self.shared_limiter is not None:
+            self.shared_limiter._after_fork()
+        if self.journal is not None:
+            self.journal._after_fork()
+        logger.debug(f"AIClient reset after fork in process {os.getpid()}")
+
     def close(self):
-        """关闭客户端，清理资源"""
-        self.session.close()
+        """关闭客户端，清理资源（get_client() 返回的共享客户端由 close_shared_clients() 关闭）"""
+        if self._shared:
+            return
+        self._poller.close()
+        if self.journal is not None:
+            self.journal.flush()
+        self._latency_stats.save()
+        self.transport.close()
         logger.info("AIClient closed")
 
     def __enter__(self):
@@ -37,6 +37,12 @@ class InvalidRequestError(AIAPIError):
     pass
 
 
+class TenantQueueFullError(InvalidRequestError):
+    """租户排队任务数已达上限 - 本地拒绝，不是服务端限流，不会自动重试"""
+
+    pass
+
+
 class APIConnectionError(AIAPIError):
     """API连接错误"""
 
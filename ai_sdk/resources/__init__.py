@@ -1,7 +1,18 @@
 """
 资源模块
 """
-from .chat import Chat, Completions
-from .tasks import Tasks
+from .batches import Batches, BatchSummary
+from .chat import AsyncChat, AsyncCompletions, Chat, CompletionResult, Completions
+from .tasks import AsyncTasks, Tasks
 
-__all__ = ["Chat", "Completions", "Tasks"]
+__all__ = [
+    "Chat",
+    "Completions",
+    "CompletionResult",
+    "Tasks",
+    "Batches",
+    "BatchSummary",
+    "AsyncChat",
+    "AsyncCompletions",
+    "AsyncTasks",
+]
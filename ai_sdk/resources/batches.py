@@ -0,0 +1,370 @@
+"""
+批量任务资源模块
+从JSONL文件流式读取请求，按给定并发提交并轮询，结果逐条写入输出JSONL文件
+"""
+import collections
+import heapq
+import json
+import logging
+import os
+import queue
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from ..cache import request_hash
+from ..exceptions import AIAPIError, InvalidRequestError, RateLimitError
+from ..types.chat import ChatCompletion
+from .chat import _REQUEST_FIELDS, _build_request_data, _retry_wait
+
+if TYPE_CHECKING:
+    from .._poller import TaskHandle
+    from ..client import AIClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchSummary:
+    """一次批量运行的统计"""
+
+    total: int = 0  # 读取的输入行数
+    succeeded: int = 0
+    failed: int = 0
+    resumed: int = 0  # 输出文件中已有成功结果、本次跳过的行数
+    deduplicated: int = 0  # 与其他行请求相同、未单独提交的行数
+    submitted: int = 0  # 实际提交的任务数（含限流后的重新提交）
+    elapsed: float = 0.0
+
+
+class _Bitmap:
+    """按行号记录已完成的行，每行占1位"""
+
+    def __init__(self):
+        self._bits = bytearray()
+
+    def add(self, n: int) -> None:
+        index = n >> 3
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        self._bits[index] |= 1 << (n & 7)
+
+    def __contains__(self, n: int) -> bool:
+        index = n >> 3
+        return index < len(self._bits) and bool(self._bits[index] & (1 << (n & 7)))
+
+
+class _Row:
+    __slots__ = (
+        "line", "custom_id", "model", "request_data", "deep_research", "generate_image",
+        "tenant", "key", "attempt",
+    )
+
+    def __init__(self, line: int, custom_id: Any):
+        self.line = line
+        self.custom_id = custom_id
+        self.attempt = 0
+
+
+def _load_finished(output_path: str) -> _Bitmap:
+    """
+    扫描已有的输出文件，记录已成功的行号
+
+    进程崩溃时最后一行可能只写了一半，这里将文件截断到最后一个完整的行。
+    """
+    finished = _Bitmap()
+    if not os.path.exists(output_path):
+        return finished
+
+    good = 0
+    with open(output_path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            if record.get("error") is None and "line" in record:
+                finished.add(record["line"])
+            good += len(raw)
+    if good != os.path.getsize(output_path):
+        logger.warning(f"Truncating partial record at byte {good} of {output_path}")
+        with open(output_path, "r+b") as f:
+            f.truncate(good)
+    return finished
+
+
+def _error_record(exception: BaseException) -> Dict[str, str]:
+    return {"type": type(exception).__name__, "message": str(exception)}
+
+
+class _Writer:
+    """结果写入：攒够 flush_every 条或超过 flush_interval 秒时统一写入并落盘"""
+
+    def __init__(self, path: str, flush_every: int, flush_interval: float, fsync: bool):
+        self._file = open(path, "a", encoding="utf-8")
+        self._buffer: List[str] = []
+        self._flush_every = flush_every
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._last_flush = time.monotonic()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if (
+            len(self._buffer) >= self._flush_every
+            or time.monotonic() - self._last_flush >= self._flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class Batches:
+    """批量任务资源类"""
+
+    def __init__(self, client: "AIClient"):
+        self._client = client
+
+    def run(
+        self,
+        input_path: str,
+        output_path: str,
+        concurrency: int = 16,
+        model: str = "yuanbao",
+        flush_every: int = 100,
+        flush_interval: float = 1.0,
+        fsync: bool = True,
+        dedup_window: int = 10000,
+    ) -> BatchSummary:
+        """
+        运行JSONL批量任务，可在中断后用相同参数重新运行以继续
+
+        输入文件每行一个JSON对象，字段与 create() 的参数相同（messages 必填），
+        可选的 custom_id 原样写入输出；也可以把参数放在 body 字段中：
+
+            {"custom_id": "q1", "messages": [{"role": "user", "content": "你好"}]}
+            {"custom_id": "q2", "body": {"model": "gemini", "messages": [...]}}
+
+        输出文件每行一条结果，line 为输入行号（从0开始）：
+
+            {"line": 0, "custom_id": "q1", "response": {...ChatCompletion...}, "error": null}
+            {"line": 1, "custom_id": "q2", "response": null, "error": {"type": "...", "message": "..."}}
+
+        - 输入按行流式读取，同时在途的任务不超过 concurrency，内存占用与输入大小无关；
+        - 提交与轮询流水线进行：任务由后台轮询器统一轮询，结束后立即补充新的提交；
+        - 请求相同的行只提交一次（在途的相同请求，以及最近 dedup_window 个已完成的请求）；
+        - 结果按组写入：每 flush_every 条或每 flush_interval 秒写入并落盘一次；
+        - 重新运行时跳过输出文件中已成功的行，失败的行会重新提交并追加新的结果
+          （同一行有多条记录时以最后一条为准）。
+
+        Args:
+            input_path: 输入JSONL文件路径
+            output_path: 输出JSONL文件路径（追加写入）
+            concurrency: 同时在途的任务数，默认16
+            model: 输入行未指定 model 时使用的模型，默认 "yuanbao"
+            flush_every: 每组写入的结果条数，默认100
+            flush_interval: 两次写入的最长间隔（秒），默认1
+            fsync: 每组写入后是否调用 fsync 落盘，默认True
+            dedup_window: 记住最近多少个已完成请求的结果用于去重，默认10000；
+                0表示只合并在途的相同请求
+
+        Returns:
+            BatchSummary
+
+        Raises:
+            InvalidRequestError: 参数无效
+        """
+        if concurrency < 1 or flush_every < 1:
+            raise InvalidRequestError("concurrency 与 flush_every 至少为1")
+
+        started = time.monotonic()
+        summary = BatchSummary()
+        finished = _load_finished(output_path)
+        writer = _Writer(output_path, flush_every, flush_interval, fsync)
+        done: "queue.Queue[Tuple[_Row, TaskHandle]]" = queue.Queue()
+        # 在途的请求：key -> 等待同一结果的其他行
+        in_flight: Dict[str, List[_Row]] = {}
+        recent: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        # 等待重新提交的限流任务：(到期时间, 行号, 行)
+        retries: List[Tuple[float, int, _Row]] = []
+
+        def record(row: _Row, response: Optional[Dict[str, Any]], error=None) -> None:
+            writer.write(
+                {
+                    "line": row.line,
+                    "custom_id": row.custom_id,
+                    "response": response,
+                    "error": error,
+                }
+            )
+            if error is None:
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+
+        def retryable(row: _Row, exception: Optional[BaseException]) -> bool:
+            client = self._client
+            return (
+                isinstance(exception, RateLimitError)
+                and client.retry_on_rate_limit
+                and row.attempt < client.max_retries
+            )
+
+        def schedule(row: _Row) -> None:
+            """按客户端的重试退避安排重新提交，不阻塞读取与写入"""
+            wait = _retry_wait(self._client, row.attempt)
+            row.attempt += 1
+            logger.warning(
+                f"Batch line {row.line} rate limited, resubmitting in {wait:.1f}s "
+                f"({row.attempt}/{self._client.max_retries})"
+            )
+            heapq.heappush(retries, (time.monotonic() + wait, row.line, row))
+
+        def submit(row: _Row) -> None:
+            try:
+                handle = self._client.chat.completions._submit(
+                    row.request_data, row.model, row.deep_research, row.generate_image, row.tenant
+                )
+            except AIAPIError as e:
+                if retryable(row, e):
+                    schedule(row)
+                else:
+                    complete(row, None, e)
+                return
+            summary.submitted += 1
+            handle.add_done_callback(lambda h: done.put((row, h)))
+
+        def complete(row: _Row, completion: Optional[ChatCompletion], error) -> None:
+            followers = in_flight.pop(row.key, [])
+            if error is not None:
+                for r in [row] + followers:
+                    record(r, None, _error_record(error))
+                return
+            response = completion.model_dump(mode="json")
+            cache = self._client.cache
+            if cache is not None:
+                cache.set(row.key, completion, cache.ttl_for(row.deep_research, row.generate_image))
+            if dedup_window:
+                recent[row.key] = response
+                if len(recent) > dedup_window:
+                    recent.popitem(last=False)
+            for r in [row] + followers:
+                record(r, response)
+
+        def drain(block: bool) -> None:
+            """处理已结束的任务，并重新提交退避已到期的限流任务"""
+            timeout = None
+            if block:
+                timeout = flush_interval
+                if retries:
+                    # 最多等到下一个限流任务到期
+                    timeout = min(timeout, max(0.0, retries[0][0] - time.monotonic()))
+            try:
+                item: Optional[Tuple[_Row, "TaskHandle"]] = done.get(block=block, timeout=timeout)
+            except queue.Empty:
+                writer.flush()
+                item = None
+            while item is not None:
+                row, handle = item
+                exception = handle.exception()
+                if retryable(row, exception):
+                    schedule(row)
+                else:
+                    complete(row, None if exception else handle.result(), exception)
+                try:
+                    item = done.get_nowait()
+                except queue.Empty:
+                    item = None
+            now = time.monotonic()
+            while retries and retries[0][0] <= now:
+                submit(heapq.heappop(retries)[2])
+
+        try:
+            for row in self._read(input_path, model, summary):
+                if row.line in finished:
+                    summary.resumed += 1
+                    continue
+                if isinstance(row.request_data, Exception):
+                    record(row, None, _error_record(row.request_data))
+                    continue
+
+                if row.key in in_flight:
+                    summary.deduplicated += 1
+                    in_flight[row.key].append(row)
+                    continue
+                if row.key in recent:
+                    summary.deduplicated += 1
+                    recent.move_to_end(row.key)
+                    record(row, recent[row.key])
+                    continue
+                cache = self._client.cache
+                cached = cache.get(row.key) if cache is not None else None
+                if cached is not None:
+                    record(row, cached.model_dump(mode="json"))
+                    continue
+
+                while len(in_flight) >= concurrency:
+                    drain(block=True)
+                in_flight[row.key] = []
+                submit(row)
+
+            while in_flight:
+                drain(block=True)
+        finally:
+            writer.close()
+
+        summary.elapsed = time.monotonic() - started
+        logger.info(
+            f"Batch finished: {summary.succeeded} succeeded, {summary.failed} failed, "
+            f"{summary.resumed} resumed, {summary.deduplicated} deduplicated "
+            f"in {summary.elapsed:.1f}s"
+        )
+        return summary
+
+    def _read(self, input_path: str, model: str, summary: BatchSummary) -> Iterator[_Row]:
+        """逐行读取输入文件并构建请求体；无效的行以异常作为 request_data 返回"""
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line, text in enumerate(f):
+                if not text.strip():
+                    continue
+                summary.total += 1
+                row = _Row(line, None)
+                try:
+                    data = json.loads(text)
+                    if not isinstance(data, dict):
+                        raise InvalidRequestError("输入行必须是JSON对象")
+                    row.custom_id = data.get("custom_id")
+                    body = data.get("body", data)
+                    params = {k: body[k] for k in _REQUEST_FIELDS if k in body}
+                    row.model = params.get("model", model)
+                    row.deep_research = bool(params.get("deep_research", False))
+                    row.generate_image = bool(params.get("generate_image", False))
+                    row.tenant = params.get("tenant")
+                    row.request_data = _build_request_data(
+                        row.model,
+                        params.get("messages"),
+                        params.get("image_url"),
+                        params.get("image_data"),
+                        row.deep_research,
+                        row.generate_image,
+                        params.get("priority", 0),
+                    )
+                    row.key = request_hash(row.request_data)
+                except (ValueError, TypeError, InvalidRequestError) as e:
+                    if not isinstance(e, InvalidRequestError):
+                        e = InvalidRequestError(f"无效的输入行: {e}")
+                    row.request_data = e
+                yield row
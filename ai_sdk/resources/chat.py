@@ -2,35 +2,337 @@
 Chat资源模块
 实现类似OpenAI的chat.completions接口
 """
+import asyncio
+import functools
+import heapq
 import logging
+import queue
+import sqlite3
+import threading
 import time
-from typing import TYPE_CHECKING, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from ..types.chat import (
     ChatCompletion,
     ChatCompletionRequest,
     ChatMessage,
-    Choice,
-    Usage,
 )
+from ..types.task import TaskState
+from ..cache import BaseCache, MemoryCache, request_hash
+from .._codec import poll_body
+from .._limiter import DROPPED, RATE_LIMITED, SUCCESS
+from .._poller import TaskHandle
+from .._spool import DEFAULT_SPOOL_THRESHOLD, AnswerBuffer, SpooledCompletion
+from .._singleflight import CoalescingStats
+from .._schedule import schedule_key
 from .._utils import (
+    MAX_UNKNOWN_POLLS,
+    check_task_result,
     extract_question_from_messages,
-    get_timestamp,
     model_name_to_type,
+    parse_task_state,
+    unknown_state_error,
 )
 from ..exceptions import (
+    APIConnectionError,
     InvalidRequestError,
     RateLimitError,
-    APIConnectionError,
     TimeoutError as AITimeoutError,
     AIAPIError,
 )
 
 if TYPE_CHECKING:
+    from .._journal import TaskJournal
+    from .._poller import _PollTask
+    from .._queue import QueueTicket
+    from .._shared_limiter import SharedRateLimiter
+    from .._tenants import TenantTicket
     from ..client import AIClient
+    from ..async_client import AsyncAIClient
 
 logger = logging.getLogger(__name__)
 
+# 等待任务结果的总时长上限（秒），与原先 60 次轮询的总等待时间一致
+TEXT_WAIT_TIMEOUT = 60 * 2
+IMAGE_WAIT_TIMEOUT = 30 + 60 * 60
+
+# create() 中可以出现在批量请求字典里的参数
+_REQUEST_FIELDS = (
+    "model", "messages", "image_url", "image_data", "deep_research",
+    "generate_image", "priority", "tenant",
+)
+
+# create_many() / imap() 并行提交任务的线程数上限（只负责 /chatCompletion，轮询由后台轮询器完成）
+_SUBMIT_WORKERS = 4
+
+
+def _build_request_data(
+    model: str,
+    messages: Optional[List[ChatMessage]],
+    image_url: Optional[str],
+    image_data: Optional[str],
+    deep_research: bool,
+    generate_image: bool,
+    priority: int,
+) -> Dict[str, Any]:
+    """
+    校验参数并构建 /chatCompletion 请求体（同步/异步共用）
+
+    Raises:
+        InvalidRequestError: 参数错误
+    """
+    # 参数验证
+    if not messages or len(messages) == 0:
+        raise InvalidRequestError("messages参数不能为空")
+
+    # 验证 image_url 和 image_data 不能同时使用
+    if image_url and image_data:
+        raise InvalidRequestError(
+            "image_url 和 image_data 不能同时提供，请只使用其中一个"
+        )
+
+    # 转换messages为字典列表（如果传入的是ChatMessage对象）
+    if isinstance(messages[0], ChatMessage):
+        messages_list = messages
+    else:
+        # 如果传入的是字典，转换为ChatMessage对象
+        messages_list = [
+            ChatMessage(**msg) if isinstance(msg, dict) else msg
+            for msg in messages
+        ]
+
+    # 从messages中提取question
+    question = extract_question_from_messages(messages_list)
+
+    # 构建请求参数
+    return {
+        "type": model_name_to_type(model),
+        "question": question,
+        "imageUrl": image_url or "",
+        "imageData": image_data or "",
+        "deepResearch": 1 if deep_research else 0,
+        "generateImage": 1 if generate_image else 0,
+        "priority": priority,
+    }
+
+
+def _parse_task_id(response: Dict[str, Any]) -> int:
+    """
+    从 /chatCompletion 响应中解析任务ID
+
+    Raises:
+        InvalidRequestError: 响应错误或任务ID无效
+    """
+    # 检查响应格式和错误
+    code = response.get("code")
+    message = response.get("message", "")
+
+    # 如果返回错误码（成功时 code 为 0）
+    if code != 0:
+        error_msg = f"API请求失败: {message}" if message else "API请求失败"
+        raise InvalidRequestError(error_msg)
+
+    # 解析响应数据 - data 直接就是任务ID
+    task_id = response.get("data")
+    if not task_id:
+        raise InvalidRequestError("API响应中缺少任务ID")
+
+    # 验证并转换任务ID为整数
+    try:
+        return int(task_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidRequestError(f"无效的任务ID格式: {task_id}") from e
+
+
+def _task_outcome(task: "_PollTask") -> str:
+    """任务结束时交给并发限制器的结果"""
+    if task.cancelled():
+        return DROPPED
+    exception = task.exception()
+    if exception is None:
+        return SUCCESS
+    return RATE_LIMITED if isinstance(exception, RateLimitError) else DROPPED
+
+
+class _Slot:
+    """一次提交占用的资源：租户调度许可、优先级队列许可、本地并发许可、跨进程租约与API Token"""
+
+    __slots__ = ("tenant_ticket", "ticket", "permit", "lease", "api_token")
+
+    def __init__(self):
+        self.tenant_ticket: Optional["TenantTicket"] = None
+        self.ticket: Optional["QueueTicket"] = None
+        self.permit: Optional[int] = None
+        self.lease: Optional[str] = None
+        self.api_token: Optional[str] = None
+
+
+def _acquire_slot(
+    client: "AIClient", priority: int = 0, tenant: Optional[str] = None
+) -> _Slot:
+    """
+    提交前依次获取租户调度许可、优先级队列许可、本地并发许可、跨进程租约与API Token，未启用的跳过
+    """
+    slot = _Slot()
+    try:
+        if client.tenant_scheduler is not None:
+            slot.tenant_ticket = client.tenant_scheduler.acquire(tenant)
+        if client.submission_queue is not None:
+            slot.ticket = client.submission_queue.acquire(priority)
+        if client.limiter is not None:
+            slot.permit = client.limiter.acquire()
+        if client.shared_limiter is not None:
+            slot.lease = client.shared_limiter.acquire()
+        if client.token_pool is not None:
+            slot.api_token = client.token_pool.acquire()
+    except BaseException:
+        _release(client, slot, DROPPED)
+        raise
+    return slot
+
+
+async def _acquire_slot_async(
+    client: "AsyncAIClient", priority: int = 0, tenant: Optional[str] = None
+) -> _Slot:
+    """_acquire_slot 的异步版本"""
+    slot = _Slot()
+    try:
+        if client.tenant_scheduler is not None:
+            slot.tenant_ticket = await client.tenant_scheduler.acquire_async(tenant)
+        if client.submission_queue is not None:
+            slot.ticket = await client.submission_queue.acquire_async(priority)
+        if client.limiter is not None:
+            slot.permit = await client.limiter.acquire()
+        if client.shared_limiter is not None:
+            slot.lease = await client.shared_limiter.acquire_async()
+        if client.token_pool is not None:
+            slot.api_token = client.token_pool.acquire()
+    except BaseException:
+        _release(client, slot, DROPPED, offload=True)
+        raise
+    return slot
+
+
+def _dispatched_request(request_data: Dict[str, Any], slot: _Slot) -> Dict[str, Any]:
+    """经过优先级队列的请求，以出队时的有效优先级（含老化）作为上游 priority 字段"""
+    ticket = slot.ticket
+    if ticket is None or ticket.effective_priority == request_data["priority"]:
+        return request_data
+    return dict(request_data, priority=ticket.effective_priority)
+
+
+def _release(client: Any, slot: _Slot, outcome: str, offload: bool = False) -> None:
+    """
+    任务结束时归还占用的资源，并按结果调整并发上限、共享退避与Token隔离（同步/异步共用）
+
+    offload 为True时（在事件循环中调用）跨进程限流器的 SQLite 写入交给线程池执行，不等待完成
+    """
+    if slot.tenant_ticket is not None:
+        client.tenant_scheduler.release(slot.tenant_ticket)
+    if slot.ticket is not None:
+        client.submission_queue.release(slot.ticket)
+    if slot.permit is not None:
+        client.limiter.release(slot.permit, outcome)
+    if slot.lease is not None:
+        args = (client.shared_limiter, slot.lease, outcome)
+        if offload:
+            asyncio.get_running_loop().run_in_executor(None, _settle_lease, *args)
+        else:
+            _settle_lease(*args)
+    if slot.api_token is not None:
+        if outcome == RATE_LIMITED:
+            client.token_pool.report_rate_limit(slot.api_token)
+        else:
+            client.token_pool.release(slot.api_token, success=outcome == SUCCESS)
+
+
+async def _cache_call(cache: BaseCache, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    在事件循环中调用缓存方法
+
+    内存缓存直接调用；其他后端（SQLite 等）可能阻塞在磁盘或锁上，交给线程池执行
+    """
+    if isinstance(cache, MemoryCache):
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+def _settle_lease(shared: "SharedRateLimiter", lease: str, outcome: str) -> None:
+    """归还跨进程租约，并按结果触发或重置共享退避"""
+    try:
+        shared.release(lease)
+        if outcome == RATE_LIMITED:
+            shared.report_rate_limit()
+        elif outcome == SUCCESS:
+            shared.report_success()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to update shared rate limiter {shared.path}: {e}")
+
+
+def _record_finished(
+    journal: "TaskJournal", task_id: int, exception: Optional[BaseException]
+) -> None:
+    """任务在服务端结束（成功或失败）时写入 done 记录；本地超时、连接错误或取消时保留，下次启动继续轮询"""
+    if isinstance(exception, (AITimeoutError, APIConnectionError, asyncio.CancelledError)):
+        return
+    journal.record_done(task_id)
+
+
+def _record_task_finished(journal: "TaskJournal", task: "_PollTask") -> None:
+    """后台轮询器中的任务结束时调用 _record_finished"""
+    if not task.cancelled():
+        _record_finished(journal, task.task_id, task.exception())
+
+
+def _retry_wait(client: Any, attempt: int) -> float:
+    """限流后重新提交前的等待时间；Token池中仍有可用Token时立即换Token重新提交"""
+    pool = client.token_pool
+    if pool is not None and pool.available():
+        return 0.0
+    return client.retry_delay * (2**attempt)
+
+
+@dataclass
+class CompletionResult:
+    """create_many() / imap() 中一个请求的结果"""
+
+    index: int  # 请求在输入中的位置
+    request: Dict[str, Any]
+    completion: Optional[ChatCompletion] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """请求是否成功"""
+        return self.error is None
+
+
+class _PipelineItem:
+    __slots__ = (
+        "index", "request", "model", "request_data", "deep_research", "generate_image",
+        "tenant", "key", "attempt", "handle",
+    )
+
+    def __init__(self, index: int, request: Dict[str, Any]):
+        self.index = index
+        self.request = request
+        self.key: Optional[str] = None
+        self.attempt = 0
+        self.handle: Optional[TaskHandle] = None
+
 
 class Completions:
     """Chat completions资源类"""
@@ -47,6 +349,8 @@ class Completions:
         deep_research: bool = False,
         generate_image: bool = False,
         priority: int = 0,
+        use_cache: bool = True,
+        tenant: Optional[str] = None,
         **kwargs,
     ) -> ChatCompletion:
         """
@@ -60,6 +364,8 @@ class Completions:
             deep_research: 是否进行深度研究，默认False
             generate_image: 是否生成图片，默认False
             priority: 任务优先级，默认0
+            use_cache: 客户端配置了缓存时是否使用，False表示本次调用既不读也不写缓存
+            tenant: 租户标签（可选），客户端配置了 tenant_scheduler 时按租户公平调度
             **kwargs: 其他参数
 
         Returns:
@@ -69,84 +375,437 @@ class Completions:
             InvalidRequestError: 参数错误
             AIAPIError: API调用错误
         """
-        # 参数验证
-        if not messages or len(messages) == 0:
-            raise InvalidRequestError("messages参数不能为空")
-
-        # 验证 image_url 和 image_data 不能同时使用
-        if image_url and image_data:
-            raise InvalidRequestError(
-                "image_url 和 image_data 不能同时提供，请只使用其中一个"
+        request_data = _build_request_data(
+            model, messages, image_url, image_data, deep_research, generate_image, priority
+        )
+
+        cache = self._client.cache if use_cache else None
+        singleflight = self._client._singleflight
+        cache_key = None
+        if cache is not None or singleflight is not None:
+            cache_key = request_hash(request_data)
+
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Chat completion served from cache: {cached.id}")
+                return cached
+
+        def run() -> ChatCompletion:
+            # 提交并等待结果（轮询，限流时重新提交）
+            completion = self._create_with_retry(
+                request_data, model, deep_research, generate_image, tenant
             )
+            if cache is not None:
+                cache.set(cache_key, completion, cache.ttl_for(deep_research, generate_image))
+            return completion
 
-        # 转换messages为字典列表（如果传入的是ChatMessage对象）
-        if isinstance(messages[0], ChatMessage):
-            messages_list = messages
-        else:
-            # 如果传入的是字典，转换为ChatMessage对象
-            messages_list = [
-                ChatMessage(**msg) if isinstance(msg, dict) else msg
-                for msg in messages
+        if singleflight is None:
+            return run()
+
+        # 相同请求正在进行时等待其结果，不再重复提交
+        completion, shared = singleflight.do(cache_key, run)
+        return completion.model_copy(deep=True) if shared else completion
+
+    def coalescing_stats(self) -> CoalescingStats:
+        """
+        相同请求合并的统计（客户端启用 coalesce_requests 时有效）
+
+        Returns:
+            CoalescingStats，followers 即省下的提交次数
+        """
+        singleflight = self._client._singleflight
+        return singleflight.stats() if singleflight is not None else CoalescingStats()
+
+    def create_spooled(
+        self,
+        model: str = "yuanbao",
+        messages: Optional[List[ChatMessage]] = None,
+        image_url: Optional[str] = None,
+        image_data: Optional[str] = None,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+        spool_threshold: Optional[int] = DEFAULT_SPOOL_THRESHOLD,
+        spool_dir: Optional[str] = None,
+        **kwargs,
+    ) -> SpooledCompletion:
+        """
+        创建chat completion，以低内存方式接收很大的答案（例如深度研究）
+
+        参数与 create() 相同。/chatResult 的响应体边接收边解析，答案直接写入 AnswerBuffer，
+        超过 spool_threshold 字节后转存到临时文件，内存中不保留响应体、dict 或 ChatCompletion 副本。
+        结果不经过缓存，也不与相同请求合并。
+
+        用法示例:
+            ```python
+            with client.chat.completions.create_spooled(
+                messages=[...], deep_research=True, spool_threshold=4 * 1024 * 1024
+            ) as result:
+                result.answer.save("report.md")
+            ```
+
+        Args:
+            spool_threshold: 答案超过该字节数时转存到临时文件，默认8MB；None 表示始终保存在内存中
+            spool_dir: 临时文件所在目录（可选），默认为系统临时目录
+
+        Returns:
+            SpooledCompletion对象，用完后调用 close()（或使用 with 语句）删除临时文件
+
+        Raises:
+            InvalidRequestError: 参数错误
+            AIAPIError: API调用错误
+        """
+        request_data = _build_request_data(
+            model, messages, image_url, image_data, deep_research, generate_image, priority
+        )
+        spool = functools.partial(AnswerBuffer, spool_threshold, spool_dir)
+        return self._create_with_retry(
+            request_data, model, deep_research, generate_image, tenant, spool=spool
+        )
+
+    def submit(
+        self,
+        model: str = "yuanbao",
+        messages: Optional[List[ChatMessage]] = None,
+        image_url: Optional[str] = None,
+        image_data: Optional[str] = None,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+        **kwargs,
+    ) -> TaskHandle:
+        """
+        提交chat completion任务，不等待结果
+
+        参数与 create() 相同。提交成功后立即返回 TaskHandle，
+        任务由客户端的后台轮询器统一轮询，完成后通过句柄获取结果。
+
+        用法示例:
+            ```python
+            handles = [
+                client.chat.completions.submit(model="gemini", messages=[...])
+                for prompt in prompts
             ]
+            for handle in handles:
+                print(handle.result().choices[0].message.content)
+            ```
 
-        # 从messages中提取question
-        question = extract_question_from_messages(messages_list)
+        Returns:
+            TaskHandle对象
 
-        # 构建请求参数
-        request_data = {
-            "type": model_name_to_type(model),
-            "question": question,
-            "imageUrl": image_url or "",
-            "imageData": image_data or "",
-            "deepResearch": 1 if deep_research else 0,
-            "generateImage": 1 if generate_image else 0,
-            "priority": priority,
-        }
+        Raises:
+            InvalidRequestError: 参数错误
+            AIAPIError: API调用错误
+        """
+        request_data = _build_request_data(
+            model, messages, image_url, image_data, deep_research, generate_image, priority
+        )
+        return self._submit(request_data, model, deep_research, generate_image, tenant)
 
-        logger.info(f"Creating chat completion with model: {model}")
-        logger.debug(f"Request data: {request_data}")
+    def create_many(
+        self,
+        requests: Iterable[Dict[str, Any]],
+        max_in_flight: int = 16,
+        use_cache: bool = True,
+    ) -> List[CompletionResult]:
+        """
+        并发执行多个请求，按输入顺序返回全部结果
+
+        等价于 list(imap(requests, max_in_flight, ordered=True))，见 imap()。
+
+        Returns:
+            CompletionResult 列表，与 requests 一一对应
+        """
+        return list(self.imap(requests, max_in_flight=max_in_flight, use_cache=use_cache))
+
+    def imap(
+        self,
+        requests: Iterable[Dict[str, Any]],
+        max_in_flight: int = 16,
+        ordered: bool = True,
+        use_cache: bool = True,
+    ) -> Iterator[CompletionResult]:
+        """
+        并发执行多个请求，逐个返回结果（惰性）
+
+        每个请求是 create() 参数组成的字典，例如 {"model": "gemini", "messages": [...]}。
+        同步代码无需线程池即可流水线执行：少量提交线程通过客户端的连接池并行提交，
+        提交成功的任务交给后台轮询器统一轮询，任务结束后立即补充新的提交。
+
+        用法示例:
+            ```python
+            requests = ({"messages": [{"role": "user", "content": q}]} for q in questions)
+            for result in client.chat.completions.imap(requests, max_in_flight=32):
+                if result.ok:
+                    print(result.index, result.completion.choices[0].message.content)
+            ```
+
+        - requests 按需读取，可以是生成器；同时在途的请求不超过 max_in_flight；
+        - ordered=True 时按输入顺序返回，先完成的结果最多缓存 max_in_flight 个，
+          缓存已满时暂停提交；ordered=False 时按完成顺序返回；
+        - 单个请求失败不会中断其他请求，异常记录在 CompletionResult.error 中；
+          限流的请求按客户端的 retry_on_rate_limit / max_retries 设置重新提交；
+        - 提前停止迭代（break 或关闭生成器）时，在途的任务停止轮询，未读取的请求不再提交。
+
+        Args:
+            requests: 请求字典的可迭代对象
+            max_in_flight: 同时在途的请求数，默认16
+            ordered: 是否按输入顺序返回，默认True
+            use_cache: 客户端配置了缓存时是否使用，默认True
+
+        Returns:
+            CompletionResult 的迭代器
+
+        Raises:
+            InvalidRequestError: max_in_flight 小于1
+        """
+        if max_in_flight < 1:
+            raise InvalidRequestError("max_in_flight 至少为1")
+        return self._imap(iter(requests), max_in_flight, ordered, use_cache)
+
+    def _imap(
+        self,
+        requests: Iterator[Dict[str, Any]],
+        max_in_flight: int,
+        ordered: bool,
+        use_cache: bool,
+    ) -> Iterator[CompletionResult]:
+        client = self._client
+        cache = client.cache if use_cache else None
+        # 已结束的请求：(请求, 结果, 异常)
+        done: "queue.SimpleQueue[Tuple[_PipelineItem, Any, Optional[BaseException]]]" = queue.SimpleQueue()
+        outstanding: Dict[int, _PipelineItem] = {}
+        retries: List[Tuple[float, int, _PipelineItem]] = []  # (重新提交时间, 序号, 请求)
+        buffered: Dict[int, CompletionResult] = {}
+        stopped = threading.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_in_flight, _SUBMIT_WORKERS), thread_name_prefix="ai-sdk-submit"
+        )
+        count = 0
+        next_index = 0  # ordered=True 时下一个应返回的序号
+        exhausted = False
+
+        def finished(item: _PipelineItem, handle: TaskHandle) -> None:
+            try:
+                done.put((item, handle.result(timeout=0), None))
+            except BaseException as e:
+                done.put((item, None, e))
+
+        def submit(item: _PipelineItem) -> None:
+            """在提交线程中执行：提交任务并在结束时把结果放入 done"""
+            if stopped.is_set():
+                return
+            try:
+                handle = self._submit(
+                    item.request_data, item.model, item.deep_research, item.generate_image, item.tenant
+                )
+            except BaseException as e:
+                done.put((item, None, e))
+                return
+            item.handle = handle
+            if stopped.is_set():
+                handle.cancel()
+                return
+            handle.add_done_callback(lambda h: finished(item, h))
+
+        def start(item: _PipelineItem) -> None:
+            """构建请求体；参数无效或命中缓存时直接得到结果，否则交给提交线程"""
+            outstanding[item.index] = item
+            try:
+                params = {k: item.request[k] for k in _REQUEST_FIELDS if k in item.request}
+                item.model = params.get("model", "yuanbao")
+                item.deep_research = bool(params.get("deep_research", False))
+                item.generate_image = bool(params.get("generate_image", False))
+                item.tenant = params.get("tenant")
+                item.request_data = _build_request_data(
+                    item.model,
+                    params.get("messages"),
+                    params.get("image_url"),
+                    params.get("image_data"),
+                    item.deep_research,
+                    item.generate_image,
+                    params.get("priority", 0),
+                )
+            except Exception as e:
+                done.put((item, None, e))
+                return
+            if cache is not None:
+                item.key = request_hash(item.request_data)
+                cached = cache.get(item.key)
+                if cached is not None:
+                    item.key = None  # 无需再次写入缓存
+                    done.put((item, cached, None))
+                    return
+            executor.submit(submit, item)
 
-        # 调用API
-        response = self._client._post("/chatCompletion", json=request_data)
+        def retryable(item: _PipelineItem, exception: Optional[BaseException]) -> bool:
+            return (
+                isinstance(exception, RateLimitError)
+                and client.retry_on_rate_limit
+                and item.attempt < client.max_retries
+            )
 
-        # 检查响应格式和错误
-        code = response.get("code")
-        message = response.get("message", "")
+        try:
+            while True:
+                while (
+                    not exhausted
+                    and len(outstanding) < max_in_flight
+                    and (not ordered or count - next_index < 2 * max_in_flight)
+                ):
+                    try:
+                        request = next(requests)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    start(_PipelineItem(count, request))
+                    count += 1
+                if not outstanding:
+                    return
 
-        # 如果返回错误码（成功时 code 为 0）
-        if code != 0:
-            error_msg = f"API请求失败: {message}" if message else "API请求失败"
-            raise InvalidRequestError(error_msg)
+                timeout = None
+                if retries:
+                    timeout = max(0.0, retries[0][0] - time.monotonic())
+                try:
+                    item, completion, error = done.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    executor.submit(submit, heapq.heappop(retries)[2])
+                if item is None:
+                    continue
+
+                if retryable(item, error):
+                    wait = _retry_wait(client, item.attempt)
+                    item.attempt += 1
+                    logger.warning(
+                        f"Request {item.index} rate limited, resubmitting in {wait:.1f}s "
+                        f"({item.attempt}/{client.max_retries})"
+                    )
+                    heapq.heappush(retries, (now + wait, item.index, item))
+                    continue
 
-        # 解析响应数据 - data 直接就是任务ID
-        task_id = response.get("data")
-        if not task_id:
-            raise InvalidRequestError("API响应中缺少任务ID")
+                del outstanding[item.index]
+                if completion is not None and item.key is not None:
+                    cache.set(item.key, completion, cache.ttl_for(item.deep_research, item.generate_image))
+                result = CompletionResult(item.index, item.request, completion, error)
+                if not ordered:
+                    yield result
+                    continue
+                buffered[item.index] = result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False)
+            for item in outstanding.values():
+                if item.handle is not None:
+                    item.handle.cancel()
+
+    def _submit(
+        self,
+        request_data: Dict[str, Any],
+        model: str,
+        deep_research: bool,
+        generate_image: bool,
+        tenant: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> TaskHandle:
+        """
+        提交已构建好的请求体，并交给后台轮询器
+
+        配置了租户调度器时先按租户加权公平排队；配置了优先级提交队列时再按优先级排队，出队时的有效优先级作为上游 priority 字段；
+        启用自适应并发控制或跨进程限流时，先获取在途许可（达到上限时阻塞）；配置了Token池时选择一个Token，
+        任务用该Token提交和轮询。任务结束时归还许可与Token，并按结果调整上限、共享退避、隔离限流的Token。
+        """
+        client = self._client
+        slot = _acquire_slot(client, request_data["priority"], tenant)
+        request_data = _dispatched_request(request_data, slot)
+        api_token = slot.api_token
+
+        logger.info(f"Creating chat completion with model: {model}")
+        logger.debug(f"Request data: {request_data}")
 
-        # 验证并转换任务ID为整数
         try:
-            task_id_int = int(task_id)
-        except (ValueError, TypeError) as e:
-            raise InvalidRequestError(f"无效的任务ID格式: {task_id}") from e
+            # 调用API
+            response = client._post("/chatCompletion", json=request_data, token=api_token)
+            task_id_int = _parse_task_id(response)
+            if api_token is not None:
+                # client.tasks.retrieve() 查询该任务时使用同一个 Token
+                client.token_pool.remember(task_id_int, api_token)
+        except BaseException as e:
+            outcome = RATE_LIMITED if isinstance(e, RateLimitError) else DROPPED
+            _release(client, slot, outcome)
+            raise
 
         logger.info(f"Chat completion created, task_id: {task_id_int}")
 
-        # 等待结果（轮询，带重试机制）
-        return self._wait_for_result_with_retry(task_id_int, model, generate_image)
+        journal = client.journal
+        if journal is not None:
+            # 开始轮询前记录任务，进程退出后可从日志恢复
+            journal.record_submit(
+                task_id_int,
+                request_hash(request_data),
+                model,
+                deep_research,
+                generate_image,
+                api_token,
+            )
 
-    def _wait_for_result_with_retry(
-        self, task_id: int, model: str, is_image_generation: bool = False
-    ) -> ChatCompletion:
+        task = self._watch(
+            task_id_int, model, generate_image, deep_research, api_token, spool=spool
+        )
+        if journal is not None:
+            task.add_done_callback(lambda t: _record_task_finished(journal, t))
+        if (
+            slot.tenant_ticket is not None
+            or slot.ticket is not None
+            or slot.permit is not None
+            or slot.lease is not None
+            or api_token is not None
+        ):
+            task.add_done_callback(lambda t: _release(client, slot, _task_outcome(t)))
+        return TaskHandle(task)
+
+    def _watch(
+        self,
+        task_id: int,
+        model: str,
+        is_image_generation: bool = False,
+        deep_research: bool = False,
+        api_token: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> "_PollTask":
+        """将任务交给后台轮询器；轮询间隔由自适应调度决定，这里只给出总时长上限"""
+        return self._client._poller.watch(
+            task_id,
+            model,
+            key=schedule_key(model, deep_research, is_image_generation),
+            timeout=IMAGE_WAIT_TIMEOUT if is_image_generation else TEXT_WAIT_TIMEOUT,
+            token=api_token,
+            spool=spool,
+        )
+
+    def _create_with_retry(
+        self,
+        request_data: Dict[str, Any],
+        model: str,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        tenant: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> Union[ChatCompletion, SpooledCompletion]:
         """
-        带重试机制的任务等待
+        提交任务并等待结果，遇到限流时重新提交
 
-        Args:
-            task_id: 任务ID
-            model: 模型名称
-            is_image_generation: 是否为图片生成任务
+        限流的任务已经在服务端失败，继续轮询同一个任务ID没有意义，因此按指数退避后重新提交。
 
         Returns:
-            ChatCompletion对象
+            ChatCompletion对象（传入 spool 时为 SpooledCompletion）
 
         Raises:
             RateLimitError: 达到限流限制
@@ -154,24 +813,17 @@ class Completions:
         """
         max_retry_attempts = self._client.max_retries
         retry_on_rate_limit = self._client.retry_on_rate_limit
-        retry_delay = self._client.retry_delay
-
-        # 图片生成使用不同的轮询参数
-        if is_image_generation:
-            max_retries = 60   # 图片生成：60次重试
-            interval = 60      # 图片生成：60秒间隔（最长等60分钟）
-            logger.info(f"Image generation mode: max_retries={max_retries}, interval={interval}s")
-        else:
-            max_retries = 60   # 普通任务：60次重试
-            interval = 2       # 普通任务：2秒间隔
 
         for attempt in range(max_retry_attempts + 1):
             try:
-                # 尝试等待结果
-                return self._wait_for_result(
-                    task_id, model, max_retries, interval, is_image_generation
+                handle = self._submit(
+                    request_data, model, deep_research, generate_image, tenant, spool=spool
                 )
 
+                # 交给客户端的后台轮询器，等待结果
+                logger.info(f"Waiting for task result: {handle.task_id}")
+                return handle.result()
+
             except RateLimitError as e:
                 # 如果不启用限流重试，或已达最大重试次数，直接抛出
                 if not retry_on_rate_limit or attempt >= max_retry_attempts:
@@ -179,178 +831,341 @@ class Completions:
                     raise
 
                 # 计算退避时间（指数退避）
-                wait_time = retry_delay * (2**attempt)
+                wait_time = _retry_wait(self._client, attempt)
                 logger.warning(
-                    f"⚠️  遇到限流错误，{wait_time:.1f}秒后进行第 {attempt + 1}/{max_retry_attempts} 次重试..."
+                    f"⚠️  遇到限流错误，{wait_time:.1f}秒后进行第 {attempt + 1}/{max_retry_attempts} 次重新提交..."
                 )
                 logger.warning(f"原始错误: {e.response.get('original_error') if e.response else 'unknown'}")
 
-                # 等待后重试
+                # 等待后重新提交
                 time.sleep(wait_time)
 
-            except Exception:
-                # 其他错误不重试，直接抛出
-                raise
-
         # 理论上不会到这里
         raise RateLimitError("达到最大重试次数，请求仍然失败")
 
-    def _wait_for_result(
-        self, task_id: int, model: str, max_retries: int = 60, interval: int = 2,
-        is_image_generation: bool = False
+
+class Chat:
+    """Chat资源类"""
+
+    def __init__(self, client: "AIClient"):
+        self.completions = Completions(client)
+
+
+class _AsyncWait:
+    """异步客户端中正在等待结果的任务进度（供 tasks.eta() 估计剩余时间）"""
+
+    __slots__ = ("key", "clock", "started", "run_started")
+
+    def __init__(self, key: tuple, clock: Callable[[], float]):
+        self.key = key
+        self.clock = clock
+        self.started = clock()
+        self.run_started: Optional[float] = None
+
+
+class AsyncCompletions:
+    """异步Chat completions资源类（基于asyncio，不占用线程）"""
+
+    def __init__(self, client: "AsyncAIClient"):
+        self._client = client
+        self._waiting: Dict[int, _AsyncWait] = {}
+
+    def _eta(self, task_id: int) -> Optional[float]:
+        """估计等待中任务的剩余时间（秒）；任务不在等待中或样本不足时返回None"""
+        waiting = self._waiting.get(task_id)
+        if waiting is None:
+            return None
+        now = waiting.clock()
+        run_elapsed = now - waiting.run_started if waiting.run_started is not None else None
+        eta = self._client._schedule.eta(waiting.key, now - waiting.started, run_elapsed)
+        return max(0.0, eta) if eta is not None else None
+
+    async def create(
+        self,
+        model: str = "yuanbao",
+        messages: Optional[List[ChatMessage]] = None,
+        image_url: Optional[str] = None,
+        image_data: Optional[str] = None,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        priority: int = 0,
+        use_cache: bool = True,
+        tenant: Optional[str] = None,
+        **kwargs,
     ) -> ChatCompletion:
         """
-        等待任务完成并获取结果
+        异步创建chat completion，参数与 Completions.create 相同
 
-        Args:
-            task_id: 任务ID（整数）
-            model: 模型名称
-            max_retries: 最大重试次数，默认60次
-            interval: 重试间隔（秒），默认2秒
-            is_image_generation: 是否为图片生成任务，默认False
+        提交与轮询均通过共享的异步连接池完成，轮询间隔使用 asyncio.sleep。
 
         Returns:
             ChatCompletion对象
 
         Raises:
-            TimeoutError: 超时错误
+            InvalidRequestError: 参数错误
             AIAPIError: API调用错误
         """
-        import time
+        request_data = _build_request_data(
+            model, messages, image_url, image_data, deep_research, generate_image, priority
+        )
 
-        logger.info(f"Waiting for task result: {task_id}")
+        cache = self._client.cache if use_cache else None
+        singleflight = self._client._singleflight
+        cache_key = None
+        if cache is not None or singleflight is not None:
+            cache_key = request_hash(request_data)
+
+        if cache is not None:
+            cached = await _cache_call(cache, cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Chat completion served from cache: {cached.id}")
+                return cached
+
+        async def run() -> ChatCompletion:
+            completion = await self._create_with_retry(
+                request_data, model, deep_research, generate_image, tenant
+            )
+            if cache is not None:
+                ttl = cache.ttl_for(deep_research, generate_image)
+                await _cache_call(cache, cache.set, cache_key, completion, ttl)
+            return completion
+
+        if singleflight is None:
+            return await run()
+
+        completion, shared = await singleflight.do(cache_key, run)
+        return completion.model_copy(deep=True) if shared else completion
+
+    def coalescing_stats(self) -> CoalescingStats:
+        """相同请求合并的统计（客户端启用 coalesce_requests 时有效）"""
+        singleflight = self._client._singleflight
+        return singleflight.stats() if singleflight is not None else CoalescingStats()
 
-        # 如果是图片生成任务，首次查询前等待30秒
-        if is_image_generation and max_retries > 0:
-            logger.info(f"Image generation task detected, waiting 30 seconds before first check...")
-            time.sleep(30)
+    async def create_spooled(
+        self,
+        model: str = "yuanbao",
+        messages: Optional[List[ChatMessage]] = None,
+        image_url: Optional[str] = None,
+        image_data: Optional[str] = None,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        priority: int = 0,
+        tenant: Optional[str] = None,
+        spool_threshold: Optional[int] = DEFAULT_SPOOL_THRESHOLD,
+        spool_dir: Optional[str] = None,
+        **kwargs,
+    ) -> SpooledCompletion:
+        """
+        异步创建chat completion并以低内存方式接收答案，参数与 Completions.create_spooled 相同
+
+        Returns:
+            SpooledCompletion对象
+
+        Raises:
+            InvalidRequestError: 参数错误
+            AIAPIError: API调用错误
+        """
+        request_data = _build_request_data(
+            model, messages, image_url, image_data, deep_research, generate_image, priority
+        )
+        spool = functools.partial(AnswerBuffer, spool_threshold, spool_dir)
+        return await self._create_with_retry(
+            request_data, model, deep_research, generate_image, tenant, spool=spool
+        )
 
-        for retry in range(max_retries):
+    async def _create_with_retry(
+        self,
+        request_data: Dict[str, Any],
+        model: str,
+        deep_research: bool = False,
+        generate_image: bool = False,
+        tenant: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> Union[ChatCompletion, SpooledCompletion]:
+        """提交任务并等待结果，遇到限流时重新提交（异步版本）"""
+        max_retry_attempts = self._client.max_retries
+        retry_on_rate_limit = self._client.retry_on_rate_limit
+
+        for attempt in range(max_retry_attempts + 1):
             try:
-                # 查询任务结果
-                result_response = self._client._post(
-                    "/chatResult", json={"id": task_id}
+                return await self._submit_and_wait(
+                    request_data, model, deep_research, generate_image, tenant, spool=spool
                 )
 
-                # 获取响应字段
-                code = result_response.get("code")
-                message = result_response.get("message", "")
-                answer = result_response.get("answer", "")
+            except RateLimitError:
+                if not retry_on_rate_limit or attempt >= max_retry_attempts:
+                    logger.error(f"Rate limit reached, no more retries")
+                    raise
 
-                # 检查API调用是否成功
-                if code != 0:
-                    # code != 0 表示API调用失败（不是任务失败）
-                    logger.warning(f"API call failed (code={code}): {message}")
-                    time.sleep(interval)
-                    continue
+                wait_time = _retry_wait(self._client, attempt)
+                logger.warning(
+                    f"⚠️  遇到限流错误，{wait_time:.1f}秒后进行第 {attempt + 1}/{max_retry_attempts} 次重新提交..."
+                )
+                await asyncio.sleep(wait_time)
 
-                # code == 0，通过 message 判断任务状态
-
-                # 1. 检查任务失败
-                if message == "AI任务处理失败":
-                    error_msg = answer if answer else "任务执行失败"
-                    logger.error(f"Task {task_id} failed: {error_msg}")
-
-                    # 识别限流错误
-                    if (
-                        "账号达到使用限制" in error_msg
-                        or "限制" in error_msg
-                        or "quota" in error_msg.lower()
-                        or "rate limit" in error_msg.lower()
-                    ):
-                        raise RateLimitError(
-                            message=error_msg,
-                            response={"task_id": task_id, "original_error": error_msg},
-                        )
+        raise RateLimitError("达到最大重试次数，请求仍然失败")
 
-                    raise InvalidRequestError(f"任务执行失败: {error_msg}")
-
-                # 2. 检查任务完成
-                if message == "AI任务处理完成":
-                    # 验证是否有有效答案（根据文档：长度>10）
-                    has_result = bool(answer and answer.strip() and len(answer.strip()) > 10)
-                    if has_result:
-                        logger.info(f"Task {task_id} completed successfully")
-                        # 构造ChatCompletion响应
-                        return ChatCompletion(
-                            id=str(task_id),
-                            object="chat.completion",
-                            created=get_timestamp(),
-                            model=model,
-                            choices=[
-                                Choice(
-                                    index=0,
-                                    message=ChatMessage(role="assistant", content=answer),
-                                    finish_reason="stop",
-                                )
-                            ],
-                            usage=Usage(
-                                prompt_tokens=0, completion_tokens=0, total_tokens=0
-                            ),
-                        )
-                    else:
-                        logger.warning(f"Task {task_id} completed but answer is empty or too short")
-                        # 可能需要继续等待
-                        time.sleep(interval)
-                        continue
-
-                # 3. 任务处理中（"AI任务待处理" 或 "AI任务处理中"）
-                if "处理中" in message or "待处理" in message:
-                    logger.debug(f"Task {task_id}: {message}, retry {retry + 1}/{max_retries}")
-                    time.sleep(interval)
-                    continue
+    async def _submit_and_wait(
+        self,
+        request_data: Dict[str, Any],
+        model: str,
+        deep_research: bool,
+        generate_image: bool,
+        tenant: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> Union[ChatCompletion, SpooledCompletion]:
+        """
+        提交一次任务并等待其结束
 
-                # 4. 兜底：有答案就返回（文档中提到的情况）
-                has_result = bool(answer and answer.strip() and len(answer.strip()) > 10)
-                if has_result:
-                    logger.info(f"Task {task_id} has result (message: {message})")
-                    return ChatCompletion(
-                        id=str(task_id),
-                        object="chat.completion",
-                        created=get_timestamp(),
-                        model=model,
-                        choices=[
-                            Choice(
-                                index=0,
-                                message=ChatMessage(role="assistant", content=answer),
-                                finish_reason="stop",
-                            )
-                        ],
-                        usage=Usage(
-                            prompt_tokens=0, completion_tokens=0, total_tokens=0
-                        ),
-                    )
+        启用并发控制或跨进程限流时占用在途许可；配置了Token池时用同一个Token提交和轮询；
+        配置了任务日志时在等待前记录任务。
+        """
+        client = self._client
+        slot = await _acquire_slot_async(client, request_data["priority"], tenant)
+        request_data = _dispatched_request(request_data, slot)
+        api_token = slot.api_token
 
-                # 5. 未知状态，继续等待
-                logger.warning(f"Task {task_id} unknown message: {message}, will retry")
-                time.sleep(interval)
+        journal = client.journal
+        task_id_int: Optional[int] = None
+        error: Optional[BaseException] = None
+        outcome = DROPPED
+        try:
+            logger.info(f"Creating async chat completion with model: {model}")
+            logger.debug(f"Request data: {request_data}")
 
-            except InvalidRequestError:
-                # 请求参数错误，立即抛出，不重试
-                raise
-            except (APIConnectionError, AITimeoutError) as e:
-                # 网络错误或超时，可以重试
-                if retry == max_retries - 1:
-                    raise
-                logger.warning(f"Network error checking task status, will retry: {str(e)}")
-                time.sleep(interval)
-            except AIAPIError as e:
-                # 其他API错误，可以重试
-                if retry == max_retries - 1:
+            response = await client._post("/chatCompletion", json=request_data, token=api_token)
+            task_id_int = _parse_task_id(response)
+            if api_token is not None:
+                client.token_pool.remember(task_id_int, api_token)
+
+            logger.info(f"Chat completion created, task_id: {task_id_int}")
+
+            if journal is not None:
+                journal.record_submit(
+                    task_id_int,
+                    request_hash(request_data),
+                    model,
+                    deep_research,
+                    generate_image,
+                    api_token,
+                )
+
+            timeout = IMAGE_WAIT_TIMEOUT if generate_image else TEXT_WAIT_TIMEOUT
+            completion = await self._wait_for_result(
+                task_id_int,
+                model,
+                schedule_key(model, deep_research, generate_image),
+                timeout,
+                api_token,
+                spool,
+            )
+            outcome = SUCCESS
+            return completion
+        except BaseException as e:
+            error = e
+            if isinstance(e, RateLimitError):
+                outcome = RATE_LIMITED
+            raise
+        finally:
+            _release(client, slot, outcome, offload=True)
+            if journal is not None and task_id_int is not None:
+                _record_finished(journal, task_id_int, error)
+
+    async def _wait_for_result(
+        self,
+        task_id: int,
+        model: str,
+        key: tuple,
+        timeout: float,
+        api_token: Optional[str] = None,
+        spool: Optional[Callable[[], AnswerBuffer]] = None,
+    ) -> Union[ChatCompletion, SpooledCompletion]:
+        """
+        等待任务完成并获取结果（异步版本）
+
+        轮询间隔与同步客户端的后台轮询器使用同一套自适应调度和耗时统计。
+        传入 spool 时每次轮询把答案流式写入新的缓冲区，未完成的轮询的缓冲区立即释放。
+        """
+        logger.info(f"Waiting for task result: {task_id}")
+
+        schedule = self._client._schedule
+        loop = asyncio.get_running_loop()
+        waiting = self._waiting[task_id] = _AsyncWait(key, loop.time)
+        started = last_poll = waiting.started
+        deadline = started + timeout
+        run_started: Optional[float] = None
+        state: Optional[TaskState] = None
+        unknown_streak = 0
+
+        polls = 0
+        answer: Optional[AnswerBuffer] = None
+        try:
+            await asyncio.sleep(schedule.first_delay(key))
+            while True:
+                polls += 1
+                if answer is not None:
+                    # 上一次轮询的缓冲区（任务未完成）
+                    answer.close()
+                answer = spool() if spool is not None else None
+                try:
+                    result_response = await self._client._post(
+                        "/chatResult", content=poll_body(task_id), token=api_token, answer=answer
+                    )
+                except InvalidRequestError:
                     raise
-                logger.warning(f"API error checking task status, will retry: {str(e)}")
-                time.sleep(interval)
-            except Exception as e:
-                # 未知错误，立即抛出，不重试
-                logger.error(f"Unexpected error in task polling: {str(e)}")
-                raise
+                except AIAPIError as e:
+                    # 网络错误、超时及其他API错误，可以重试
+                    if loop.time() >= deadline:
+                        raise
+                    logger.warning(f"Error checking task status, will retry: {str(e)}")
+                    result_response = None
+
+                now = loop.time()
+                if result_response is not None:
+                    observed_at = (last_poll + now) / 2
+                    last_poll = now
+                    observed = parse_task_state(result_response)
+                    if observed == TaskState.UNKNOWN:
+                        unknown_streak += 1
+                        if unknown_streak >= MAX_UNKNOWN_POLLS:
+                            raise unknown_state_error(task_id, result_response)
+                    else:
+                        unknown_streak = 0
+                        state = observed
+                    if state == TaskState.RUNNING and run_started is None:
+                        run_started = waiting.run_started = observed_at
 
-        # 超时
-        raise AITimeoutError(f"任务{task_id}等待超时，已重试{max_retries}次")
+                    completion = check_task_result(task_id, model, result_response, observed)
+                    if completion is not None:
+                        schedule.stats.record(
+                            key,
+                            total=observed_at - started,
+                            queue=run_started - started if run_started is not None else None,
+                            run=observed_at - run_started if run_started is not None else None,
+                        )
+                        schedule.stats.maybe_save()
+                        answer = None
+                        return completion
 
+                if now >= deadline:
+                    raise AITimeoutError(f"任务{task_id}等待超时，已重试{polls}次")
 
-class Chat:
-    """Chat资源类"""
+                delay = schedule.next_delay(
+                    key,
+                    state,
+                    now - started,
+                    now - run_started if run_started is not None else None,
+                )
+                await asyncio.sleep(min(delay, deadline - now))
+        finally:
+            if self._waiting.get(task_id) is waiting:
+                del self._waiting[task_id]
+            if answer is not None:
+                answer.close()
 
-    def __init__(self, client: "AIClient"):
-        self.completions = Completions(client)
+
+class AsyncChat:
+    """异步Chat资源类"""
+
+    def __init__(self, client: "AsyncAIClient"):
+        self.completions = AsyncCompletions(client)
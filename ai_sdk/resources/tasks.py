@@ -2,89 +2,463 @@
 任务管理资源模块
 提供任务查询等功能
 """
+import asyncio
+import collections
 import logging
-from typing import TYPE_CHECKING, Optional, Dict, Any, List
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncIterator, Iterable, Iterator, List, Set
 
 from ..exceptions import InvalidRequestError
+from ..types.task import TaskState
+from .._codec import poll_body
+from .._journal import RecoveredTask, token_id
+from .._poller import TaskHandle
+from .._utils import parse_task_state
+from .chat import _record_task_finished
 
 if TYPE_CHECKING:
+    from .._poller import _PollTask
+    from ..cache import BaseCache
     from ..client import AIClient
+    from ..async_client import AsyncAIClient
 
 logger = logging.getLogger(__name__)
 
 
+def _validate_task_id(task_id: str) -> int:
+    """
+    校验并转换任务ID为整数
+
+    Raises:
+        InvalidRequestError: 任务ID为空或格式无效
+    """
+    if not task_id:
+        raise InvalidRequestError("task_id不能为空")
+
+    try:
+        return int(task_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidRequestError(f"无效的任务ID格式: {task_id}") from e
+
+
+def _build_task_result(response: Dict[str, Any]) -> Dict[str, Any]:
+    """将 /chatResult 响应转换为任务结果字典"""
+    # API 响应格式: {"code": 0, "message": "AI任务处理完成", "answer": "..."}
+    # 任务状态在 message 字段，结果在 answer 字段
+    return {
+        "state": parse_task_state(response),
+        "code": response.get("code"),
+        "message": response.get("message", ""),
+        "answer": response.get("answer", ""),
+    }
+
+
+def _task_token(client: Any, task_id: int, api_token: Optional[str]) -> Optional[str]:
+    """查询任务所用的 Token：显式指定的，或者Token池中记录的提交该任务的 Token"""
+    if api_token is None and client.token_pool is not None:
+        return client.token_pool.owner(task_id)
+    return api_token
+
+
+def _cache_result(cache: "BaseCache", key: str, ttl: Optional[float], task: "_PollTask") -> None:
+    """恢复的任务成功后写入缓存，之后相同的请求直接命中"""
+    if task._result is not None:
+        cache.set(key, task._result, ttl)
+
+
 class Tasks:
     """任务管理资源类"""
 
     def __init__(self, client: "AIClient"):
         self._client = client
+        self._recovered: List[RecoveredTask] = []
 
-    def retrieve(self, task_id: str) -> Dict[str, Any]:
+    def retrieve(self, task_id: str, api_token: Optional[str] = None) -> Dict[str, Any]:
         """
         查询任务结果
 
+        任务必须用提交它的 Token 查询：本客户端通过Token池提交的任务自动使用同一个 Token，
+        其他进程提交的任务可通过 api_token 指定。
+
         Args:
             task_id: 任务ID
+            api_token: 查询使用的API Token（可选），默认为提交该任务的 Token 或客户端的 Token
 
         Returns:
-            任务结果字典，包含status, answer等字段
+            任务结果字典，包含state（TaskState）, message, answer等字段
 
         Raises:
             InvalidRequestError: 参数错误
             AIAPIError: API调用错误
         """
-        if not task_id:
-            raise InvalidRequestError("task_id不能为空")
+        task_id_int = _validate_task_id(task_id)
+
+        logger.info(f"Retrieving task: {task_id_int}")
+
+        response = self._client._post(
+            "/chatResult",
+            content=poll_body(task_id_int),
+            token=_task_token(self._client, task_id_int, api_token),
+        )
+        result = _build_task_result(response)
+        logger.debug(f"Task {task_id} result: {result}")
+
+        return result
+
+    def eta(self, task_id: str) -> Optional[float]:
+        """
+        估计任务的剩余等待时间
+
+        根据同类任务（模型、深度研究、图片生成）的历史耗时分布，
+        以及任务当前是否仍在排队，估计还需等待的秒数。
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            剩余秒数估计；任务不在等待中或历史样本不足时返回None
+        """
+        return self._client._poller.eta(_validate_task_id(task_id))
+
+    def poll_stats(self) -> Dict[TaskState, int]:
+        """
+        后台轮询器发出的 /chatResult 轮询按观察到的状态汇总的次数
+
+        可用于判断轮询是否浪费在排队（PENDING）或无法识别的响应（UNKNOWN）上。
+
+        Returns:
+            {TaskState: 次数}，只包含出现过的状态
+        """
+        return self._client._poller.poll_stats()
+
+    def recover(self) -> List[RecoveredTask]:
+        """
+        客户端启动时从任务日志恢复的任务
+
+        客户端配置了 journal 时，上次进程退出时尚未结束的任务在初始化时已交给后台轮询器继续轮询，
+        通过各任务的 handle 获取结果；未配置日志时返回空列表。
+
+        用法示例:
+            ```python
+            client = AIClient(journal=TaskJournal("tasks.journal"))
+            for task in client.tasks.recover():
+                completion = task.handle.result()
+                save(task.key, completion)
+            ```
+
+        Returns:
+            RecoveredTask列表，按提交时间排序；key 为原请求的哈希（见 cache.request_hash）
+        """
+        return list(self._recovered)
+
+    def _reattach(self) -> None:
+        """对日志中尚未结束的任务继续轮询（使用提交时的Token）"""
+        client = self._client
+        journal = client.journal
+        tokens = [client.api_token] + (client.token_pool.tokens if client.token_pool else [])
+        by_id = {token_id(token): token for token in tokens}
+        cache = client.cache
+
+        for entry in journal.unfinished():
+            token = by_id.get(entry.token)
+            if token is not None and client.token_pool is not None:
+                client.token_pool.remember(entry.task_id, token)
+            task = client.chat.completions._watch(
+                entry.task_id,
+                entry.model,
+                entry.generate_image,
+                entry.deep_research,
+                token,
+            )
+            task.add_done_callback(lambda t: _record_task_finished(journal, t))
+            if cache is not None and entry.key:
+                ttl = cache.ttl_for(entry.deep_research, entry.generate_image)
+                task.add_done_callback(
+                    lambda t, key=entry.key, ttl=ttl: _cache_result(cache, key, ttl, t)
+                )
+            self._recovered.append(
+                RecoveredTask(
+                    task_id=entry.task_id,
+                    key=entry.key,
+                    model=entry.model,
+                    deep_research=entry.deep_research,
+                    generate_image=entry.generate_image,
+                    submitted_at=entry.submitted_at,
+                    handle=TaskHandle(task),
+                )
+            )
+        if self._recovered:
+            logger.info(f"Resumed polling {len(self._recovered)} tasks from the task journal")
+
+    def batch_retrieve(
+        self, task_ids: List[str], concurrency: int = 16, api_token: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        并发批量查询任务结果，结果顺序与task_ids一致
+
+        Args:
+            task_ids: 任务ID列表
+            concurrency: 最大并发查询数，默认16
+            api_token: 查询使用的API Token（可选），见 retrieve()
+
+        Returns:
+            任务结果列表（含 id 字段），单个任务失败时对应位置为 {"id", "error"}
+
+        Raises:
+            InvalidRequestError: 参数错误
+        """
+        if not task_ids or len(task_ids) == 0:
+            raise InvalidRequestError("task_ids不能为空")
+
+        logger.info(f"Batch retrieving {len(task_ids)} tasks")
+        return list(
+            self.iter_retrieve(task_ids, concurrency=concurrency, ordered=True, api_token=api_token)
+        )
+
+    def iter_retrieve(
+        self,
+        task_ids: Iterable[str],
+        concurrency: int = 16,
+        ordered: bool = False,
+        api_token: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        并发查询任务结果，逐个返回（惰性）
 
-        # 验证并转换任务ID为整数
+        task_ids 按需读取，可以是生成器；同时进行的查询不超过 concurrency，
+        内存占用与ID总数无关，适合对账大量任务。
+
+        用法示例:
+            ```python
+            with open("task_ids.txt") as f:
+                ids = (line.strip() for line in f)
+                for result in client.tasks.iter_retrieve(ids, concurrency=32):
+                    if "error" in result:
+                        retry_later(result["id"])
+                    elif result["state"] == TaskState.SUCCEEDED:
+                        save(result["id"], result["answer"])
+            ```
+
+        Args:
+            task_ids: 任务ID的可迭代对象
+            concurrency: 最大并发查询数，默认16
+            ordered: 是否按输入顺序返回，默认False（按完成顺序返回）
+            api_token: 查询使用的API Token（可选），见 retrieve()
+
+        Returns:
+            任务结果字典的迭代器，每个结果含 id 字段；单个任务失败时为 {"id", "error"}
+
+        Raises:
+            InvalidRequestError: concurrency 小于1
+        """
+        if concurrency < 1:
+            raise InvalidRequestError("concurrency 至少为1")
+        return self._iter_retrieve(iter(task_ids), concurrency, ordered, api_token)
+
+    def _retrieve_record(self, task_id: str, api_token: Optional[str]) -> Dict[str, Any]:
         try:
-            task_id_int = int(task_id)
-        except (ValueError, TypeError) as e:
-            raise InvalidRequestError(f"无效的任务ID格式: {task_id}") from e
+            result = self.retrieve(task_id, api_token)
+        except Exception as e:
+            logger.warning(f"Failed to retrieve task {task_id}: {str(e)}")
+            return {"id": task_id, "error": str(e)}
+        result["id"] = task_id
+        return result
+
+    def _iter_retrieve(
+        self, task_ids: Iterator[str], concurrency: int, ordered: bool, api_token: Optional[str]
+    ) -> Iterator[Dict[str, Any]]:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ai-sdk-retrieve")
+        window: "collections.deque[Future]" = collections.deque()  # 按提交顺序
+        running: Set[Future] = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(window) < concurrency:
+                    try:
+                        task_id = next(task_ids)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = executor.submit(self._retrieve_record, task_id, api_token)
+                    window.append(future)
+                    running.add(future)
+                if not window:
+                    return
+
+                if ordered:
+                    future = window.popleft()
+                    running.discard(future)
+                    yield future.result()
+                    continue
+
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    window.remove(future)
+                for future in finished:
+                    yield future.result()
+        finally:
+            for future in window:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-        logger.info(f"Retrieving task: {task_id_int}")
 
-        response = self._client._post("/chatResult", json={"id": task_id_int})
+class AsyncTasks:
+    """异步任务管理资源类"""
+
+    def __init__(self, client: "AsyncAIClient"):
+        self._client = client
+
+    def eta(self, task_id: str) -> Optional[float]:
+        """
+        估计任务的剩余等待时间，见 Tasks.eta()
+
+        覆盖本客户端正在等待结果的任务，以及从任务日志恢复、由后台轮询器轮询的任务。
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            剩余秒数估计；任务不在等待中或历史样本不足时返回None
+        """
+        task_id_int = _validate_task_id(task_id)
+        eta = self._client.chat.completions._eta(task_id_int)
+        if eta is None:
+            eta = self._client.client._poller.eta(task_id_int)
+        return eta
+
+    def recover(self) -> List[RecoveredTask]:
+        """客户端启动时从任务日志恢复的任务，见 Tasks.recover()"""
+        return self._client.client.tasks.recover()
+
+    async def retrieve(self, task_id: str, api_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        异步查询任务结果
 
-        # API 响应格式: {"code": 0, "message": "AI任务处理完成", "answer": "..."}
-        # 任务状态在 message 字段，结果在 answer 字段
-        result = {
-            "code": response.get("code"),
-            "message": response.get("message", ""),
-            "answer": response.get("answer", ""),
-        }
+        Args:
+            task_id: 任务ID
+            api_token: 查询使用的API Token（可选），见 Tasks.retrieve()
+
+        Returns:
+            任务结果字典，包含code, message, answer字段
+
+        Raises:
+            InvalidRequestError: 参数错误
+            AIAPIError: API调用错误
+        """
+        task_id_int = _validate_task_id(task_id)
+
+        logger.info(f"Retrieving task: {task_id_int}")
+
+        response = await self._client._post(
+            "/chatResult",
+            content=poll_body(task_id_int),
+            token=_task_token(self._client, task_id_int, api_token),
+        )
+        result = _build_task_result(response)
         logger.debug(f"Task {task_id} result: {result}")
 
         return result
 
-    def batch_retrieve(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+    async def batch_retrieve(
+        self, task_ids: List[str], concurrency: int = 16, api_token: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
-        批量查询任务结果
+        并发批量查询任务结果，结果顺序与task_ids一致
 
         Args:
             task_ids: 任务ID列表
+            concurrency: 最大并发查询数，默认16
+            api_token: 查询使用的API Token（可选），见 Tasks.retrieve()
 
         Returns:
-            任务结果列表
+            任务结果列表（含 id 字段），单个任务失败时对应位置为 {"id", "error"}
 
         Raises:
             InvalidRequestError: 参数错误
-            AIAPIError: API调用错误
         """
         if not task_ids or len(task_ids) == 0:
             raise InvalidRequestError("task_ids不能为空")
 
         logger.info(f"Batch retrieving {len(task_ids)} tasks")
+        return [
+            result
+            async for result in self.iter_retrieve(
+                task_ids, concurrency=concurrency, ordered=True, api_token=api_token
+            )
+        ]
+
+    async def iter_retrieve(
+        self,
+        task_ids: Iterable[str],
+        concurrency: int = 16,
+        ordered: bool = False,
+        api_token: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        并发查询任务结果，逐个产出（惰性），见 Tasks.iter_retrieve()
+
+        task_ids 按需读取，同时进行的查询不超过 concurrency，不为每个查询创建线程。
+        提前退出 async for（break）或取消迭代时，尚未结束的查询会被取消。
+
+        用法示例:
+            ```python
+            async for result in client.tasks.iter_retrieve(ids, concurrency=32):
+                if "error" in result:
+                    retry_later(result["id"])
+            ```
+
+        Args:
+            task_ids: 任务ID的可迭代对象
+            concurrency: 最大并发查询数，默认16
+            ordered: 是否按输入顺序产出，默认False（按完成顺序产出）
+            api_token: 查询使用的API Token（可选），见 Tasks.retrieve()
+
+        Yields:
+            任务结果字典，每个结果含 id 字段；单个任务失败时为 {"id", "error"}
+
+        Raises:
+            InvalidRequestError: concurrency 小于1
+        """
+        if concurrency < 1:
+            raise InvalidRequestError("concurrency 至少为1")
 
-        # 注意：这里假设API支持批量查询，根据实际API调整
-        # 如果API不支持批量查询，可以循环调用单个查询
-        results = []
-        for task_id in task_ids:
+        ids = iter(task_ids)
+        window: "collections.deque[asyncio.Future]" = collections.deque()  # 按提交顺序
+
+        def start_next() -> bool:
             try:
-                result = self.retrieve(task_id)
-                results.append(result)
-            except Exception as e:
-                logger.warning(f"Failed to retrieve task {task_id}: {str(e)}")
-                results.append({"id": task_id, "error": str(e)})
+                task_id = next(ids)
+            except StopIteration:
+                return False
+            window.append(asyncio.ensure_future(self._retrieve_record(task_id, api_token)))
+            return True
 
-        return results
+        try:
+            while len(window) < concurrency and start_next():
+                pass
+            while window:
+                if ordered:
+                    await asyncio.wait((window[0],))
+                    finished = [window[0]]
+                else:
+                    done, _ = await asyncio.wait(window, return_when=asyncio.FIRST_COMPLETED)
+                    finished = [future for future in window if future in done]
+                for future in finished:
+                    window.remove(future)
+                    # 先补充新的查询再交出结果，保持并发
+                    start_next()
+                    yield future.result()
+        finally:
+            for future in window:
+                future.cancel()
+            if window:
+                await asyncio.gather(*window, return_exceptions=True)
+
+    async def _retrieve_record(self, task_id: str, api_token: Optional[str]) -> Dict[str, Any]:
+        try:
+            result = await self.retrieve(task_id, api_token)
+        except Exception as e:
+            logger.warning(f"Failed to retrieve task {task_id}: {str(e)}")
+            return {"id": task_id, "error": str(e)}
+        result["id"] = task_id
+        return result
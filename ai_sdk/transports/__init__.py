@@ -0,0 +1,42 @@
+"""
+传输层
+
+    - RequestsTransport: 基于 requests.Session（AIClient 默认）
+    - Urllib3Transport: 基于 urllib3 连接池，每个请求的开销更低
+    - AsyncioTransport: 基于内置的 asyncio 连接池（AsyncAIClient 默认）
+    - InProcessTransport: 由 Python 函数处理请求，不经过网络（同步/异步均可）
+    - HTTP2Transport / AsyncHTTP2Transport: 基于 httpx 的 HTTP/2 多路复用（需安装 httpx[http2]）
+
+自定义传输层继承 BaseTransport（实现 handle_request）或 AsyncBaseTransport
+（实现 handle_async_request），通过 AIClient(transport=...) / AsyncAIClient(transport=...) 传入。
+支持连接预热与连接池统计的传输层另外实现 warmup() 与 pool_stats()；
+能边接收边处理响应体的传输层可覆盖 stream_request() / stream_async_request()。
+"""
+from .base import (
+    AsyncBaseTransport,
+    BaseTransport,
+    PoolStats,
+    Request,
+    Response,
+    build_request,
+)
+from .asyncio_transport import AsyncioTransport
+from .httpx_transport import AsyncHTTP2Transport, HTTP2Transport
+from .inprocess import InProcessTransport
+from .requests_transport import RequestsTransport
+from .urllib3_transport import Urllib3Transport
+
+__all__ = [
+    "BaseTransport",
+    "AsyncBaseTransport",
+    "Request",
+    "Response",
+    "PoolStats",
+    "build_request",
+    "RequestsTransport",
+    "Urllib3Transport",
+    "AsyncioTransport",
+    "InProcessTransport",
+    "HTTP2Transport",
+    "AsyncHTTP2Transport",
+]
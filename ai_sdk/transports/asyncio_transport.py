@@ -0,0 +1,74 @@
+"""
+基于 asyncio 连接池的异步传输层（AsyncAIClient 的默认传输层）
+"""
+import asyncio
+import dataclasses
+from typing import Optional
+
+from .._async_http import AsyncConnectionPool
+from .base import (
+    AsyncBaseTransport,
+    PoolStats,
+    Request,
+    Response,
+    Sink,
+    connection_error,
+    timeout_error,
+)
+
+
+class AsyncioTransport(AsyncBaseTransport):
+    """
+    通过内置的 asyncio HTTP/1.1 连接池发送请求，所有请求都在事件循环内完成，不占用额外线程
+
+    Args:
+        max_connections: 最大并发连接数，默认100
+        keepalive_expiry: 空闲连接保留时间（秒），默认30
+    """
+
+    def __init__(self, max_connections: int = 100, keepalive_expiry: float = 30.0):
+        self.pool = AsyncConnectionPool(
+            max_connections=max_connections, keepalive_expiry=keepalive_expiry
+        )
+
+    async def handle_async_request(self, request: Request) -> Response:
+        try:
+            return await self.pool.send(
+                request.method, request.url, request.headers, request.content, request.timeout
+            )
+        except asyncio.TimeoutError:
+            raise timeout_error(request.timeout)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise connection_error(e)
+
+    async def stream_async_request(self, request: Request, sink: Sink) -> Response:
+        try:
+            return await self.pool.send(
+                request.method,
+                request.url,
+                request.headers,
+                request.content,
+                request.timeout,
+                sink=sink,
+            )
+        except asyncio.TimeoutError:
+            raise timeout_error(request.timeout)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise connection_error(e)
+
+    async def warmup(
+        self, url: str, connections: int, timeout: Optional[float] = None
+    ) -> int:
+        return await self.pool.warmup(url, connections, timeout)
+
+    def pool_stats(self) -> PoolStats:
+        return dataclasses.replace(self.pool.stats)
+
+    def after_fork(self) -> None:
+        self.pool._after_fork()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
@@ -0,0 +1,317 @@
+"""
+传输层接口
+
+AIClient / AsyncAIClient 的所有HTTP请求都经过传输层：客户端负责拼接URL、编码请求体与请求头，
+传输层只负责发送请求并返回状态码、响应头与响应体。HTTP状态码到SDK异常的映射
+（401/403/400/429/5xx）由客户端统一完成，与使用哪种传输层无关。
+
+传输层实现需要将网络错误转换为SDK异常：
+    - 超时抛出 ai_sdk.exceptions.TimeoutError
+    - 连接失败、连接被重置等抛出 APIConnectionError
+
+stream_request / stream_async_request 用于接收很大的响应体（见 create_spooled）：
+状态码为200时边接收边把响应体分块交给 sink，不在内存中保留完整响应体。
+默认实现先读取完整响应再整块交给 sink，支持流式读取的传输层覆盖它们。
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+from urllib.parse import urlencode
+
+from .._codec import JSONCodec, get_codec
+from ..exceptions import APIConnectionError, TimeoutError as AITimeoutError
+
+
+class Request:
+    """一次HTTP请求（请求体已编码）"""
+
+    __slots__ = ("method", "url", "headers", "content", "timeout")
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        content: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.timeout = timeout
+
+    def json(self) -> Any:
+        """解析请求体JSON（供进程内传输层使用）"""
+        return get_codec().decode(self.content) if self.content else None
+
+    def __repr__(self) -> str:
+        return f"<Request {self.method} {self.url}>"
+
+
+class Response:
+    """HTTP响应（响应体已完整读取），headers 的键为小写"""
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return get_codec().decode(self.content)
+
+    def __repr__(self) -> str:
+        return f"<Response [{self.status_code}]>"
+
+
+# 流式读取响应体时每块的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 接收响应体数据块的回调
+Sink = Callable[[bytes], None]
+
+
+def build_request(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    json: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    content: Optional[bytes] = None,
+    codec: Optional[JSONCodec] = None,
+) -> Request:
+    """
+    拼接查询参数并编码JSON请求体（同步/异步客户端共用）
+
+    json 用 codec（默认见 ai_sdk._codec.get_codec）编码为紧凑的 UTF-8；
+    已编码的请求体可通过 content 直接传入
+    """
+    if params:
+        url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+    if json is not None:
+        content = (codec or get_codec()).encode(json)
+    return Request(method, url, headers, content, timeout)
+
+
+def timeout_error(timeout: Optional[float]) -> AITimeoutError:
+    return AITimeoutError(f"请求超时 ({timeout}秒)")
+
+
+def connection_error(error: BaseException) -> APIConnectionError:
+    return APIConnectionError(f"网络连接错误: {str(error)}")
+
+
+@dataclass
+class PoolStats:
+    """连接池统计"""
+
+    max_connections: Optional[int]  # 同时占用的连接数上限，None 表示不限制
+    keepalive_expiry: float  # 空闲超过该时长（秒）的连接不再复用
+    requests: int = 0
+    connections_opened: int = 0  # 新建的连接数（含预热）
+    in_use: int = 0  # 当前占用的连接数
+    waits: int = 0  # 因连接数达到上限而等待的请求数
+    wait_time: float = 0.0  # 累计等待时间（秒）
+    max_wait: float = 0.0
+    evictions: int = 0  # 空闲超过 keepalive_expiry 而丢弃空闲连接的次数
+
+
+class _ConnectionLimit:
+    """
+    限制同时占用的连接数（先到先得），统计等待，并在连接池空闲超过 keepalive_expiry 后提示关闭空闲连接
+
+    等待的请求按到达顺序获得连接：刚释放连接的线程不能插队，避免连接数不足时部分请求长时间饿死。
+    urllib3 只在复用前检查连接是否已被对端关闭；服务端通常会关闭长时间空闲的连接，
+    这里在客户端空闲过久后主动丢弃空闲连接，避免突发请求撞上失效的连接。
+    """
+
+    def __init__(self, max_connections: Optional[int], keepalive_expiry: float):
+        self._available = max_connections
+        self._waiters: Deque[threading.Lock] = deque()
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self.stats = PoolStats(max_connections, keepalive_expiry)
+
+    def acquire(self, timeout: Optional[float]) -> bool:
+        """
+        占用一个连接
+
+        Returns:
+            连接池此前是否已空闲超过 keepalive_expiry（调用方应先关闭空闲连接）
+
+        Raises:
+            TimeoutError: timeout 秒内没有可用连接
+        """
+        waiter = None
+        with self._lock:
+            if self._available is not None:
+                if self._available > 0 and not self._waiters:
+                    self._available -= 1
+                else:
+                    waiter = threading.Lock()
+                    waiter.acquire()
+                    self._waiters.append(waiter)
+
+        waited = 0.0
+        if waiter is not None:
+            started = time.monotonic()
+            acquired = waiter.acquire(timeout=-1 if timeout is None else timeout)
+            waited = time.monotonic() - started
+            if not acquired:
+                with self._lock:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        # 超时的同时 release() 已把连接交给了这个请求
+                        acquired = True
+                    if not acquired:
+                        self.stats.waits += 1
+                        self.stats.wait_time += waited
+                if not acquired:
+                    raise timeout_error(timeout)
+
+        now = time.monotonic()
+        with self._lock:
+            stats = self.stats
+            stats.requests += 1
+            stats.in_use += 1
+            if waiter is not None:
+                stats.waits += 1
+                stats.wait_time += waited
+                stats.max_wait = max(stats.max_wait, waited)
+            expired = stats.in_use == 1 and now - self._last_used > stats.keepalive_expiry
+            if expired:
+                stats.evictions += 1
+            self._last_used = now
+        return expired
+
+    def touch(self) -> None:
+        """预热等操作刚建立了连接，重新开始计算空闲时长"""
+        with self._lock:
+            self._last_used = time.monotonic()
+
+    def release(self) -> None:
+        with self._lock:
+            self.stats.in_use -= 1
+            self._last_used = time.monotonic()
+            if self._available is None:
+                return
+            if self._waiters:
+                # 连接直接交给最早等待的请求
+                self._waiters.popleft().release()
+            else:
+                self._available += 1
+
+
+class BaseTransport:
+    """同步传输层基类，handle_request 会被多个线程同时调用，实现需要线程安全"""
+
+    def handle_request(self, request: Request) -> Response:
+        """
+        发送请求并返回完整响应
+
+        Raises:
+            TimeoutError: 请求超时
+            APIConnectionError: 网络连接错误
+        """
+        raise NotImplementedError
+
+    def stream_request(self, request: Request, sink: Sink) -> Response:
+        """
+        发送请求，状态码为200时将响应体分块交给 sink，返回的 Response.content 为空；
+        其他状态码时与 handle_request 相同，返回完整响应体
+
+        默认实现读取完整响应体后一次性交给 sink
+
+        Raises:
+            TimeoutError: 请求超时
+            APIConnectionError: 网络连接错误
+            ValueError: 由 sink 抛出（响应体无法解析）
+        """
+        response = self.handle_request(request)
+        if response.status_code == 200:
+            sink(response.content)
+            response.content = b""
+        return response
+
+    def warmup(self, url: str, connections: int, timeout: Optional[float] = None) -> int:
+        """
+        预先建立到 url 所在主机的连接（TCP/TLS握手），避免首批请求承担建连开销
+
+        已有的空闲连接计入 connections，建立失败的连接只记录警告，不抛出异常
+
+        Returns:
+            新建立的连接数；不支持预热的传输层返回0
+        """
+        return 0
+
+    def pool_stats(self) -> Optional[PoolStats]:
+        """连接池统计；不支持时返回None"""
+        return None
+
+    def after_fork(self) -> None:
+        """
+        fork 后在子进程中调用：丢弃从父进程继承的连接（不关闭，以免影响父进程），重建锁
+
+        所属客户端会自动调用；持有连接池的自定义传输层需要覆盖
+        """
+
+    def close(self) -> None:
+        """释放连接等资源"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AsyncBaseTransport:
+    """异步传输层基类"""
+
+    async def handle_async_request(self, request: Request) -> Response:
+        """
+        发送请求并返回完整响应
+
+        Raises:
+            TimeoutError: 请求超时
+            APIConnectionError: 网络连接错误
+        """
+        raise NotImplementedError
+
+    async def stream_async_request(self, request: Request, sink: Sink) -> Response:
+        """发送请求并将响应体分块交给 sink，见 BaseTransport.stream_request"""
+        response = await self.handle_async_request(request)
+        if response.status_code == 200:
+            sink(response.content)
+            response.content = b""
+        return response
+
+    async def warmup(
+        self, url: str, connections: int, timeout: Optional[float] = None
+    ) -> int:
+        """预先建立连接，见 BaseTransport.warmup"""
+        return 0
+
+    def pool_stats(self) -> Optional[PoolStats]:
+        """连接池统计；不支持时返回None"""
+        return None
+
+    def after_fork(self) -> None:
+        """fork 后在子进程中调用，见 BaseTransport.after_fork"""
+
+    def close(self) -> None:
+        """同步释放资源（不等待连接关闭完成）"""
+
+    async def aclose(self) -> None:
+        """释放资源并等待连接关闭完成"""
+        self.close()
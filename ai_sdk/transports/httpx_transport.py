@@ -0,0 +1,282 @@
+"""
+基于 httpx 的 HTTP/2 传输层（可选依赖）
+
+大量任务同时轮询 /chatResult 时，HTTP/1.1 每个连接同一时间只能处理一个请求，
+要么需要很大的连接池，要么请求在连接上排队。HTTP/2 在少量连接上多路复用并发的请求（流），
+连接数与在途请求数解耦。
+
+需要安装 httpx 与 h2：
+
+    pip install "ai-sdk[http2]"    # 或 pip install "httpx[http2]"
+
+HTTPS 服务端通过 TLS ALPN 协商协议，不支持 HTTP/2 时自动回退到 HTTP/1.1（此时每个连接
+同一时间只处理一个请求，max_connections 即并发上限）。明文 http:// 地址默认使用 HTTP/1.1；
+确认服务端支持 h2c 时可设置 prior_knowledge=True 直接使用 HTTP/2（不再回退）。
+"""
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from .base import (
+    AsyncBaseTransport,
+    BaseTransport,
+    Request,
+    Response,
+    connection_error,
+    timeout_error,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - 可选依赖
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# 在另一个线程中关闭旧事件循环上的客户端时最多等待的秒数
+CLOSE_TIMEOUT = 5.0
+
+
+def _check_installed() -> None:
+    if httpx is None:
+        raise ImportError('HTTP/2 传输层需要安装 httpx 与 h2: pip install "httpx[http2]"')
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        raise ImportError('HTTP/2 传输层需要安装 h2: pip install "httpx[http2]"') from None
+
+
+def _client_options(
+    max_connections: int, keepalive_expiry: float, prior_knowledge: bool, verify
+) -> Dict:
+    return {
+        "http1": not prior_knowledge,
+        "http2": True,
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        "verify": verify,
+    }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _to_response(response: "httpx.Response") -> Response:
+    headers = {name.lower(): value for name, value in response.headers.items()}
+    return Response(response.status_code, headers, response.content)
+
+
+async def _close_with_loop(client: "httpx.AsyncClient", armed: List[bool]) -> AsyncIterator[None]:
+    """
+    随事件循环关闭客户端的异步生成器
+
+    事件循环会在首次迭代时登记异步生成器，asyncio.run() 退出前（shutdown_asyncgens）
+    对其调用 aclose()，此时连接所在的循环仍在运行，可以正常关闭连接。
+    """
+    try:
+        yield
+    finally:
+        if armed[0] and not client.is_closed:
+            await client.aclose()
+
+
+def _disarm(guard: AsyncIterator[None], armed: List[bool]) -> None:
+    """结束 guard 而不关闭客户端（不会挂起，无需事件循环）"""
+    armed[0] = False
+    closing = guard.aclose()
+    try:
+        closing.send(None)
+    except StopIteration:
+        pass
+
+
+class _HTTP2Options:
+    """同步/异步 HTTP/2 传输层共用的参数与统计"""
+
+    def __init__(self, max_connections: int, max_streams: int):
+        _check_installed()
+        self.max_connections = max_connections
+        self.max_streams = max_streams
+        # 每种协议版本完成的请求数，例如 {"HTTP/2": 980, "HTTP/1.1": 20}
+        self.http_versions: Counter = Counter()
+
+    def _record(self, response: "httpx.Response") -> None:
+        self.http_versions[response.http_version] += 1
+
+
+class HTTP2Transport(_HTTP2Options, BaseTransport):
+    """
+    同步 HTTP/2 传输层，供 AIClient 使用
+
+    Args:
+        max_connections: 最大连接数，默认4
+        max_streams: 同时进行的请求（流）总数上限，默认100；超过时等待，等待计入请求超时
+        keepalive_expiry: 空闲连接保留时间（秒），默认30
+        prior_knowledge: 明文 http:// 地址是否直接使用 HTTP/2（h2c），默认False
+        verify: TLS证书校验，同 httpx（True、False 或 ssl.SSLContext），默认True
+
+    Raises:
+        ImportError: 未安装 httpx 或 h2
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 4,
+        max_streams: int = 100,
+        keepalive_expiry: float = 30.0,
+        prior_knowledge: bool = False,
+        verify=True,
+    ):
+        super().__init__(max_connections, max_streams)
+        self._options = _client_options(max_connections, keepalive_expiry, prior_knowledge, verify)
+        self.client = httpx.Client(**self._options)
+        self._streams = threading.BoundedSemaphore(max_streams)
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: Request) -> Response:
+        if not self._streams.acquire(timeout=request.timeout):
+            raise timeout_error(request.timeout)
+        try:
+            response = self.client.request(
+                request.method,
+                request.url,
+                content=request.content,
+                headers=request.headers,
+                timeout=request.timeout,
+            )
+        except httpx.TimeoutException:
+            raise timeout_error(request.timeout)
+        except httpx.TransportError as e:
+            raise connection_error(e)
+        finally:
+            self._streams.release()
+        with self._lock:
+            self._record(response)
+        return _to_response(response)
+
+    def after_fork(self) -> None:
+        self.client = httpx.Client(**self._options)
+        self._streams = threading.BoundedSemaphore(self.max_streams)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class AsyncHTTP2Transport(_HTTP2Options, AsyncBaseTransport):
+    """
+    异步 HTTP/2 传输层，供 AsyncAIClient 使用，参数同 HTTP2Transport
+
+    Raises:
+        ImportError: 未安装 httpx 或 h2
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 4,
+        max_streams: int = 100,
+        keepalive_expiry: float = 30.0,
+        prior_knowledge: bool = False,
+        verify=True,
+    ):
+        super().__init__(max_connections, max_streams)
+        self._options = _client_options(max_connections, keepalive_expiry, prior_knowledge, verify)
+        self.client: Optional["httpx.AsyncClient"] = None
+        self._streams: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._guard: Optional[AsyncIterator[None]] = None
+        self._armed = [False]
+        self._closing: Set["asyncio.Future[None]"] = set()
+
+    async def _bind(self) -> None:
+        """
+        连接与信号量都绑定在事件循环上，换循环（如多次 asyncio.run）时关闭旧客户端并重建
+
+        客户端随所在的事件循环一起关闭（见 _close_with_loop），asyncio.run() 退出时不会遗留连接
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._discard()
+            self.client = httpx.AsyncClient(**self._options)
+            self._streams = asyncio.Semaphore(self.max_streams)
+            self._loop = loop
+            self._armed = [True]
+            self._guard = _close_with_loop(self.client, self._armed)
+            await self._guard.__anext__()
+
+    def _discard(self) -> None:
+        """关闭当前客户端（在其所属的事件循环上执行，不等待完成）"""
+        client, loop, guard, armed = self.client, self._loop, self._guard, self._armed
+        self.client = self._streams = self._loop = self._guard = None
+        if guard is None:
+            return
+        if client.is_closed:
+            _disarm(guard, armed)
+        elif loop.is_closed():
+            # 循环没有经过 shutdown_asyncgens 就已关闭，连接无法再正常关闭
+            _disarm(guard, armed)
+            logger.debug("Event loop closed before the HTTP/2 client, connections dropped")
+        elif loop is _running_loop():
+            closing = loop.create_task(guard.aclose())
+            self._closing.add(closing)
+            closing.add_done_callback(self._closing.discard)
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(guard.aclose(), loop)
+        else:
+            thread = threading.Thread(target=loop.run_until_complete, args=(guard.aclose(),))
+            thread.start()
+            thread.join(CLOSE_TIMEOUT)
+
+    async def handle_async_request(self, request: Request) -> Response:
+        await self._bind()
+        try:
+            await asyncio.wait_for(self._streams.acquire(), request.timeout)
+        except asyncio.TimeoutError:
+            raise timeout_error(request.timeout)
+        try:
+            response = await self.client.request(
+                request.method,
+                request.url,
+                content=request.content,
+                headers=request.headers,
+                timeout=request.timeout,
+            )
+        except httpx.TimeoutException:
+            raise timeout_error(request.timeout)
+        except httpx.TransportError as e:
+            raise connection_error(e)
+        finally:
+            self._streams.release()
+        self._record(response)
+        return _to_response(response)
+
+    def after_fork(self) -> None:
+        # 连接属于父进程的事件循环，不关闭（关闭会向父进程的连接发送 GOAWAY），下次请求时重建
+        if self._guard is not None:
+            _disarm(self._guard, self._armed)
+        self.client = self._streams = self._loop = self._guard = None
+        self._closing = set()
+
+    def close(self) -> None:
+        self._discard()
+
+    async def aclose(self) -> None:
+        guard = self._guard
+        if guard is not None and self._loop is asyncio.get_running_loop():
+            self.client = self._streams = self._loop = self._guard = None
+            await guard.aclose()
+        else:
+            self._discard()
+        loop = asyncio.get_running_loop()
+        closing = [task for task in self._closing if task.get_loop() is loop]
+        if closing:
+            await asyncio.gather(*closing, return_exceptions=True)
@@ -0,0 +1,49 @@
+"""
+进程内传输层
+
+请求不经过网络，直接交给 Python 函数处理，用于测试或在本地模拟服务端。
+同时实现同步与异步接口，AIClient 与 AsyncAIClient 均可使用。
+"""
+from typing import Any, Callable, Tuple, Union
+
+from .._codec import get_codec
+from .base import AsyncBaseTransport, BaseTransport, Request, Response
+
+Handler = Callable[[Request], Union[Response, Tuple[int, Any]]]
+
+
+class InProcessTransport(BaseTransport, AsyncBaseTransport):
+    """
+    由函数处理请求的传输层
+
+    用法示例:
+        ```python
+        def handler(request):
+            if request.url.endswith("/chatCompletion"):
+                return 200, {"code": 0, "message": "成功", "data": 1}
+            return 200, {"code": 0, "message": "AI任务处理完成", "answer": "你好"}
+
+        client = AIClient(api_token="test", transport=InProcessTransport(handler))
+        ```
+
+    Args:
+        handler: 处理函数，参数为 Request（request.json() 得到请求体），
+            返回 Response，或 (状态码, 响应体) 元组；响应体为 bytes/str 时原样返回，其他值编码为JSON
+    """
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+
+    def handle_request(self, request: Request) -> Response:
+        result = self.handler(request)
+        if isinstance(result, Response):
+            return result
+        status_code, body = result
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, bytes):
+            body = get_codec().encode(body)
+        return Response(status_code, {"content-type": "application/json"}, body)
+
+    async def handle_async_request(self, request: Request) -> Response:
+        return self.handle_request(request)
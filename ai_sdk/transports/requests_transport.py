@@ -0,0 +1,189 @@
+"""
+基于 requests.Session 的传输层（AIClient 的默认传输层）
+
+requests 没有承诺 Session 可以在线程间共享：请求过程中会读写 Session 上的请求头、Cookie 等状态。
+这里每个线程使用自己的 Session（首次请求时按传入的 Session 复制配置），所有线程共用同一组
+HTTPAdapter（即同一个 urllib3 连接池，其本身是线程安全的）与同一个 Cookie 容器（内部加锁），
+因此一个 AIClient 可以在任意多个线程间共享，连接数也不随线程数增长。
+"""
+import dataclasses
+import threading
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .base import (
+    STREAM_CHUNK_SIZE,
+    BaseTransport,
+    PoolStats,
+    Request,
+    Response,
+    Sink,
+    _ConnectionLimit,
+    connection_error,
+    timeout_error,
+)
+from .urllib3_transport import _opened_connections, _warm_pool
+
+
+class RequestsTransport(BaseTransport):
+    """
+    通过 requests.Session 发送请求
+
+    Args:
+        session: 使用的 Session（可选），默认新建；可传入已配置代理、证书等的 Session。
+            各线程的 Session 在该线程首次请求时复制它的配置，之后修改请求头、代理等不影响已复制的线程；
+            挂载的 HTTPAdapter 与 Cookie 由所有线程共用
+        max_connections: 同时进行的请求数上限（可选），超过时等待，等待计入请求超时；
+            新建 Session 时同时作为每个主机保留的 keep-alive 连接数。默认不限制
+            （requests 默认每个主机保留10个连接，超出的连接用完即关闭）
+        keepalive_expiry: 连接池空闲超过该时长（秒）后，下一个请求前先关闭所有空闲连接，默认30
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        max_connections: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+    ):
+        if session is None:
+            session = requests.Session()
+            if max_connections:
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max_connections)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+        self.session = session
+        self._local = threading.local()
+        self._limit = _ConnectionLimit(max_connections, keepalive_expiry)
+        self._evicted_connections = 0
+
+    def handle_request(self, request: Request) -> Response:
+        if self._limit.acquire(request.timeout):
+            self._evict()
+        try:
+            response = self._thread_session().request(
+                method=request.method,
+                url=request.url,
+                data=request.content,
+                headers=request.headers,
+                timeout=request.timeout,
+            )
+        except requests.exceptions.Timeout:
+            raise timeout_error(request.timeout)
+        except requests.exceptions.ConnectionError as e:
+            raise connection_error(e)
+        finally:
+            self._limit.release()
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        return Response(response.status_code, headers, response.content)
+
+    def stream_request(self, request: Request, sink: Sink) -> Response:
+        if self._limit.acquire(request.timeout):
+            self._evict()
+        try:
+            response = self._thread_session().request(
+                method=request.method,
+                url=request.url,
+                data=request.content,
+                headers=request.headers,
+                timeout=request.timeout,
+                stream=True,
+            )
+            with response:
+                if response.status_code != 200:
+                    content = response.content
+                else:
+                    content = b""
+                    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                        sink(chunk)
+        except requests.exceptions.Timeout:
+            raise timeout_error(request.timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            raise connection_error(e)
+        finally:
+            self._limit.release()
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        return Response(response.status_code, headers, content)
+
+    def _thread_session(self) -> requests.Session:
+        """当前线程的 Session"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._copy_session()
+        return session
+
+    def _copy_session(self) -> requests.Session:
+        template = self.session
+        session = requests.Session()
+        session.close()
+        # 连接池与 Cookie 共用；mount() 修改的是共用的 adapters，对所有线程生效
+        session.adapters = template.adapters
+        session.cookies = template.cookies
+        session.headers = template.headers.copy()
+        session.proxies = dict(template.proxies)
+        session.params = dict(template.params)
+        session.hooks = {event: list(hooks) for event, hooks in template.hooks.items()}
+        session.auth = template.auth
+        session.verify = template.verify
+        session.cert = template.cert
+        session.stream = template.stream
+        session.trust_env = template.trust_env
+        session.max_redirects = template.max_redirects
+        return session
+
+    def _adapters(self) -> List[HTTPAdapter]:
+        return [
+            adapter
+            for adapter in dict.fromkeys(self.session.adapters.values())
+            if isinstance(adapter, HTTPAdapter)
+        ]
+
+    def _evict(self) -> None:
+        for adapter in self._adapters():
+            self._evicted_connections += _opened_connections(
+                [adapter.poolmanager, *adapter.proxy_manager.values()]
+            )
+            adapter.close()
+
+    def warmup(self, url: str, connections: int, timeout: Optional[float] = None) -> int:
+        adapter = self.session.get_adapter(url)
+        if not isinstance(adapter, HTTPAdapter):
+            return 0
+        max_connections = self._limit.stats.max_connections
+        if max_connections:
+            connections = min(connections, max_connections)
+        # 与 Session.request 一样合并环境变量中的代理与证书配置，才能选中发送请求时的连接池
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        verify, cert, proxies = settings["verify"], settings["cert"], settings["proxies"]
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            prepared = requests.Request("GET", url).prepare()
+            pool = adapter.get_connection_with_tls_context(
+                prepared, verify, proxies=proxies, cert=cert
+            )
+        else:  # requests < 2.32
+            pool = adapter.get_connection(url, proxies)
+        adapter.cert_verify(pool, url, verify, cert)
+        self._limit.touch()
+        return _warm_pool(pool, connections, timeout)
+
+    def pool_stats(self) -> PoolStats:
+        opened = self._evicted_connections
+        for adapter in self._adapters():
+            opened += _opened_connections([adapter.poolmanager, *adapter.proxy_manager.values()])
+        return dataclasses.replace(self._limit.stats, connections_opened=opened)
+
+    def after_fork(self) -> None:
+        # 在原 HTTPAdapter 上重建连接池，挂载关系与各线程 Session 的配置保持不变
+        for adapter in self._adapters():
+            adapter.init_poolmanager(
+                adapter._pool_connections, adapter._pool_maxsize, block=adapter._pool_block
+            )
+            adapter.proxy_manager = {}
+        self._local = threading.local()
+        stats = self._limit.stats
+        self._limit = _ConnectionLimit(stats.max_connections, stats.keepalive_expiry)
+        self._evicted_connections = 0
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,245 @@
+"""
+基于 urllib3 连接池的传输层
+
+urllib3 是 requests 的底层依赖，无需额外安装。相比 requests.Session，跳过了
+Session 层的钩子、Cookie、代理环境变量与重定向处理，每个请求的 Python 开销更低，
+适合高频轮询。不处理 Cookie 与系统代理设置，需要这些功能时使用 RequestsTransport。
+"""
+import dataclasses
+import logging
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+import urllib3
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import (
+    EmptyPoolError,
+    HTTPError,
+    NewConnectionError,
+    TimeoutError as Urllib3TimeoutError,
+)
+from urllib3.util.wait import wait_for_read
+
+from .base import (
+    STREAM_CHUNK_SIZE,
+    BaseTransport,
+    PoolStats,
+    Request,
+    Response,
+    Sink,
+    _ConnectionLimit,
+    connection_error,
+    timeout_error,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _opened_connections(managers: Iterable[urllib3.PoolManager]) -> int:
+    """PoolManager 中各主机连接池累计新建的连接数"""
+    opened = 0
+    for manager in managers:
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+    return opened
+
+
+def _read_session_tickets(sock: ssl.SSLSocket, wait: float) -> bool:
+    """
+    读取 TLS 1.3 服务端在握手完成后发送的会话票据
+
+    票据在握手后约一个往返到达；不读取的话连接一直处于可读状态，urllib3 复用前的检查
+    会误判连接已被对端关闭而重新建立连接，预热就白做了。
+
+    Returns:
+        连接是否仍然可用
+    """
+    if sock.version() != "TLSv1.3" or not wait_for_read(sock, timeout=wait):
+        return True
+    timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        # 票据由 SSL 层处理，没有应用数据可读时抛出 SSLWantReadError；
+        # 读到空数据（连接已关闭）或请求前的意外数据时，连接不可复用
+        sock.recv(65536)
+        return False
+    except ssl.SSLWantReadError:
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+
+def _warm_pool(pool: HTTPConnectionPool, connections: int, timeout: Optional[float]) -> int:
+    """
+    从连接池取出 connections 个连接，并发建立其中尚未连接的，再全部放回池中
+
+    Returns:
+        新建立的连接数
+    """
+    conns = []
+    # 超出连接池容量的连接放回时会被丢弃
+    for _ in range(min(connections, pool.pool.maxsize)):
+        try:
+            conns.append(pool._get_conn(timeout=0))
+        except EmptyPoolError:
+            # block=True 且其余连接都在使用中
+            break
+    cold = [conn for conn in conns if conn.sock is None]
+
+    def connect(conn) -> bool:
+        conn.timeout = timeout
+        try:
+            started = time.monotonic()
+            conn.connect()
+            # 握手耗时（数个往返）足够等到会话票据
+            if isinstance(conn.sock, ssl.SSLSocket) and not _read_session_tickets(
+                conn.sock, time.monotonic() - started
+            ):
+                conn.close()
+                return False
+            return True
+        except Exception as e:
+            logger.warning(f"Warmup connection to {pool.host}:{pool.port} failed: {e}")
+            conn.close()
+            return False
+
+    try:
+        if not cold:
+            return 0
+        with ThreadPoolExecutor(max_workers=len(cold)) as executor:
+            return sum(executor.map(connect, cold))
+    finally:
+        for conn in conns:
+            pool._put_conn(conn)
+
+
+@contextmanager
+def _map_errors(timeout: Optional[float]) -> Iterator[None]:
+    """将 urllib3 的异常转换为SDK异常"""
+    try:
+        yield
+    except NewConnectionError as e:
+        # NewConnectionError 继承自 ConnectTimeoutError，需先于超时处理
+        raise connection_error(e)
+    except Urllib3TimeoutError:
+        raise timeout_error(timeout)
+    except HTTPError as e:
+        raise connection_error(e)
+
+
+class Urllib3Transport(BaseTransport):
+    """
+    通过 urllib3.PoolManager 发送请求
+
+    Args:
+        maxsize: 每个主机保留的 keep-alive 连接数，默认10
+        block: 连接数达到 maxsize 时是否等待空闲连接，默认False（临时新建连接，用完关闭）
+        num_pools: 保留连接池的主机数，默认10
+        max_connections: 同时进行的请求数上限（可选），超过时等待，等待计入请求超时；
+            默认不限制
+        keepalive_expiry: 连接池空闲超过该时长（秒）后，下一个请求前先关闭所有空闲连接，默认30
+        **pool_kwargs: 传给 urllib3.PoolManager 的其他参数，例如 ca_certs、cert_reqs
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10,
+        block: bool = False,
+        num_pools: int = 10,
+        max_connections: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+        **pool_kwargs,
+    ):
+        self._pool_options = dict(
+            num_pools=num_pools, maxsize=maxsize, block=block, retries=False, **pool_kwargs
+        )
+        self.pool = urllib3.PoolManager(**self._pool_options)
+        self._timeouts: Dict[Optional[float], urllib3.Timeout] = {}
+        self._limit = _ConnectionLimit(max_connections, keepalive_expiry)
+        self._evicted_connections = 0
+
+    def _timeout(self, timeout: Optional[float]) -> urllib3.Timeout:
+        cached = self._timeouts.get(timeout)
+        if cached is None:
+            cached = self._timeouts[timeout] = urllib3.Timeout(connect=timeout, read=timeout)
+        return cached
+
+    def handle_request(self, request: Request) -> Response:
+        if self._limit.acquire(request.timeout):
+            self._evict()
+        try:
+            with _map_errors(request.timeout):
+                response = self._urlopen(request, preload_content=True)
+        finally:
+            self._limit.release()
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        return Response(response.status, headers, response.data)
+
+    def stream_request(self, request: Request, sink: Sink) -> Response:
+        if self._limit.acquire(request.timeout):
+            self._evict()
+        try:
+            with _map_errors(request.timeout):
+                response = self._urlopen(request, preload_content=False)
+                try:
+                    if response.status != 200:
+                        content = response.read()
+                    else:
+                        content = b""
+                        for chunk in response.stream(STREAM_CHUNK_SIZE):
+                            sink(chunk)
+                except BaseException:
+                    # 未读完的连接不能放回连接池
+                    response.close()
+                    raise
+                finally:
+                    response.release_conn()
+        finally:
+            self._limit.release()
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        return Response(response.status, headers, content)
+
+    def _urlopen(self, request: Request, preload_content: bool) -> urllib3.HTTPResponse:
+        return self.pool.urlopen(
+            request.method,
+            request.url,
+            body=request.content,
+            headers=request.headers,
+            timeout=self._timeout(request.timeout),
+            retries=False,
+            redirect=False,
+            preload_content=preload_content,
+        )
+
+    def _evict(self) -> None:
+        self._evicted_connections += _opened_connections([self.pool])
+        self.pool.clear()
+
+    def warmup(self, url: str, connections: int, timeout: Optional[float] = None) -> int:
+        max_connections = self._limit.stats.max_connections
+        if max_connections:
+            connections = min(connections, max_connections)
+        self._limit.touch()
+        return _warm_pool(self.pool.connection_from_url(url), connections, timeout)
+
+    def pool_stats(self) -> PoolStats:
+        return dataclasses.replace(
+            self._limit.stats,
+            connections_opened=self._evicted_connections + _opened_connections([self.pool]),
+        )
+
+    def after_fork(self) -> None:
+        self.pool = urllib3.PoolManager(**self._pool_options)
+        stats = self._limit.stats
+        self._limit = _ConnectionLimit(stats.max_connections, stats.keepalive_expiry)
+        self._evicted_connections = 0
+
+    def close(self) -> None:
+        self.pool.clear()
@@ -8,6 +8,7 @@ from .chat import (
     Choice,
     Usage,
 )
+from .task import TaskState
 
 __all__ = [
     "ChatMessage",
@@ -15,4 +16,5 @@ __all__ = [
     "ChatCompletion",
     "Choice",
     "Usage",
+    "TaskState",
 ]
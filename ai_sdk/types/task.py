@@ -0,0 +1,24 @@
+"""
+任务相关的类型定义
+"""
+from enum import Enum
+
+
+class TaskState(str, Enum):
+    """
+    任务状态
+
+    由 /chatResult 响应解析得到；CANCELLED 仅表示本地已停止轮询，服务端不会返回。
+    """
+
+    PENDING = "pending"  # AI任务待处理（排队中）
+    RUNNING = "running"  # AI任务处理中
+    SUCCEEDED = "succeeded"  # AI任务处理完成，且有答案
+    FAILED = "failed"  # AI任务处理失败
+    UNKNOWN = "unknown"  # 无法识别的响应（code != 0 或未知 message）
+    CANCELLED = "cancelled"  # 本地取消
+
+    @property
+    def is_terminal(self) -> bool:
+        """是否为终态"""
+        return self in (TaskState.SUCCEEDED, TaskState.FAILED, TaskState.CANCELLED)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+JSON 编解码的线上字节数与 CPU 开销基准测试
+
+以中文提示词的 /chatCompletion 请求体和中文回答的 /chatResult 响应为样本，比较:
+
+    1. 请求体字节数：标准库 json.dumps 默认输出（ensure_ascii=True，中文为 \\uXXXX 转义）
+       与编解码器输出的紧凑 UTF-8
+    2. 各编解码器（json / orjson / msgspec，已安装的）编码请求体、解码响应体的耗时
+    3. 经过客户端完整路径（InProcessTransport，不含网络）的每次提交 / 轮询的 CPU 时间，
+       legacy 为改动前的路径：json.dumps 编码、响应体先解码为文本再解析
+
+用法:
+    python benchmarks/bench_codec.py
+    python benchmarks/bench_codec.py --prompt-chars 2000 --answer-chars 8000 --calls 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_sdk import AIClient, ChatMessage, InProcessTransport, JSONCodec  # noqa: E402
+from ai_sdk._codec import get_codec, poll_body  # noqa: E402
+from ai_sdk.resources.chat import _build_request_data  # noqa: E402
+
+SAMPLE = "请用简洁的中文解释量子计算的基本原理，并举例说明它与经典计算的区别。"
+
+
+class LegacyCodec(JSONCodec):
+    """改动前的编解码方式"""
+
+    name = "legacy"
+
+    def encode(self, obj):
+        return json.dumps(obj).encode("utf-8")
+
+    def decode(self, data):
+        return json.loads(data.decode("utf-8", errors="replace"))
+
+
+def _text(chars):
+    return (SAMPLE * (chars // len(SAMPLE) + 1))[:chars]
+
+
+def _codecs():
+    codecs = [LegacyCodec()]
+    for name in ("json", "orjson", "msgspec"):
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f"  ({name} 未安装，跳过)")
+    return codecs
+
+
+def _per_call(fn, calls):
+    """返回每次调用的 CPU 时间（秒）"""
+    fn()
+    started = time.process_time()
+    for _ in range(calls):
+        fn()
+    return (time.process_time() - started) / calls
+
+
+def _client_path(codec, request_data, answer_body, calls):
+    submit_body = json.dumps({"code": 0, "message": "成功", "data": 1000}).encode("utf-8")
+
+    def handler(request):
+        return 200, submit_body if request.url.endswith("/chatCompletion") else answer_body
+
+    client = AIClient(api_token="t", transport=InProcessTransport(handler), json_codec=codec)
+    if codec.name == "legacy":
+        poll = lambda: client._post("/chatResult", json={"id": 1000})  # noqa: E731
+    else:
+        poll = lambda: client._post("/chatResult", content=poll_body(1000))  # noqa: E731
+    submit = _per_call(lambda: client._post("/chatCompletion", json=request_data), calls)
+    result = _per_call(poll, calls)
+    client.close()
+    return submit, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompt-chars", type=int, default=500, help="提示词的中文字符数")
+    parser.add_argument("--answer-chars", type=int, default=2000, help="回答的中文字符数")
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    request_data = _build_request_data(
+        "yuanbao", [ChatMessage(role="user", content=_text(args.prompt_chars))],
+        None, None, False, False, 0,
+    )
+    answer = {"code": 0, "message": "AI任务处理完成", "answer": _text(args.answer_chars)}
+    answer_body = json.dumps(answer, ensure_ascii=False).encode("utf-8")
+    codecs = _codecs()
+
+    legacy = len(json.dumps(request_data).encode("utf-8"))
+    print(f"\n请求体字节数（提示词 {args.prompt_chars} 个中文字符）:")
+    print(f"  {'json.dumps default':<18} {legacy:>8,} B")
+    for codec in codecs[1:]:
+        size = len(codec.encode(request_data))
+        print(f"  {codec.name:<18} {size:>8,} B   {size / legacy:6.1%}")
+    print(f"  {'poll body':<18} {len(json.dumps({'id': 1000})):>8} B -> {len(poll_body(1000))} B")
+
+    print(f"\n编解码耗时（us/次，回答 {len(answer_body):,} B）:")
+    print(f"  {'codec':<10} {'encode':>9} {'decode':>9}")
+    for codec in codecs:
+        encode = _per_call(lambda: codec.encode(request_data), args.calls)
+        decode = _per_call(lambda: codec.decode(answer_body), args.calls)
+        print(f"  {codec.name:<10} {encode * 1e6:>9.2f} {decode * 1e6:>9.2f}")
+
+    print("\n客户端完整路径 CPU 时间（us/次，不含网络）:")
+    print(f"  {'codec':<10} {'submit':>9} {'poll':>9}")
+    for codec in codecs:
+        submit, poll = _client_path(codec, request_data, answer_body, args.calls)
+        print(f"  {codec.name:<10} {submit * 1e6:>9.2f} {poll * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+HTTP/2 多路复用与 HTTP/1.1 连接池的轮询吞吐对比
+
+本地替身服务端（独立进程）在同一端口上同时支持 HTTP/1.1 与明文 HTTP/2（h2c），
+每个请求延迟 --latency 秒后返回，模拟服务端处理时间。客户端以 --concurrency 个并发
+发送共 --requests 个 /chatResult 轮询，比较相同连接数下两种协议的吞吐、延迟与实际建立的连接数。
+
+需要安装 httpx 与 h2:
+    pip install "httpx[http2]"
+
+用法:
+    python benchmarks/bench_http2.py
+    python benchmarks/bench_http2.py --requests 5000 --concurrency 500 --connections 4 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_sdk import (  # noqa: E402
+    AIClient,
+    AsyncAIClient,
+    AsyncHTTP2Transport,
+    AsyncioTransport,
+    HTTP2Transport,
+    Urllib3Transport,
+)
+
+BODY = json.dumps({"code": 0, "message": "AI任务处理完成", "answer": "benchmark answer"}).encode()
+PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+
+# ---------------------------------------------------------------- 替身服务端
+
+
+async def _serve_http1(first: bytes, reader, writer, latency):
+    buffer = first
+    while True:
+        while b"\r\n\r\n" not in buffer:
+            data = await reader.read(65536)
+            if not data:
+                return
+            buffer += data
+        head, _, buffer = buffer.partition(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        while len(buffer) < length:
+            buffer += await reader.read(65536)
+        buffer = buffer[length:]
+        await asyncio.sleep(latency)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+            + BODY
+        )
+        await writer.drain()
+
+
+async def _serve_http2(first: bytes, reader, writer, latency):
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.settings
+
+    conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+    conn.initiate_connection()
+    conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+    loop = asyncio.get_running_loop()
+
+    def respond(stream_id):
+        conn.send_headers(stream_id, [(":status", "200"), ("content-length", str(len(BODY)))])
+        conn.send_data(stream_id, BODY, end_stream=True)
+        writer.write(conn.data_to_send())
+
+    data = first
+    while data:
+        for event in conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                loop.call_later(latency, respond, event.stream_id)
+        writer.write(conn.data_to_send())
+        data = await reader.read(65536)
+
+
+def _run_server(port_queue, connections, latency):
+    async def handle(reader, writer):
+        with connections.get_lock():
+            connections.value += 1
+        try:
+            first = await reader.readexactly(len(PREFACE))
+            serve = _serve_http2 if first == PREFACE else _serve_http1
+            await serve(first, reader, writer, latency)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+# ---------------------------------------------------------------- 客户端
+
+
+def _report(name, latencies, elapsed, connections):
+    latencies.sort()
+    n = len(latencies)
+    p50 = latencies[n // 2] * 1000
+    p99 = latencies[int(n * 0.99)] * 1000
+    print(
+        f"{name:<26} {n / elapsed:9,.0f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  "
+        f"connections {connections}"
+    )
+
+
+def _bench_async(name, base_url, transport, args, connections):
+    latencies = []
+
+    async def run():
+        async with AsyncAIClient(api_token="t", base_url=base_url, transport=transport) as client:
+            remaining = iter(range(args.requests))
+
+            async def worker():
+                for _ in remaining:
+                    started = time.perf_counter()
+                    await client._post("/chatResult", json={"id": 1})
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            return time.perf_counter() - started
+
+    before = connections.value
+    elapsed = asyncio.run(run())
+    _report(name, latencies, elapsed, connections.value - before)
+
+
+def _bench_sync(name, base_url, transport, args, connections):
+    latencies = []
+    lock = threading.Lock()
+    client = AIClient(api_token="t", base_url=base_url, transport=transport)
+
+    def one(_):
+        started = time.perf_counter()
+        client._post("/chatResult", json={"id": 1})
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    before = connections.value
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    client.close()
+    _report(name, latencies, elapsed, connections.value - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=400)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--sync-concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    connections = multiprocessing.Value("i", 0)
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_run_server, args=(port_queue, connections, args.latency), daemon=True
+    )
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}/api/v1"
+    c = args.connections
+
+    print(
+        f"requests: {args.requests}  concurrency: {args.concurrency}  "
+        f"connections: {c}  server latency: {args.latency * 1000:.0f} ms"
+    )
+    _bench_async("async HTTP/1.1 (asyncio)", base_url, AsyncioTransport(max_connections=c), args, connections)
+    _bench_async(
+        "async HTTP/2 (httpx)",
+        base_url,
+        AsyncHTTP2Transport(max_connections=c, max_streams=args.concurrency, prior_knowledge=True),
+        args,
+        connections,
+    )
+
+    sync_args = argparse.Namespace(**vars(args))
+    sync_args.concurrency = args.sync_concurrency
+    print(f"sync clients with {args.sync_concurrency} threads:")
+    _bench_sync("sync HTTP/1.1 (urllib3)", base_url, Urllib3Transport(maxsize=c, block=True), sync_args, connections)
+    _bench_sync(
+        "sync HTTP/2 (httpx)",
+        base_url,
+        HTTP2Transport(max_connections=c, max_streams=args.sync_concurrency, prior_knowledge=True),
+        sync_args,
+        connections,
+    )
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+集中式轮询器基准测试
+
+在不访问网络的情况下，向 Poller 登记大量任务（默认10万个），
+统计每个任务的内存占用、轮询吞吐，以及运行期间内存是否保持平稳。
+
+用法:
+    python benchmarks/bench_poller.py
+    python benchmarks/bench_poller.py --tasks 100000 --polls-per-task 3 --workers 4
+"""
+import argparse
+import gc
+import json as _json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_sdk._poller import Poller  # noqa: E402
+
+
+class _FakeClient:
+    """模拟 /chatResult：每个任务被轮询 polls_per_task 次后完成"""
+
+    def __init__(self, polls_per_task: int):
+        self.polls_per_task = polls_per_task
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _post(self, endpoint, json=None, params=None, token=None, content=None, answer=None):
+        # 轮询器发送预先编码的请求体 content（见 ai_sdk._codec.poll_body）
+        task_id = _json.loads(content)["id"] if content is not None else json["id"]
+        with self._lock:
+            count = self._counts.get(task_id, 0) + 1
+            if count >= self.polls_per_task:
+                self._counts.pop(task_id, None)
+                return {"code": 0, "message": "AI任务处理完成", "answer": "benchmark answer"}
+            self._counts[task_id] = count
+        return {"code": 0, "message": "AI任务处理中", "answer": ""}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--polls-per-task", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    client = _FakeClient(args.polls_per_task)
+    poller = Poller(client, max_workers=args.workers)
+
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+
+    completed = []
+
+    start = time.perf_counter()
+    for task_id in range(args.tasks):
+        task = poller.watch(
+            task_id, "yuanbao", max_polls=args.polls_per_task + 5, interval=args.interval
+        )
+        # 结果交给回调后即丢弃，只统计轮询器自身持有的状态
+        task.add_done_callback(lambda t: completed.append(t.exception() is None))
+    register_time = time.perf_counter() - start
+    registered, _ = tracemalloc.get_traced_memory()
+    per_task = (registered - base) / args.tasks
+
+    print(f"tasks:              {args.tasks}")
+    print(f"workers:            {args.workers}")
+    print(f"register time:      {register_time:.3f}s ({args.tasks / register_time:,.0f} tasks/s)")
+    print(f"memory per task:    {per_task:.0f} bytes (task state + heap entry + callback)")
+    print(f"threads:            {threading.active_count()}")
+
+    samples = []
+    while len(completed) < args.tasks:
+        current, _ = tracemalloc.get_traced_memory()
+        samples.append((time.perf_counter() - start, poller.pending_count, current - base))
+        time.sleep(0.25)
+
+    assert all(completed)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"total time:         {elapsed:.3f}s")
+    print(f"total polls:        {poller.total_polls} ({poller.total_polls / elapsed:,.0f} polls/s)")
+    print(f"peak traced memory: {(peak - base) / 1024 / 1024:.1f} MiB")
+    print("memory over time (t, pending, MiB):")
+    step = max(1, len(samples) // 10)
+    for t, pending, mem in samples[::step]:
+        print(f"  {t:6.2f}s  {pending:7d}  {mem / 1024 / 1024:6.1f}")
+
+    poller.close()
+
+
+if __name__ == "__main__":
+    main()
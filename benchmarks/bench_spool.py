@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+大答案接收的峰值内存基准测试
+
+本地服务端返回指定大小的中文答案，比较两种接收方式在客户端进程中的峰值内存（RSS）增量与耗时:
+
+    create          响应体完整读入内存，解析为 dict，再构造 ChatCompletion
+    create_spooled  边接收边解析，答案写入 AnswerBuffer，超过 spool_threshold 后转存到临时文件
+
+每次测量在新的子进程中进行（spawn），峰值取 resource.getrusage 的 ru_maxrss，
+增量相对于发出请求前的峰值。服务端运行在独立进程中，不计入客户端内存。
+耗时为提交到拿到结果的总时间，包含首次轮询前的等待（约1秒）。
+
+用法:
+    python benchmarks/bench_spool.py
+    python benchmarks/bench_spool.py --sizes 1 10 100 --spool-threshold 8 --transport urllib3
+    python benchmarks/bench_spool.py --escape    # 服务端以 \\uXXXX 转义中文（json.dumps 默认）
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_sdk import AIClient, RequestsTransport, Urllib3Transport  # noqa: E402
+
+SAMPLE = "量子计算利用叠加与纠缠在特定问题上获得相对经典计算的加速。"
+MB = 1024 * 1024
+TRANSPORTS = {"requests": RequestsTransport, "urllib3": Urllib3Transport}
+
+
+def _answer_body(size_mb, escape):
+    """答案约 size_mb MB（UTF-8）的 /chatResult 响应体"""
+    sample_bytes = len(SAMPLE.encode("utf-8"))
+    answer = SAMPLE * (size_mb * MB // sample_bytes)
+    data = {"code": 0, "message": "AI任务处理完成", "answer": answer}
+    return json.dumps(data, ensure_ascii=escape).encode("utf-8")
+
+
+def _serve(size_mb, escape, port_queue):
+    result_body = _answer_body(size_mb, escape)
+    submit_body = json.dumps({"code": 0, "message": "成功", "data": 1000}).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = submit_body if self.path.endswith("/chatCompletion") else result_body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _max_rss():
+    """当前进程的峰值 RSS（字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _measure(base_url, mode, transport, spool_threshold, result_queue):
+    """子进程中执行一次请求，返回 (峰值增量, 耗时, 答案字节数, 是否转存)"""
+    client = AIClient(api_token="bench", base_url=base_url, transport=TRANSPORTS[transport]())
+    messages = [{"role": "user", "content": "写一份报告"}]
+    baseline = _max_rss()
+    started = time.perf_counter()
+    if mode == "create":
+        completion = client.chat.completions.create(messages=messages, use_cache=False)
+        size = len(completion.choices[0].message.content.encode("utf-8"))
+        spooled = False
+    else:
+        result = client.chat.completions.create_spooled(
+            messages=messages, spool_threshold=spool_threshold
+        )
+        size, spooled = result.answer.size, result.answer.spooled
+    elapsed = time.perf_counter() - started
+    result_queue.put((_max_rss() - baseline, elapsed, size, spooled))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="答案大小（MB）")
+    parser.add_argument(
+        "--spool-threshold", type=int, default=8, help="create_spooled 转存到临时文件的阈值（MB）"
+    )
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS), default="requests")
+    parser.add_argument("--escape", action="store_true", help="服务端以 \\uXXXX 转义中文")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(
+        f"transport={args.transport}  spool_threshold={args.spool_threshold} MB  "
+        f"escape={args.escape}\n"
+    )
+    print(f"{'answer':>8} {'mode':<16} {'peak RSS +':>12} {'x answer':>9} {'time':>9}  storage")
+    for size_mb in args.sizes:
+        port_queue = ctx.Queue()
+        server = ctx.Process(target=_serve, args=(size_mb, args.escape, port_queue), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port_queue.get()}/api/v1"
+        try:
+            for mode in ("create", "create_spooled"):
+                result_queue = ctx.Queue()
+                child = ctx.Process(
+                    target=_measure,
+                    args=(base_url, mode, args.transport, args.spool_threshold * MB, result_queue),
+                )
+                child.start()
+                peak, elapsed, size, spooled = result_queue.get()
+                child.join()
+                storage = "temp file" if spooled else "memory"
+                print(
+                    f"{size_mb:>5} MB {mode:<16} {peak / MB:>9.1f} MB {peak / size:>8.2f}x "
+                    f"{elapsed * 1000:>7.0f}ms  {storage}"
+                )
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
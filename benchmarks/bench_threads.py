@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+多线程共用一个 AIClient 的扩展性基准测试
+
+本地替身服务端（独立进程，asyncio）对每个请求延迟 --latency 秒后返回。客户端在
+1 到 256 个线程间共用一个 AIClient，通过 client._post("/chatResult") 发送共 --requests 个请求，
+统计吞吐、延迟分位数与客户端进程的 CPU 时间。
+
+每个 Python 解释器在独立的子进程中运行客户端，便于比较普通 CPython 与自由线程（无 GIL）
+CPython：除当前解释器外，自动查找 PATH 中的 python3.13t / python3.14t，也可用 --python
+指定（需要在该解释器中安装 ai-sdk 的依赖）。
+
+用法:
+    python benchmarks/bench_threads.py
+    python benchmarks/bench_threads.py --threads 1,4,16,64,256 --latency 0.005
+    python benchmarks/bench_threads.py --python /opt/python3.13t/bin/python3.13t --transport urllib3
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+BODY = json.dumps({"code": 0, "message": "AI任务处理完成", "answer": "benchmark answer"}).encode()
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+    + BODY
+)
+FREE_THREADED = ("python3.13t", "python3.14t")
+
+
+# ---------------------------------------------------------------- 替身服务端
+
+
+def _run_server(port_queue, latency):
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                if latency:
+                    await asyncio.sleep(latency)
+                writer.write(RESPONSE)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+# ---------------------------------------------------------------- 客户端（子进程）
+
+
+def _worker(args):
+    from ai_sdk import AIClient, RequestsTransport, Urllib3Transport
+
+    gil = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+    print(json.dumps({"python": sys.version.split()[0], "gil": gil}), flush=True)
+
+    for threads in map(int, args.threads.split(",")):
+        transport = (
+            Urllib3Transport(maxsize=threads, max_connections=threads)
+            if args.transport == "urllib3"
+            else RequestsTransport(max_connections=threads)
+        )
+        client = AIClient(api_token="t", base_url=args.url, transport=transport)
+        client.warmup(threads)
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        remaining = iter(range(args.requests))
+
+        def run():
+            nonlocal errors
+            local = []
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    client._post("/chatResult", json={"id": 1})
+                except Exception:
+                    with lock:
+                        errors += 1
+                local.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(local)
+
+        cpu, wall = time.process_time(), time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(run) for _ in range(threads)]:
+                future.result()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        client.close()
+
+        latencies.sort()
+        n = len(latencies)
+        print(
+            json.dumps(
+                {
+                    "threads": threads,
+                    "rps": n / wall,
+                    "p50": latencies[n // 2],
+                    "p99": latencies[int(n * 0.99)],
+                    "cpu": cpu / n,
+                    "errors": errors,
+                }
+            ),
+            flush=True,
+        )
+
+
+# ---------------------------------------------------------------- 汇总
+
+
+def _bench(python, args, url):
+    command = [
+        python, os.path.abspath(__file__), "--worker", "--url", url,
+        "--threads", args.threads, "--requests", str(args.requests), "--transport", args.transport,
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    header = process.stdout.readline()
+    if not header:
+        error = process.stderr.read().strip().splitlines()
+        print(f"\n{python}: 运行失败 ({error[-1] if error else process.wait()})")
+        return
+    info = json.loads(header)
+    print(f"\n{python} (Python {info['python']}, GIL {'enabled' if info['gil'] else 'disabled'})")
+    print(f"  {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'CPU us/req':>11} {'errors':>7}")
+    baseline = None
+    for line in process.stdout:
+        row = json.loads(line)
+        baseline = baseline or row["rps"]
+        print(
+            f"  {row['threads']:>7} {row['rps']:>9,.0f} {row['p50'] * 1000:>8.2f} "
+            f"{row['p99'] * 1000:>8.2f} {row['cpu'] * 1e6:>11.0f} {row['errors']:>7}"
+            f"   x{row['rps'] / baseline:.1f}"
+        )
+    process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", default="1,2,4,8,16,32,64,128,256")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--latency", type=float, default=0.002, help="每个请求的服务端延迟（秒）")
+    parser.add_argument("--transport", choices=["requests", "urllib3"], default="requests")
+    parser.add_argument("--python", action="append", default=[], help="额外测试的解释器，可重复")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args)
+        return
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_run_server, args=(port_queue, args.latency), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port_queue.get(timeout=10)}/api/v1"
+    print(
+        f"transport: {args.transport}  requests: {args.requests}  "
+        f"server latency: {args.latency * 1000:.1f} ms  cpus: {os.cpu_count()}"
+    )
+
+    pythons = [sys.executable, *args.python]
+    for name in FREE_THREADED:
+        path = shutil.which(name)
+        if path and path not in pythons:
+            pythons.append(path)
+    for python in pythons:
+        _bench(python, args, url)
+    if len(pythons) == 1:
+        print(f"\n未找到自由线程 CPython（{' / '.join(FREE_THREADED)}），可用 --python 指定")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+传输层单请求开销基准测试
+
+对每种传输层通过 client._post("/chatResult") 顺序发送大量请求，统计每个请求的耗时，
+以及发送线程的 CPU 时间（即SDK与HTTP库在客户端一侧的 Python 开销，不含等待服务端的时间）。
+网络传输层的服务端运行在独立进程中，不与客户端争用 GIL；in-process 传输层不经过网络，
+只包含SDK自身的开销（构建请求、编码JSON、状态码映射、解析响应）。
+
+用法:
+    python benchmarks/bench_transports.py
+    python benchmarks/bench_transports.py --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_sdk import (  # noqa: E402
+    AIClient,
+    AsyncAIClient,
+    InProcessTransport,
+    RequestsTransport,
+    Urllib3Transport,
+)
+
+ANSWER = {"code": 0, "message": "AI任务处理完成", "answer": "benchmark answer"}
+BODY = json.dumps(ANSWER).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+def _serve(port_queue):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _report(name, n, wall, cpu):
+    print(f"{name:<22} {wall / n * 1e6:9.1f} us/req {cpu / n * 1e6:9.1f} us CPU/req {n / wall:10,.0f} req/s")
+
+
+def _bench_sync(name, client, n):
+    for _ in range(min(100, n)):
+        client._post("/chatResult", json={"id": 1})
+    wall, cpu = time.perf_counter(), time.thread_time()
+    for _ in range(n):
+        client._post("/chatResult", json={"id": 1})
+    _report(name, n, time.perf_counter() - wall, time.thread_time() - cpu)
+    client.close()
+
+
+def _bench_async(name, make_client, n):
+    async def run():
+        async with make_client() as client:
+            for _ in range(min(100, n)):
+                await client._post("/chatResult", json={"id": 1})
+            wall, cpu = time.perf_counter(), time.thread_time()
+            for _ in range(n):
+                await client._post("/chatResult", json={"id": 1})
+            _report(name, n, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    n = args.requests
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(port_queue,), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}/api/v1"
+
+    def in_process():
+        return InProcessTransport(lambda request: (200, ANSWER))
+
+    print(f"requests per transport: {n}")
+    _bench_sync("requests", AIClient(api_token="t", base_url=base_url, transport=RequestsTransport()), n)
+    _bench_sync("urllib3", AIClient(api_token="t", base_url=base_url, transport=Urllib3Transport()), n)
+    _bench_sync("in-process", AIClient(api_token="t", base_url=base_url, transport=in_process()), n)
+    _bench_async("asyncio (async)", lambda: AsyncAIClient(api_token="t", base_url=base_url), n)
+    _bench_async(
+        "in-process (async)",
+        lambda: AsyncAIClient(api_token="t", base_url=base_url, transport=in_process()),
+        n,
+    )
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
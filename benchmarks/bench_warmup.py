@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+连接预热、共享客户端与连接池上限的基准测试
+
+本地替身服务端（独立进程）使用自签名证书的 HTTPS，每个新连接在 TLS 握手前先等待
+--handshake 秒，模拟跨地域的建连延迟；每个请求再延迟 --latency 秒后返回。依次测量:
+
+    1. 首批并发请求（轮询线程数+1 个）在冷连接池与 warmup() 之后的延迟
+    2. 每次调用新建 AIClient 与使用 get_client() 共享客户端的单次调用延迟
+    3. 线程数超过 max_connections 时的等待次数与等待时长（pool_stats()）
+
+需要 openssl 命令行工具生成临时证书。
+
+用法:
+    python benchmarks/bench_warmup.py
+    python benchmarks/bench_warmup.py --handshake 0.1 --latency 0.01 --threads 64
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_sdk import AIClient, close_shared_clients, get_client  # noqa: E402
+
+BODY = json.dumps({"code": 0, "message": "AI任务处理完成", "answer": "benchmark answer"}).encode()
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+    + BODY
+)
+
+
+def _make_certificate(directory):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+            "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def _serve_connection(sock, context, handshake, latency):
+    try:
+        # 客户端的 ClientHello 在握手开始前一直等待，延迟计入客户端建立连接的时间
+        time.sleep(handshake)
+        with context.wrap_socket(sock, server_side=True) as conn:
+            stream = conn.makefile("rb")
+            while True:
+                length = 0
+                line = stream.readline()
+                if not line:
+                    return
+                while line not in (b"\r\n", b""):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                    line = stream.readline()
+                stream.read(length)
+                time.sleep(latency)
+                conn.sendall(RESPONSE)
+    except (OSError, ssl.SSLError):
+        pass
+
+
+def _run_server(port_queue, cert, key, handshake, latency):
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    listener = socket.create_server(("127.0.0.1", 0), backlog=1024)
+    port_queue.put(listener.getsockname()[1])
+    while True:
+        sock, _ = listener.accept()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(
+            target=_serve_connection, args=(sock, context, handshake, latency), daemon=True
+        ).start()
+
+
+def _poll(client):
+    started = time.perf_counter()
+    client._post("/chatResult", json={"id": 1})
+    return time.perf_counter() - started
+
+
+def _first_batch(base_url, warmup):
+    """轮询线程数+1 个并发请求，返回 (预热耗时, 最慢请求延迟, 新建连接数)"""
+    client = AIClient(api_token="t", base_url=base_url)
+    batch = client._warmup_connections
+    warmup_time = 0.0
+    if warmup:
+        started = time.perf_counter()
+        client.warmup()
+        warmup_time = time.perf_counter() - started
+    with ThreadPoolExecutor(max_workers=batch) as executor:
+        latencies = list(executor.map(lambda _: _poll(client), range(batch)))
+    opened = client.pool_stats().connections_opened
+    client.close()
+    return warmup_time, max(latencies), opened
+
+
+def _per_call(base_url, calls, shared):
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        if shared:
+            client = get_client(api_token="t", base_url=base_url)
+            client._post("/chatResult", json={"id": 1})
+        else:
+            with AIClient(api_token="t", base_url=base_url) as client:
+                client._post("/chatResult", json={"id": 1})
+        latencies.append(time.perf_counter() - started)
+    close_shared_clients()
+    latencies.sort()
+    return latencies[len(latencies) // 2]
+
+
+def _exhaustion(base_url, threads, max_connections, requests):
+    client = AIClient(api_token="t", base_url=base_url, max_connections=max_connections)
+    client.warmup(max_connections)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: _poll(client), range(requests)))
+    elapsed = time.perf_counter() - started
+    stats = client.pool_stats()
+    client.close()
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--handshake", type=float, default=0.05, help="模拟的建连延迟（秒）")
+    parser.add_argument("--latency", type=float, default=0.005, help="每个请求的服务端延迟（秒）")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    cert, key = _make_certificate(directory)
+    # requests 从环境变量读取信任的证书
+    os.environ["REQUESTS_CA_BUNDLE"] = cert
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_run_server, args=(port_queue, cert, key, args.handshake, args.latency), daemon=True
+    )
+    server.start()
+    base_url = f"https://127.0.0.1:{port_queue.get(timeout=10)}/api/v1"
+    print(f"handshake: {args.handshake * 1000:.0f} ms  server latency: {args.latency * 1000:.0f} ms")
+
+    print("\n首批并发请求:")
+    for name, warmup in (("cold", False), ("warmup()", True)):
+        warmup_time, slowest, opened = _first_batch(base_url, warmup)
+        print(
+            f"  {name:<10} warmup {warmup_time * 1000:7.1f} ms  slowest first call "
+            f"{slowest * 1000:7.1f} ms  connections {opened}"
+        )
+
+    print(f"\n单次调用（{args.calls} 次，中位数）:")
+    for name, shared in (("new AIClient per call", False), ("get_client()", True)):
+        print(f"  {name:<24} {_per_call(base_url, args.calls, shared) * 1000:7.1f} ms")
+
+    print(f"\n{args.threads} 个线程发送 {args.requests} 个请求:")
+    for max_connections in (8, 32, args.threads):
+        elapsed, stats = _exhaustion(base_url, args.threads, max_connections, args.requests)
+        avg_wait = stats.wait_time / stats.waits * 1000 if stats.waits else 0.0
+        print(
+            f"  max_connections {max_connections:<4} {args.requests / elapsed:8,.0f} req/s  "
+            f"waits {stats.waits:5}  avg wait {avg_wait:6.1f} ms  max wait "
+            f"{stats.max_wait * 1000:6.1f} ms  connections {stats.connections_opened}"
+        )
+
+    server.terminate()
+    for path in (cert, key):
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 高级用法示例
 演示上下文管理器、任务管理、错误处理等高级功能
 """
+import json
 import os
 import sys
 
@@ -136,29 +137,28 @@ def example_batch_requests():
         "什么是Go语言?",
     ]
 
+    # 输入文件每行一个请求；大文件按行流式读取，不会整体载入内存
+    input_path = "batch_input.jsonl"
+    output_path = "batch_output.jsonl"
+    with open(input_path, "w", encoding="utf-8") as f:
+        for i, question in enumerate(questions):
+            row = {"custom_id": f"q{i}", "messages": [{"role": "user", "content": question}]}
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
     with AIClient() as client:
-        responses = []
-
-        for i, question in enumerate(questions, 1):
-            print(f"\n处理问题 {i}/{len(questions)}: {question}")
-            try:
-                response = client.chat.completions.create(
-                    model="yuanbao",
-                    messages=[{"role": "user", "content": question}],
-                )
-                responses.append(
-                    {
-                        "question": question,
-                        "answer": response.choices[0].message.content,
-                        "task_id": response.id,
-                    }
-                )
-                print(f"回答: {response.choices[0].message.content[:100]}...")
-            except Exception as e:
-                print(f"错误: {e}")
-                responses.append({"question": question, "error": str(e)})
-
-        print(f"\n批量处理完成，共{len(responses)}个请求")
+        # 中断后用相同参数重新运行，会跳过输出文件中已成功的行
+        summary = client.batches.run(input_path, output_path, concurrency=8)
+
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["error"]:
+                print(f"{record['custom_id']} 错误: {record['error']['message']}")
+            else:
+                answer = record["response"]["choices"][0]["message"]["content"]
+                print(f"{record['custom_id']} 回答: {answer[:100]}...")
+
+    print(f"\n批量处理完成: 成功 {summary.succeeded}，失败 {summary.failed}，跳过 {summary.resumed}")
 
 
 def main():
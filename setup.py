@@ -48,6 +48,8 @@ setup(
     python_requires=">=3.8",
     install_requires=requirements,
     extras_require={
+        "http2": ["httpx[http2]>=0.24.0"],
+        "fast": ["orjson>=3.6.0"],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
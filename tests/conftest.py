@@ -0,0 +1,202 @@
+"""
+测试公共夹具
+
+提供一个本地的假 API 服务器，模拟 /chatCompletion 与 /chatResult 接口。
+"""
+import asyncio
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_sdk._schedule import PollSchedule
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeAPIServer:
+    """
+    本地假 API 服务器
+
+    每个任务在被轮询 ``polls_until_done`` 次后完成，答案为 ``answer_for(question)``。
+    """
+
+    def __init__(self, polls_until_done: int = 1):
+        self.polls_until_done = polls_until_done
+        self.answer_for = lambda question: f"这是回答: {question}"
+        self.submissions = []
+        self.polls = {}
+        self._questions = {}
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload = server.handle(self.path, body, dict(self.headers))
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._httpd = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/api/v1"
+
+    def handle(self, path, body, headers):
+        if path.endswith("/chatCompletion"):
+            with self._lock:
+                task_id = next(self._ids)
+                self.submissions.append(body)
+                self._questions[task_id] = body.get("question", "")
+                self.polls[task_id] = 0
+            return 200, {"code": 0, "message": "成功", "data": task_id}
+
+        if path.endswith("/chatResult"):
+            task_id = body.get("id")
+            with self._lock:
+                if task_id not in self.polls:
+                    return 200, {"code": 0, "message": "AI任务不存在", "answer": ""}
+                self.polls[task_id] += 1
+                done = self.polls[task_id] >= self.polls_until_done
+                question = self._questions[task_id]
+            if not done:
+                return 200, {"code": 0, "message": "AI任务处理中", "answer": ""}
+            return 200, {
+                "code": 0,
+                "message": "AI任务处理完成",
+                "answer": self.answer_for(question),
+            }
+
+        return 404, {"code": 404, "message": "not found"}
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    # 假服务器上的任务几乎立即完成，缩短轮询先验间隔以加快测试
+    monkeypatch.setattr(
+        PollSchedule, "PRIORS", {name: (0.01, 0.02) for name in PollSchedule.PRIORS}
+    )
+    original_init = PollSchedule.__init__
+
+    def fast_init(self, stats, min_interval=0.01, **kwargs):
+        original_init(self, stats, min_interval=min_interval, **kwargs)
+
+    monkeypatch.setattr(PollSchedule, "__init__", fast_init)
+
+    server = FakeAPIServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+class _H2Protocol(asyncio.Protocol):
+    """明文 HTTP/2（h2c，prior knowledge）服务端连接，请求交给 FakeAPIServer.handle 处理"""
+
+    def __init__(self, server):
+        import h2.config
+        import h2.connection
+
+        self.server = server
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self.streams = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections += 1
+        self.conn.initiate_connection()
+        transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        import h2.events
+        import h2.exceptions
+
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self.streams[event.stream_id] = (dict(event.headers), bytearray())
+            elif isinstance(event, h2.events.DataReceived):
+                self.streams[event.stream_id][1].extend(event.data)
+                self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                headers, body = self.streams.pop(event.stream_id)
+                status, payload = self.server.api.handle(
+                    headers[":path"], json.loads(body or b"{}"), headers
+                )
+                data = json.dumps(payload).encode("utf-8")
+                self.conn.send_headers(
+                    event.stream_id,
+                    [(":status", str(status)), ("content-length", str(len(data)))],
+                )
+                self.conn.send_data(event.stream_id, data, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+class FakeH2Server:
+    """与 FakeAPIServer 共用处理逻辑的 h2c 服务端，connections 为已建立的连接数"""
+
+    def __init__(self, api: FakeAPIServer):
+        self.api = api
+        self.connections = 0
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            self._loop.create_server(lambda: _H2Protocol(self), "127.0.0.1", 0)
+        )
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def stop(self):
+        def shutdown():
+            self._server.close()
+            self._loop.stop()
+
+        self._loop.call_soon_threadsafe(shutdown)
+        self._thread.join(timeout=5)
+
+
+@pytest.fixture
+def h2_api(fake_api):
+    pytest.importorskip("h2")
+    server = FakeH2Server(fake_api)
+    yield server
+    server.stop()
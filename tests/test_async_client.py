@@ -0,0 +1,183 @@
+"""
+AsyncAIClient 原生异步路径测试
+"""
+import asyncio
+import threading
+
+from ai_sdk import AsyncAIClient, ChatMessage
+from ai_sdk.types.chat import ChatCompletion
+
+
+class TestAsyncAIClient:
+    """AsyncAIClient测试类"""
+
+    def test_create_uses_async_transport(self, fake_api):
+        """测试异步提交与轮询"""
+
+        async def main():
+            async with AsyncAIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+                return await client.chat.completions.create(
+                    model="gemini",
+                    messages=[ChatMessage(role="user", content="什么是SEO?")],
+                )
+
+        response = asyncio.run(main())
+
+        assert isinstance(response, ChatCompletion)
+        assert response.model == "gemini"
+        assert response.choices[0].message.content == "这是回答: 什么是SEO?"
+        assert fake_api.submissions[0]["type"] == 2
+
+    def test_concurrent_generate_constant_threads(self, fake_api):
+        """测试大量并发生成不会创建额外线程"""
+        thread_counts = []
+
+        async def main():
+            async with AsyncAIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+
+                async def one(i):
+                    thread_counts.append(threading.active_count())
+                    return await client.generate(system="", user=f"问题{i}")
+
+                return await asyncio.gather(*(one(i) for i in range(50)))
+
+        before = threading.active_count()
+        texts = asyncio.run(main())
+
+        assert texts == [f"这是回答: [System]: You are a helpful assistant.\n问题{i}" for i in range(50)]
+        assert max(thread_counts) == before
+
+    def test_tasks_retrieve_and_batch_retrieve(self, fake_api):
+        """测试异步任务查询"""
+
+        async def main():
+            async with AsyncAIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+                fake_api.polls[42] = 0
+                fake_api._questions[42] = "问题"
+                single = await client.tasks.retrieve("42")
+                batch = await client.tasks.batch_retrieve(["42", "not-a-number"])
+                return single, batch
+
+        single, batch = asyncio.run(main())
+
+        assert single["message"] == "AI任务处理完成"
+        assert batch[0]["answer"] == "这是回答: 问题"
+        assert batch[0]["id"] == "42"
+        assert batch[1]["id"] == "not-a-number"
+        assert "error" in batch[1]
+
+    def test_tasks_iter_retrieve(self, fake_api):
+        """测试异步惰性查询：并发受限、按需读取ID，提前停止时取消其余查询"""
+        for i in range(1, 21):
+            fake_api.polls[i] = 0
+            fake_api._questions[i] = f"问题{i}"
+        consumed = []
+
+        def ids():
+            for i in range(1, 1_000_000):
+                consumed.append(i)
+                yield str(i)
+
+        async def main():
+            async with AsyncAIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+                ordered = [
+                    r async for r in client.tasks.iter_retrieve(
+                        ["3", "bad", "1"], concurrency=2, ordered=True
+                    )
+                ]
+                results = []
+                async for result in client.tasks.iter_retrieve(ids(), concurrency=4):
+                    results.append(result)
+                    if len(results) == 10:
+                        break
+                return ordered, results
+
+        ordered, results = asyncio.run(main())
+
+        assert [r["id"] for r in ordered] == ["3", "bad", "1"]
+        assert ordered[0]["answer"] == "这是回答: 问题3"
+        assert "error" in ordered[1]
+        assert all(r["answer"] == f"这是回答: 问题{r['id']}" for r in results)
+        assert len(consumed) <= 10 + 4
+
+
+def _fail_question(fake_api, marker):
+    """问题中包含 marker 的任务以失败结束"""
+    original = fake_api.handle
+
+    def handle(path, body, headers):
+        if path.endswith("/chatResult") and marker in fake_api._questions.get(body["id"], ""):
+            return 200, {"code": 0, "message": "AI任务处理失败", "answer": "内容不合规"}
+        return original(path, body, headers)
+
+    fake_api.handle = handle
+
+
+class TestAsyncMap:
+    """AsyncAIClient.map / as_completed 测试类"""
+
+    def test_map_ordered_with_errors(self, fake_api):
+        """测试按输入顺序返回，单项失败不影响其他项"""
+        _fail_question(fake_api, "坏")
+        progress = []
+        peak = 0
+
+        async def main():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, max_retries=1
+            ) as client:
+                original = client.generate_with_metadata
+                running = 0
+
+                async def counting(**kwargs):
+                    nonlocal running, peak
+                    running += 1
+                    peak = max(peak, running)
+                    try:
+                        return await original(**kwargs)
+                    finally:
+                        running -= 1
+
+                client.generate_with_metadata = counting
+                prompts = [f"问题{i}" for i in range(12)]
+                prompts[5] = "坏问题"
+                prompts[7] = {"system": "你是助手", "user": "字典形式的问题"}
+                return await client.map(
+                    prompts,
+                    concurrency=3,
+                    on_progress=lambda done, total, r: progress.append((done, total)),
+                )
+
+        results = asyncio.run(main())
+
+        assert [r.index for r in results] == list(range(12))
+        assert not results[5].ok and results[5].text is None
+        assert all(r.ok for i, r in enumerate(results) if i != 5)
+        assert results[7].text == "这是回答: [System]: 你是助手\n字典形式的问题"
+        assert peak == 3
+        assert progress[-1] == (12, 12) and len(progress) == 12
+
+    def test_as_completed_break_cancels_remaining(self, fake_api):
+        """测试提前退出时取消剩余的输入，且输入按需读取"""
+        consumed = []
+
+        def prompts():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"问题{i}"
+
+        async def main():
+            async with AsyncAIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+                async for result in client.as_completed(prompts(), concurrency=4):
+                    first = result
+                    break
+                await asyncio.sleep(0.05)
+                others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+                return first, others
+
+        first, others = asyncio.run(main())
+
+        assert first.ok
+        assert len(consumed) <= 5
+        assert others == []
+        assert len(fake_api.submissions) <= 5
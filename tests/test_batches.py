@@ -0,0 +1,108 @@
+"""
+JSONL批量任务测试
+"""
+import json
+import time
+
+from ai_sdk import AIClient
+
+
+def _write_input(path, questions):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, question in enumerate(questions):
+            row = {"custom_id": f"q{i}", "messages": [{"role": "user", "content": question}]}
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def _read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _client(fake_api, **kwargs):
+    return AIClient(api_token="test_token", base_url=fake_api.base_url, **kwargs)
+
+
+class TestBatches:
+    """client.batches.run 测试类"""
+
+    def test_run_writes_every_row(self, fake_api, tmp_path):
+        """测试每个输入行都写出结果，相同请求只提交一次"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        questions = [f"第{i}个问题的内容" for i in range(20)] + ["第3个问题的内容"] * 5
+        _write_input(input_path, questions)
+
+        with _client(fake_api) as client:
+            summary = client.batches.run(str(input_path), str(output_path), concurrency=4)
+
+        records = _read_output(output_path)
+        assert summary.total == 25 and summary.succeeded == 25 and summary.failed == 0
+        assert summary.deduplicated == 5
+        assert len(fake_api.submissions) == 20
+        assert sorted(r["line"] for r in records) == list(range(25))
+        by_id = {r["custom_id"]: r for r in records}
+        assert by_id["q24"]["response"]["choices"][0]["message"]["content"] == "这是回答: 第3个问题的内容"
+
+    def test_invalid_rows_recorded(self, fake_api, tmp_path):
+        """测试无效的输入行记录为错误，不影响其他行"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write('{"custom_id": "ok", "messages": [{"role": "user", "content": "正常的问题"}]}\n')
+            f.write("not json\n")
+            f.write('{"custom_id": "empty", "messages": []}\n')
+
+        with _client(fake_api) as client:
+            summary = client.batches.run(str(input_path), str(output_path))
+
+        errors = {r["line"]: r["error"] for r in _read_output(output_path)}
+        assert summary.succeeded == 1 and summary.failed == 2
+        assert errors[0] is None
+        assert errors[1]["type"] == errors[2]["type"] == "InvalidRequestError"
+
+    def test_resume_skips_finished_rows(self, fake_api, tmp_path):
+        """测试中断后重新运行：跳过已成功的行，并截断写了一半的记录"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_input(input_path, [f"第{i}个问题的内容" for i in range(10)])
+
+        with _client(fake_api) as client:
+            client.batches.run(str(input_path), str(output_path), concurrency=2)
+
+        # 模拟崩溃：只保留前 4 条结果，外加一条写了一半的记录
+        lines = output_path.read_text(encoding="utf-8").splitlines(keepends=True)
+        kept = {json.loads(line)["line"] for line in lines[:4]}
+        output_path.write_text("".join(lines[:4]) + lines[4][:20], encoding="utf-8")
+        submitted_before = len(fake_api.submissions)
+
+        with _client(fake_api) as client:
+            summary = client.batches.run(str(input_path), str(output_path), concurrency=2)
+
+        records = _read_output(output_path)
+        assert summary.resumed == 4 and summary.succeeded == 6
+        assert len(fake_api.submissions) - submitted_before == 6
+        assert sorted(r["line"] for r in records) == list(range(10))
+        assert not kept & {r["line"] for r in records[4:]}
+
+    def test_rate_limited_rows_back_off_concurrently(self, fake_api, tmp_path):
+        """测试限流的行各自退避、同时到期重新提交，不会依次等待"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_input(input_path, [f"第{i}个问题的内容" for i in range(6)])
+        original = fake_api.handle
+        resubmitted = []
+
+        def handle(path, body, headers):
+            if path.endswith("/chatResult") and body["id"] < 1006:
+                return 200, {"code": 0, "message": "AI任务处理失败", "answer": "账号达到使用限制"}
+            if path.endswith("/chatCompletion") and len(fake_api.submissions) >= 6:
+                resubmitted.append(time.monotonic())
+            return original(path, body, headers)
+
+        fake_api.handle = handle
+        with _client(
+            fake_api, max_retries=2, retry_on_rate_limit=True, retry_delay=0.3
+        ) as client:
+            summary = client.batches.run(str(input_path), str(output_path), concurrency=6)
+
+        assert summary.succeeded == 6 and summary.failed == 0
+        assert len(resubmitted) == 6
+        # 依次等待时相邻两次重新提交至少间隔 retry_delay
+        assert max(resubmitted) - min(resubmitted) < 0.3
@@ -0,0 +1,217 @@
+"""
+响应缓存测试
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from ai_sdk import AIClient, AsyncAIClient, ChatMessage, MemoryCache, SQLiteCache
+from ai_sdk._utils import build_completion
+from ai_sdk.cache import request_hash
+
+
+def _messages(content: str = "什么是缓存?"):
+    return [ChatMessage(role="user", content=content)]
+
+
+class TestMemoryCache:
+    """MemoryCache测试类"""
+
+    def test_request_hash_is_canonical(self):
+        """测试请求哈希与字段顺序和优先级无关"""
+        a = {"type": 1, "question": "问题", "imageUrl": "", "priority": 0}
+        b = {"priority": 9, "imageUrl": "", "question": "问题", "type": 1}
+        assert request_hash(a) == request_hash(b)
+        assert request_hash(a) != request_hash({**a, "type": 2})
+
+    def test_lru_eviction_by_size(self):
+        """测试超出字节上限时淘汰最久未使用的条目"""
+        entry = build_completion(0, "gemini", "x" * 1000)
+        cache = MemoryCache(max_bytes=3 * MemoryCache._sizeof("k0", entry), ttl=None)
+        for i in range(3):
+            cache.set(f"k{i}", build_completion(i, "gemini", "x" * 1000))
+        assert len(cache) == 3
+
+        cache.get("k0")
+        cache.set("k3", build_completion(3, "gemini", "x" * 1000))
+
+        assert cache.get("k1") is None
+        assert cache.get("k0") is not None
+        stats = cache.stats()
+        assert stats.evictions == 1 and stats.entries == 3
+        assert stats.size_bytes <= cache.max_bytes
+
+    def test_ttl_per_task_kind(self):
+        """测试不同任务类型使用不同的有效期"""
+        cache = MemoryCache(ttl=0.05, deep_research_ttl=10, image_ttl=None)
+        assert cache.ttl_for(True, False) == 10
+        assert cache.ttl_for(False, True) == 0.05
+
+        cache.set("text", build_completion(1, "gemini", "答案"), ttl=cache.ttl_for(False, False))
+        cache.set("deep", build_completion(2, "gemini", "答案"), ttl=cache.ttl_for(True, False))
+        time.sleep(0.06)
+
+        assert cache.get("text") is None
+        assert cache.get("deep") is not None
+        assert cache.stats().expirations == 1
+
+
+def _write_entries(path: str, worker: int, count: int) -> None:
+    cache = SQLiteCache(path, eviction_interval=None)
+    for i in range(count):
+        cache.set(f"w{worker}-{i}", build_completion(i, "gemini", f"进程{worker}的第{i}个答案"))
+    cache.close()
+
+
+class TestSQLiteCache:
+    """SQLiteCache测试类"""
+
+    def test_roundtrip_and_compression(self, tmp_path):
+        """测试读写、压缩与过期"""
+        cache = SQLiteCache(str(tmp_path / "cache.db"), compress_threshold=100)
+        long_answer = "很长的答案" * 1000
+        cache.set("long", build_completion(1, "gemini", long_answer), ttl=None)
+        cache.set("short", build_completion(2, "gemini", "短"), ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("long").choices[0].message.content == long_answer
+        assert cache.get("short") is None
+        stats = cache.stats()
+        assert stats.hits == 1 and stats.expirations == 1
+        assert stats.entries == 1 and stats.size_bytes < len(long_answer.encode("utf-8"))
+        cache.close()
+
+    def test_shared_across_processes(self, tmp_path):
+        """测试多个进程同时写入同一个缓存文件"""
+        path = str(tmp_path / "shared.db")
+        SQLiteCache(path, eviction_interval=None).close()
+
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_write_entries, args=(path, w, 50)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(timeout=30)
+            assert p.exitcode == 0
+
+        cache = SQLiteCache(path, eviction_interval=None)
+        assert cache.stats().entries == 200
+        assert cache.get("w3-49").choices[0].message.content == "进程3的第49个答案"
+
+    def test_evict_by_size(self, tmp_path):
+        """测试超出大小上限时淘汰最久未访问的条目"""
+        cache = SQLiteCache(str(tmp_path / "cache.db"), max_bytes=3_000, eviction_interval=None)
+        for i in range(20):
+            cache.set(f"k{i:02d}", build_completion(i, "gemini", f"答案{i}"), ttl=None)
+            time.sleep(0.001)
+
+        assert cache.evict() > 0
+        stats = cache.stats()
+        assert stats.size_bytes <= 3_000 and stats.evictions > 0
+        assert cache.get("k19") is not None
+        assert cache.get("k00") is None
+
+    def test_recovers_from_corrupt_file(self, tmp_path):
+        """测试数据库文件损坏时重建"""
+        path = tmp_path / "cache.db"
+        path.write_bytes(b"this is not a sqlite database" * 100)
+
+        cache = SQLiteCache(str(path))
+        cache.set("k", build_completion(1, "gemini", "答案"))
+
+        assert cache.get("k") is not None
+        assert list(tmp_path.glob("cache.db.corrupt-*"))
+
+
+class TestClientCache:
+    """客户端缓存集成测试类"""
+
+    def test_hit_skips_submission(self, fake_api):
+        """测试相同请求命中缓存，不再提交任务"""
+        cache = MemoryCache()
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, cache=cache
+        ) as client:
+            first = client.chat.completions.create(messages=_messages())
+            second = client.chat.completions.create(messages=_messages(), priority=5)
+            client.chat.completions.create(messages=_messages("另一个问题"))
+
+        assert second.choices[0].message.content == first.choices[0].message.content
+        assert len(fake_api.submissions) == 2
+        stats = cache.stats()
+        assert stats.hits == 1 and stats.misses == 2
+
+    def test_bypass(self, fake_api):
+        """测试use_cache=False绕过缓存"""
+        cache = MemoryCache()
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, cache=cache
+        ) as client:
+            client.chat.completions.create(messages=_messages(), use_cache=False)
+            client.chat.completions.create(messages=_messages(), use_cache=False)
+
+        assert len(fake_api.submissions) == 2
+        assert len(cache) == 0
+
+    def test_async_client_shares_cache(self, fake_api):
+        """测试异步客户端使用同一个缓存"""
+        cache = MemoryCache()
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, cache=cache
+        ) as client:
+            client.chat.completions.create(messages=_messages())
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, cache=cache
+            ) as client:
+                return await client.chat.completions.create(messages=_messages())
+
+        response = asyncio.run(run())
+        assert response.choices[0].message.content == "这是回答: 什么是缓存?"
+        assert len(fake_api.submissions) == 1
+
+    def test_async_client_offloads_disk_cache(self, fake_api, tmp_path):
+        """测试异步客户端在线程池中读写磁盘缓存，不阻塞事件循环"""
+        calls = []
+
+        class RecordingCache(SQLiteCache):
+            def get(self, key):
+                calls.append(("get", threading.get_ident()))
+                return super().get(key)
+
+            def set(self, key, value, ttl=None):
+                calls.append(("set", threading.get_ident()))
+                super().set(key, value, ttl)
+
+        cache = RecordingCache(str(tmp_path / "cache.db"))
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, cache=cache
+            ) as client:
+                first = await client.chat.completions.create(messages=_messages())
+                second = await client.chat.completions.create(messages=_messages())
+                return first, second
+
+        first, second = asyncio.run(run())
+        cache.close()
+
+        assert second.id == first.id
+        assert len(fake_api.submissions) == 1
+        assert [name for name, _ in calls] == ["get", "set", "get"]
+        assert all(ident != threading.get_ident() for _, ident in calls)
+
+    def test_disk_cache_survives_restart(self, fake_api, tmp_path):
+        """测试磁盘缓存在客户端重建后仍然有效"""
+        path = str(tmp_path / "cache.db")
+        for _ in range(2):
+            cache = SQLiteCache(path)
+            with AIClient(
+                api_token="test_token", base_url=fake_api.base_url, cache=cache
+            ) as client:
+                client.chat.completions.create(messages=_messages())
+            cache.close()
+
+        assert len(fake_api.submissions) == 1
@@ -0,0 +1,98 @@
+"""
+相同请求合并测试
+"""
+import asyncio
+import threading
+
+from ai_sdk import AIClient, AsyncAIClient, ChatMessage, InvalidRequestError
+
+
+def _messages():
+    return [ChatMessage(role="user", content="一个热门的问题")]
+
+
+def _run_threads(client, count):
+    barrier = threading.Barrier(count)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(client.chat.completions.create(messages=_messages()))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    return results, errors
+
+
+class TestCoalescing:
+    """coalesce_requests测试类"""
+
+    def test_threads_share_one_task(self, fake_api):
+        """测试多个线程的相同请求只提交一次"""
+        fake_api.polls_until_done = 5
+
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, coalesce_requests=True
+        ) as client:
+            results, errors = _run_threads(client, 20)
+            stats = client.chat.completions.coalescing_stats()
+
+        assert not errors and len(results) == 20
+        assert len(fake_api.submissions) == 1
+        assert len({r.id for r in results}) == 1
+        assert stats.leaders == 1 and stats.saved == 19 and stats.in_flight == 0
+        # 每个调用方拿到各自的副本
+        assert len({id(r) for r in results}) == 20
+
+    def test_failure_reaches_all_waiters(self, fake_api):
+        """测试leader失败时所有等待方都收到异常"""
+        fake_api.polls_until_done = 5
+        original = fake_api.handle
+
+        def handle(path, body, headers):
+            if path.endswith("/chatResult") and fake_api.polls.get(body["id"], 0) >= 2:
+                return 200, {"code": 0, "message": "AI任务处理失败", "answer": "内容违规"}
+            return original(path, body, headers)
+
+        fake_api.handle = handle
+
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, coalesce_requests=True
+        ) as client:
+            results, errors = _run_threads(client, 10)
+
+        assert not results and len(errors) == 10
+        assert all(isinstance(e, InvalidRequestError) for e in errors)
+        assert len(fake_api.submissions) == 1
+
+    def test_async_coroutines_share_one_task(self, fake_api):
+        """测试异步客户端跨协程合并"""
+        fake_api.polls_until_done = 3
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, coalesce_requests=True
+            ) as client:
+                results = await asyncio.gather(
+                    *(client.chat.completions.create(messages=_messages()) for _ in range(20))
+                )
+                return results, client.chat.completions.coalescing_stats()
+
+        results, stats = asyncio.run(run())
+        assert len(fake_api.submissions) == 1
+        assert all(r.choices[0].message.content == "这是回答: 一个热门的问题" for r in results)
+        assert stats.saved == 19
+
+    def test_disabled_by_default(self, fake_api):
+        """测试默认不合并"""
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            _run_threads(client, 3)
+            assert client.chat.completions.coalescing_stats().leaders == 0
+
+        assert len(fake_api.submissions) == 3
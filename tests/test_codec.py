@@ -0,0 +1,126 @@
+"""
+JSON 编解码测试
+"""
+import importlib.util
+import json
+
+import pytest
+
+from ai_sdk import AIClient, AsyncAIClient, ChatMessage, InProcessTransport, JSONCodec
+from ai_sdk._codec import get_codec, poll_body
+from ai_sdk.exceptions import AIAPIError, InvalidRequestError
+
+CODECS = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            name != "json" and importlib.util.find_spec(name) is None, reason=f"需要 {name}"
+        ),
+    )
+    for name in ("json", "orjson", "msgspec")
+]
+
+
+def _recording_handler(bodies, answer="这是回答"):
+    """进程内模拟 /chatCompletion 与 /chatResult，记录原始请求体"""
+
+    def handler(request):
+        bodies.append(request.content)
+        if request.url.endswith("/chatCompletion"):
+            return 200, {"code": 0, "message": "成功", "data": 1000}
+        return 200, {"code": 0, "message": "AI任务处理完成", "answer": answer}
+
+    return handler
+
+
+class TestJSONCodec:
+    """JSON 编解码测试类"""
+
+    @pytest.mark.parametrize("name", CODECS)
+    def test_compact_utf8_request_body(self, name):
+        """测试请求体为紧凑的 UTF-8，中文不转义，轮询请求体使用固定模板"""
+        bodies = []
+        transport = InProcessTransport(_recording_handler(bodies, answer="你好，世界"))
+        with AIClient(api_token="test_token", transport=transport, json_codec=name) as client:
+            response = client.chat.completions.create(
+                messages=[ChatMessage(role="user", content="什么是量子计算？")]
+            )
+
+        assert response.choices[0].message.content == "你好，世界"
+        submit, poll = bodies[0], bodies[-1]
+        assert "什么是量子计算？".encode("utf-8") in submit
+        assert b"\\u" not in submit and b", " not in submit and b": " not in submit
+        assert json.loads(submit) == json.loads(json.dumps(json.loads(submit)))
+        assert poll == b'{"id":1000}'
+
+    @pytest.mark.parametrize("name", CODECS)
+    def test_round_trip(self, name):
+        """测试各编解码器的编码结果可被标准库解析，且解码结果一致"""
+        codec = get_codec(name)
+        data = {"question": "中文\n\"引号\"", "id": 2**40, "score": 0.5, "tags": ["a", None, True]}
+
+        assert json.loads(codec.encode(data)) == data
+        assert codec.decode(json.dumps(data).encode("utf-8")) == data
+        with pytest.raises(ValueError):
+            codec.decode(b"<html>502 Bad Gateway</html>")
+
+    @pytest.mark.parametrize("name", CODECS)
+    def test_invalid_response(self, name):
+        """测试无法解析的响应与错误响应映射为SDK异常，异常信息包含响应文本"""
+        transport = InProcessTransport(lambda request: (200, "<html>维护中</html>"))
+        with AIClient(api_token="test_token", transport=transport, json_codec=name) as client:
+            with pytest.raises(AIAPIError, match="无法解析API响应: <html>维护中"):
+                client._post("/chatResult", content=poll_body(1))
+
+        transport = InProcessTransport(lambda request: (400, {"message": "缺少参数"}))
+        with AIClient(api_token="test_token", transport=transport, json_codec=name) as client:
+            with pytest.raises(InvalidRequestError, match="缺少参数") as exc_info:
+                client._post("/chatCompletion", json={})
+
+        assert exc_info.value.response == {"message": "缺少参数"}
+
+    def test_custom_codec(self):
+        """测试传入自定义编解码器，同步与异步客户端都使用它"""
+
+        class CountingCodec(JSONCodec):
+            name = "counting"
+
+            def __init__(self):
+                self.encoded = self.decoded = 0
+
+            def encode(self, obj):
+                self.encoded += 1
+                return json.dumps(obj).encode("utf-8")
+
+            def decode(self, data):
+                self.decoded += 1
+                return json.loads(data)
+
+        codec = CountingCodec()
+        transport = InProcessTransport(_recording_handler([]))
+        with AIClient(api_token="test_token", transport=transport, json_codec=codec) as client:
+            client.chat.completions.create(messages=[ChatMessage(role="user", content="你好")])
+
+        # 提交编码一次；轮询请求体是预先编码的
+        assert codec.encoded == 1
+        assert codec.decoded == 2
+
+        client = AsyncAIClient(api_token="test_token", json_codec=codec)
+        assert client.client._codec is codec
+        client.close()
+
+    def test_select_codec(self, monkeypatch):
+        """测试按名称、环境变量选择编解码器，未知名称报错"""
+        monkeypatch.setenv("AI_JSON_CODEC", "json")
+        assert get_codec().name == "json"
+        monkeypatch.delenv("AI_JSON_CODEC")
+        assert get_codec("auto").name in ("orjson", "msgspec", "json")
+
+        with pytest.raises(ValueError, match="未知的 JSON 编解码器"):
+            get_codec("simdjson")
+
+    def test_poll_body(self):
+        """测试轮询请求体模板"""
+        assert poll_body(123) == b'{"id":123}'
+        assert json.loads(poll_body(2**63)) == {"id": 2**63}
+        assert json.loads(poll_body("7")) == {"id": "7"}
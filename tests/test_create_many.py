@@ -0,0 +1,112 @@
+"""
+create_many / imap 测试
+"""
+import threading
+import time
+
+import pytest
+
+from ai_sdk import AIClient, InvalidRequestError, MemoryCache, RateLimitError
+
+
+def _request(question):
+    return {"messages": [{"role": "user", "content": question}]}
+
+
+def _client(fake_api, **kwargs):
+    return AIClient(api_token="test_token", base_url=fake_api.base_url, **kwargs)
+
+
+def _track_in_flight(fake_api):
+    """记录服务端同时未完成的任务数的峰值"""
+    original = fake_api.handle
+    lock = threading.Lock()
+    running = set()
+    peak = [0]
+
+    def handle(path, body, headers):
+        status, payload = original(path, body, headers)
+        with lock:
+            if path.endswith("/chatCompletion"):
+                running.add(payload["data"])
+                peak[0] = max(peak[0], len(running))
+            elif path.endswith("/chatResult") and payload["message"] != "AI任务处理中":
+                running.discard(body["id"])
+        return status, payload
+
+    fake_api.handle = handle
+    return peak
+
+
+class TestCreateMany:
+    """chat.completions.create_many / imap 测试类"""
+
+    def test_ordered_results_with_errors(self, fake_api):
+        """测试按输入顺序返回，在途数不超过上限，单项失败不影响其他项"""
+        fake_api.polls_until_done = 3
+        peak = _track_in_flight(fake_api)
+        requests = [_request(f"第{i}个问题的内容") for i in range(30)]
+        requests[4] = {"messages": []}
+
+        with _client(fake_api) as client:
+            results = client.chat.completions.create_many(requests, max_in_flight=5)
+
+        assert [r.index for r in results] == list(range(30))
+        assert isinstance(results[4].error, InvalidRequestError)
+        assert all(r.ok for i, r in enumerate(results) if i != 4)
+        assert results[17].completion.choices[0].message.content == "这是回答: 第17个问题的内容"
+        assert len(fake_api.submissions) == 29
+        assert peak[0] <= 5
+
+    def test_rate_limited_requests_resubmitted(self, fake_api):
+        """测试限流的请求按客户端设置重新提交，重试用尽后记录为错误"""
+        original = fake_api.handle
+
+        def handle(path, body, headers):
+            if path.endswith("/chatResult") and (
+                body["id"] < 1002 or "总是限流" in fake_api._questions.get(body["id"], "")
+            ):
+                return 200, {"code": 0, "message": "AI任务处理失败", "answer": "账号达到使用限制"}
+            return original(path, body, headers)
+
+        fake_api.handle = handle
+        requests = [_request(f"第{i}个问题的内容") for i in range(6)] + [_request("总是限流的问题")]
+
+        with _client(fake_api, max_retries=2, retry_on_rate_limit=True, retry_delay=0.01) as client:
+            results = client.chat.completions.create_many(requests, max_in_flight=3)
+
+        assert all(r.ok for r in results[:6])
+        assert isinstance(results[6].error, RateLimitError)
+        # 前两个任务各重新提交一次，总是限流的请求提交 1 + 2 次
+        assert len(fake_api.submissions) == 6 + 2 + 3
+
+    def test_unordered_break_stops_submitting(self, fake_api):
+        """测试按完成顺序返回，提前停止后不再提交并停止轮询"""
+        consumed = []
+
+        def requests():
+            for i in range(1000):
+                consumed.append(i)
+                yield _request(f"第{i}个问题的内容")
+
+        with _client(fake_api) as client:
+            for result in client.chat.completions.imap(requests(), max_in_flight=4, ordered=False):
+                assert result.ok
+                break
+            time.sleep(0.1)
+            assert client._poller.pending_count == 0
+
+        assert len(consumed) <= 5
+        assert len(fake_api.submissions) <= 5
+
+    def test_cache_and_validation(self, fake_api):
+        """测试命中缓存的请求不再提交，max_in_flight 无效时立即报错"""
+        requests = [_request(f"第{i}个问题的内容") for i in range(5)]
+        with _client(fake_api, cache=MemoryCache()) as client:
+            client.chat.completions.create_many(requests)
+            results = client.chat.completions.create_many(requests)
+            assert all(r.ok for r in results)
+            assert len(fake_api.submissions) == 5
+
+            with pytest.raises(InvalidRequestError):
+                client.chat.completions.imap(requests, max_in_flight=0)
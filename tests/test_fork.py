@@ -0,0 +1,223 @@
+"""
+fork 后子进程中客户端的重置测试
+
+子进程的结果通过管道以 JSON 发回父进程，子进程用 os._exit 退出，不执行 pytest 的清理。
+"""
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import threading
+
+import pytest
+
+from ai_sdk import (
+    AIClient,
+    AsyncAIClient,
+    ChatMessage,
+    RequestsTransport,
+    SharedRateLimiter,
+    SubmissionQueue,
+    TaskJournal,
+    TenantScheduler,
+    Urllib3Transport,
+)
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+
+SYNC_TRANSPORTS = [RequestsTransport, Urllib3Transport]
+
+
+def _messages(content):
+    return [ChatMessage(role="user", content=content)]
+
+
+def _fork_children(count, run):
+    """fork count 个子进程，每个执行 run(i) 并返回结果；子进程异常时结果为 {"error": ...}"""
+    children = []
+    for i in range(count):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            code = 0
+            try:
+                result = run(i)
+            except BaseException as e:
+                result, code = {"error": repr(e)}, 1
+            with os.fdopen(write_fd, "w") as pipe:
+                json.dump(result, pipe)
+            os._exit(code)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    results = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd) as pipe:
+            output = pipe.read()
+        _, status = os.waitpid(pid, 0)
+        assert not os.WIFSIGNALED(status), f"子进程被信号 {os.WTERMSIG(status)} 终止（卡住）"
+        result = json.loads(output)
+        assert os.WEXITSTATUS(status) == 0, result
+        results.append(result)
+    return results
+
+
+class TestFork:
+    """fork 测试类"""
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_children_share_parent_client(self, fake_api, transport_cls):
+        """测试多个子进程共用父进程创建的客户端：连接、轮询任务与在途计数在子进程中重新开始"""
+        fake_api.polls_until_done = 5
+        client = AIClient(
+            api_token="test_token",
+            base_url=fake_api.base_url,
+            transport=transport_cls(max_connections=4),
+            api_tokens=["a", "b"],
+            adaptive_concurrency=True,
+        )
+        client.warmup(2)
+        # 父进程中尚未完成的任务，占用一个 Token 与一个并发名额
+        pending = client.chat.completions.submit(messages=_messages("父进程"))
+
+        def run(i):
+            inherited = {
+                "pending": client._poller.pending_count,
+                "requests": client.pool_stats().requests,
+                "connections": client.pool_stats().connections_opened,
+                "in_flight": sum(status.in_flight for status in client.token_pool.snapshot()),
+            }
+            response = client.chat.completions.create(messages=_messages(f"子进程{i}"))
+            return {
+                **inherited,
+                "answer": response.choices[0].message.content,
+                "pending_after": client._poller.pending_count,
+            }
+
+        results = _fork_children(3, run)
+
+        for i, result in enumerate(results):
+            assert result["answer"] == f"这是回答: 子进程{i}"
+            assert result["pending"] == 0
+            assert result["requests"] == 0
+            assert result["connections"] == 0
+            assert result["in_flight"] == 0
+            assert result["pending_after"] == 0
+
+        # 父进程的客户端与在途任务不受影响
+        assert pending.result(timeout=10).choices[0].message.content == "这是回答: 父进程"
+        assert client.chat.completions.create(messages=_messages("再问")).choices
+        client.close()
+
+    def test_queue_scheduler_and_journal(self, fake_api, tmp_path):
+        """测试父进程占满的提交队列与租户调度器在子进程中可用，任务日志在子进程中停用"""
+        fake_api.polls_until_done = 5
+        journal_path = str(tmp_path / "tasks.journal")
+        client = AIClient(
+            api_token="test_token",
+            base_url=fake_api.base_url,
+            submission_queue=SubmissionQueue(max_in_flight=1),
+            tenant_scheduler=TenantScheduler(max_in_flight=1),
+            shared_limiter=SharedRateLimiter(str(tmp_path / "limiter.db"), rate=100, burst=100),
+            journal=TaskJournal(journal_path),
+        )
+        # 父进程中尚未完成的任务占满了队列与调度器的在途名额
+        pending = client.chat.completions.submit(messages=_messages("父进程"))
+
+        def run(i):
+            # 许可泄漏时 acquire() 会一直阻塞
+            signal.alarm(10)
+            inherited = {
+                "queue": client.submission_queue.in_flight,
+                "tenants": client.tenant_scheduler.in_flight,
+            }
+            response = client.chat.completions.create(messages=_messages(f"子进程{i}"))
+            client.close()
+            return {
+                **inherited,
+                "task_id": int(response.id),
+                "answer": response.choices[0].message.content,
+                "queue_after": client.submission_queue.in_flight,
+                "tenants_after": client.tenant_scheduler.in_flight,
+            }
+
+        results = _fork_children(2, run)
+
+        for i, result in enumerate(results):
+            assert result["answer"] == f"这是回答: 子进程{i}"
+            assert result["queue"] == result["tenants"] == 0
+            assert result["queue_after"] == result["tenants_after"] == 0
+
+        assert pending.result(timeout=10).choices[0].message.content == "这是回答: 父进程"
+        assert client.submission_queue.in_flight == 0
+        client.close()
+        client.journal.close()
+
+        # 日志只有父进程的任务
+        with open(journal_path, encoding="utf-8") as f:
+            logged = {json.loads(line)["id"] for line in f}
+        assert logged == {int(pending.task_id)}
+        assert not logged & {result["task_id"] for result in results}
+
+    def test_lock_held_at_fork(self, fake_api):
+        """测试 fork 时被其他线程持有的锁不会让子进程卡住"""
+        client = AIClient(
+            api_token="test_token",
+            base_url=fake_api.base_url,
+            api_tokens=["a"],
+            submission_queue=SubmissionQueue(),
+            tenant_scheduler=TenantScheduler(),
+        )
+        locked, release = threading.Event(), threading.Event()
+
+        def hold():
+            with contextlib.ExitStack() as stack:
+                for lock in (
+                    client.token_pool._lock,
+                    client.submission_queue._lock,
+                    client.tenant_scheduler._lock,
+                ):
+                    stack.enter_context(lock)
+                locked.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        locked.wait()
+
+        def run(i):
+            signal.alarm(10)
+            response = client.chat.completions.create(messages=_messages("锁"))
+            return response.choices[0].message.content
+
+        try:
+            results = _fork_children(1, run)
+        finally:
+            release.set()
+            thread.join()
+
+        assert results == ["这是回答: 锁"]
+        client.close()
+
+    def test_async_client(self, fake_api):
+        """测试子进程在新的事件循环中使用父进程创建（并已使用过）的异步客户端"""
+        client = AsyncAIClient(api_token="test_token", base_url=fake_api.base_url)
+
+        async def ask(content):
+            response = await client.chat.completions.create(messages=_messages(content))
+            return response.choices[0].message.content
+
+        assert asyncio.run(ask("父进程")) == "这是回答: 父进程"
+
+        def run(i):
+            answer = asyncio.run(ask(f"子进程{i}"))
+            return {"answer": answer, "requests": client.pool_stats().requests}
+
+        results = _fork_children(2, run)
+
+        for i, result in enumerate(results):
+            # 一次提交 + 一次轮询
+            assert result == {"answer": f"这是回答: 子进程{i}", "requests": 2}
+        client.close()
@@ -0,0 +1,114 @@
+"""
+HTTP/2 传输层测试（需要 httpx 与 h2）
+"""
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+from ai_sdk import (  # noqa: E402
+    AIClient,
+    APIConnectionError,
+    AsyncAIClient,
+    AsyncHTTP2Transport,
+    ChatMessage,
+    HTTP2Transport,
+)
+
+
+def _requests(n):
+    return [{"messages": [{"role": "user", "content": f"第{i}个问题的内容"}]} for i in range(n)]
+
+
+class TestHTTP2Transport:
+    """HTTP2Transport / AsyncHTTP2Transport 测试类"""
+
+    def test_sync_multiplexes_over_one_connection(self, fake_api, h2_api):
+        """测试并发的提交与轮询在一个连接上多路复用"""
+        transport = HTTP2Transport(max_connections=1, prior_knowledge=True)
+        with AIClient(api_token="test_token", base_url=h2_api.base_url, transport=transport) as client:
+            results = client.chat.completions.create_many(_requests(30), max_in_flight=30)
+
+        assert all(r.ok for r in results)
+        assert results[9].completion.choices[0].message.content == "这是回答: 第9个问题的内容"
+        assert set(transport.http_versions) == {"HTTP/2"}
+        assert h2_api.connections == 1
+
+    def test_async_multiplexes_with_stream_limit(self, fake_api, h2_api):
+        """测试异步传输层的多路复用与流数上限"""
+        transport = AsyncHTTP2Transport(max_connections=1, max_streams=8, prior_knowledge=True)
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token",
+                model="yuanbao",
+                base_url=h2_api.base_url,
+                transport=transport,
+                max_retries=1,
+            ) as client:
+                return await client.map([f"问题{i}" for i in range(40)], concurrency=40)
+
+        results = asyncio.run(run())
+
+        assert all(r.ok for r in results)
+        assert results[3].text == "这是回答: 问题3"
+        assert h2_api.connections == 1
+        assert transport.http_versions["HTTP/2"] >= 80
+
+    def test_async_client_closed_with_its_loop(self, fake_api, h2_api):
+        """测试多次 asyncio.run 时旧循环上的客户端随循环关闭，close() 关闭当前客户端"""
+        transport = AsyncHTTP2Transport(prior_knowledge=True)
+
+        async def run():
+            client = AsyncAIClient(
+                api_token="test_token", base_url=h2_api.base_url, transport=transport
+            )
+            await client.tasks.retrieve("1")
+            return transport.client
+
+        first = asyncio.run(run())
+        assert first.is_closed
+
+        loop = asyncio.new_event_loop()
+        try:
+            second = loop.run_until_complete(run())
+            # 旧循环仍然存在，换循环时在旧循环上关闭
+            third = asyncio.run(run())
+            assert second.is_closed and third.is_closed
+        finally:
+            loop.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            fourth = loop.run_until_complete(run())
+            transport.close()
+            assert fourth.is_closed and transport.client is None
+        finally:
+            loop.close()
+
+    def test_falls_back_to_http1(self, fake_api):
+        """测试服务端不支持 HTTP/2 时使用 HTTP/1.1"""
+        transport = HTTP2Transport()
+        with AIClient(api_token="test_token", base_url=fake_api.base_url, transport=transport) as client:
+            response = client.chat.completions.create(
+                messages=[ChatMessage(role="user", content="HTTP/1.1 服务端")]
+            )
+
+        assert response.choices[0].message.content == "这是回答: HTTP/1.1 服务端"
+        assert set(transport.http_versions) == {"HTTP/1.1"}
+
+    def test_connection_error(self):
+        """测试连接失败转换为SDK异常"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        with AIClient(
+            api_token="test_token",
+            base_url=f"http://127.0.0.1:{port}/api/v1",
+            transport=HTTP2Transport(prior_knowledge=True),
+        ) as client:
+            with pytest.raises(APIConnectionError):
+                client.tasks.retrieve("1")
@@ -0,0 +1,96 @@
+"""
+任务日志测试
+"""
+import asyncio
+
+from ai_sdk import (
+    AIClient,
+    APIConnectionError,
+    AsyncAIClient,
+    ChatMessage,
+    MemoryCache,
+    TaskJournal,
+)
+
+
+def _messages(content="需要很久的深度研究问题"):
+    return [ChatMessage(role="user", content=content)]
+
+
+class TestTaskJournal:
+    """TaskJournal测试类"""
+
+    def test_reload_and_compact(self, tmp_path):
+        """测试重新打开日志时只保留未结束的任务，并忽略写了一半的最后一行"""
+        path = tmp_path / "tasks.journal"
+        journal = TaskJournal(str(path))
+        journal.record_submit(1, "k1", "yuanbao")
+        journal.record_submit(2, "k2", "gemini", deep_research=True, token="spsw.some-token")
+        journal.record_done(1)
+        assert journal.flush(timeout=5)
+        journal.close()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"op": "submit", "id": 3, "ke')
+
+        journal = TaskJournal(str(path))
+        entries = journal.unfinished()
+        journal.close()
+
+        assert [e.task_id for e in entries] == [2]
+        assert entries[0].deep_research and entries[0].model == "gemini"
+        assert entries[0].token and "spsw" not in entries[0].token
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+class TestClientJournal:
+    """客户端任务日志测试类"""
+
+    def test_restart_resumes_polling(self, fake_api, tmp_path):
+        """测试进程重启后继续轮询未结束的任务，而不是重新提交"""
+        path = str(tmp_path / "tasks.journal")
+        fake_api.polls_until_done = 10**6
+
+        journal = TaskJournal(path)
+        client = AIClient(api_token="test_token", base_url=fake_api.base_url, journal=journal)
+        handle = client.chat.completions.submit(messages=_messages())
+        # 模拟进程退出：任务尚未结束
+        client.close()
+        journal.close()
+        assert isinstance(handle.exception(), APIConnectionError)
+
+        fake_api.polls_until_done = 1
+        fake_api.polls[handle.task_id] = 0
+        cache = MemoryCache()
+        journal = TaskJournal(path)
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, journal=journal, cache=cache
+        ) as client:
+            recovered = client.tasks.recover()
+            assert [task.task_id for task in recovered] == [handle.task_id]
+            completion = recovered[0].handle.result(timeout=5)
+            assert completion.choices[0].message.content == "这是回答: 需要很久的深度研究问题"
+
+            # 恢复的结果写入缓存，相同的请求不再提交
+            client.chat.completions.create(messages=_messages())
+            assert len(fake_api.submissions) == 1
+
+        journal.close()
+        journal = TaskJournal(path)
+        assert journal.unfinished() == []
+        journal.close()
+
+    def test_async_records_completion(self, fake_api, tmp_path):
+        """测试异步客户端记录提交与结束"""
+        path = str(tmp_path / "tasks.journal")
+        journal = TaskJournal(path)
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, journal=journal
+            ) as client:
+                return await client.chat.completions.create(messages=_messages("异步问题"))
+
+        asyncio.run(run())
+        journal.close()
+        lines = open(path, encoding="utf-8").read().splitlines()
+        assert len(lines) == 2 and '"op": "done"' in lines[1]
@@ -0,0 +1,159 @@
+"""
+AIMD自适应并发控制测试
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_sdk import AIClient, AsyncAIClient, AIMDLimiter, AsyncAIMDLimiter, ChatMessage
+from ai_sdk._limiter import RATE_LIMITED, SUCCESS
+from ai_sdk.exceptions import AIAPIError, TimeoutError as AITimeoutError
+
+
+class TestAIMDLimiter:
+    """AIMDLimiter测试类"""
+
+    def test_additive_increase(self):
+        """测试每成功约limit个任务，上限加1"""
+        limiter = AIMDLimiter(initial_limit=4, max_limit=5)
+        for _ in range(4):
+            limiter.release(limiter.acquire(), SUCCESS)
+        assert limiter.limit == 4
+        for _ in range(10):
+            limiter.release(limiter.acquire(), SUCCESS)
+        assert limiter.limit == 5
+
+    def test_multiplicative_decrease_once_per_episode(self):
+        """测试同一轮限流只减小一次上限"""
+        limiter = AIMDLimiter(initial_limit=16)
+        tokens = [limiter.acquire() for _ in range(10)]
+        for token in tokens:
+            limiter.release(token, RATE_LIMITED)
+        assert limiter.limit == 8
+        assert limiter.rate_limits == 10
+
+        # 减小之后才获得许可的任务再次限流，会继续减小
+        limiter.release(limiter.acquire(), RATE_LIMITED)
+        assert limiter.limit == 4
+
+    def test_blocks_at_limit(self):
+        """测试达到上限时阻塞，并暴露排队深度"""
+        limiter = AIMDLimiter(initial_limit=2, max_limit=2)
+        tokens = [limiter.acquire(), limiter.acquire()]
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(limiter.acquire()))
+        thread.start()
+        time.sleep(0.05)
+
+        assert limiter.in_flight == 2 and limiter.queue_depth == 1 and not acquired
+        limiter.release(tokens[0], SUCCESS)
+        thread.join(timeout=5)
+        assert acquired and limiter.queue_depth == 0
+
+    def test_acquire_timeout(self):
+        """测试等待许可超时抛出SDK的超时异常"""
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        limiter.acquire()
+        with pytest.raises(AITimeoutError) as exc_info:
+            limiter.acquire(timeout=0.01)
+        assert isinstance(exc_info.value, AIAPIError)
+        assert limiter.queue_depth == 0
+
+    def test_async_limiter(self):
+        """测试异步限制器的上限与排队"""
+        limiter = AsyncAIMDLimiter(initial_limit=3, max_limit=3)
+        peak = 0
+
+        async def worker():
+            nonlocal peak
+            token = await limiter.acquire()
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            limiter.release(token, SUCCESS)
+
+        async def run():
+            await asyncio.gather(*(worker() for _ in range(20)))
+
+        asyncio.run(run())
+        assert peak == 3 and limiter.in_flight == 0 and limiter.successes == 20
+
+
+def _rate_limit_first(fake_api, count):
+    """前 count 个任务以"账号达到使用限制"失败"""
+    original = fake_api.handle
+
+    def handle(path, body, headers):
+        if path.endswith("/chatResult") and body["id"] < 1000 + count:
+            return 200, {"code": 0, "message": "AI任务处理失败", "answer": "账号达到使用限制"}
+        return original(path, body, headers)
+
+    fake_api.handle = handle
+
+
+class TestAdaptiveConcurrency:
+    """客户端自适应并发控制测试类"""
+
+    def test_rate_limit_resubmits(self, fake_api):
+        """测试限流后重新提交任务，而不是继续轮询失败的任务"""
+        _rate_limit_first(fake_api, 1)
+
+        with AIClient(
+            api_token="test_token",
+            base_url=fake_api.base_url,
+            max_retries=2,
+            retry_on_rate_limit=True,
+            retry_delay=0.01,
+            adaptive_concurrency=True,
+            max_concurrency=16,
+        ) as client:
+            response = client.chat.completions.create(
+                messages=[ChatMessage(role="user", content="被限流的问题")]
+            )
+            limiter = client.limiter
+
+            assert response.id == "1001"
+            assert len(fake_api.submissions) == 2
+            assert limiter.rate_limits == 1 and limiter.limit == 4
+            assert limiter.in_flight == 0
+
+    def test_submit_handles_release_permits(self, fake_api):
+        """测试submit的句柄结束时归还许可"""
+        with AIClient(
+            api_token="test_token",
+            base_url=fake_api.base_url,
+            adaptive_concurrency=True,
+            max_concurrency=4,
+        ) as client:
+            handles = [
+                client.chat.completions.submit(
+                    messages=[ChatMessage(role="user", content=f"第{i}个问题的内容")]
+                )
+                for i in range(12)
+            ]
+            for handle in handles:
+                handle.result(timeout=5)
+
+            assert client.limiter.in_flight == 0
+            assert client.limiter.successes == 12
+
+    def test_async_rate_limit_resubmits(self, fake_api):
+        """测试异步客户端限流后重新提交"""
+        _rate_limit_first(fake_api, 1)
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token",
+                base_url=fake_api.base_url,
+                retry_delay=0.01,
+                adaptive_concurrency=True,
+            ) as client:
+                response = await client.chat.completions.create(
+                    messages=[ChatMessage(role="user", content="被限流的问题")]
+                )
+                return response, client.limiter
+
+        response, limiter = asyncio.run(run())
+        assert response.id == "1001"
+        assert limiter.rate_limits == 1 and limiter.in_flight == 0
@@ -0,0 +1,176 @@
+"""
+集中式轮询器测试
+"""
+import concurrent.futures
+import threading
+
+import pytest
+
+from ai_sdk import AIClient, ChatMessage, InvalidRequestError, TaskState
+from ai_sdk.types.chat import ChatCompletion
+
+
+class TestPoller:
+    """Poller测试类"""
+
+    def test_create_resolves_through_poller(self, fake_api):
+        """测试同步create通过后台轮询器拿到结果"""
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            response = client.chat.completions.create(
+                model="yuanbao",
+                messages=[ChatMessage(role="user", content="什么是SEO?")],
+            )
+
+            assert isinstance(response, ChatCompletion)
+            assert response.choices[0].message.content == "这是回答: 什么是SEO?"
+            assert client._poller.pending_count == 0
+
+    def test_same_task_shares_one_poll(self, fake_api):
+        """测试多个等待方共享同一个任务的轮询"""
+        fake_api.polls_until_done = 3
+        fake_api.polls[7] = 0
+        fake_api._questions[7] = "共享的问题"
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            futures = [client._poller.watch(7, "yuanbao", interval=0.01) for _ in range(5)]
+            results = [f.result(timeout=5) for f in futures]
+
+        assert all(f is futures[0] for f in futures)
+        assert all(r.choices[0].message.content == "这是回答: 共享的问题" for r in results)
+        assert fake_api.polls[7] == 3
+
+    def test_many_tasks_use_fixed_threads(self, fake_api):
+        """测试大量任务只使用固定数量的轮询线程"""
+        fake_api.polls_until_done = 2
+        for task_id in range(100):
+            fake_api.polls[task_id] = 0
+            fake_api._questions[task_id] = f"第{task_id}个问题的内容"
+
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, poll_workers=2
+        ) as client:
+            futures = [
+                client._poller.watch(task_id, "yuanbao", interval=0.01)
+                for task_id in range(100)
+            ]
+            for future in futures:
+                future.result(timeout=10)
+
+            poller_threads = [
+                t for t in threading.enumerate() if t.name.startswith("ai-sdk-poller")
+            ]
+            assert len(poller_threads) == 3
+            assert client._poller.total_polls == 200
+
+    def test_timeout_and_failure(self, fake_api):
+        """测试超时与任务失败"""
+        fake_api.polls_until_done = 100
+        fake_api.polls[1] = 0
+        fake_api._questions[1] = "问题"
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            future = client._poller.watch(1, "yuanbao", max_polls=3, interval=0.01)
+            with pytest.raises(Exception, match="等待超时"):
+                future.result(timeout=5)
+
+            fake_api.handle = lambda path, body, headers: (
+                200,
+                {"code": 0, "message": "AI任务处理失败", "answer": "内容违规"},
+            )
+            future = client._poller.watch(2, "yuanbao", interval=0.01)
+            with pytest.raises(InvalidRequestError):
+                future.result(timeout=5)
+            # exception() 与 Future 相同：返回异常而不抛出，已结束时不阻塞
+            assert isinstance(future.exception(timeout=0), InvalidRequestError)
+
+            future = client._poller.watch(3, "yuanbao", interval=10)
+            future.cancel()
+            with pytest.raises(concurrent.futures.CancelledError):
+                future.exception()
+
+    def test_repeated_timed_waits_share_one_event(self, fake_api):
+        """测试反复带超时等待不会累积回调，任务结束时唤醒所有等待方"""
+        fake_api.polls_until_done = 1000
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            task = client._poller.watch(1, "yuanbao", interval=10)
+            for _ in range(100):
+                with pytest.raises(concurrent.futures.TimeoutError):
+                    task.result(timeout=0.001)
+            assert task._callbacks is None
+
+            woken = []
+
+            def wait():
+                try:
+                    task.result(timeout=5)
+                except concurrent.futures.CancelledError:
+                    woken.append(True)
+
+            waiters = [threading.Thread(target=wait) for _ in range(3)]
+            for waiter in waiters:
+                waiter.start()
+            task.cancel()
+            for waiter in waiters:
+                waiter.join(timeout=5)
+            assert woken == [True] * 3
+
+
+class TestTaskHandle:
+    """submit() 与 TaskHandle 测试类"""
+
+    def test_submit_returns_handle(self, fake_api):
+        """测试submit立即返回句柄，结果由轮询器完成"""
+        fake_api.polls_until_done = 2
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            handles = [
+                client.chat.completions.submit(
+                    model="gemini",
+                    messages=[ChatMessage(role="user", content=f"第{i}个问题的内容")],
+                )
+                for i in range(20)
+            ]
+            assert all(
+                h.status in (TaskState.PENDING, TaskState.RUNNING, TaskState.SUCCEEDED)
+                for h in handles
+            )
+            assert len(fake_api.submissions) == 20
+
+            finished = []
+            handles[0].add_done_callback(finished.append)
+            results = [h.result(timeout=10) for h in handles]
+
+        assert finished == [handles[0]]
+        assert all(h.done() and h.status == TaskState.SUCCEEDED for h in handles)
+        assert results[3].choices[0].message.content.endswith("第3个问题的内容")
+        assert results[3].id == str(handles[3].task_id)
+
+    def test_future_interop(self, fake_api):
+        """测试与concurrent.futures和asyncio互操作"""
+        import asyncio
+        import concurrent.futures
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            handle = client.chat.completions.submit(
+                messages=[{"role": "user", "content": "一个足够长的问题"}]
+            )
+            done, _ = concurrent.futures.wait([handle.future], timeout=10)
+            assert handle.future in done
+
+            async def wait_async():
+                return await asyncio.wrap_future(handle.future)
+
+            response = asyncio.run(wait_async())
+            assert response.choices[0].message.content == "这是回答: 一个足够长的问题"
+
+    def test_cancel_stops_polling(self, fake_api):
+        """测试取消句柄后停止轮询"""
+        fake_api.polls_until_done = 1000
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            handle = client.chat.completions.submit(
+                messages=[{"role": "user", "content": "一个足够长的问题"}]
+            )
+            assert handle.future.cancel()
+            assert handle.cancelled() and handle.status == TaskState.CANCELLED
+            assert client._poller.pending_count <= 1
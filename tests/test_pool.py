@@ -0,0 +1,185 @@
+"""
+连接池配置、预热与共享客户端测试
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_sdk import (
+    AIClient,
+    AsyncAIClient,
+    InProcessTransport,
+    RequestsTransport,
+    TimeoutError as AITimeoutError,
+    Urllib3Transport,
+    close_shared_clients,
+    get_async_client,
+    get_client,
+)
+
+SYNC_TRANSPORTS = [RequestsTransport, Urllib3Transport]
+
+
+def _slow_results(fake_api, monkeypatch, delay=0.05):
+    """让 /chatResult 每个请求延迟 delay 秒"""
+    handle = fake_api.handle
+
+    def slow_handle(path, body, headers):
+        if path.endswith("/chatResult"):
+            time.sleep(delay)
+        return handle(path, body, headers)
+
+    monkeypatch.setattr(fake_api, "handle", slow_handle)
+
+
+def _poll(client):
+    return client._post("/chatResult", json={"id": 1})
+
+
+@pytest.fixture
+def registry():
+    yield
+    close_shared_clients()
+
+
+class TestPoolConfig:
+    """连接池配置与统计测试类"""
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_warmup_connections_are_reused(self, fake_api, transport_cls):
+        """测试预热的连接被随后的并发请求复用"""
+        transport = transport_cls(max_connections=4)
+        with AIClient(api_token="test_token", base_url=fake_api.base_url, transport=transport) as client:
+            assert client.warmup(4) == 4
+            assert client.pool_stats().connections_opened == 4
+            # 已预热的连接不再重复建立
+            assert client.warmup(4) == 0
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: _poll(client), range(20)))
+            stats = client.pool_stats()
+
+        assert stats.requests == 20
+        assert stats.connections_opened == 4
+
+    def test_default_client_pool(self, fake_api):
+        """测试默认传输层使用 max_connections，默认预热连接数为轮询线程数+1"""
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, poll_workers=2, max_connections=8
+        ) as client:
+            assert client.warmup() == 3
+            _poll(client)
+            stats = client.pool_stats()
+
+        assert stats.max_connections == 8
+        assert stats.connections_opened == 3
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_pool_exhaustion_waits(self, fake_api, monkeypatch, transport_cls):
+        """测试连接数达到上限时请求等待，并统计等待次数与时长"""
+        _slow_results(fake_api, monkeypatch)
+        transport = transport_cls(max_connections=2)
+        with AIClient(api_token="test_token", base_url=fake_api.base_url, transport=transport) as client:
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                list(executor.map(lambda _: _poll(client), range(6)))
+            stats = client.pool_stats()
+
+        assert stats.requests == 6
+        assert stats.waits >= 3
+        assert stats.max_wait >= 0.03
+        assert stats.wait_time >= stats.max_wait
+        assert stats.connections_opened <= 2
+        assert stats.in_use == 0
+
+    def test_pool_wait_timeout(self, fake_api, monkeypatch):
+        """测试等待空闲连接超过请求超时时抛出超时异常"""
+        _slow_results(fake_api, monkeypatch, delay=0.5)
+        transport = Urllib3Transport(max_connections=1)
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, transport=transport, timeout=0.1
+        ) as client:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(_poll, client) for _ in range(2)]
+                errors = [f.exception() for f in futures]
+
+        assert sum(isinstance(e, AITimeoutError) for e in errors) == 2
+        assert transport.pool_stats().waits == 1
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_idle_connections_evicted(self, fake_api, transport_cls):
+        """测试连接池空闲超过 keepalive_expiry 后丢弃空闲连接"""
+        transport = transport_cls(max_connections=4, keepalive_expiry=0.05)
+        with AIClient(api_token="test_token", base_url=fake_api.base_url, transport=transport) as client:
+            _poll(client)
+            _poll(client)
+            time.sleep(0.1)
+            _poll(client)
+            stats = client.pool_stats()
+
+        assert stats.evictions == 1
+        assert stats.connections_opened == 2
+
+    def test_transport_without_pool(self, fake_api):
+        """测试不支持预热与统计的传输层"""
+        transport = InProcessTransport(lambda request: (200, {"code": 0, "answer": ""}))
+        with AIClient(api_token="test_token", transport=transport) as client:
+            assert client.warmup() == 0
+            assert client.pool_stats() is None
+
+    def test_async_warmup_and_waits(self, fake_api, monkeypatch):
+        """测试异步连接池的预热与等待统计"""
+        _slow_results(fake_api, monkeypatch)
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, max_connections=2
+            ) as client:
+                assert await client.warmup() == 2
+                await asyncio.gather(*(client._post("/chatResult", json={"id": 1}) for _ in range(6)))
+                return client.pool_stats()
+
+        stats = asyncio.run(run())
+
+        assert stats.requests == 6
+        assert stats.connections_opened == 2
+        assert stats.waits == 4
+        assert stats.max_wait > 0
+
+
+class TestSharedClients:
+    """共享客户端测试类"""
+
+    def test_same_config_returns_same_client(self, fake_api, registry, monkeypatch):
+        """测试相同配置返回同一个客户端，环境变量与显式参数等价"""
+        monkeypatch.setenv("AI_API_TOKEN", "test_token")
+        client = get_client(base_url=fake_api.base_url)
+
+        assert get_client(api_token="test_token", base_url=fake_api.base_url + "/") is client
+        assert get_client(api_token="other_token", base_url=fake_api.base_url) is not client
+        assert get_client(base_url=fake_api.base_url, timeout=5) is not client
+        assert get_async_client(base_url=fake_api.base_url) is get_async_client(
+            base_url=fake_api.base_url
+        )
+
+    def test_list_arguments(self, fake_api, registry):
+        """测试列表参数（如 api_tokens）参与区分客户端"""
+        first = get_client(base_url=fake_api.base_url, api_tokens=["a", "b"])
+
+        assert get_client(base_url=fake_api.base_url, api_tokens=["a", "b"]) is first
+        assert get_client(base_url=fake_api.base_url, api_tokens=["a"]) is not first
+
+    def test_shared_client_survives_close(self, fake_api, registry):
+        """测试共享客户端的 close() 与 with 语句不关闭连接，close_shared_clients() 后重新创建"""
+        with get_client(api_token="test_token", base_url=fake_api.base_url, warmup=True) as client:
+            _poll(client)
+        client.close()
+
+        assert get_client(api_token="test_token", base_url=fake_api.base_url) is client
+        _poll(client)
+        # 预热的5个连接（4个轮询线程+1）一直被复用
+        assert client.pool_stats().connections_opened == 5
+
+        close_shared_clients()
+        assert get_client(api_token="test_token", base_url=fake_api.base_url) is not client
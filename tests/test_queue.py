@@ -0,0 +1,158 @@
+"""
+本地优先级提交队列测试
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_sdk import AIClient, AsyncAIClient, ChatMessage, SubmissionQueue
+from ai_sdk.exceptions import TimeoutError as AITimeoutError
+
+
+def _acquire_in_thread(queue, priority, order):
+    """在线程中排队，出队后记录优先级并立即归还"""
+
+    def run():
+        ticket = queue.acquire(priority)
+        order.append(priority)
+        queue.release(ticket)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestSubmissionQueue:
+    """SubmissionQueue测试类"""
+
+    def test_higher_priority_first(self):
+        """测试在途已满时按优先级出队，同优先级先到先得"""
+        queue = SubmissionQueue(max_in_flight=1, aging=None)
+        first = queue.acquire(0)
+        order = []
+        threads = []
+        for priority in (0, 5, 1, 9, 0):
+            threads.append(_acquire_in_thread(queue, priority, order))
+            time.sleep(0.02)
+        assert queue.pending == 5
+
+        queue.release(first)
+        for thread in threads:
+            thread.join(timeout=5)
+        assert order == [9, 5, 1, 0, 0]
+
+        stats = queue.stats()
+        assert stats.priorities[9].dispatched == 1 and stats.priorities[0].dispatched == 3
+        assert stats.priorities[0].max_wait >= stats.priorities[9].max_wait
+        assert queue.in_flight == 0
+
+    def test_aging(self):
+        """测试老化：等待足够久的低优先级任务排在新来的高优先级任务前面"""
+        queue = SubmissionQueue(max_in_flight=1, aging=0.05)
+        first = queue.acquire(0)
+        order = []
+        old = _acquire_in_thread(queue, 0, order)
+        time.sleep(0.2)  # 有效优先级约为 0 + 4
+        new = _acquire_in_thread(queue, 2, order)
+        time.sleep(0.02)
+
+        queue.release(first)
+        old.join(timeout=5)
+        new.join(timeout=5)
+        assert order == [0, 2]
+
+    def test_effective_priority_capped(self):
+        """测试发给上游的有效优先级不超过 max_priority"""
+        queue = SubmissionQueue(max_in_flight=1, aging=0.01, max_priority=3)
+        first = queue.acquire(0)
+        tickets = []
+        thread = threading.Thread(target=lambda: tickets.append(queue.acquire(1)))
+        thread.start()
+        time.sleep(0.1)
+        queue.release(first)
+        thread.join(timeout=5)
+        assert tickets[0].effective_priority == 3
+
+    def test_backpressure(self):
+        """测试排队已满时阻塞生产者，超时抛出 TimeoutError"""
+        queue = SubmissionQueue(max_in_flight=1, max_pending=1, aging=None)
+        first = queue.acquire()
+        waiting = threading.Thread(target=queue.acquire)
+        waiting.start()
+        time.sleep(0.02)
+
+        with pytest.raises(AITimeoutError):
+            queue.acquire(timeout=0.05)
+        assert queue.pending == 1
+
+        queue.release(first)
+        waiting.join(timeout=5)
+        assert queue.pending == 0 and queue.in_flight == 1
+
+    def test_async_cancel_does_not_leak(self):
+        """测试异步调用方取消后不占用许可"""
+        queue = SubmissionQueue(max_in_flight=1)
+
+        async def run():
+            first = await queue.acquire_async()
+            waiter = asyncio.ensure_future(queue.acquire_async(5))
+            await asyncio.sleep(0.01)
+            assert queue.pending == 1
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            queue.release(first)
+            second = await queue.acquire_async(timeout=1)
+            queue.release(second)
+
+        asyncio.run(run())
+        assert queue.pending == 0 and queue.in_flight == 0
+
+
+class TestClientQueue:
+    """客户端使用优先级队列的测试类"""
+
+    def test_submit_through_queue(self, fake_api):
+        """测试提交经过队列，任务结束后归还许可"""
+        queue = SubmissionQueue(max_in_flight=2)
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, submission_queue=queue
+        ) as client:
+            handles = [
+                client.chat.completions.submit(
+                    messages=[ChatMessage(role="user", content=f"第{i}个问题的内容")],
+                    priority=i % 3,
+                )
+                for i in range(9)
+            ]
+            for handle in handles:
+                handle.result(timeout=5)
+
+        assert queue.in_flight == 0
+        stats = queue.stats()
+        assert sum(s.dispatched for s in stats.priorities.values()) == 9
+        assert sorted(b["priority"] for b in fake_api.submissions) == [0] * 3 + [1] * 3 + [2] * 3
+
+    def test_async_create_through_queue(self, fake_api):
+        """测试异步客户端经过队列提交"""
+        queue = SubmissionQueue(max_in_flight=2)
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url, submission_queue=queue
+            ) as client:
+                return await asyncio.gather(
+                    *(
+                        client.chat.completions.create(
+                            messages=[ChatMessage(role="user", content=f"异步问题{i}的内容")],
+                            priority=5,
+                        )
+                        for i in range(6)
+                    )
+                )
+
+        responses = asyncio.run(run())
+        assert len(responses) == 6
+        assert queue.in_flight == 0 and queue.stats().priorities[5].dispatched == 6
@@ -0,0 +1,119 @@
+"""
+自适应轮询调度测试
+"""
+import asyncio
+
+from ai_sdk import AIClient, AsyncAIClient, ChatMessage, TaskState
+from ai_sdk._schedule import LatencyStats, PollSchedule, schedule_key
+
+
+def _schedule(**kwargs) -> PollSchedule:
+    return PollSchedule(LatencyStats(), jitter=0, **kwargs)
+
+
+class TestPollSchedule:
+    """PollSchedule测试类"""
+
+    def test_priors_without_samples(self):
+        """测试没有样本时使用先验间隔"""
+        schedule = _schedule()
+
+        assert schedule.first_delay(schedule_key("gemini", False, False)) == 1.0
+        assert schedule.first_delay(schedule_key("gemini", False, True)) == 10.0
+        key = schedule_key("gemini", True, False)
+        assert schedule.next_delay(key, TaskState.RUNNING, 3.0) == 5.0
+
+    def test_quantile_based_delays(self):
+        """测试按耗时分布计算首次延迟和后续间隔"""
+        schedule = _schedule()
+        key = schedule_key("yuanbao", False, False)
+        for seconds in range(1, 21):
+            schedule.stats.record(key, total=float(seconds), queue=1.0, run=seconds * 2.0)
+
+        assert schedule.first_delay(key) == 3.0
+        # 已等待5秒：第25%分位，下一次轮询落在第35%分位（8秒）
+        assert schedule.next_delay(key, None, 5.0) == 3.0
+        # 处理阶段使用处理耗时分布
+        assert schedule.next_delay(key, TaskState.RUNNING, 6.0, run_elapsed=10.0) == 6.0
+        # 排队阶段按排队时长中位数；已超过则按比例退避
+        assert schedule.next_delay(key, TaskState.PENDING, 0.2) == 0.8
+        assert schedule.next_delay(key, TaskState.PENDING, 8.0) == 2.0
+        # 超出历史分布后按比例退避，但不超过最大间隔
+        assert schedule.next_delay(key, None, 400.0) == 60.0
+
+    def test_eta(self):
+        """测试剩余时间估计"""
+        schedule = _schedule()
+        key = schedule_key("gemini", False, True)
+        assert schedule.eta(key, 0.0) is None
+
+        for seconds in (10.0, 20.0, 30.0, 40.0, 50.0):
+            schedule.stats.record(key, total=seconds)
+
+        assert schedule.eta(key, 0.0) == 30.0
+        assert schedule.eta(key, 25.0) == 15.0
+
+    def test_persistence(self, tmp_path):
+        """测试统计数据持久化"""
+        path = str(tmp_path / "latency.json")
+        key = schedule_key("gemini", True, False)
+
+        stats = LatencyStats(path=path)
+        stats.record(key, total=12.5, queue=2.0, run=10.5)
+        stats.save()
+
+        loaded = LatencyStats(path=path)
+        assert loaded.samples(key) == [12.5]
+        assert loaded.samples(key, "run") == [10.5]
+
+
+class TestTasksEta:
+    """tasks.eta测试类"""
+
+    def test_eta_for_watched_task(self, fake_api):
+        """测试等待中任务的剩余时间估计，并在完成后记录耗时"""
+        fake_api.polls_until_done = 3
+        fake_api.polls[5] = 0
+        fake_api._questions[5] = "一个需要多次轮询的问题"
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            key = schedule_key("yuanbao", False, False)
+            for seconds in (1.0, 2.0, 3.0, 4.0, 5.0):
+                client._latency_stats.record(key, total=seconds)
+
+            task = client._poller.watch(5, "yuanbao", interval=0.01)
+            eta = client.tasks.eta("5")
+            task.result(timeout=5)
+
+            assert eta is not None and 0 < eta <= 3.0
+            assert client.tasks.eta("5") is None
+            assert len(client._latency_stats.samples(key)) == 6
+
+    def test_async_eta_for_waiting_task(self, fake_api):
+        """测试异步客户端等待中任务的剩余时间估计"""
+        fake_api.polls_until_done = 3
+
+        async def main():
+            async with AsyncAIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+                key = schedule_key("yuanbao", False, False)
+                for seconds in (0.1, 0.2, 0.3, 0.4, 0.5):
+                    client.client._latency_stats.record(key, total=seconds)
+
+                waiting = client.chat.completions._waiting
+                create = asyncio.ensure_future(
+                    client.chat.completions.create(
+                        messages=[ChatMessage(role="user", content="一个需要多次轮询的问题")]
+                    )
+                )
+                while not waiting:
+                    await asyncio.sleep(0.001)
+                task_id = str(next(iter(waiting)))
+                eta = client.tasks.eta(task_id)
+                await create
+                return eta, client.tasks.eta(task_id), len(client.client._latency_stats.samples(key))
+
+        eta, after, samples = asyncio.run(main())
+
+        assert eta is not None and 0 < eta <= 0.5
+        assert after is None
+        assert samples == 6
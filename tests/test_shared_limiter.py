@@ -0,0 +1,141 @@
+"""
+跨进程共享限流测试
+"""
+import asyncio
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+from ai_sdk import AIClient, ChatMessage, RateLimitError, SharedRateLimiter
+
+
+def _report_from_child(path: str) -> None:
+    SharedRateLimiter(path).report_rate_limit()
+
+
+class TestSharedRateLimiter:
+    """SharedRateLimiter测试类"""
+
+    def test_token_bucket(self, tmp_path):
+        """测试令牌桶：突发容量用完后按速率补充"""
+        limiter = SharedRateLimiter(str(tmp_path / "limiter.db"), rate=20, burst=2)
+        start = time.monotonic()
+        leases = [limiter.acquire() for _ in range(4)]
+        elapsed = time.monotonic() - start
+
+        assert len(set(leases)) == 4
+        assert 0.08 <= elapsed < 1.0
+        assert limiter.snapshot().in_flight == 4
+
+    def test_concurrency_budget(self, tmp_path):
+        """测试在途任务上限与等待方统计"""
+        path = str(tmp_path / "limiter.db")
+        limiter = SharedRateLimiter(path, rate=1000, burst=100, max_concurrency=1)
+        lease = limiter.acquire()
+
+        lease2, wait = limiter.try_acquire()
+        assert lease2 is None and wait > 0
+
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(limiter.acquire(timeout=5)))
+        thread.start()
+        time.sleep(0.1)
+        # 另一个实例（模拟另一个进程）看到相同的状态
+        snapshot = SharedRateLimiter(path, rate=1000, burst=100, max_concurrency=1).snapshot()
+        assert snapshot.in_flight == 1 and snapshot.waiters == 1
+
+        limiter.release(lease)
+        thread.join(timeout=5)
+        assert acquired and limiter.snapshot().waiters == 0
+
+    def test_backoff_shared_across_processes(self, tmp_path):
+        """测试一个进程遇到限流后，所有进程一起退避"""
+        path = str(tmp_path / "limiter.db")
+        limiter = SharedRateLimiter(path, backoff=5)
+
+        ctx = multiprocessing.get_context("fork")
+        child = ctx.Process(target=_report_from_child, args=(path,))
+        child.start()
+        child.join(timeout=30)
+        assert child.exitcode == 0
+
+        lease, wait = limiter.try_acquire()
+        assert lease is None and 4 < wait <= 5
+        snapshot = limiter.snapshot()
+        assert snapshot.backoff == 5 and snapshot.tokens == 0
+
+        # 退避期间重复报告不会延长；之后再次限流时翻倍
+        limiter.report_rate_limit()
+        assert limiter.snapshot().backoff == 5
+
+
+    def test_acquire_async_does_not_block_loop(self, tmp_path):
+        """测试另一个进程持有写锁时，异步获取许可不阻塞事件循环"""
+        path = str(tmp_path / "limiter.db")
+        limiter = SharedRateLimiter(path)
+        other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        other.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.5, lambda: other.execute("COMMIT")).start()
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.ensure_future(tick())
+            lease = await limiter.acquire_async(timeout=5)
+            ticker.cancel()
+            return lease, ticks
+
+        lease, ticks = asyncio.run(run())
+        other.close()
+        assert lease is not None
+        # 等待写锁的约0.5秒内事件循环照常运行
+        assert ticks >= 10
+
+    def test_report_success_writes_only_after_backoff(self, tmp_path):
+        """测试本进程没有遇到过退避时，报告成功不写入共享状态"""
+        path = str(tmp_path / "limiter.db")
+        limiter = SharedRateLimiter(path, backoff=0.01)
+        writes = []
+        limiter._conn().set_trace_callback(writes.append)
+        limiter.report_success()
+        assert not [sql for sql in writes if sql.startswith("UPDATE")]
+
+        SharedRateLimiter(path, backoff=0.01).report_rate_limit()
+        time.sleep(0.02)
+        limiter.release(limiter.acquire(timeout=5))
+        limiter.report_success()
+        assert limiter.snapshot().backoff == 0
+
+
+class TestClientSharedLimiter:
+    """客户端跨进程限流集成测试类"""
+
+    def test_rate_limit_triggers_shared_backoff(self, fake_api, tmp_path):
+        """测试任务限流后写入共享退避，成功后重置"""
+        fake_api.handle = lambda path, body, headers: (
+            (200, {"code": 0, "message": "成功", "data": 1})
+            if path.endswith("/chatCompletion")
+            else (200, {"code": 0, "message": "AI任务处理失败", "answer": "账号达到使用限制"})
+        )
+        shared = SharedRateLimiter(str(tmp_path / "limiter.db"), backoff=0.2)
+
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, shared_limiter=shared
+        ) as client:
+            try:
+                client.chat.completions.create(
+                    messages=[ChatMessage(role="user", content="被限流的问题")]
+                )
+            except RateLimitError:
+                pass
+            snapshot = shared.snapshot()
+
+        assert snapshot.in_flight == 0
+        assert 0 < snapshot.blocked_for <= 0.2 and snapshot.backoff == 0.2
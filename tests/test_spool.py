@@ -0,0 +1,215 @@
+"""
+大答案低内存接收测试
+"""
+import asyncio
+import json
+
+import pytest
+
+from ai_sdk import (
+    AIClient,
+    AnswerBuffer,
+    AsyncAIClient,
+    ChatMessage,
+    InProcessTransport,
+    RequestsTransport,
+    SpooledCompletion,
+    Urllib3Transport,
+)
+from ai_sdk._async_http import AsyncConnectionPool
+from ai_sdk._codec import get_codec
+from ai_sdk._spool import _AnswerDecoder
+from ai_sdk.exceptions import AIAPIError, InvalidRequestError
+
+ANSWER = '量子计算\n"引号" \\u0041 é 😀 tab\t/ end'
+
+
+def _body(answer=ANSWER, ensure_ascii=False, **extra):
+    data = {"code": 0, "message": "AI任务处理完成", "answer": answer, **extra}
+    return json.dumps(data, ensure_ascii=ensure_ascii).encode("utf-8")
+
+
+def _decode(chunks, threshold=None):
+    answer = AnswerBuffer(spool_threshold=threshold)
+    decoder = _AnswerDecoder(answer, get_codec("json"))
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.finish(), answer
+
+
+def _messages(content="你好"):
+    return [ChatMessage(role="user", content=content)]
+
+
+class TestAnswerDecoder:
+    """答案增量解析测试类"""
+
+    @pytest.mark.parametrize("ensure_ascii", [False, True])
+    def test_every_split_point(self, ensure_ascii):
+        """测试响应体在任意位置分块时结果一致（多字节字符、转义、代理对被截断）"""
+        body = _body(ensure_ascii=ensure_ascii, extra={"a": [1, "}"]}, data=None)
+        for split in range(len(body) + 1):
+            fields, answer = _decode([body[:split], body[split:]])
+            assert answer.text() == ANSWER, split
+            assert fields["extra"] == {"a": [1, "}"]} and fields["data"] is None
+            assert fields["answer"] is answer and fields["code"] == 0
+
+    def test_byte_by_byte(self):
+        """测试逐字节输入"""
+        body = _body(ensure_ascii=True)
+        fields, answer = _decode(body[i : i + 1] for i in range(len(body)))
+        assert answer.text() == ANSWER
+        assert fields["message"] == "AI任务处理完成"
+
+    def test_blank_and_missing_answer(self):
+        """测试空白答案与没有答案字段的响应"""
+        _, answer = _decode([_body(answer=" \n\t")])
+        assert answer.blank and answer.size == 3
+
+        fields, answer = _decode([b'{"code":0,"message":"AI\xe4\xbb\xbb\xe5\x8a\xa1"}'])
+        assert "answer" not in fields and answer.size == 0
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            b"<html>502 Bad Gateway</html>",
+            b'{"code":0,"answer":"abc',
+            b'{"code":0,"answer":"\\x41"}',
+            b'{"code":0 "answer":""}',
+        ],
+    )
+    def test_invalid(self, body):
+        """测试无效或不完整的响应抛出 ValueError"""
+        with pytest.raises(ValueError):
+            _decode([body])
+
+
+class TestAnswerBuffer:
+    """答案缓冲区测试类"""
+
+    def test_spool_to_file(self, tmp_path):
+        """测试超过阈值后转存到临时文件，读取方式结果一致"""
+        text = "深度研究报告。" * 5000
+        _, answer = _decode([_body(answer=text)], threshold=4096)
+        assert answer.spooled and answer.size == len(text.encode("utf-8"))
+
+        assert answer.text() == text
+        assert answer.read() == text.encode("utf-8")
+        assert "".join(answer.iter_text(chunk_size=1000)) == text
+        assert bytes(answer.getbuffer()) == text.encode("utf-8")
+        assert answer.save(str(tmp_path / "answer.md")) == answer.size
+        assert (tmp_path / "answer.md").read_text(encoding="utf-8") == text
+        answer.close()
+        assert answer.closed
+
+    def test_in_memory(self):
+        """测试未超过阈值时保存在内存中"""
+        _, answer = _decode([_body()], threshold=1024)
+        assert not answer.spooled
+        assert answer.getbuffer().readonly
+        with answer:
+            assert len(answer) == len(ANSWER.encode("utf-8"))
+
+    def test_to_completion(self):
+        """测试转换为 ChatCompletion"""
+        _, answer = _decode([_body()])
+        result = SpooledCompletion("1000", "yuanbao", 0, answer)
+        completion = result.to_completion()
+        assert completion.id == "1000"
+        assert completion.choices[0].message.content == ANSWER
+
+
+class TestCreateSpooled:
+    """create_spooled() 测试类"""
+
+    @pytest.mark.parametrize("transport_cls", [RequestsTransport, Urllib3Transport])
+    def test_sync_transports(self, fake_api, transport_cls, tmp_path):
+        """测试通过真实网络流式接收答案，未完成的轮询不影响结果"""
+        fake_api.polls_until_done = 3
+        fake_api.answer_for = lambda question: f"{question}的答案：" + "内容" * 20000
+        client = AIClient(
+            api_token="test_token", base_url=fake_api.base_url, transport=transport_cls()
+        )
+        with client:
+            with client.chat.completions.create_spooled(
+                messages=_messages("报告"), spool_threshold=1024, spool_dir=str(tmp_path)
+            ) as result:
+                assert result.answer.spooled
+                assert result.answer.text() == "报告的答案：" + "内容" * 20000
+                assert result.id == "1000" and result.model == "yuanbao"
+            assert result.answer.closed
+            assert fake_api.polls[1000] == 3
+        assert list(tmp_path.iterdir()) == []
+
+    def test_async(self, fake_api):
+        """测试异步客户端流式接收答案"""
+        fake_api.polls_until_done = 2
+
+        async def main():
+            client = AsyncAIClient(api_token="test_token", base_url=fake_api.base_url)
+            async with client:
+                return await client.chat.completions.create_spooled(
+                    messages=_messages("问题"), spool_threshold=None
+                )
+
+        result = asyncio.run(main())
+        assert not result.answer.spooled
+        assert result.answer.text() == "这是回答: 问题"
+        result.close()
+
+    def test_invalid_response(self):
+        """测试无法解析的响应映射为 AIAPIError"""
+
+        def handler(request):
+            if request.url.endswith("/chatCompletion"):
+                return 200, {"code": 0, "message": "成功", "data": 1000}
+            return 200, "<html>维护中</html>"
+
+        client = AIClient(api_token="test_token", transport=InProcessTransport(handler))
+        with client:
+            with pytest.raises(AIAPIError, match="无法解析API响应"):
+                client._post("/chatResult", json={"id": 1000}, answer=AnswerBuffer())
+
+    def test_failed_task(self):
+        """测试任务失败时答案作为错误信息"""
+
+        def handler(request):
+            if request.url.endswith("/chatCompletion"):
+                return 200, {"code": 0, "message": "成功", "data": 1000}
+            return 200, {"code": 0, "message": "AI任务处理失败", "answer": "内容不合规"}
+
+        client = AIClient(api_token="test_token", transport=InProcessTransport(handler))
+        with client:
+            with pytest.raises(InvalidRequestError, match="内容不合规"):
+                client.chat.completions.create_spooled(messages=_messages())
+
+
+class TestAsyncStreamBody:
+    """异步连接池流式读取响应体测试类"""
+
+    @pytest.mark.parametrize("framing", ["content-length", "chunked", "eof"])
+    def test_framing(self, framing):
+        """测试各种响应体分帧方式都按块交给 sink"""
+        body = _body(answer="很长的答案" * 30000)
+        if framing == "content-length":
+            head, payload = f"Content-Length: {len(body)}\r\n", body
+        elif framing == "chunked":
+            head = "Transfer-Encoding: chunked\r\n"
+            parts = [body[i : i + 100000] for i in range(0, len(body), 100000)]
+            payload = b"".join(b"%x\r\n%s\r\n" % (len(p), p) for p in parts) + b"0\r\n\r\n"
+        else:
+            head, payload = "Connection: close\r\n", body
+
+        async def main():
+            reader = asyncio.StreamReader(limit=2**20)
+            reader.feed_data(f"HTTP/1.1 200 OK\r\n{head}\r\n".encode("latin-1") + payload)
+            reader.feed_eof()
+            chunks = []
+            response, reusable = await AsyncConnectionPool._read_response(reader, chunks.append)
+            return response, reusable, chunks
+
+        response, reusable, chunks = asyncio.run(main())
+        assert response.content == b""
+        assert b"".join(chunks) == body
+        assert max(map(len, chunks)) <= 64 * 1024
+        assert reusable == (framing != "eof")
@@ -0,0 +1,91 @@
+"""
+任务状态解析测试
+"""
+import asyncio
+
+import pytest
+
+from ai_sdk import AIAPIError, AIClient, AsyncAIClient, ChatMessage, TaskState
+from ai_sdk._utils import MAX_UNKNOWN_POLLS, parse_task_state
+
+
+class TestParseTaskState:
+    """parse_task_state测试类"""
+
+    def test_states(self):
+        """测试各类响应的状态识别"""
+        assert parse_task_state({"code": 0, "message": "AI任务待处理"}) == TaskState.PENDING
+        assert parse_task_state({"code": 0, "message": "AI任务处理中"}) == TaskState.RUNNING
+        assert (
+            parse_task_state({"code": 0, "message": "AI任务处理完成", "answer": "是"})
+            == TaskState.SUCCEEDED
+        )
+        assert (
+            parse_task_state({"code": 0, "message": "AI任务处理失败", "answer": "违规"})
+            == TaskState.FAILED
+        )
+        assert parse_task_state({"code": 1, "message": "AI任务处理中"}) == TaskState.UNKNOWN
+        assert parse_task_state({"code": 0, "message": "AI任务不存在"}) == TaskState.UNKNOWN
+        # 完成但没有答案视为异常响应
+        assert (
+            parse_task_state({"code": 0, "message": "AI任务处理完成", "answer": " "})
+            == TaskState.UNKNOWN
+        )
+
+
+class TestTaskStateMachine:
+    """基于任务状态的轮询测试类"""
+
+    def test_short_answer_completes_in_one_poll(self, fake_api):
+        """测试短答案不会被反复轮询"""
+        fake_api.answer_for = lambda question: "42"
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            handle = client.chat.completions.submit(
+                messages=[ChatMessage(role="user", content="6乘以7等于几?")]
+            )
+            response = handle.result(timeout=5)
+
+            assert response.choices[0].message.content == "42"
+            assert handle.polls == 1
+            assert handle.poll_counts == {TaskState.SUCCEEDED: 1}
+
+    def test_poll_counts_per_state(self, fake_api):
+        """测试按状态统计每个任务实际需要的轮询次数"""
+        fake_api.polls_until_done = 3
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            handle = client.chat.completions.submit(
+                messages=[ChatMessage(role="user", content="一个需要多次轮询的问题")]
+            )
+            handle.result(timeout=5)
+
+            assert handle.status == TaskState.SUCCEEDED
+            assert handle.poll_counts == {TaskState.RUNNING: 2, TaskState.SUCCEEDED: 1}
+            assert client.tasks.poll_stats() == {TaskState.RUNNING: 2, TaskState.SUCCEEDED: 1}
+
+    def test_unknown_state_stops_polling(self, fake_api):
+        """测试连续无法识别的响应达到上限后停止轮询"""
+        with AIClient(api_token="test_token", base_url=fake_api.base_url) as client:
+            task = client._poller.watch(99999, "yuanbao", interval=0.01)
+            with pytest.raises(AIAPIError, match="无法识别"):
+                task.result(timeout=5)
+
+            assert task.polls == MAX_UNKNOWN_POLLS
+            assert client.tasks.retrieve("99999")["state"] == TaskState.UNKNOWN
+
+    def test_async_short_answer(self, fake_api):
+        """测试异步客户端同样接受短答案"""
+        fake_api.answer_for = lambda question: "是"
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=fake_api.base_url
+            ) as client:
+                return await client.chat.completions.create(
+                    messages=[ChatMessage(role="user", content="地球是圆的吗?")]
+                )
+
+        response = asyncio.run(run())
+        assert response.choices[0].message.content == "是"
+        assert fake_api.polls[int(response.id)] == 1
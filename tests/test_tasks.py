@@ -0,0 +1,84 @@
+"""
+任务查询测试
+"""
+import threading
+import time
+
+from ai_sdk import AIClient, TaskState
+
+
+def _client(fake_api):
+    return AIClient(api_token="test_token", base_url=fake_api.base_url)
+
+
+def _known_tasks(fake_api, ids):
+    for task_id in ids:
+        fake_api.polls[task_id] = 0
+        fake_api._questions[task_id] = f"问题{task_id}"
+
+
+class TestIterRetrieve:
+    """tasks.iter_retrieve / batch_retrieve 测试类"""
+
+    def test_concurrent_with_error_records(self, fake_api):
+        """测试并发查询、每个结果带 id，无效ID记录为错误"""
+        _known_tasks(fake_api, range(1, 41))
+        original = fake_api.handle
+        lock = threading.Lock()
+        running = [0, 0]  # 当前, 峰值
+
+        def handle(path, body, headers):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.02)
+            try:
+                return original(path, body, headers)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        fake_api.handle = handle
+        ids = [str(i) for i in range(1, 41)] + ["not-a-number"]
+
+        with _client(fake_api) as client:
+            started = time.monotonic()
+            results = list(client.tasks.iter_retrieve(ids, concurrency=8))
+            elapsed = time.monotonic() - started
+
+        by_id = {r["id"]: r for r in results}
+        assert set(by_id) == set(ids)
+        assert by_id["7"]["state"] == TaskState.SUCCEEDED
+        assert by_id["7"]["answer"] == "这是回答: 问题7"
+        assert "error" in by_id["not-a-number"]
+        assert running[1] <= 8
+        # 40 次查询各 20ms，串行至少需要 0.8 秒
+        assert elapsed < 0.6
+
+    def test_lazy_input_and_early_stop(self, fake_api):
+        """测试按需读取ID，提前停止时不再查询"""
+        _known_tasks(fake_api, range(1, 11))
+        consumed = []
+
+        def ids():
+            for i in range(1, 1_000_000):
+                consumed.append(i)
+                yield str(i)
+
+        with _client(fake_api) as client:
+            for result in client.tasks.iter_retrieve(ids(), concurrency=4):
+                break
+
+        assert len(consumed) <= 5
+
+    def test_batch_retrieve_keeps_order(self, fake_api):
+        """测试 batch_retrieve 的结果顺序与输入一致"""
+        _known_tasks(fake_api, range(1, 21))
+        ids = [str(i) for i in range(20, 0, -1)] + ["bad"]
+
+        with _client(fake_api) as client:
+            results = client.tasks.batch_retrieve(ids, concurrency=4)
+
+        assert [r["id"] for r in results] == ids
+        assert results[0]["answer"] == "这是回答: 问题20"
+        assert "error" in results[-1]
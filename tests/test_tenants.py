@@ -0,0 +1,174 @@
+"""
+多租户公平调度测试
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_sdk import (
+    AIClient,
+    AsyncAIClient,
+    ChatMessage,
+    InvalidRequestError,
+    RateLimitError,
+    TenantQueueFullError,
+    TenantScheduler,
+)
+from ai_sdk._queue import _Waiter
+from ai_sdk.exceptions import TimeoutError as AITimeoutError
+
+
+def _stats(scheduler):
+    return {s.tenant: s for s in scheduler.stats()}
+
+
+class TestTenantScheduler:
+    """TenantScheduler测试类"""
+
+    def test_weighted_fair_order(self):
+        """测试积压的租户按权重交替出队，先到的大批量任务不会占满"""
+        scheduler = TenantScheduler(max_in_flight=1, weights={"search": 2})
+        first = scheduler.acquire("batch")
+        order = []
+        threads = []
+
+        def run(tenant):
+            ticket = scheduler.acquire(tenant)
+            order.append(tenant)
+            scheduler.release(ticket)
+
+        # batch 先积压 6 个任务，search 之后才到
+        for tenant in ["batch"] * 6 + ["search"] * 4:
+            thread = threading.Thread(target=run, args=(tenant,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.01)
+
+        scheduler.release(first)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # search 的权重是 batch 的两倍，前 6 个出队名额中占 4 个
+        assert order[:6].count("search") == 4
+        assert order.count("batch") == 6
+
+    def test_tenant_limit_isolates_noisy_tenant(self):
+        """测试达到在途上限的租户只能排队，其他租户不受影响"""
+        scheduler = TenantScheduler(max_in_flight=4, tenant_max_in_flight=2)
+        noisy = [scheduler.acquire("batch"), scheduler.acquire("batch")]
+
+        with pytest.raises(AITimeoutError):
+            scheduler.acquire("batch", timeout=0.05)
+        quiet = scheduler.acquire("search", timeout=0.05)
+
+        stats = _stats(scheduler)
+        assert stats["batch"].in_flight == 2 and stats["batch"].rejected == 1
+        assert stats["search"].in_flight == 1 and stats["search"].rejected == 0
+
+        for ticket in noisy + [quiet]:
+            scheduler.release(ticket)
+        stats = _stats(scheduler)
+        assert stats["batch"].completed == 2 and stats["search"].completed == 1
+        assert stats["batch"].throughput > 0 and stats["batch"].mean_latency > 0
+        assert scheduler.in_flight == 0
+
+    def test_queue_full_rejects(self):
+        """测试租户排队已满时直接拒绝并计数"""
+        scheduler = TenantScheduler(max_in_flight=1, max_pending=1)
+        first = scheduler.acquire("batch")
+        waiting = threading.Thread(target=lambda: scheduler.release(scheduler.acquire("batch")))
+        waiting.start()
+        time.sleep(0.02)
+
+        with pytest.raises(TenantQueueFullError) as exc_info:
+            scheduler.acquire("batch")
+        # 本地拒绝不是服务端限流，不会被当作限流重试
+        assert isinstance(exc_info.value, InvalidRequestError)
+        assert not isinstance(exc_info.value, RateLimitError)
+        assert _stats(scheduler)["batch"].rejected == 1
+
+        scheduler.release(first)
+        waiting.join(timeout=5)
+        assert _stats(scheduler)["batch"].completed == 2
+
+    def test_abandoned_ticket_does_not_push_back_tenant(self):
+        """测试排队超时放弃的请求不会推后该租户之后的请求"""
+        scheduler = TenantScheduler(max_in_flight=1)
+        first = scheduler.acquire("a")
+        for _ in range(3):
+            with pytest.raises(AITimeoutError):
+                scheduler.acquire("b", timeout=0.01)
+        assert scheduler._tenants["b"].last_finish == 0.0
+
+        with scheduler._lock:
+            tickets = [scheduler._enqueue(tenant, _Waiter()) for tenant in ("a", "b")]
+        # 放弃的请求没有占用虚拟时间，b 先于 a 的第二个请求出队
+        assert tickets[1].tag < tickets[0].tag
+        scheduler.release(first)
+        assert tickets[1].granted and not tickets[0].granted
+
+    def test_async_cancel_does_not_leak(self):
+        """测试异步调用方取消后不占用许可"""
+        scheduler = TenantScheduler(max_in_flight=1)
+
+        async def run():
+            first = await scheduler.acquire_async("a")
+            waiter = asyncio.ensure_future(scheduler.acquire_async("b"))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            scheduler.release(first)
+            second = await scheduler.acquire_async("b", timeout=1)
+            scheduler.release(second)
+
+        asyncio.run(run())
+        assert scheduler.in_flight == 0 and _stats(scheduler)["b"].pending == 0
+
+
+class TestClientTenants:
+    """客户端按租户调度的测试类"""
+
+    def test_create_with_tenant(self, fake_api):
+        """测试 create/submit 按租户标签计数"""
+        scheduler = TenantScheduler(max_in_flight=4, tenant_max_in_flight=2)
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, tenant_scheduler=scheduler
+        ) as client:
+            client.chat.completions.create(
+                messages=[ChatMessage(role="user", content="搜索团队的问题")], tenant="search"
+            )
+            handles = [
+                client.chat.completions.submit(
+                    messages=[ChatMessage(role="user", content=f"批量任务{i}的内容")],
+                    tenant="batch",
+                )
+                for i in range(5)
+            ]
+            for handle in handles:
+                handle.result(timeout=5)
+
+        stats = _stats(scheduler)
+        assert stats["search"].completed == 1
+        assert stats["batch"].completed == 5 and stats["batch"].in_flight == 0
+
+    def test_async_generate_with_tenant(self, fake_api):
+        """测试 AsyncAIClient.generate 的租户标签"""
+        scheduler = TenantScheduler(max_in_flight=2)
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token",
+                base_url=fake_api.base_url,
+                max_retries=1,
+                tenant_scheduler=scheduler,
+            ) as client:
+                return await asyncio.gather(
+                    *(client.generate("", f"问题{i}的内容", tenant="reports") for i in range(4))
+                )
+
+        texts = asyncio.run(run())
+        assert len(texts) == 4
+        assert _stats(scheduler)["reports"].completed == 4
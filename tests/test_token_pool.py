@@ -0,0 +1,143 @@
+"""
+多Token轮换测试
+"""
+import asyncio
+import time
+
+import pytest
+
+from ai_sdk import AIClient, AsyncAIClient, ChatMessage, RateLimitError, TokenPool
+
+
+class TestTokenPool:
+    """TokenPool测试类"""
+
+    def test_least_loaded(self):
+        """测试优先选择在途任务最少的Token"""
+        pool = TokenPool(["tok-a", "tok-b", "tok-c"])
+        picked = [pool.acquire() for _ in range(6)]
+        assert sorted(picked) == ["tok-a", "tok-a", "tok-b", "tok-b", "tok-c", "tok-c"]
+
+        pool.release("tok-b")
+        pool.release("tok-b")
+        assert pool.acquire() == "tok-b"
+
+    def test_round_robin(self):
+        """测试轮询策略"""
+        pool = TokenPool(["tok-a", "tok-b"], strategy="round_robin")
+        assert [pool.acquire() for _ in range(4)] == ["tok-a", "tok-b", "tok-a", "tok-b"]
+
+    def test_quarantine_and_probe(self):
+        """测试限流隔离、到期后单个探测请求与恢复"""
+        pool = TokenPool(["tok-a", "tok-b"], quarantine=0.05)
+        token = pool.acquire()
+        pool.report_rate_limit(token)
+
+        assert pool.available() == 1
+        assert all(pool.acquire() != token for _ in range(3))
+
+        time.sleep(0.06)
+        other = "tok-b" if token == "tok-a" else "tok-a"
+        for _ in range(3):
+            pool.release(other)
+        assert pool.acquire() == token  # 探测
+        assert pool.snapshot()[pool.tokens.index(token)].state == "probing"
+        pool.release(pool.acquire())
+        assert pool.available() == 1  # 探测进行中，不再分配给该Token
+
+        pool.release(token, success=True)
+        assert pool.snapshot()[pool.tokens.index(token)].state == "active"
+
+    def test_all_quarantined(self):
+        """测试所有Token都被隔离时抛出限流错误"""
+        pool = TokenPool(["tok-a"], quarantine=60)
+        pool.report_rate_limit(pool.acquire())
+        with pytest.raises(RateLimitError):
+            pool.acquire()
+
+
+class TestClientTokenPool:
+    """客户端Token池集成测试类"""
+
+    def test_poll_with_submitting_token_and_failover(self, fake_api):
+        """测试任务用提交它的Token轮询，限流的Token被隔离后换Token重新提交"""
+        fake_api.polls_until_done = 2
+        original = fake_api.handle
+        submitted_by = {}
+        mismatched = []
+
+        def handle(path, body, headers):
+            token = headers.get("x-custom-token")
+            status, payload = original(path, body, headers)
+            if path.endswith("/chatCompletion"):
+                submitted_by[payload["data"]] = token
+            elif submitted_by.get(body["id"]) != token:
+                mismatched.append(body["id"])
+            elif token == "spsw.limited-token":
+                return 200, {"code": 0, "message": "AI任务处理失败", "answer": "账号达到使用限制"}
+            return status, payload
+
+        fake_api.handle = handle
+
+        with AIClient(
+            base_url=fake_api.base_url,
+            api_tokens=["spsw.limited-token", "spsw.healthy-token"],
+            retry_on_rate_limit=True,
+            max_retries=2,
+        ) as client:
+            responses = [
+                client.chat.completions.create(
+                    messages=[ChatMessage(role="user", content=f"第{i}个问题的内容")]
+                )
+                for i in range(4)
+            ]
+            snapshot = {s.token: s for s in client.token_pool.snapshot()}
+
+        assert len(responses) == 4 and not mismatched
+        assert len(fake_api.submissions) == 5
+        # 快照中的Token已脱敏
+        assert snapshot["spsw.lim..."].state == "quarantined"
+        assert snapshot["spsw.hea..."].submitted == 4
+
+    def test_retrieve_with_submitting_token(self, fake_api):
+        """测试 tasks.retrieve / batch_retrieve 用提交任务的Token查询，也可显式指定Token"""
+        original = fake_api.handle
+        submitted_by = {}
+        polled_with = []
+
+        def handle(path, body, headers):
+            token = headers.get("x-custom-token")
+            status, payload = original(path, body, headers)
+            if path.endswith("/chatCompletion"):
+                submitted_by[payload["data"]] = token
+            else:
+                polled_with.append((body["id"], token))
+            return status, payload
+
+        fake_api.handle = handle
+        tokens = ["spsw.first-token", "spsw.second-token"]
+        with AIClient(base_url=fake_api.base_url, api_tokens=tokens) as client:
+            handles = [
+                client.chat.completions.submit(
+                    messages=[ChatMessage(role="user", content=f"第{i}个问题的内容")]
+                )
+                for i in range(4)
+            ]
+            ids = [str(h.task_id) for h in handles]
+            client.tasks.batch_retrieve(ids)
+            client.tasks.retrieve(ids[0], api_token="spsw.other-token")
+
+            async def run():
+                async with AsyncAIClient(base_url=fake_api.base_url, api_tokens=tokens) as aclient:
+                    aclient.token_pool.remember(int(ids[1]), submitted_by[int(ids[1])])
+                    await aclient.tasks.retrieve(ids[1])
+
+            asyncio.run(run())
+
+        assert set(submitted_by.values()) == set(tokens)
+        explicit = [p for p in polled_with if p[1] == "spsw.other-token"]
+        assert explicit == [(int(ids[0]), "spsw.other-token")]
+        # 轮询器与 retrieve 的其他查询都使用提交任务的Token
+        others = [p for p in polled_with if p not in explicit]
+        assert len(others) >= 5
+        assert all(token == submitted_by[task_id] for task_id, token in others)
@@ -0,0 +1,297 @@
+"""
+传输层测试
+"""
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_sdk import (
+    AIClient,
+    APIConnectionError,
+    AsyncAIClient,
+    AuthenticationError,
+    ChatMessage,
+    InProcessTransport,
+    InvalidRequestError,
+    RateLimitError,
+    RequestsTransport,
+    Urllib3Transport,
+)
+from ai_sdk._async_http import AsyncConnectionPool
+from ai_sdk.exceptions import AIAPIError, TimeoutError as AITimeoutError
+
+SYNC_TRANSPORTS = [RequestsTransport, Urllib3Transport]
+
+
+def _messages(content="你好"):
+    return [ChatMessage(role="user", content=content)]
+
+
+def _unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+OK_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 39\r\n\r\n"
+    b'{"code": 0, "message": "ok", "data": 1}'
+)
+# 响应头声明的长度大于实际发送的响应体
+TRUNCATED_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b'Content-Length: 1000\r\n\r\n{"code": 0, "mess'
+)
+# chunk 长度行不是十六进制数
+MALFORMED_CHUNKED_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Transfer-Encoding: chunked\r\n\r\nzz\r\n{}\r\n0\r\n\r\n"
+)
+
+
+def _scripted_server(script):
+    """
+    按顺序回复收到的请求的 keep-alive 服务端
+
+    script 中每一项为 (响应数据, 回复后是否关闭连接)，用完后重复最后一项；
+    返回 (监听socket, 收到的请求列表)
+    """
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    received = []
+
+    def handle(conn):
+        with conn:
+            while True:
+                request = conn.recv(65536)
+                if not request:
+                    return
+                received.append(request)
+                reply, close = script[min(len(received), len(script)) - 1]
+                conn.sendall(reply)
+                if close:
+                    return
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server, received
+
+
+def _fake_handler():
+    """进程内模拟 /chatCompletion 与 /chatResult"""
+    questions = {}
+
+    def handler(request):
+        body = request.json()
+        if request.url.endswith("/chatCompletion"):
+            task_id = 1000 + len(questions)
+            questions[task_id] = body["question"]
+            return 200, {"code": 0, "message": "成功", "data": task_id}
+        return 200, {
+            "code": 0,
+            "message": "AI任务处理完成",
+            "answer": f"这是回答: {questions[body['id']]}",
+        }
+
+    return handler
+
+
+class TestTransports:
+    """同步传输层测试类"""
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_create_over_network(self, fake_api, transport_cls):
+        """测试各传输层完成提交与轮询"""
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, transport=transport_cls()
+        ) as client:
+            response = client.chat.completions.create(messages=_messages("什么是HTTP?"))
+            client.chat.completions.submit(messages=_messages("第二个问题"), priority=3).result(5)
+
+        assert response.choices[0].message.content == "这是回答: 什么是HTTP?"
+        assert fake_api.submissions[1]["priority"] == 3
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_network_errors(self, fake_api, transport_cls):
+        """测试连接失败与超时转换为SDK异常"""
+        with AIClient(
+            api_token="test_token",
+            base_url=f"http://127.0.0.1:{_unused_port()}/api/v1",
+            transport=transport_cls(),
+        ) as client:
+            with pytest.raises(APIConnectionError):
+                client.tasks.retrieve("1")
+
+        original = fake_api.handle
+
+        def slow(path, body, headers):
+            time.sleep(0.5)
+            return original(path, body, headers)
+
+        fake_api.handle = slow
+        with AIClient(
+            api_token="test_token", base_url=fake_api.base_url, timeout=0.1, transport=transport_cls()
+        ) as client:
+            with pytest.raises(AITimeoutError):
+                client.tasks.retrieve("1")
+
+    @pytest.mark.parametrize(
+        "status_code, error",
+        [
+            (401, AuthenticationError),
+            (403, AuthenticationError),
+            (400, InvalidRequestError),
+            (429, RateLimitError),
+            (502, AIAPIError),
+        ],
+    )
+    def test_status_mapping_shared(self, status_code, error):
+        """测试HTTP状态码到SDK异常的映射与传输层无关"""
+        transport = InProcessTransport(lambda request: (status_code, {"message": "error"}))
+        with AIClient(api_token="test_token", transport=transport) as client:
+            with pytest.raises(error):
+                client.tasks.retrieve("1")
+
+        async def run():
+            async with AsyncAIClient(api_token="test_token", transport=transport) as client:
+                await client.tasks.retrieve("1")
+
+        with pytest.raises(error):
+            asyncio.run(run())
+
+    def test_in_process_transport(self):
+        """测试进程内传输层：同步与异步客户端都不经过网络"""
+        handler = _fake_handler()
+        with AIClient(api_token="test_token", transport=InProcessTransport(handler)) as client:
+            response = client.chat.completions.create(messages=_messages("同步问题"))
+        assert response.choices[0].message.content == "这是回答: 同步问题"
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token",
+                model="yuanbao",
+                transport=InProcessTransport(handler),
+                max_retries=1,
+            ) as client:
+                return await client.generate(system="", user="异步问题")
+
+        assert asyncio.run(run()) == "这是回答: 异步问题"
+
+    def test_async_connection_error(self):
+        """测试默认异步传输层的连接错误"""
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=f"http://127.0.0.1:{_unused_port()}/api/v1"
+            ) as client:
+                await client.tasks.retrieve("1")
+
+        with pytest.raises(APIConnectionError):
+            asyncio.run(run())
+
+    @pytest.mark.parametrize("reply", [TRUNCATED_RESPONSE, MALFORMED_CHUNKED_RESPONSE])
+    def test_async_connection_closed_mid_body(self, reply):
+        """测试响应体不完整或 chunk 长度无效时转换为连接错误"""
+        server, _ = _scripted_server([(reply, True)])
+        port = server.getsockname()[1]
+
+        async def run():
+            async with AsyncAIClient(
+                api_token="test_token", base_url=f"http://127.0.0.1:{port}/api/v1"
+            ) as client:
+                await client.tasks.retrieve("1")
+
+        try:
+            with pytest.raises(APIConnectionError):
+                asyncio.run(run())
+        finally:
+            server.close()
+
+    @pytest.mark.parametrize(
+        "second_reply, requests_sent",
+        [
+            # 复用的连接上没有收到任何数据：换新连接重试一次
+            (b"", 3),
+            # 已收到部分响应：不重试，避免重复提交任务
+            (TRUNCATED_RESPONSE, 2),
+        ],
+    )
+    def test_async_pool_retries_only_unanswered_requests(self, second_reply, requests_sent):
+        """测试复用的 keep-alive 连接出错时，只有服务端未返回任何数据才重发请求"""
+        server, received = _scripted_server(
+            [(OK_RESPONSE, False), (second_reply, True), (OK_RESPONSE, False)]
+        )
+        url = f"http://127.0.0.1:{server.getsockname()[1]}/api/v1/chatCompletion"
+
+        async def run():
+            pool = AsyncConnectionPool()
+            try:
+                await pool.send("POST", url, content=b"{}")
+                return await pool.send("POST", url, content=b"{}")
+            finally:
+                await pool.aclose()
+
+        try:
+            if requests_sent == 2:
+                with pytest.raises(asyncio.IncompleteReadError):
+                    asyncio.run(run())
+            else:
+                assert asyncio.run(run()).status_code == 200
+        finally:
+            server.close()
+        assert len(received) == requests_sent
+
+
+class TestThreadSafety:
+    """多线程共用一个客户端的测试类"""
+
+    @pytest.mark.parametrize("transport_cls", SYNC_TRANSPORTS)
+    def test_shared_client_across_threads(self, fake_api, transport_cls):
+        """测试多个线程共用一个客户端时，每个线程得到自己请求的结果"""
+        transport = transport_cls(max_connections=8)
+        with AIClient(api_token="test_token", base_url=fake_api.base_url, transport=transport) as client:
+
+            def ask(i):
+                response = client.chat.completions.create(messages=_messages(f"线程问题{i}"))
+                return response.choices[0].message.content
+
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                answers = list(executor.map(ask, range(200)))
+            stats = client.pool_stats()
+
+        assert answers == [f"这是回答: 线程问题{i}" for i in range(200)]
+        assert stats.connections_opened <= 8
+
+    def test_per_thread_sessions_share_pool(self, fake_api):
+        """测试每个线程使用自己的 Session，共用连接池、Cookie 与 Session 配置"""
+        transport = RequestsTransport()
+        transport.session.headers["X-Trace"] = "shared"
+        sessions = {}
+
+        with AIClient(api_token="test_token", base_url=fake_api.base_url, transport=transport) as client:
+
+            def poll(_):
+                client.tasks.retrieve("1")
+                sessions[threading.get_ident()] = transport._thread_session()
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(poll, range(40)))
+
+        assert len(set(map(id, sessions.values()))) == len(sessions) > 1
+        for session in sessions.values():
+            assert session is not transport.session
+            assert session.adapters is transport.session.adapters
+            assert session.cookies is transport.session.cookies
+            assert session.headers["X-Trace"] == "shared"